@@ -0,0 +1,87 @@
+# Copyright 2025 Emcie Co Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Compares recall@k and queries per second of the IVF index against exact search.
+
+Usage: python scripts/benchmark_vector_index.py [--size N] [--dimensions D] [--queries Q] [--k K]
+"""
+
+import argparse
+import time
+import numpy as np
+from numpy.typing import NDArray
+
+from Daneel.core.persistence.vector_index import IVFIndex, IVFParameters, top_k
+
+
+def make_vectors(
+    rng: np.random.Generator,
+    count: int,
+    dimensions: int,
+    centers: NDArray[np.float64],
+) -> NDArray[np.float32]:
+    # Embeddings of real text are clustered by topic, rather than uniformly spread
+    vectors = centers[rng.integers(0, len(centers), count)] + 0.5 * rng.normal(
+        size=(count, dimensions)
+    )
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=200_000)
+    parser.add_argument("--dimensions", type=int, default=256)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--n-lists", type=int, default=None)
+    parser.add_argument("--n-probes", type=int, nargs="+", default=[1, 4, 8, 16, 32, 64])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    centers = rng.normal(size=(max(1, args.size // 1000), args.dimensions))
+
+    vectors = make_vectors(rng, args.size, args.dimensions, centers)
+    queries = make_vectors(rng, args.queries, args.dimensions, centers)
+    rows = np.arange(args.size)
+
+    t_start = time.perf_counter()
+    exact = [top_k(vectors @ q, args.k) for q in queries]
+    exact_qps = len(queries) / (time.perf_counter() - t_start)
+
+    index = IVFIndex(IVFParameters(n_lists=args.n_lists, min_size=0))
+
+    t_start = time.perf_counter()
+    index.train(vectors, rows)
+    print(
+        f"Trained {index.n_lists} lists over {args.size} x {args.dimensions} vectors "
+        f"in {time.perf_counter() - t_start:.1f}s"
+    )
+
+    print(f"{'search':>12} {'recall@' + str(args.k):>10} {'QPS':>10} {'speedup':>8}")
+    print(f"{'exact':>12} {1.0:>10.3f} {exact_qps:>10.1f} {1.0:>8.1f}")
+
+    for n_probe in args.n_probes:
+        t_start = time.perf_counter()
+        found = [index.search(vectors, q, args.k, n_probe=n_probe)[0] for q in queries]
+        qps = len(queries) / (time.perf_counter() - t_start)
+
+        recall = np.mean([len(set(f) & set(e)) / args.k for f, e in zip(found, exact)])
+
+        print(
+            f"{'n_probe=' + str(n_probe):>12} {recall:>10.3f} {qps:>10.1f} {qps / exact_qps:>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
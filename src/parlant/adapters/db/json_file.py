@@ -13,37 +13,274 @@
 # limitations under the License.
 
 from __future__ import annotations
+import asyncio
 import json
+import os
 from pathlib import Path
-from typing import Any, Awaitable, Callable, Mapping, Optional, Sequence, cast
-from typing_extensions import override, Self
+from typing import Any, Awaitable, Callable, Literal, Mapping, Optional, Sequence, TextIO, cast
+from typing_extensions import override, Self, TypedDict, NotRequired
 import aiofiles
 
 from Daneel.core.persistence.common import (
+    ObjectId,
     Where,
-    matches_filters,
     ensure_is_total,
 )
 from Daneel.core.async_utils import ReaderWriterLock
 from Daneel.core.persistence.document_database import (
     BaseDocument,
+    DeleteManyResult,
     DeleteResult,
     DocumentCollection,
     DocumentDatabase,
+    InsertManyResult,
     InsertResult,
     TDocument,
+    UpdateManyResult,
     UpdateResult,
     identity_loader,
 )
+from Daneel.core.persistence.document_index import DEFAULT_INDEXED_FIELDS, IndexedDocuments
 from Daneel.core.loggers import Logger
 
 
+JournalOperation = Literal["insert", "update", "delete"]
+
+
+class _JournalEntry(TypedDict):
+    op: JournalOperation
+    collection: str
+    id: Optional[ObjectId]
+    document: NotRequired[BaseDocument]
+
+
+class _Journal:
+    """An append-only log of document mutations, written with group-commit fsync.
+
+    Concurrent appends that arrive while a write is in flight are coalesced
+    into the next write, so many writers share a single fsync. A failed write is
+    truncated away, so that it never sits in front of later entries; if even that
+    fails, the journal refuses any further appends.
+    """
+
+    def __init__(
+        self,
+        logger: Logger,
+        file_path: Path,
+    ) -> None:
+        self.file_path = file_path
+        self.size = 0
+
+        self._logger = logger
+        self._file: Optional[TextIO] = None
+        self._pending: list[tuple[str, asyncio.Future[None]]] = []
+        self._commit_task: Optional[asyncio.Task[None]] = None
+        self._commit_lock = asyncio.Lock()
+        self._failure: Optional[Exception] = None
+
+    def replay(self, raw_data: dict[str, Any]) -> int:
+        if not self.file_path.exists():
+            return 0
+
+        tables: dict[str, dict[Any, BaseDocument]] = {}
+        replayed = 0
+        valid_size = 0
+
+        with open(self.file_path, "rb") as file:
+            for line in file:
+                if not line.endswith(b"\n"):
+                    self._logger.warning(
+                        f'Discarding torn trailing entry in journal "{self.file_path}"'
+                    )
+                    break
+
+                try:
+                    entry = cast(_JournalEntry, json.loads(line))
+                except json.JSONDecodeError:
+                    self._logger.warning(
+                        f'Discarding corrupt trailing entry in journal "{self.file_path}"'
+                    )
+                    break
+
+                if entry["collection"] not in tables:
+                    tables[entry["collection"]] = self._index_documents(
+                        raw_data.get(entry["collection"], [])
+                    )
+
+                self._apply(tables[entry["collection"]], entry)
+
+                replayed += 1
+                valid_size += len(line)
+
+        if valid_size < self.file_path.stat().st_size:
+            with open(self.file_path, "r+b") as file:
+                file.truncate(valid_size)
+
+        for name, table in tables.items():
+            raw_data[name] = list(table.values())
+
+        return replayed
+
+    def open(self) -> None:
+        self._file = open(self.file_path, "a", encoding="utf-8")
+        self.size = self.file_path.stat().st_size
+
+    async def close(self) -> None:
+        async with self._commit_lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+
+    def enqueue(self, entries: Sequence[_JournalEntry]) -> asyncio.Future[None]:
+        """Queues entries for the next write, returning a future that completes once they are durable."""
+
+        if self._failure:
+            raise IOError(f'Journal "{self.file_path}" is unusable') from self._failure
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append(
+            ("".join(json.dumps(e, ensure_ascii=False) + "\n" for e in entries), future)
+        )
+
+        if self._commit_task is None or self._commit_task.done():
+            self._commit_task = asyncio.create_task(self._commit())
+
+        return future
+
+    async def rotate(self, capture_snapshot: Callable[[], Callable[[], None]]) -> None:
+        """Folds the journal into a snapshot and drops the entries it covers.
+
+        The snapshot is captured while no journal writes are in flight, but written
+        without holding up new appends; only the entries appended meanwhile are
+        carried over into the rotated journal.
+        """
+        async with self._commit_lock:
+            await self._drain()
+            write_snapshot = capture_snapshot()
+            covered_size = self.size
+
+        await asyncio.to_thread(write_snapshot)
+
+        async with self._commit_lock:
+            await asyncio.to_thread(self._drop_prefix, covered_size)
+
+    async def _commit(self) -> None:
+        async with self._commit_lock:
+            await self._drain()
+
+    async def _drain(self) -> None:
+        while self._pending:
+            batch, self._pending = self._pending, []
+            data = "".join(line for line, _ in batch)
+
+            try:
+                await asyncio.to_thread(self._write, data)
+            except Exception as exc:
+                self._logger.error(f'Failed to write to journal "{self.file_path}": {exc}')
+                await asyncio.to_thread(self._discard_failed_write, exc)
+                self._settle(batch, exc)
+                continue
+
+            self.size += len(data.encode("utf-8"))
+            self._settle(batch)
+
+    def _write(self, data: str) -> None:
+        assert self._file, "Journal is not open"
+
+        self._file.write(data)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def _discard_failed_write(self, exc: Exception) -> None:
+        # Closing drops whatever the failed write left buffered,
+        # and truncating drops whatever part of it reached the file.
+        try:
+            if self._file:
+                self._file.close()
+        except Exception:
+            pass
+
+        try:
+            os.truncate(self.file_path, self.size)
+            self._file = open(self.file_path, "a", encoding="utf-8")
+        except Exception as truncation_exc:
+            self._logger.critical(
+                f'Failed to truncate journal "{self.file_path}"; refusing further writes: {truncation_exc}'
+            )
+            self._file = None
+            self._failure = exc
+
+    def _drop_prefix(self, size: int) -> None:
+        assert self._file, "Journal is not open"
+
+        with open(self.file_path, "rb") as file:
+            file.seek(size)
+            tail = file.read()
+
+        temp_path = self.file_path.with_name(self.file_path.name + ".tmp")
+
+        with open(temp_path, "wb") as file:
+            file.write(tail)
+            file.flush()
+            os.fsync(file.fileno())
+
+        self._file.close()
+        os.replace(temp_path, self.file_path)
+
+        self._file = open(self.file_path, "a", encoding="utf-8")
+        self.size = len(tail)
+
+    def _settle(
+        self,
+        batch: Sequence[tuple[str, asyncio.Future[None]]],
+        exc: Optional[Exception] = None,
+    ) -> None:
+        for _, future in batch:
+            if future.done():
+                continue
+            if exc:
+                future.set_exception(exc)
+            else:
+                future.set_result(None)
+
+    @staticmethod
+    def _index_documents(documents: Sequence[BaseDocument]) -> dict[Any, BaseDocument]:
+        table: dict[Any, BaseDocument] = {}
+
+        for doc in documents:
+            key = doc.get("id")
+            table[key if key is not None and key not in table else object()] = doc
+
+        return table
+
+    @staticmethod
+    def _apply(table: dict[Any, BaseDocument], entry: _JournalEntry) -> None:
+        # Entries are keyed by document ID and applied as last-writer-wins,
+        # so replaying entries that are already folded into the snapshot is harmless.
+        key = entry["id"] if entry["id"] is not None else object()
+
+        if entry["op"] == "delete":
+            table.pop(key, None)
+        else:
+            table[key] = entry["document"]
+
+
 class JSONFileDocumentDatabase(DocumentDatabase):
     def __init__(
         self,
         logger: Logger,
         file_path: Path,
+        journaled: bool = False,
+        compaction_threshold: int = 64 * 1024 * 1024,
+        indexed_fields: Sequence[str] = DEFAULT_INDEXED_FIELDS,
     ) -> None:
+        """When journaled, mutations are appended to a write-ahead log next to the file
+        (instead of rewriting the whole file), and the log is folded back into the file
+        in the background once it grows beyond compaction_threshold bytes.
+
+        Collections keep in-memory hash indexes over indexed_fields, which serve
+        equality lookups on those fields without scanning."""
+
         self.file_path = file_path
 
         self._logger = logger
@@ -57,14 +294,43 @@ class JSONFileDocumentDatabase(DocumentDatabase):
         self._raw_data: dict[str, Any] = {}
         self._collections: dict[str, JSONFileDocumentCollection[BaseDocument]] = {}
 
+        self._journal = (
+            _Journal(logger, file_path.with_name(file_path.name + ".journal"))
+            if journaled
+            else None
+        )
+        self._compaction_threshold = compaction_threshold
+        self._compaction_task: Optional[asyncio.Task[None]] = None
+
+        self._indexed_fields = indexed_fields
+
+    @property
+    def journaled(self) -> bool:
+        return self._journal is not None
+
     async def flush(self) -> None:
         async with self._lock.writer_lock:
             await self._flush_unlocked()
 
+    async def compact(self) -> None:
+        if not self._journal:
+            await self.flush()
+            return
+
+        async with self._lock.writer_lock:
+            await self._compact_unlocked()
+
     async def __aenter__(self) -> Self:
         async with self._lock.reader_lock:
             self._raw_data = await self._load_raw_data()
 
+            if self._journal:
+                if replayed := self._journal.replay(self._raw_data):
+                    self._logger.info(
+                        f'Replayed {replayed} journal entries onto "{self.file_path}"'
+                    )
+                self._journal.open()
+
         return self
 
     async def __aexit__(
@@ -73,10 +339,109 @@ class JSONFileDocumentDatabase(DocumentDatabase):
         exc_value: Optional[BaseException],
         traceback: Optional[object],
     ) -> bool:
+        if self._compaction_task:
+            await asyncio.gather(self._compaction_task, return_exceptions=True)
+
         async with self._lock.writer_lock:
-            await self._flush_unlocked()
+            if self._journal:
+                await self._compact_unlocked()
+                await self._journal.close()
+            else:
+                await self._flush_unlocked()
         return False
 
+    def stage(
+        self,
+        collection_name: str,
+        op: JournalOperation,
+        document: BaseDocument,
+        document_id: Optional[ObjectId] = None,
+    ) -> Awaitable[None]:
+        return self.stage_many(collection_name, op, [document], [document_id])
+
+    def stage_many(
+        self,
+        collection_name: str,
+        op: JournalOperation,
+        documents: Sequence[BaseDocument],
+        document_ids: Optional[Sequence[Optional[ObjectId]]] = None,
+    ) -> Awaitable[None]:
+        """Queues a batch of mutations for a single flush or journal write,
+        returning an awaitable that completes once they are durable.
+
+        Staging itself doesn't wait, so collections can stage mutations in the order
+        they apply them under their lock, and wait for durability after releasing it."""
+
+        if not documents:
+            return asyncio.sleep(0)
+
+        if not self._journal:
+            return self.flush()
+
+        entries = []
+
+        for document, document_id in zip(documents, document_ids or [None] * len(documents)):
+            entry = _JournalEntry(
+                op=op,
+                collection=collection_name,
+                id=document_id if document_id is not None else document.get("id"),
+            )
+
+            if op != "delete":
+                entry["document"] = document
+
+            entries.append(entry)
+
+        return self._await_journal(self._journal.enqueue(entries))
+
+    async def _await_journal(self, durable: asyncio.Future[None]) -> None:
+        assert self._journal
+
+        await asyncio.shield(durable)
+
+        if self._journal.size >= self._compaction_threshold and (
+            self._compaction_task is None or self._compaction_task.done()
+        ):
+            self._compaction_task = asyncio.create_task(self._compact_in_background())
+
+    async def _compact_in_background(self) -> None:
+        try:
+            await self.compact()
+        except Exception as exc:
+            self._logger.error(f'Failed to compact journal of "{self.file_path}": {exc}')
+
+    async def _compact_unlocked(self) -> None:
+        assert self._journal
+
+        def capture_snapshot() -> Callable[[], None]:
+            # Documents are replaced rather than mutated on update,
+            # so shallow copies of the collections make a consistent snapshot.
+            data = {name: c.documents for name, c in self._collections.items()}
+            return lambda: self._write_snapshot(data)
+
+        await self._journal.rotate(capture_snapshot)
+
+    def _write_snapshot(
+        self,
+        data: Mapping[str, Sequence[Mapping[str, Any]]],
+    ) -> None:
+        temp_path = self.file_path.with_name(self.file_path.name + ".tmp")
+
+        with open(temp_path, "w", encoding="utf-8") as file:
+            json.dump(
+                {
+                    **self._raw_data,
+                    **data,
+                },
+                file,
+                ensure_ascii=False,
+                indent=2,
+            )
+            file.flush()
+            os.fsync(file.fileno())
+
+        os.replace(temp_path, self.file_path)
+
     async def _load_raw_data(
         self,
     ) -> dict[str, Any]:
@@ -131,8 +496,7 @@ class JSONFileDocumentDatabase(DocumentDatabase):
                 "failed_migrations", BaseDocument, identity_loader
             )
 
-            for doc in failed_migrations:
-                await failed_migrations_collection.insert_one(doc)
+            await failed_migrations_collection.insert_many(failed_migrations)
 
         return data
 
@@ -148,6 +512,7 @@ class JSONFileDocumentDatabase(DocumentDatabase):
             database=self,
             name=name,
             schema=schema,
+            indexed_fields=self._indexed_fields,
         )
 
         return cast(JSONFileDocumentCollection[TDocument], self._collections[name])
@@ -167,6 +532,7 @@ class JSONFileDocumentDatabase(DocumentDatabase):
                 database=self,
                 name=name,
                 schema=schema,
+                indexed_fields=self._indexed_fields,
                 data=await self.load_documents_with_loader(name, document_loader),
             )
             return cast(JSONFileDocumentCollection[TDocument], self._collections[name])
@@ -188,6 +554,7 @@ class JSONFileDocumentDatabase(DocumentDatabase):
                 database=self,
                 name=name,
                 schema=schema,
+                indexed_fields=self._indexed_fields,
                 data=await self.load_documents_with_loader(name, document_loader),
             )
             return cast(JSONFileDocumentCollection[TDocument], self._collections[name])
@@ -196,6 +563,7 @@ class JSONFileDocumentDatabase(DocumentDatabase):
             database=self,
             name=name,
             schema=schema,
+            indexed_fields=self._indexed_fields,
             data=await self.load_documents_with_loader(name, document_loader),
         )
 
@@ -226,6 +594,7 @@ class JSONFileDocumentCollection(DocumentCollection[TDocument]):
         name: str,
         schema: type[TDocument],
         data: Sequence[TDocument] | None = None,
+        indexed_fields: Sequence[str] = (),
     ) -> None:
         self._database = database
         self._name = name
@@ -234,22 +603,19 @@ class JSONFileDocumentCollection(DocumentCollection[TDocument]):
 
         self._lock = ReaderWriterLock()
 
-        self.documents = list(data) if data else []
+        self._documents = IndexedDocuments(data or [], indexed_fields)
+
+    @property
+    def documents(self) -> list[TDocument]:
+        return list(self._documents)
 
     @override
     async def find(
         self,
         filters: Where,
     ) -> Sequence[TDocument]:
-        result = []
         async with self._lock.reader_lock:
-            for doc in filter(
-                lambda d: matches_filters(filters, d),
-                self.documents,
-            ):
-                result.append(doc)
-
-        return result
+            return [doc for _, doc in self._documents.find(filters)]
 
     @override
     async def find_one(
@@ -257,25 +623,54 @@ class JSONFileDocumentCollection(DocumentCollection[TDocument]):
         filters: Where,
     ) -> Optional[TDocument]:
         async with self._lock.reader_lock:
-            for doc in self.documents:
-                if matches_filters(filters, doc):
-                    return doc
+            if match := self._documents.find_first(filters):
+                return match[1]
 
         return None
 
+    async def _await_durability(
+        self,
+        durable: Awaitable[None],
+        rollback: Callable[[], None],
+    ) -> None:
+        # Waiting outside the lock lets concurrent writes share a journal commit,
+        # and keeps readers from waiting behind the fsync.
+        try:
+            await durable
+        except Exception:
+            async with self._lock.writer_lock:
+                rollback()
+            raise
+
     @override
     async def insert_one(
         self,
         document: TDocument,
     ) -> InsertResult:
-        ensure_is_total(document, self._schema)
+        await self.insert_many([document])
+
+        return InsertResult(acknowledged=True)
+
+    @override
+    async def insert_many(
+        self,
+        documents: Sequence[TDocument],
+    ) -> InsertManyResult:
+        for document in documents:
+            ensure_is_total(document, self._schema)
 
         async with self._lock.writer_lock:
-            self.documents.append(document)
+            durable = self._database.stage_many(self._name, "insert", documents)
+            keys = [self._documents.append(document) for document in documents]
 
-        await self._database.flush()
+        def rollback() -> None:
+            for key, document in zip(keys, documents):
+                if key in self._documents and self._documents.get(key) is document:
+                    self._documents.remove(key)
 
-        return InsertResult(acknowledged=True)
+        await self._await_durability(durable, rollback)
+
+        return InsertManyResult(acknowledged=True, inserted_count=len(documents))
 
     @override
     async def update_one(
@@ -284,19 +679,30 @@ class JSONFileDocumentCollection(DocumentCollection[TDocument]):
         params: TDocument,
         upsert: bool = False,
     ) -> UpdateResult[TDocument]:
+        durable: Optional[Awaitable[None]] = None
+
         async with self._lock.writer_lock:
-            for i, d in enumerate(self.documents):
-                if matches_filters(filters, d):
-                    self.documents[i] = cast(TDocument, {**self.documents[i], **params})
+            if match := self._documents.find_first(filters):
+                key, d = match
+                updated_document = cast(TDocument, {**d, **params})
 
-                    await self._database.flush()
+                durable = self._database.stage(
+                    self._name, "update", updated_document, document_id=d.get("id")
+                )
+                self._documents.replace(key, updated_document)
 
-                    return UpdateResult(
-                        acknowledged=True,
-                        matched_count=1,
-                        modified_count=1,
-                        updated_document=self.documents[i],
-                    )
+        if durable:
+            await self._await_durability(
+                durable,
+                lambda: self._revert_updates([(key, d, updated_document)]),
+            )
+
+            return UpdateResult(
+                acknowledged=True,
+                matched_count=1,
+                modified_count=1,
+                updated_document=updated_document,
+            )
 
         if upsert:
             await self.insert_one(params)
@@ -315,24 +721,89 @@ class JSONFileDocumentCollection(DocumentCollection[TDocument]):
             updated_document=None,
         )
 
+    @override
+    async def update_many(
+        self,
+        filters: Where,
+        params: TDocument,
+        upsert: bool = False,
+    ) -> UpdateManyResult:
+        async with self._lock.writer_lock:
+            matches = self._documents.find(filters)
+            updates = [(key, d, cast(TDocument, {**d, **params})) for key, d in matches]
+
+            durable = self._database.stage_many(
+                self._name,
+                "update",
+                [updated_document for _, _, updated_document in updates],
+                document_ids=[d.get("id") for _, d in matches],
+            )
+
+            for key, _, updated_document in updates:
+                self._documents.replace(key, updated_document)
+
+        await self._await_durability(durable, lambda: self._revert_updates(updates))
+
+        if not matches and upsert:
+            await self.insert_one(params)
+
+        return UpdateManyResult(
+            acknowledged=True,
+            matched_count=len(matches),
+            modified_count=len(matches),
+        )
+
+    def _revert_updates(self, updates: Sequence[tuple[int, TDocument, TDocument]]) -> None:
+        for key, original_document, updated_document in updates:
+            # Documents that changed again since are left to the later write
+            if key in self._documents and self._documents.get(key) is updated_document:
+                self._documents.replace(key, original_document)
+
     @override
     async def delete_one(
         self,
         filters: Where,
     ) -> DeleteResult[TDocument]:
+        durable: Optional[Awaitable[None]] = None
+
         async with self._lock.writer_lock:
-            for i, d in enumerate(self.documents):
-                if matches_filters(filters, d):
-                    document = self.documents.pop(i)
+            if match := self._documents.find_first(filters):
+                key, document = match
+                durable = self._database.stage(self._name, "delete", document)
+                self._documents.remove(key)
+
+        if durable:
+            await self._await_durability(
+                durable,
+                lambda: self._revert_deletions([(key, document)]),
+            )
 
-                    await self._database.flush()
-
-                    return DeleteResult(
-                        deleted_count=1, acknowledged=True, deleted_document=document
-                    )
+            return DeleteResult(deleted_count=1, acknowledged=True, deleted_document=document)
 
         return DeleteResult(
             acknowledged=True,
             deleted_count=0,
             deleted_document=None,
         )
+
+    @override
+    async def delete_many(
+        self,
+        filters: Where,
+    ) -> DeleteManyResult:
+        async with self._lock.writer_lock:
+            matches = self._documents.find(filters)
+            durable = self._database.stage_many(
+                self._name, "delete", [document for _, document in matches]
+            )
+
+            for key, _ in matches:
+                self._documents.remove(key)
+
+        await self._await_durability(durable, lambda: self._revert_deletions(matches))
+
+        return DeleteManyResult(acknowledged=True, deleted_count=len(matches))
+
+    def _revert_deletions(self, deletions: Sequence[tuple[int, TDocument]]) -> None:
+        for key, document in deletions:
+            self._documents.restore(key, document)
@@ -19,11 +19,14 @@ from Daneel.core.loggers import Logger
 from Daneel.core.persistence.common import Where
 from Daneel.core.persistence.document_database import (
     BaseDocument,
+    DeleteManyResult,
     DeleteResult,
     DocumentCollection,
     DocumentDatabase,
+    InsertManyResult,
     InsertResult,
     TDocument,
+    UpdateManyResult,
     UpdateResult,
 )
 from pymongo import AsyncMongoClient
@@ -173,6 +176,16 @@ class MongoDocumentCollection(DocumentCollection[TDocument]):
         insert_result = await self._collection.insert_one(document)
         return InsertResult(acknowledged=insert_result.acknowledged)
 
+    async def insert_many(self, documents: Sequence[TDocument]) -> InsertManyResult:
+        if not documents:
+            return InsertManyResult(acknowledged=True, inserted_count=0)
+
+        insert_result = await self._collection.insert_many(documents)
+        return InsertManyResult(
+            acknowledged=insert_result.acknowledged,
+            inserted_count=len(insert_result.inserted_ids),
+        )
+
     async def update_one(
         self,
         filters: Where,
@@ -188,6 +201,19 @@ class MongoDocumentCollection(DocumentCollection[TDocument]):
             result_document,
         )
 
+    async def update_many(
+        self,
+        filters: Where,
+        params: TDocument,
+        upsert: bool = False,
+    ) -> UpdateManyResult:
+        update_result = await self._collection.update_many(filters, {"$set": params}, upsert)
+        return UpdateManyResult(
+            update_result.acknowledged,
+            update_result.matched_count,
+            update_result.modified_count,
+        )
+
     async def delete_one(self, filters: Where) -> DeleteResult[TDocument]:
         result_document = await self._collection.find_one(filters)
         if result_document is None:
@@ -199,3 +225,10 @@ class MongoDocumentCollection(DocumentCollection[TDocument]):
             deleted_count=delete_result.deleted_count,
             deleted_document=result_document,
         )
+
+    async def delete_many(self, filters: Where) -> DeleteManyResult:
+        delete_result = await self._collection.delete_many(filters)
+        return DeleteManyResult(
+            delete_result.acknowledged,
+            deleted_count=delete_result.deleted_count,
+        )
@@ -0,0 +1,695 @@
+# Copyright 2025 Emcie Co Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+from array import array
+import asyncio
+import json
+from pathlib import Path
+import re
+import sqlite3
+from typing import Any, Awaitable, Callable, Mapping, Optional, Sequence, cast
+from typing_extensions import override, Self
+
+from Daneel.core.loggers import Logger
+from Daneel.core.nlp.embedding import EmbeddingStore
+from Daneel.core.persistence.common import (
+    LiteralValue,
+    LogicalOperator,
+    Where,
+    WhereExpression,
+    ensure_is_total,
+)
+from Daneel.core.persistence.document_database import (
+    BaseDocument,
+    DeleteManyResult,
+    DeleteResult,
+    DocumentCollection,
+    DocumentDatabase,
+    InsertManyResult,
+    InsertResult,
+    TDocument,
+    UpdateManyResult,
+    UpdateResult,
+    identity_loader,
+)
+from Daneel.core.persistence.document_index import DEFAULT_INDEXED_FIELDS
+
+
+_IDENTIFIER_PATTERN = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+_COMPARISON_OPERATORS = {
+    "$eq": "=",
+    "$ne": "IS NOT",
+    "$gt": ">",
+    "$gte": ">=",
+    "$lt": "<",
+    "$lte": "<=",
+}
+
+
+def _ensure_identifier(name: str) -> str:
+    if not _IDENTIFIER_PATTERN.match(name):
+        raise ValueError(f'"{name}" is not a valid SQLite collection or field name')
+    return name
+
+
+def _field_expression(field_name: str) -> str:
+    # The expression must stay textually identical to the one used when declaring
+    # indexes, otherwise SQLite won't match the query against the expression index.
+    return f"json_extract(data, '$.{_ensure_identifier(field_name)}')"
+
+
+def translate_where(where: Where) -> tuple[str, list[LiteralValue]]:
+    """Translates a Where filter into an SQL condition over the JSON `data` column."""
+
+    if not where:
+        return "1", []
+
+    if next(iter(where.keys())) in ("$and", "$or"):
+        clauses: list[str] = []
+        params: list[LiteralValue] = []
+
+        for operator, operands in cast(LogicalOperator, where).items():
+            sub_clauses = []
+
+            for sub_filter in cast(list[Where], operands):
+                sub_clause, sub_params = translate_where(sub_filter)
+                sub_clauses.append(f"({sub_clause})")
+                params.extend(sub_params)
+
+            if operator == "$and":
+                clauses.append(" AND ".join(sub_clauses) if sub_clauses else "1")
+            else:
+                clauses.append(" OR ".join(sub_clauses) if sub_clauses else "0")
+
+        return " AND ".join(f"({c})" for c in clauses), params
+
+    clauses = []
+    params = []
+
+    for field_name, field_filter in cast(WhereExpression, where).items():
+        field = _field_expression(field_name)
+
+        for operator, filter_value in field_filter.items():
+            if operator in ("$in", "$nin"):
+                values = cast(list[LiteralValue], filter_value)
+
+                if not values:
+                    clauses.append("0" if operator == "$in" else "1")
+                    continue
+
+                placeholders = ", ".join("?" for _ in values)
+
+                if operator == "$in":
+                    clauses.append(f"{field} IN ({placeholders})")
+                else:
+                    clauses.append(f"({field} IS NULL OR {field} NOT IN ({placeholders}))")
+
+                params.extend(values)
+            elif operator in _COMPARISON_OPERATORS:
+                clauses.append(f"{field} {_COMPARISON_OPERATORS[operator]} ?")
+                params.append(cast(LiteralValue, filter_value))
+            else:
+                raise ValueError(f'Unsupported filter operator "{operator}"')
+
+    return " AND ".join(clauses) if clauses else "1", params
+
+
+class SQLiteDocumentDatabase(DocumentDatabase):
+    def __init__(
+        self,
+        logger: Logger,
+        file_path: Path,
+        indexed_fields: Sequence[str] = DEFAULT_INDEXED_FIELDS,
+    ) -> None:
+        self.file_path = file_path
+
+        self._logger = logger
+        self._indexed_fields = [_ensure_identifier(f) for f in indexed_fields]
+
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = asyncio.Lock()
+
+        self._collections: dict[str, SQLiteDocumentCollection[BaseDocument]] = {}
+
+    async def __aenter__(self) -> Self:
+        def connect() -> sqlite3.Connection:
+            connection = sqlite3.connect(self.file_path, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            return connection
+
+        self._connection = await asyncio.to_thread(connect)
+
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: Optional[type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[object],
+    ) -> bool:
+        if self._connection:
+            async with self._lock:
+                await asyncio.to_thread(self._connection.close)
+            self._connection = None
+
+        return False
+
+    async def execute(
+        self,
+        operation: Callable[[sqlite3.Connection], Any],
+    ) -> Any:
+        if self._connection is None:
+            raise Exception("underlying database missing.")
+
+        connection = self._connection
+
+        async with self._lock:
+            return await asyncio.to_thread(operation, connection)
+
+    async def _table_exists(self, name: str) -> bool:
+        def query(connection: sqlite3.Connection) -> bool:
+            return (
+                connection.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                    (name,),
+                ).fetchone()
+                is not None
+            )
+
+        return cast(bool, await self.execute(query))
+
+    async def _create_table(self, name: str) -> None:
+        table = _ensure_identifier(name)
+
+        def create(connection: sqlite3.Connection) -> None:
+            with connection:
+                connection.execute(
+                    f'CREATE TABLE IF NOT EXISTS "{table}" '
+                    "(seq INTEGER PRIMARY KEY AUTOINCREMENT, data TEXT NOT NULL)"
+                )
+
+                for field in self._indexed_fields:
+                    connection.execute(
+                        f'CREATE INDEX IF NOT EXISTS "{table}__{field}" '
+                        f'ON "{table}" ({_field_expression(field)})'
+                    )
+
+        await self.execute(create)
+
+    async def _load_documents_with_loader(
+        self,
+        collection: SQLiteDocumentCollection[TDocument],
+        document_loader: Callable[[BaseDocument], Awaitable[Optional[TDocument]]],
+    ) -> None:
+        failed_migrations: list[BaseDocument] = []
+
+        for seq, doc in await collection.rows():
+            try:
+                if loaded_doc := await document_loader(doc):
+                    if loaded_doc != doc:
+                        await collection.replace(seq, loaded_doc)
+                    continue
+
+                self._logger.warning(f'Failed to load document "{doc}"')
+            except Exception as e:
+                self._logger.error(
+                    f"Failed to load document '{doc}' with error: {e}. Added to failed migrations collection."
+                )
+
+            failed_migrations.append(doc)
+            await collection.remove(seq)
+
+        if failed_migrations:
+            failed_migrations_collection = await self.get_or_create_collection(
+                "failed_migrations", BaseDocument, identity_loader
+            )
+
+            await failed_migrations_collection.insert_many(failed_migrations)
+
+    @override
+    async def create_collection(
+        self,
+        name: str,
+        schema: type[TDocument],
+    ) -> SQLiteDocumentCollection[TDocument]:
+        self._logger.debug(f'Create collection "{name}"')
+
+        await self._create_table(name)
+
+        self._collections[name] = SQLiteDocumentCollection(
+            database=self,
+            name=name,
+            schema=schema,
+        )
+
+        return cast(SQLiteDocumentCollection[TDocument], self._collections[name])
+
+    @override
+    async def get_collection(
+        self,
+        name: str,
+        schema: type[TDocument],
+        document_loader: Callable[[BaseDocument], Awaitable[Optional[TDocument]]],
+    ) -> SQLiteDocumentCollection[TDocument]:
+        if collection := self._collections.get(name):
+            return cast(SQLiteDocumentCollection[TDocument], collection)
+
+        elif await self._table_exists(_ensure_identifier(name)):
+            # Make sure indexes declared after the table was created are in place
+            await self._create_table(name)
+
+            new_collection = SQLiteDocumentCollection(
+                database=self,
+                name=name,
+                schema=schema,
+            )
+
+            await self._load_documents_with_loader(new_collection, document_loader)
+
+            self._collections[name] = cast(SQLiteDocumentCollection[BaseDocument], new_collection)
+            return new_collection
+
+        raise ValueError(f'Collection "{name}" does not exists')
+
+    @override
+    async def get_or_create_collection(
+        self,
+        name: str,
+        schema: type[TDocument],
+        document_loader: Callable[[BaseDocument], Awaitable[Optional[TDocument]]],
+    ) -> SQLiteDocumentCollection[TDocument]:
+        if await self._table_exists(_ensure_identifier(name)):
+            return await self.get_collection(name, schema, document_loader)
+
+        return await self.create_collection(name, schema)
+
+    @override
+    async def delete_collection(
+        self,
+        name: str,
+    ) -> None:
+        if not await self._table_exists(_ensure_identifier(name)):
+            raise ValueError(f'Collection "{name}" does not exists')
+
+        def drop(connection: sqlite3.Connection) -> None:
+            with connection:
+                connection.execute(f'DROP TABLE "{name}"')
+
+        await self.execute(drop)
+
+        self._collections.pop(name, None)
+
+
+class SQLiteDocumentCollection(DocumentCollection[TDocument]):
+    def __init__(
+        self,
+        database: SQLiteDocumentDatabase,
+        name: str,
+        schema: type[TDocument],
+    ) -> None:
+        self._database = database
+        self._name = _ensure_identifier(name)
+        self._schema = schema
+
+    async def rows(self) -> Sequence[tuple[int, TDocument]]:
+        def query(connection: sqlite3.Connection) -> list[tuple[int, TDocument]]:
+            return [
+                (seq, cast(TDocument, json.loads(data)))
+                for seq, data in connection.execute(
+                    f'SELECT seq, data FROM "{self._name}" ORDER BY seq'
+                )
+            ]
+
+        return cast(Sequence[tuple[int, TDocument]], await self._database.execute(query))
+
+    async def replace(self, seq: int, document: TDocument) -> None:
+        def update(connection: sqlite3.Connection) -> None:
+            with connection:
+                connection.execute(
+                    f'UPDATE "{self._name}" SET data = ? WHERE seq = ?',
+                    (json.dumps(document, ensure_ascii=False), seq),
+                )
+
+        await self._database.execute(update)
+
+    async def remove(self, seq: int) -> None:
+        def delete(connection: sqlite3.Connection) -> None:
+            with connection:
+                connection.execute(f'DELETE FROM "{self._name}" WHERE seq = ?', (seq,))
+
+        await self._database.execute(delete)
+
+    def _select_first(
+        self,
+        connection: sqlite3.Connection,
+        filters: Where,
+    ) -> Optional[tuple[int, TDocument]]:
+        condition, params = translate_where(filters)
+
+        row = connection.execute(
+            f'SELECT seq, data FROM "{self._name}" WHERE {condition} ORDER BY seq LIMIT 1',
+            params,
+        ).fetchone()
+
+        return (row[0], cast(TDocument, json.loads(row[1]))) if row else None
+
+    @override
+    async def find(
+        self,
+        filters: Where,
+    ) -> Sequence[TDocument]:
+        condition, params = translate_where(filters)
+
+        def query(connection: sqlite3.Connection) -> list[TDocument]:
+            return [
+                cast(TDocument, json.loads(data))
+                for (data,) in connection.execute(
+                    f'SELECT data FROM "{self._name}" WHERE {condition} ORDER BY seq',
+                    params,
+                )
+            ]
+
+        return cast(Sequence[TDocument], await self._database.execute(query))
+
+    @override
+    async def find_one(
+        self,
+        filters: Where,
+    ) -> Optional[TDocument]:
+        def query(connection: sqlite3.Connection) -> Optional[TDocument]:
+            if row := self._select_first(connection, filters):
+                return row[1]
+            return None
+
+        return cast(Optional[TDocument], await self._database.execute(query))
+
+    @override
+    async def insert_one(
+        self,
+        document: TDocument,
+    ) -> InsertResult:
+        ensure_is_total(document, self._schema)
+
+        def insert(connection: sqlite3.Connection) -> None:
+            with connection:
+                connection.execute(
+                    f'INSERT INTO "{self._name}" (data) VALUES (?)',
+                    (json.dumps(document, ensure_ascii=False),),
+                )
+
+        await self._database.execute(insert)
+
+        return InsertResult(acknowledged=True)
+
+    @override
+    async def insert_many(
+        self,
+        documents: Sequence[TDocument],
+    ) -> InsertManyResult:
+        for document in documents:
+            ensure_is_total(document, self._schema)
+
+        def insert(connection: sqlite3.Connection) -> None:
+            with connection:
+                connection.executemany(
+                    f'INSERT INTO "{self._name}" (data) VALUES (?)',
+                    [(json.dumps(d, ensure_ascii=False),) for d in documents],
+                )
+
+        await self._database.execute(insert)
+
+        return InsertManyResult(acknowledged=True, inserted_count=len(documents))
+
+    @override
+    async def update_one(
+        self,
+        filters: Where,
+        params: TDocument,
+        upsert: bool = False,
+    ) -> UpdateResult[TDocument]:
+        def update(connection: sqlite3.Connection) -> Optional[TDocument]:
+            with connection:
+                if row := self._select_first(connection, filters):
+                    seq, document = row
+                    updated_document = cast(TDocument, {**document, **params})
+
+                    connection.execute(
+                        f'UPDATE "{self._name}" SET data = ? WHERE seq = ?',
+                        (json.dumps(updated_document, ensure_ascii=False), seq),
+                    )
+
+                    return updated_document
+
+                if upsert:
+                    ensure_is_total(params, self._schema)
+
+                    connection.execute(
+                        f'INSERT INTO "{self._name}" (data) VALUES (?)',
+                        (json.dumps(params, ensure_ascii=False),),
+                    )
+
+                return None
+
+        if updated_document := await self._database.execute(update):
+            return UpdateResult(
+                acknowledged=True,
+                matched_count=1,
+                modified_count=1,
+                updated_document=cast(TDocument, updated_document),
+            )
+
+        return UpdateResult(
+            acknowledged=True,
+            matched_count=0,
+            modified_count=0,
+            updated_document=params if upsert else None,
+        )
+
+    @override
+    async def update_many(
+        self,
+        filters: Where,
+        params: TDocument,
+        upsert: bool = False,
+    ) -> UpdateManyResult:
+        condition, condition_params = translate_where(filters)
+
+        def update(connection: sqlite3.Connection) -> int:
+            with connection:
+                rows = connection.execute(
+                    f'SELECT seq, data FROM "{self._name}" WHERE {condition}',
+                    condition_params,
+                ).fetchall()
+
+                connection.executemany(
+                    f'UPDATE "{self._name}" SET data = ? WHERE seq = ?',
+                    [
+                        (json.dumps({**json.loads(data), **params}, ensure_ascii=False), seq)
+                        for seq, data in rows
+                    ],
+                )
+
+                if not rows and upsert:
+                    ensure_is_total(params, self._schema)
+
+                    connection.execute(
+                        f'INSERT INTO "{self._name}" (data) VALUES (?)',
+                        (json.dumps(params, ensure_ascii=False),),
+                    )
+
+                return len(rows)
+
+        matched_count = cast(int, await self._database.execute(update))
+
+        return UpdateManyResult(
+            acknowledged=True,
+            matched_count=matched_count,
+            modified_count=matched_count,
+        )
+
+    @override
+    async def delete_one(
+        self,
+        filters: Where,
+    ) -> DeleteResult[TDocument]:
+        def delete(connection: sqlite3.Connection) -> Optional[TDocument]:
+            with connection:
+                if row := self._select_first(connection, filters):
+                    seq, document = row
+                    connection.execute(f'DELETE FROM "{self._name}" WHERE seq = ?', (seq,))
+                    return document
+
+                return None
+
+        if document := await self._database.execute(delete):
+            return DeleteResult(
+                acknowledged=True,
+                deleted_count=1,
+                deleted_document=cast(TDocument, document),
+            )
+
+        return DeleteResult(
+            acknowledged=True,
+            deleted_count=0,
+            deleted_document=None,
+        )
+
+    @override
+    async def delete_many(
+        self,
+        filters: Where,
+    ) -> DeleteManyResult:
+        condition, params = translate_where(filters)
+
+        def delete(connection: sqlite3.Connection) -> int:
+            with connection:
+                return connection.execute(
+                    f'DELETE FROM "{self._name}" WHERE {condition}',
+                    params,
+                ).rowcount
+
+        return DeleteManyResult(
+            acknowledged=True,
+            deleted_count=cast(int, await self._database.execute(delete)),
+        )
+
+
+class SQLiteEmbeddingStore(EmbeddingStore):
+    """Keeps embeddings as packed float32 blobs, evicting the least recently used ones.
+
+    Unlike a document collection, nothing is held in memory beyond the
+    connection, and the file stops growing once `max_entries` is reached.
+    """
+
+    _MAX_KEYS_PER_QUERY = 500
+
+    def __init__(
+        self,
+        file_path: Path,
+        max_entries: int = 100_000,
+    ) -> None:
+        self.file_path = file_path
+        self.max_entries = max_entries
+
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = asyncio.Lock()
+        self._size = 0
+        self._clock = 0
+
+    async def __aenter__(self) -> Self:
+        def connect() -> tuple[sqlite3.Connection, int, int]:
+            connection = sqlite3.connect(self.file_path, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+
+            with connection:
+                connection.execute(
+                    "CREATE TABLE IF NOT EXISTS embeddings "
+                    "(key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_used INTEGER NOT NULL)"
+                )
+                connection.execute(
+                    "CREATE INDEX IF NOT EXISTS embeddings__last_used ON embeddings (last_used)"
+                )
+
+            size, clock = connection.execute(
+                "SELECT COUNT(*), COALESCE(MAX(last_used), 0) FROM embeddings"
+            ).fetchone()
+
+            return connection, size, clock
+
+        self._connection, self._size, self._clock = await asyncio.to_thread(connect)
+
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: Optional[type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[object],
+    ) -> bool:
+        if self._connection:
+            async with self._lock:
+                await asyncio.to_thread(self._connection.close)
+            self._connection = None
+
+        return False
+
+    async def _execute(self, operation: Callable[[sqlite3.Connection], Any]) -> Any:
+        if self._connection is None:
+            raise Exception("underlying database missing.")
+
+        connection = self._connection
+
+        async with self._lock:
+            return await asyncio.to_thread(operation, connection)
+
+    def _tick(self) -> int:
+        # A logical clock orders uses reliably, unlike wall-clock timestamps
+        self._clock += 1
+        return self._clock
+
+    @override
+    async def get_many(self, keys: Sequence[str]) -> Mapping[str, Sequence[float]]:
+        def query(connection: sqlite3.Connection) -> dict[str, Sequence[float]]:
+            vectors: dict[str, Sequence[float]] = {}
+            last_used = self._tick()
+
+            with connection:
+                for i in range(0, len(keys), self._MAX_KEYS_PER_QUERY):
+                    chunk = keys[i : i + self._MAX_KEYS_PER_QUERY]
+                    placeholders = ", ".join("?" for _ in chunk)
+
+                    for key, blob in connection.execute(
+                        f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                        chunk,
+                    ):
+                        vectors[key] = array("f", blob).tolist()
+
+                # Mark the hits as recently used, so that eviction spares them
+                connection.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                    [(last_used, key) for key in vectors],
+                )
+
+            return vectors
+
+        return cast(dict[str, Sequence[float]], await self._execute(query))
+
+    @override
+    async def set_many(self, vectors: Mapping[str, Sequence[float]]) -> None:
+        def write(connection: sqlite3.Connection) -> None:
+            last_used = self._tick()
+
+            with connection:
+                inserted = connection.executemany(
+                    "INSERT OR IGNORE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+                    [
+                        (key, array("f", vector).tobytes(), last_used)
+                        for key, vector in vectors.items()
+                    ],
+                ).rowcount
+
+                self._size += inserted
+
+                if (excess := self._size - self.max_entries) > 0:
+                    self._size -= connection.execute(
+                        "DELETE FROM embeddings WHERE key IN "
+                        "(SELECT key FROM embeddings ORDER BY last_used LIMIT ?)",
+                        (excess,),
+                    ).rowcount
+
+        await self._execute(write)
@@ -17,20 +17,25 @@ from typing import Awaitable, Callable, Optional, Sequence, cast
 from typing_extensions import override
 from typing_extensions import get_type_hints
 
-from Daneel.core.persistence.common import matches_filters, Where, ObjectId, ensure_is_total
+from Daneel.core.persistence.common import Where, ObjectId, ensure_is_total
 from Daneel.core.persistence.document_database import (
     BaseDocument,
+    DeleteManyResult,
     DeleteResult,
     DocumentCollection,
     DocumentDatabase,
+    InsertManyResult,
     InsertResult,
     TDocument,
+    UpdateManyResult,
     UpdateResult,
 )
+from Daneel.core.persistence.document_index import DEFAULT_INDEXED_FIELDS, IndexedDocuments
 
 
 class TransientDocumentDatabase(DocumentDatabase):
-    def __init__(self) -> None:
+    def __init__(self, indexed_fields: Sequence[str] = DEFAULT_INDEXED_FIELDS) -> None:
+        self._indexed_fields = indexed_fields
         self._collections: dict[str, TransientDocumentCollection[BaseDocument]] = {}
 
     @override
@@ -45,6 +50,7 @@ class TransientDocumentDatabase(DocumentDatabase):
         self._collections[name] = TransientDocumentCollection(
             name=name,
             schema=schema,
+            indexed_fields=self._indexed_fields,
         )
 
         return cast(TransientDocumentCollection[TDocument], self._collections[name])
@@ -95,33 +101,26 @@ class TransientDocumentCollection(DocumentCollection[TDocument]):
         name: str,
         schema: type[TDocument],
         data: Optional[Sequence[TDocument]] = None,
+        indexed_fields: Sequence[str] = (),
     ) -> None:
         self._name = name
         self._schema = schema
-        self._documents = list(data) if data else []
+        self._documents = IndexedDocuments(data or [], indexed_fields)
 
     @override
     async def find(
         self,
         filters: Where,
     ) -> Sequence[TDocument]:
-        result = []
-        for doc in filter(
-            lambda d: matches_filters(filters, d),
-            self._documents,
-        ):
-            result.append(doc)
-
-        return result
+        return [doc for _, doc in self._documents.find(filters)]
 
     @override
     async def find_one(
         self,
         filters: Where,
     ) -> Optional[TDocument]:
-        for doc in self._documents:
-            if matches_filters(filters, doc):
-                return doc
+        if match := self._documents.find_first(filters):
+            return match[1]
 
         return None
 
@@ -136,6 +135,19 @@ class TransientDocumentCollection(DocumentCollection[TDocument]):
 
         return InsertResult(acknowledged=True)
 
+    @override
+    async def insert_many(
+        self,
+        documents: Sequence[TDocument],
+    ) -> InsertManyResult:
+        for document in documents:
+            ensure_is_total(document, self._schema)
+
+        for document in documents:
+            self._documents.append(document)
+
+        return InsertManyResult(acknowledged=True, inserted_count=len(documents))
+
     @override
     async def update_one(
         self,
@@ -143,16 +155,17 @@ class TransientDocumentCollection(DocumentCollection[TDocument]):
         params: TDocument,
         upsert: bool = False,
     ) -> UpdateResult[TDocument]:
-        for i, d in enumerate(self._documents):
-            if matches_filters(filters, d):
-                self._documents[i] = cast(TDocument, {**self._documents[i], **params})
+        if match := self._documents.find_first(filters):
+            key, d = match
+            updated_document = cast(TDocument, {**d, **params})
+            self._documents.replace(key, updated_document)
 
-                return UpdateResult(
-                    acknowledged=True,
-                    matched_count=1,
-                    modified_count=1,
-                    updated_document=self._documents[i],
-                )
+            return UpdateResult(
+                acknowledged=True,
+                matched_count=1,
+                modified_count=1,
+                updated_document=updated_document,
+            )
 
         if upsert:
             await self.insert_one(params)
@@ -171,19 +184,51 @@ class TransientDocumentCollection(DocumentCollection[TDocument]):
             updated_document=None,
         )
 
+    @override
+    async def update_many(
+        self,
+        filters: Where,
+        params: TDocument,
+        upsert: bool = False,
+    ) -> UpdateManyResult:
+        matches = self._documents.find(filters)
+
+        for key, d in matches:
+            self._documents.replace(key, cast(TDocument, {**d, **params}))
+
+        if not matches and upsert:
+            await self.insert_one(params)
+
+        return UpdateManyResult(
+            acknowledged=True,
+            matched_count=len(matches),
+            modified_count=len(matches),
+        )
+
     @override
     async def delete_one(
         self,
         filters: Where,
     ) -> DeleteResult[TDocument]:
-        for i, d in enumerate(self._documents):
-            if matches_filters(filters, d):
-                document = self._documents.pop(i)
+        if match := self._documents.find_first(filters):
+            document = self._documents.remove(match[0])
 
-                return DeleteResult(deleted_count=1, acknowledged=True, deleted_document=document)
+            return DeleteResult(deleted_count=1, acknowledged=True, deleted_document=document)
 
         return DeleteResult(
             acknowledged=True,
             deleted_count=0,
             deleted_document=None,
         )
+
+    @override
+    async def delete_many(
+        self,
+        filters: Where,
+    ) -> DeleteManyResult:
+        matches = self._documents.find(filters)
+
+        for key, _ in matches:
+            self._documents.remove(key)
+
+        return DeleteManyResult(acknowledged=True, deleted_count=len(matches))
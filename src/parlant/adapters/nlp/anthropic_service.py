@@ -22,7 +22,8 @@ from anthropic import (
     InternalServerError,
     RateLimitError,
 )  # type: ignore
-from typing import Any, Mapping
+from anthropic.types import Usage  # type: ignore
+from typing import Any, Awaitable, Callable, Mapping
 from typing_extensions import override
 import jsonfinder  # type: ignore
 import os
@@ -34,6 +35,7 @@ from Daneel.core.engines.alpha.prompt_builder import PromptBuilder
 from Daneel.core.nlp.embedding import Embedder
 from Daneel.core.nlp.generation import (
     T,
+    CompletionDelta,
     SchematicGenerationResult,
     SchematicGenerator,
 )
@@ -45,6 +47,19 @@ from Daneel.core.nlp.service import NLPService
 from Daneel.core.nlp.tokenization import EstimatingTokenizer
 
 
+RATE_LIMIT_ERROR_MESSAGE = (
+    "Anthropic API rate limit exceeded. Possible reasons:\n"
+    "1. Your account may have insufficient API credits.\n"
+    "2. You may be using a free-tier account with limited request capacity.\n"
+    "3. You might have exceeded the requests-per-minute limit for your account.\n\n"
+    "Recommended actions:\n"
+    "- Check your Anthropic account balance and billing status.\n"
+    "- Review your API usage limits in Anthropic's dashboard.\n"
+    "- For more details on rate limits and usage tiers, visit:\n"
+    "  https://docs.anthropic.com/claude/reference/rate-limits \n"
+)
+
+
 class AnthropicEstimatingTokenizer(EstimatingTokenizer):
     def __init__(self, client: AsyncAnthropic) -> None:
         self.encoding = tiktoken.encoding_for_model("gpt-4o-2024-08-06")
@@ -113,25 +128,67 @@ class AnthropicAISchematicGenerator(SchematicGenerator[T]):
                 **anthropic_api_arguments,
             )
         except RateLimitError:
-            self._logger.error(
-                (
-                    "Anthropic API rate limit exceeded. Possible reasons:\n"
-                    "1. Your account may have insufficient API credits.\n"
-                    "2. You may be using a free-tier account with limited request capacity.\n"
-                    "3. You might have exceeded the requests-per-minute limit for your account.\n\n"
-                    "Recommended actions:\n"
-                    "- Check your Anthropic account balance and billing status.\n"
-                    "- Review your API usage limits in Anthropic's dashboard.\n"
-                    "- For more details on rate limits and usage tiers, visit:\n"
-                    "  https://docs.anthropic.com/claude/reference/rate-limits \n"
-                ),
-            )
+            self._logger.error(RATE_LIMIT_ERROR_MESSAGE)
             raise
 
         t_end = time.time()
 
-        raw_content = response.content[0].text
+        return self._parse_result(response.content[0].text, response.usage, t_end - t_start)
 
+    @policy(
+        [
+            retry(
+                exceptions=(
+                    APIConnectionError,
+                    APITimeoutError,
+                    RateLimitError,
+                    APIResponseValidationError,
+                )
+            ),
+            retry(InternalServerError, max_attempts=2, wait_times=(1.0, 5.0)),
+        ]
+    )
+    @override
+    async def generate_streaming(
+        self,
+        prompt: str | PromptBuilder,
+        on_progress: Callable[[CompletionDelta], Awaitable[None]],
+        hints: Mapping[str, Any] = {},
+    ) -> SchematicGenerationResult[T]:
+        if isinstance(prompt, PromptBuilder):
+            prompt = prompt.build()
+
+        anthropic_api_arguments = {k: v for k, v in hints.items() if k in self.supported_hints}
+
+        chunks: list[str] = []
+
+        t_start = time.time()
+        try:
+            async with self._client.messages.stream(
+                messages=[{"role": "user", "content": prompt}],
+                model=self.model_name,
+                max_tokens=4096,
+                **anthropic_api_arguments,
+            ) as stream:
+                async for text in stream.text_stream:
+                    chunks.append(text)
+                    await on_progress(CompletionDelta(text=text, restart=len(chunks) == 1))
+
+                response = await stream.get_final_message()
+        except RateLimitError:
+            self._logger.error(RATE_LIMIT_ERROR_MESSAGE)
+            raise
+
+        t_end = time.time()
+
+        return self._parse_result("".join(chunks), response.usage, t_end - t_start)
+
+    def _parse_result(
+        self,
+        raw_content: str,
+        usage: Usage,
+        duration: float,
+    ) -> SchematicGenerationResult[T]:
         try:
             json_content = normalize_json_output(raw_content)
             json_object = jsonfinder.only_json(json_content)[2]
@@ -148,10 +205,10 @@ class AnthropicAISchematicGenerator(SchematicGenerator[T]):
                 info=GenerationInfo(
                     schema_name=self.schema.__name__,
                     model=self.id,
-                    duration=(t_end - t_start),
+                    duration=duration,
                     usage=UsageInfo(
-                        input_tokens=response.usage.input_tokens,
-                        output_tokens=response.usage.output_tokens,
+                        input_tokens=usage.input_tokens,
+                        output_tokens=usage.output_tokens,
                     ),
                 ),
             )
@@ -186,7 +243,7 @@ class AnthropicService(NLPService):
 
     @override
     async def get_embedder(self) -> Embedder:
-        return JinaAIEmbedder()
+        return JinaAIEmbedder(self._logger)
 
     @override
     async def get_moderation_service(self) -> ModerationService:
@@ -204,7 +204,7 @@ class DeepSeekService(NLPService):
 
     @override
     async def get_embedder(self) -> Embedder:
-        return JinaAIEmbedder()
+        return JinaAIEmbedder(self._logger)
 
     @override
     async def get_moderation_service(self) -> ModerationService:
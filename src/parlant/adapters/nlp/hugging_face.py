@@ -12,10 +12,17 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import asyncio
 from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+import copy
+from dataclasses import dataclass
+from itertools import chain
 import os
 from pathlib import Path
-from typing import Any
+import threading
+import time
+from typing import Any, Callable, TypeVar
 from typing_extensions import override
 import torch  # type: ignore
 from transformers import AutoModel, AutoTokenizer  # type: ignore
@@ -28,14 +35,46 @@ from huggingface_hub.errors import (  # type: ignore
 
 from tempfile import gettempdir
 
+from Daneel.core.loggers import Logger
 from Daneel.core.nlp.policies import policy, retry
 from Daneel.core.nlp.tokenization import EstimatingTokenizer
-from Daneel.core.nlp.embedding import Embedder, EmbeddingResult
+from Daneel.core.nlp.embedding import Embedder, EmbedderInferenceStats, EmbeddingResult
 
 
 _TOKENIZER_MODELS: dict[str, AutoTokenizer] = {}
 _AUTO_MODELS: dict[str, AutoModel] = {}
 _DEVICE: torch.device | None = None
+_EXECUTOR: ThreadPoolExecutor | None = None
+_THREAD_STATE = threading.local()
+
+_R = TypeVar("_R")
+
+
+def _inference_threads() -> int:
+    # 0 runs tokenization and inference inline, on the event loop
+    return int(os.environ.get("Daneel_HF_INFERENCE_THREADS", "1"))
+
+
+def _get_executor() -> ThreadPoolExecutor | None:
+    global _EXECUTOR
+
+    if _EXECUTOR or not (thread_count := _inference_threads()):
+        return _EXECUTOR
+
+    if _get_device().type == "cpu":
+        # Keep torch's intra-op parallelism from oversubscribing the CPU
+        torch_thread_count = max(1, (os.cpu_count() or 1) // thread_count)
+        torch.set_num_threads(int(os.environ.get("Daneel_HF_TORCH_THREADS", torch_thread_count)))
+
+    _EXECUTOR = ThreadPoolExecutor(max_workers=thread_count, thread_name_prefix="hf-inference")
+
+    return _EXECUTOR
+
+
+async def _run_off_loop(func: Callable[..., _R], *args: Any) -> _R:
+    if executor := _get_executor():
+        return await asyncio.get_running_loop().run_in_executor(executor, func, *args)
+    return func(*args)
 
 
 def _model_temp_dir() -> str:
@@ -57,6 +96,17 @@ def _create_tokenizer(model_name: str) -> AutoTokenizer:
     return tokenizer
 
 
+def _get_thread_tokenizer(model_name: str) -> AutoTokenizer:
+    # Fast tokenizers fail with "Already borrowed" when used from several threads
+    # at once, so each thread works with its own copy of the loaded tokenizer.
+    tokenizers: dict[str, AutoTokenizer] = _THREAD_STATE.__dict__.setdefault("tokenizers", {})
+
+    if model_name not in tokenizers:
+        tokenizers[model_name] = copy.deepcopy(_create_tokenizer(model_name))
+
+    return tokenizers[model_name]
+
+
 def _get_device() -> torch.device:
     global _DEVICE
 
@@ -96,20 +146,43 @@ def _create_auto_model(model_name: str) -> AutoModel:
 class HuggingFaceEstimatingTokenizer(EstimatingTokenizer):
     def __init__(self, model_name: str) -> None:
         self.model_name = model_name
-        self._tokenizer = _create_tokenizer(model_name)
+
+        # Load the tokenizer up front, rather than on the first estimate
+        _create_tokenizer(model_name)
 
     @override
     async def estimate_token_count(self, prompt: str) -> int:
-        tokens = self._tokenizer.tokenize(prompt)
-        return len(tokens)
+        if _inference_threads():
+            # Not on the inference pool, so that estimates don't wait behind forward passes
+            return await asyncio.to_thread(self._count_tokens, prompt)
+
+        return self._count_tokens(prompt)
+
+    def _count_tokens(self, prompt: str) -> int:
+        return len(_get_thread_tokenizer(self.model_name).tokenize(prompt))
+
+
+@dataclass
+class _PendingInference:
+    texts: list[str]
+    enqueued_at: float
+    future: asyncio.Future[list[list[float]]]
 
 
 class HuggingFaceEmbedder(Embedder):
-    def __init__(self, model_name: str) -> None:
+    def __init__(self, logger: Logger, model_name: str, max_batch_size: int = 32) -> None:
+        self._logger = logger
+
         self.model_name = model_name
+        self.max_batch_size = max_batch_size
+        self.stats = EmbedderInferenceStats()
+
         self._model = _create_auto_model(model_name)
         self._tokenizer = HuggingFaceEstimatingTokenizer(model_name=model_name)
 
+        self._pending: list[_PendingInference] = []
+        self._in_flight_batches = 0
+
     @property
     @override
     def id(self) -> str:
@@ -125,6 +198,11 @@ class HuggingFaceEmbedder(Embedder):
     def tokenizer(self) -> HuggingFaceEstimatingTokenizer:
         return self._tokenizer
 
+    @property
+    @override
+    def inference_stats(self) -> EmbedderInferenceStats:
+        return self.stats
+
     @policy(
         [
             retry(
@@ -144,7 +222,99 @@ class HuggingFaceEmbedder(Embedder):
         texts: list[str],
         hints: Mapping[str, Any] = {},
     ) -> EmbeddingResult:
-        tokenized_texts = self._tokenizer._tokenizer.batch_encode_plus(
+        # Large requests are split, so that no forward pass exceeds the batch size
+        chunks = [
+            texts[i : i + self.max_batch_size] for i in range(0, len(texts), self.max_batch_size)
+        ]
+
+        if not _get_executor():
+            return EmbeddingResult(vectors=list(chain.from_iterable(map(self._infer, chunks))))
+
+        loop = asyncio.get_running_loop()
+
+        pending = [
+            _PendingInference(
+                texts=chunk,
+                enqueued_at=time.monotonic(),
+                future=loop.create_future(),
+            )
+            for chunk in chunks
+        ]
+
+        self._pending.extend(pending)
+        self._dispatch()
+
+        results = await asyncio.gather(*[asyncio.shield(p.future) for p in pending])
+
+        return EmbeddingResult(vectors=list(chain.from_iterable(results)))
+
+    def _dispatch(self) -> None:
+        # Requests queue up while all workers are busy, and are then
+        # embedded together in a single forward pass (dynamic batching).
+        while self._pending and self._in_flight_batches < _inference_threads():
+            batch: list[_PendingInference] = []
+
+            while self._pending and (
+                not batch
+                or sum(len(p.texts) for p in batch) + len(self._pending[0].texts)
+                <= self.max_batch_size
+            ):
+                batch.append(self._pending.pop(0))
+
+            self._in_flight_batches += 1
+
+            task = asyncio.ensure_future(self._process_batch(batch))
+            task.add_done_callback(lambda _: self._on_batch_done())
+
+    def _on_batch_done(self) -> None:
+        self._in_flight_batches -= 1
+        self._dispatch()
+
+    async def _process_batch(self, batch: list[_PendingInference]) -> None:
+        t_start = time.monotonic()
+
+        try:
+            vectors = await _run_off_loop(
+                self._infer, list(chain.from_iterable(p.texts for p in batch))
+            )
+        except BaseException as exc:
+            # Every waiter must be settled, even when we're cancelled or interrupted,
+            # or else its embed() call would hang forever
+            for p in batch:
+                if p.future.done():
+                    continue
+                if isinstance(exc, asyncio.CancelledError):
+                    p.future.cancel()
+                else:
+                    p.future.set_exception(exc)
+
+            if isinstance(exc, Exception):
+                return
+
+            raise
+
+        self.stats.batches += 1
+        self.stats.texts += sum(len(p.texts) for p in batch)
+        self.stats.total_queue_latency += sum(
+            (t_start - p.enqueued_at) * len(p.texts) for p in batch
+        )
+        self.stats.total_inference_time += time.monotonic() - t_start
+
+        self._logger.debug(
+            f"Embedded {sum(len(p.texts) for p in batch)} texts in one forward pass "
+            f"(average batch size: {self.stats.average_batch_size:.1f}, "
+            f"average queue latency: {self.stats.average_queue_latency:.3f}s)"
+        )
+
+        offset = 0
+
+        for p in batch:
+            if not p.future.done():
+                p.future.set_result(vectors[offset : offset + len(p.texts)])
+            offset += len(p.texts)
+
+    def _infer(self, texts: list[str]) -> list[list[float]]:
+        tokenized_texts = _get_thread_tokenizer(self.model_name).batch_encode_plus(
             texts, padding=True, truncation=True, return_tensors="pt"
         )
         tokenized_texts = {key: value.to(_get_device()) for key, value in tokenized_texts.items()}
@@ -152,12 +322,12 @@ class HuggingFaceEmbedder(Embedder):
         with torch.no_grad():
             embeddings = self._model(**tokenized_texts).last_hidden_state[:, 0, :]
 
-        return EmbeddingResult(vectors=embeddings.tolist())
+        return list(embeddings.tolist())
 
 
 class JinaAIEmbedder(HuggingFaceEmbedder):
-    def __init__(self) -> None:
-        super().__init__("jinaai/jina-embeddings-v2-base-en")
+    def __init__(self, logger: Logger) -> None:
+        super().__init__(logger, "jinaai/jina-embeddings-v2-base-en")
 
     @property
     @override
@@ -208,7 +208,7 @@ class LiteLLMService(NLPService):
 
     @override
     async def get_embedder(self) -> Embedder:
-        return JinaAIEmbedder()
+        return JinaAIEmbedder(self._logger)
 
     @override
     async def get_moderation_service(self) -> ModerationService:
@@ -24,7 +24,8 @@ from openai import (
     InternalServerError,
     RateLimitError,
 )
-from typing import Any, Mapping
+from openai.types.completion_usage import CompletionUsage
+from typing import Any, Awaitable, Callable, Mapping
 from typing_extensions import override
 import json
 import jsonfinder  # type: ignore
@@ -43,6 +44,7 @@ from Daneel.core.nlp.service import NLPService
 from Daneel.core.nlp.embedding import Embedder, EmbeddingResult
 from Daneel.core.nlp.generation import (
     T,
+    CompletionDelta,
     SchematicGenerator,
     SchematicGenerationResult,
 )
@@ -192,43 +194,119 @@ class OpenAISchematicGenerator(SchematicGenerator[T]):
             if response.usage:
                 self._logger.debug(response.usage.model_dump_json(indent=2))
 
-            raw_content = response.choices[0].message.content or "{}"
+            assert response.usage
 
-            try:
-                json_content = json.loads(normalize_json_output(raw_content))
-            except json.JSONDecodeError:
-                self._logger.warning(f"Invalid JSON returned by {self.model_name}:\n{raw_content})")
-                json_content = jsonfinder.only_json(raw_content)[2]
-                self._logger.warning("Found JSON content within model response; continuing...")
+            return SchematicGenerationResult(
+                content=self._parse_content(response.choices[0].message.content or "{}"),
+                info=self._generation_info(response.usage, t_end - t_start),
+            )
 
-            try:
-                content = self.schema.model_validate(json_content)
-
-                assert response.usage
-                assert response.usage.prompt_tokens_details
-
-                return SchematicGenerationResult(
-                    content=content,
-                    info=GenerationInfo(
-                        schema_name=self.schema.__name__,
-                        model=self.id,
-                        duration=(t_end - t_start),
-                        usage=UsageInfo(
-                            input_tokens=response.usage.prompt_tokens,
-                            output_tokens=response.usage.completion_tokens,
-                            extra={
-                                "cached_input_tokens": response.usage.prompt_tokens_details.cached_tokens
-                                or 0
-                            },
-                        ),
-                    ),
-                )
+    @policy(
+        [
+            retry(
+                exceptions=(
+                    APIConnectionError,
+                    APITimeoutError,
+                    ConflictError,
+                    RateLimitError,
+                    APIResponseValidationError,
+                ),
+            ),
+            retry(InternalServerError, max_attempts=2, wait_times=(1.0, 5.0)),
+        ]
+    )
+    @override
+    async def generate_streaming(
+        self,
+        prompt: str | PromptBuilder,
+        on_progress: Callable[[CompletionDelta], Awaitable[None]],
+        hints: Mapping[str, Any] = {},
+    ) -> SchematicGenerationResult[T]:
+        with self._logger.scope("OpenAISchematicGenerator"):
+            with self._logger.operation(f"LLM Streaming Request ({self.schema.__name__})"):
+                if hints.get("strict", False):
+                    # Structured outputs are parsed by the SDK only once complete
+                    return await self._do_generate(prompt, hints)
 
-            except ValidationError as e:
-                self._logger.error(
-                    f"Error: {e.json(indent=2)}\nJSON content returned by {self.model_name} does not match expected schema:\n{raw_content}"
-                )
-                raise
+                return await self._do_generate_streaming(prompt, on_progress, hints)
+
+    async def _do_generate_streaming(
+        self,
+        prompt: str | PromptBuilder,
+        on_progress: Callable[[CompletionDelta], Awaitable[None]],
+        hints: Mapping[str, Any] = {},
+    ) -> SchematicGenerationResult[T]:
+        if isinstance(prompt, PromptBuilder):
+            prompt = prompt.build()
+
+        openai_api_arguments = {k: v for k, v in hints.items() if k in self.supported_openai_params}
+
+        chunks: list[str] = []
+        usage = None
+
+        try:
+            t_start = time.time()
+            stream = await self._client.chat.completions.create(
+                messages=[{"role": "developer", "content": prompt}],
+                model=self.model_name,
+                response_format={"type": "json_object"},
+                stream=True,
+                stream_options={"include_usage": True},
+                **openai_api_arguments,
+            )
+
+            async for chunk in stream:
+                if chunk.usage:
+                    usage = chunk.usage
+
+                if chunk.choices and (delta := chunk.choices[0].delta.content):
+                    chunks.append(delta)
+                    await on_progress(CompletionDelta(text=delta, restart=len(chunks) == 1))
+
+            t_end = time.time()
+        except RateLimitError:
+            self._logger.error(RATE_LIMIT_ERROR_MESSAGE)
+            raise
+
+        if usage:
+            self._logger.debug(usage.model_dump_json(indent=2))
+
+        assert usage
+
+        return SchematicGenerationResult(
+            content=self._parse_content("".join(chunks) or "{}"),
+            info=self._generation_info(usage, t_end - t_start),
+        )
+
+    def _parse_content(self, raw_content: str) -> T:
+        try:
+            json_content = json.loads(normalize_json_output(raw_content))
+        except json.JSONDecodeError:
+            self._logger.warning(f"Invalid JSON returned by {self.model_name}:\n{raw_content})")
+            json_content = jsonfinder.only_json(raw_content)[2]
+            self._logger.warning("Found JSON content within model response; continuing...")
+
+        try:
+            return self.schema.model_validate(json_content)
+        except ValidationError as e:
+            self._logger.error(
+                f"Error: {e.json(indent=2)}\nJSON content returned by {self.model_name} does not match expected schema:\n{raw_content}"
+            )
+            raise
+
+    def _generation_info(self, usage: CompletionUsage, duration: float) -> GenerationInfo:
+        assert usage.prompt_tokens_details
+
+        return GenerationInfo(
+            schema_name=self.schema.__name__,
+            model=self.id,
+            duration=duration,
+            usage=UsageInfo(
+                input_tokens=usage.prompt_tokens,
+                output_tokens=usage.completion_tokens,
+                extra={"cached_input_tokens": usage.prompt_tokens_details.cached_tokens or 0},
+            ),
+        )
 
 
 class GPT_4o(OpenAISchematicGenerator[T]):
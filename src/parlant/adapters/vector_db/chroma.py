@@ -13,11 +13,15 @@
 # limitations under the License.
 
 from __future__ import annotations
+import asyncio
+from dataclasses import dataclass
 import json
 from pathlib import Path
-from typing import Awaitable, Callable, Generic, Optional, Sequence, cast
+from typing import Any, Awaitable, Callable, Generic, Mapping, Optional, Sequence, cast
 from typing_extensions import override, Self
 import chromadb
+from chromadb.api.types import IncludeEnum
+import numpy as np
 
 from Daneel.core.async_utils import ReaderWriterLock
 from Daneel.core.common import JSONSerializable
@@ -26,9 +30,12 @@ from Daneel.core.nlp.embedding import Embedder, EmbedderFactory, NoOpEmbedder
 from Daneel.core.persistence.common import Where, ensure_is_total
 from Daneel.core.persistence.vector_database import (
     BaseDocument,
+    DeleteManyResult,
     DeleteResult,
+    InsertManyResult,
     InsertResult,
     SimilarDocumentResult,
+    UpdateManyResult,
     UpdateResult,
     VectorCollection,
     VectorDatabase,
@@ -37,19 +44,34 @@ from Daneel.core.persistence.vector_database import (
 )
 
 
+@dataclass(frozen=True)
+class IndexingProgress:
+    total: int
+    indexed: int
+
+    @property
+    def done(self) -> bool:
+        return self.indexed >= self.total
+
+
 class ChromaDatabase(VectorDatabase):
     def __init__(
         self,
         logger: Logger,
         dir_path: Path,
         embedder_factory: EmbedderFactory,
+        indexing_batch_size: int = 256,
+        background_indexing: bool = False,
     ) -> None:
         self._dir_path = dir_path
         self._logger = logger
         self._embedder_factory = embedder_factory
+        self._indexing_batch_size = indexing_batch_size
+        self._background_indexing = background_indexing
 
         self.chroma_client: chromadb.api.ClientAPI
         self._collections: dict[str, ChromaCollection[BaseDocument]] = {}
+        self._indexing_tasks: dict[str, asyncio.Task[None]] = {}
 
     async def __aenter__(self) -> Self:
         self.chroma_client = chromadb.PersistentClient(str(self._dir_path))
@@ -61,7 +83,22 @@ class ChromaDatabase(VectorDatabase):
         exc_value: Optional[BaseException],
         traceback: Optional[object],
     ) -> None:
-        pass
+        # Interrupted indexing is resumed the next time the collection is opened
+        for task in self._indexing_tasks.values():
+            task.cancel()
+
+        await asyncio.gather(*self._indexing_tasks.values(), return_exceptions=True)
+
+    @property
+    def indexing_progress(self) -> Mapping[str, IndexingProgress]:
+        return {
+            name: progress
+            for name, collection in self._collections.items()
+            if (progress := collection.indexing_progress)
+        }
+
+    async def wait_for_indexing(self) -> None:
+        await asyncio.gather(*self._indexing_tasks.values())
 
     def format_collection_name(
         self,
@@ -70,16 +107,14 @@ class ChromaDatabase(VectorDatabase):
     ) -> str:
         return f"{name}_{embedder_type.__name__}"
 
-    # Loads documents from unembedded collection, migrates them if needed, and ensures embedded collection is in sync
+    # Loads documents from unembedded collection and migrates them if needed.
+    # Returns whether any document changed, in which case the embedded collection must be re-indexed.
     async def _load_collection_documents(
         self,
-        embedded_collection: chromadb.Collection,
         unembedded_collection: chromadb.Collection,
-        embedder_type: type[Embedder],
         document_loader: Callable[[BaseDocument], Awaitable[Optional[TDocument]]],
-    ) -> chromadb.Collection:
+    ) -> bool:
         failed_migrations: list[BaseDocument] = []
-        embedder = self._embedder_factory.create_embedder(embedder_type)
 
         unembedded_docs = unembedded_collection.get()["metadatas"]
         indexing_required = False
@@ -101,6 +136,7 @@ class ChromaDatabase(VectorDatabase):
                         self._logger.warning(f'Failed to load document "{doc}"')
                         unembedded_collection.delete(where={"id": prospective_doc["id"]})
                         failed_migrations.append(prospective_doc)
+                        indexing_required = True
 
                 except Exception as e:
                     self._logger.error(f"Failed to load document '{doc}'. error: {e}.")
@@ -115,66 +151,236 @@ class ChromaDatabase(VectorDatabase):
                     identity_loader,
                 )
 
-                for failed_doc in failed_migrations:
-                    failed_migrations_collection.embedded_collection.add(
-                        ids=[failed_doc["id"]],
-                        documents=[failed_doc["content"]],
-                        metadatas=[cast(chromadb.Metadata, failed_doc)],
-                        embeddings=[0],
+                for chroma_collection in (
+                    failed_migrations_collection._unembedded_collection,
+                    failed_migrations_collection.embedded_collection,
+                ):
+                    chroma_collection.upsert(
+                        ids=[d["id"] for d in failed_migrations],
+                        documents=[d["content"] for d in failed_migrations],
+                        metadatas=[cast(chromadb.Metadata, d) for d in failed_migrations],
+                        embeddings=[[0]] * len(failed_migrations),
                     )
 
-        if (
-            indexing_required
-            or unembedded_collection.metadata["version"] != embedded_collection.metadata["version"]
-        ):
-            await self._index_collection(embedded_collection, unembedded_collection, embedder)
+        return indexing_required
+
+    def _get_or_create_embedded_collection(
+        self,
+        name: str,
+        embedder_type: type[Embedder],
+    ) -> chromadb.Collection:
+        return next(
+            (
+                col
+                for col in self.chroma_client.list_collections()
+                if col.name == self.format_collection_name(name, embedder_type)
+            ),
+            None,
+        ) or self.chroma_client.create_collection(
+            name=self.format_collection_name(name, embedder_type),
+            # A new embedded collection must be populated from the unembedded one
+            metadata={"version": 1, "indexing": True},
+            embedding_function=None,
+        )
 
-        return embedded_collection
+    async def _sync_collection(
+        self,
+        collection: ChromaCollection[BaseDocument],
+    ) -> None:
+        if self._background_indexing:
+            self._indexing_tasks[collection._name] = asyncio.create_task(
+                self._index_in_background(collection)
+            )
+        else:
+            await self._index_collection(collection)
 
-    # Syncs embedded collection with unembedded collection
+    async def _index_in_background(
+        self,
+        collection: ChromaCollection[BaseDocument],
+    ) -> None:
+        try:
+            await self._index_collection(collection)
+        except asyncio.CancelledError:
+            self._logger.info(f"Indexing {collection.embedded_collection.name} was interrupted")
+            raise
+        except Exception as exc:
+            self._logger.error(f"Indexing {collection.embedded_collection.name} failed: {exc}")
+
+    def _find_staging_collection(
+        self,
+        embedded_collection: chromadb.Collection,
+    ) -> Optional[chromadb.Collection]:
+        return next(
+            (
+                col
+                for col in self.chroma_client.list_collections()
+                if col.name == f"{embedded_collection.name}_staging"
+            ),
+            None,
+        )
+
+    # Syncs embedded collection with unembedded collection.
+    # The new index is built in a staging collection while the embedded collection keeps
+    # serving queries, and replaces it once complete. Outdated documents are embedded and
+    # committed to the staging collection in batches, so that an interrupted run keeps its
+    # progress; the "indexing" flag makes the next run pick up the rest.
     async def _index_collection(
         self,
-        collection: chromadb.Collection,
-        unembedded_collection: chromadb.Collection,
-        embedder: Embedder,
+        collection: ChromaCollection[BaseDocument],
     ) -> None:
-        if docs := unembedded_collection.get()["metadatas"]:
-            unembedded_docs_by_id = {doc["id"]: doc for doc in docs}
-
-        # Remove docs from embedded collection that no longer exist in unembedded
-        # Update embeddings for changed docs
-        if docs := collection.get()["metadatas"]:
-            for doc in docs:
-                if doc["id"] not in unembedded_docs_by_id:
-                    collection.delete(where={"id": doc["id"]})
-                else:
-                    if doc["checksum"] != unembedded_docs_by_id[doc["id"]]["checksum"]:
-                        embeddings = list(
-                            (
-                                await embedder.embed(
-                                    [cast(str, unembedded_docs_by_id[doc["id"]]["content"])]
-                                )
-                            ).vectors
-                        )
-
-                        collection.update(
-                            ids=[str(doc["id"])],
-                            documents=[cast(str, unembedded_docs_by_id[doc["id"]]["content"])],
-                            metadatas=[cast(chromadb.Metadata, unembedded_docs_by_id[doc["id"]])],
-                            embeddings=embeddings,
-                        )
-                    unembedded_docs_by_id.pop(doc["id"])
-
-        # Add new docs from unembedded to embedded collection
-        for doc in unembedded_docs_by_id.values():
-            collection.add(
-                ids=[str(doc["id"])],
-                documents=[cast(str, doc["content"])],
-                metadatas=[doc],
-                embeddings=list((await embedder.embed([cast(str, doc["content"])])).vectors),
+        embedded_collection = collection.embedded_collection
+        unembedded_collection = collection._unembedded_collection
+
+        unembedded_docs_by_id = {
+            str(doc["id"]): doc for doc in unembedded_collection.get()["metadatas"] or []
+        }
+        embedded_checksums = {
+            str(doc["id"]): doc["checksum"] for doc in embedded_collection.get()["metadatas"] or []
+        }
+
+        staging_collection = self._find_staging_collection(embedded_collection)
+
+        if (
+            not staging_collection
+            and embedded_checksums.keys() == unembedded_docs_by_id.keys()
+            and all(
+                embedded_checksums[id] == doc["checksum"]
+                for id, doc in unembedded_docs_by_id.items()
+            )
+        ):
+            embedded_collection.modify(
+                metadata={
+                    **embedded_collection.metadata,
+                    "version": unembedded_collection.metadata["version"],
+                    "indexing": False,
+                }
+            )
+            return
+
+        embedded_collection.modify(metadata={**embedded_collection.metadata, "indexing": True})
+
+        # A staging collection left by an interrupted run already holds its progress
+        staging_collection = staging_collection or self.chroma_client.create_collection(
+            name=f"{embedded_collection.name}_staging",
+            metadata={"version": 1, "indexing": True},
+            embedding_function=None,
+        )
+
+        staged_checksums = {
+            str(doc["id"]): doc["checksum"] for doc in staging_collection.get()["metadatas"] or []
+        }
+
+        if stale_ids := [id for id in staged_checksums if id not in unembedded_docs_by_id]:
+            staging_collection.delete(ids=stale_ids)
+
+        # Documents whose embeddings are up to date are carried over rather than re-embedded
+        if reusable_ids := [
+            id
+            for id, doc in unembedded_docs_by_id.items()
+            if staged_checksums.get(id) != doc["checksum"]
+            and embedded_checksums.get(id) == doc["checksum"]
+        ]:
+            self._copy_embeddings(embedded_collection, staging_collection, reusable_ids)
+
+        outdated_docs = [
+            doc
+            for id, doc in unembedded_docs_by_id.items()
+            if staged_checksums.get(id) != doc["checksum"]
+            and embedded_checksums.get(id) != doc["checksum"]
+        ]
+
+        collection.indexing_progress = IndexingProgress(total=len(outdated_docs), indexed=0)
+
+        for i in range(0, len(outdated_docs), self._indexing_batch_size):
+            batch = outdated_docs[i : i + self._indexing_batch_size]
+
+            embeddings = list(
+                (
+                    await collection._embedder.embed([cast(str, doc["content"]) for doc in batch])
+                ).vectors
+            )
+
+            staging_collection.upsert(
+                ids=[str(doc["id"]) for doc in batch],
+                documents=[cast(str, doc["content"]) for doc in batch],
+                metadatas=batch,
+                embeddings=embeddings,
+            )
+
+            collection.indexing_progress = IndexingProgress(
+                total=len(outdated_docs),
+                indexed=i + len(batch),
+            )
+
+            self._logger.info(
+                f"Indexing {embedded_collection.name}: {i + len(batch)}/{len(outdated_docs)} documents"
+            )
+
+        async with collection._lock.writer_lock:
+            # Writes made while indexing went to the embedded collection; bring them over
+            current_docs_by_id = {
+                str(doc["id"]): doc for doc in unembedded_collection.get()["metadatas"] or []
+            }
+            staged_docs_by_id = {
+                str(doc["id"]): doc for doc in staging_collection.get()["metadatas"] or []
+            }
+
+            if stale_ids := [id for id in staged_docs_by_id if id not in current_docs_by_id]:
+                staging_collection.delete(ids=stale_ids)
+
+            if changed_ids := [
+                id
+                for id, doc in current_docs_by_id.items()
+                if id not in staged_docs_by_id
+                or staged_docs_by_id[id]["checksum"] != doc["checksum"]
+            ]:
+                self._copy_embeddings(embedded_collection, staging_collection, changed_ids)
+
+            # Updates that left the content as is only need their metadata brought over
+            if updated_docs := [
+                doc
+                for id, doc in current_docs_by_id.items()
+                if id in staged_docs_by_id
+                and staged_docs_by_id[id]["checksum"] == doc["checksum"]
+                and staged_docs_by_id[id] != doc
+            ]:
+                staging_collection.update(
+                    ids=[str(doc["id"]) for doc in updated_docs],
+                    metadatas=updated_docs,
+                )
+
+            name = embedded_collection.name
+
+            self.chroma_client.delete_collection(name=name)
+            staging_collection.modify(
+                name=name,
+                metadata={
+                    **embedded_collection.metadata,
+                    "version": unembedded_collection.metadata["version"],
+                    "indexing": False,
+                },
             )
 
-        collection.metadata.update({"version": unembedded_collection.metadata["version"]})
+            collection.embedded_collection = staging_collection
+
+    def _copy_embeddings(
+        self,
+        source: chromadb.Collection,
+        destination: chromadb.Collection,
+        ids: Sequence[str],
+    ) -> None:
+        docs = source.get(
+            ids=list(ids),
+            include=[IncludeEnum.documents, IncludeEnum.metadatas, IncludeEnum.embeddings],
+        )
+
+        if docs["ids"]:
+            destination.upsert(
+                ids=docs["ids"],
+                documents=docs["documents"],
+                metadatas=docs["metadatas"],
+                embeddings=docs["embeddings"],
+            )
 
     @override
     async def create_collection(
@@ -233,39 +439,25 @@ class ChromaDatabase(VectorDatabase):
             ),
             None,
         ):
-            embedded_collection = next(
-                (
-                    col
-                    for col in self.chroma_client.list_collections()
-                    if col.name == self.format_collection_name(name, embedder_type)
-                ),
-                None,
-            ) or self.chroma_client.create_collection(
-                name=self.format_collection_name(name, embedder_type),
-                metadata={"version": 1},
-                embedding_function=None,
-            )
+            embedded_collection = self._get_or_create_embedded_collection(name, embedder_type)
 
-            await self._index_collection(
-                collection=embedded_collection,
+            await self._load_collection_documents(
                 unembedded_collection=unembedded_collection,
-                embedder=self._embedder_factory.create_embedder(embedder_type),
+                document_loader=document_loader,
             )
 
             self._collections[name] = ChromaCollection(
                 self._logger,
-                embedded_collection=await self._load_collection_documents(
-                    embedded_collection=embedded_collection,
-                    unembedded_collection=unembedded_collection,
-                    embedder_type=embedder_type,
-                    document_loader=document_loader,
-                ),
+                embedded_collection=embedded_collection,
                 unembedded_collection=unembedded_collection,
                 name=name,
                 schema=schema,
                 embedder=self._embedder_factory.create_embedder(embedder_type),
                 version=1,
             )
+
+            await self._sync_collection(self._collections[name])
+
             return cast(ChromaCollection[TDocument], self._collections[name])
 
         raise ValueError(f'ChromaDB collection "{name}" not found.')
@@ -283,7 +475,7 @@ class ChromaDatabase(VectorDatabase):
 
         # Get or create unembedded collection for storing raw documents
         # Then get or create embedded collection for storing embeddings
-        # Load and migrate documents from unembedded collection, then reindex embedded collection to ensure it is in sync
+        # Load and migrate documents from unembedded collection, then reindex embedded collection if it is out of sync
         unembedded_collection = next(
             (
                 col
@@ -297,26 +489,16 @@ class ChromaDatabase(VectorDatabase):
             embedding_function=None,
         )
 
-        embedded_collection = next(
-            (
-                col
-                for col in self.chroma_client.list_collections()
-                if col.name == self.format_collection_name(name, embedder_type)
-            ),
-            None,
-        ) or self.chroma_client.create_collection(
-            name=self.format_collection_name(name, embedder_type),
-            metadata={"version": 1},
+        embedded_collection = self._get_or_create_embedded_collection(name, embedder_type)
+
+        indexing_required = await self._load_collection_documents(
+            unembedded_collection=unembedded_collection,
+            document_loader=document_loader,
         )
 
         self._collections[name] = ChromaCollection(
             self._logger,
-            embedded_collection=await self._load_collection_documents(
-                embedded_collection=embedded_collection,
-                unembedded_collection=unembedded_collection,
-                embedder_type=embedder_type,
-                document_loader=document_loader,
-            ),
+            embedded_collection=embedded_collection,
             unembedded_collection=unembedded_collection,
             name=name,
             schema=schema,
@@ -324,6 +506,13 @@ class ChromaDatabase(VectorDatabase):
             version=1,
         )
 
+        if (
+            indexing_required
+            or embedded_collection.metadata.get("indexing")
+            or unembedded_collection.metadata["version"] != embedded_collection.metadata["version"]
+        ):
+            await self._sync_collection(self._collections[name])
+
         return cast(ChromaCollection[TDocument], self._collections[name])
 
     @override
@@ -334,6 +523,15 @@ class ChromaDatabase(VectorDatabase):
         if name not in self._collections:
             raise ValueError(f'Collection "{name}" not found.')
 
+        if task := self._indexing_tasks.pop(name, None):
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+        if staging_collection := self._find_staging_collection(
+            self._collections[name].embedded_collection
+        ):
+            self.chroma_client.delete_collection(name=staging_collection.name)
+
         self.chroma_client.delete_collection(name=name)
         self.chroma_client.delete_collection(name=f"{name}_unembedded")
         del self._collections[name]
@@ -436,13 +634,17 @@ class ChromaCollection(Generic[TDocument], VectorCollection[TDocument]):
         self._unembedded_collection = unembedded_collection
         self.embedded_collection = embedded_collection
 
+        self.indexing_progress: Optional[IndexingProgress] = None
+
     @override
     async def find(
         self,
         filters: Where,
     ) -> Sequence[TDocument]:
+        # Documents are looked up in the unembedded collection, which remains
+        # complete while the embedded collection is being (re-)indexed
         async with self._lock.reader_lock:
-            if metadatas := self.embedded_collection.get(
+            if metadatas := self._unembedded_collection.get(
                 where=cast(chromadb.Where, filters) or None
             )["metadatas"]:
                 return [cast(TDocument, m) for m in metadatas]
@@ -455,7 +657,7 @@ class ChromaCollection(Generic[TDocument], VectorCollection[TDocument]):
         filters: Where,
     ) -> Optional[TDocument]:
         async with self._lock.reader_lock:
-            if metadatas := self.embedded_collection.get(
+            if metadatas := self._unembedded_collection.get(
                 where=cast(chromadb.Where, filters) or None
             )["metadatas"]:
                 return cast(TDocument, {k: v for k, v in metadatas[0].items()})
@@ -497,6 +699,44 @@ class ChromaCollection(Generic[TDocument], VectorCollection[TDocument]):
 
         return InsertResult(acknowledged=True)
 
+    @override
+    async def insert_many(
+        self,
+        documents: Sequence[TDocument],
+    ) -> InsertManyResult:
+        for document in documents:
+            ensure_is_total(document, self._schema)
+
+        if not documents:
+            return InsertManyResult(acknowledged=True, inserted_count=0)
+
+        embeddings = list((await self._embedder.embed([d["content"] for d in documents])).vectors)
+
+        async with self._lock.writer_lock:
+            self._version += 1
+
+            self._unembedded_collection.add(
+                ids=[d["id"] for d in documents],
+                documents=[d["content"] for d in documents],
+                metadatas=[cast(chromadb.Metadata, d) for d in documents],
+                embeddings=[[0]] * len(documents),
+            )
+            self._unembedded_collection.modify(
+                metadata={**self._unembedded_collection.metadata, **{"version": self._version}}
+            )
+
+            self.embedded_collection.add(
+                ids=[d["id"] for d in documents],
+                documents=[d["content"] for d in documents],
+                metadatas=[cast(chromadb.Metadata, d) for d in documents],
+                embeddings=embeddings,
+            )
+            self.embedded_collection.modify(
+                metadata={**self.embedded_collection.metadata, **{"version": self._version}}
+            )
+
+        return InsertManyResult(acknowledged=True, inserted_count=len(documents))
+
     @override
     async def update_one(
         self,
@@ -505,7 +745,7 @@ class ChromaCollection(Generic[TDocument], VectorCollection[TDocument]):
         upsert: bool = False,
     ) -> UpdateResult[TDocument]:
         async with self._lock.writer_lock:
-            if docs := self.embedded_collection.get(where=cast(chromadb.Where, filters) or None)[
+            if docs := self._unembedded_collection.get(where=cast(chromadb.Where, filters) or None)[
                 "metadatas"
             ]:
                 doc = docs[0]
@@ -531,7 +771,8 @@ class ChromaCollection(Generic[TDocument], VectorCollection[TDocument]):
                     metadata={**self._unembedded_collection.metadata, **{"version": self._version}}
                 )
 
-                self.embedded_collection.update(
+                # The document may not have been indexed yet if indexing is underway
+                self.embedded_collection.upsert(
                     ids=[str(doc["id"])],
                     documents=[document],
                     metadatas=[cast(chromadb.Metadata, updated_document)],
@@ -589,13 +830,96 @@ class ChromaCollection(Generic[TDocument], VectorCollection[TDocument]):
                 updated_document=None,
             )
 
+    @override
+    async def update_many(
+        self,
+        filters: Where,
+        params: TDocument,
+        upsert: bool = False,
+    ) -> UpdateManyResult:
+        embeddings_by_content: dict[str, Sequence[float]] = {}
+
+        while True:
+            async with self._lock.writer_lock:
+                docs = self._unembedded_collection.get(where=cast(chromadb.Where, filters) or None)[
+                    "metadatas"
+                ]
+
+                updated_documents = [{**doc, **params} for doc in docs or []]
+                changed = [
+                    u for u, d in zip(updated_documents, docs or []) if u["content"] != d["content"]
+                ]
+                unembedded = [
+                    str(u["content"])
+                    for u in changed
+                    if str(u["content"]) not in embeddings_by_content
+                ]
+
+                if not unembedded:
+                    if updated_documents:
+                        self._apply_updates(updated_documents, changed, embeddings_by_content)
+                    break
+
+            # Embedding happens outside the lock, after which the documents are matched again
+            embeddings = (await self._embedder.embed(unembedded)).vectors
+            embeddings_by_content.update(zip(unembedded, embeddings))
+
+        if not docs and upsert:
+            await self.insert_one(params)
+
+        return UpdateManyResult(
+            acknowledged=True,
+            matched_count=len(docs or []),
+            modified_count=len(docs or []),
+        )
+
+    def _apply_updates(
+        self,
+        updated_documents: Sequence[Mapping[str, Any]],
+        changed: Sequence[Mapping[str, Any]],
+        embeddings_by_content: Mapping[str, Sequence[float]],
+    ) -> None:
+        self._version += 1
+
+        self._unembedded_collection.update(
+            ids=[str(d["id"]) for d in updated_documents],
+            documents=[str(d["content"]) for d in updated_documents],
+            metadatas=[cast(chromadb.Metadata, d) for d in updated_documents],
+            embeddings=[[0]] * len(updated_documents),
+        )
+        self._unembedded_collection.modify(
+            metadata={**self._unembedded_collection.metadata, **{"version": self._version}}
+        )
+
+        # Some of the documents may not have been indexed yet if indexing is underway
+        if changed:
+            self.embedded_collection.upsert(
+                ids=[str(d["id"]) for d in changed],
+                documents=[str(d["content"]) for d in changed],
+                metadatas=[cast(chromadb.Metadata, d) for d in changed],
+                embeddings=[embeddings_by_content[str(d["content"])] for d in changed],  # type: ignore
+            )
+
+        # Documents whose content is unchanged keep their embeddings
+        changed_ids = {d["id"] for d in changed}
+
+        if unchanged := [d for d in updated_documents if d["id"] not in changed_ids]:
+            self.embedded_collection.update(
+                ids=[str(d["id"]) for d in unchanged],
+                metadatas=[cast(chromadb.Metadata, d) for d in unchanged],
+            )
+
+        self.embedded_collection.modify(
+            metadata={**self.embedded_collection.metadata, **{"version": self._version}}
+        )
+
     @override
     async def delete_one(
         self,
         filters: Where,
     ) -> DeleteResult[TDocument]:
         async with self._lock.writer_lock:
-            if docs := self.embedded_collection.get(where=cast(chromadb.Where, filters) or None)[
+            if docs := self._unembedded_collection.get(where=cast(chromadb.Where, filters) or None)[
                 "metadatas"
             ]:
                 if len(docs) > 1:
@@ -628,6 +952,31 @@ class ChromaCollection(Generic[TDocument], VectorCollection[TDocument]):
                 deleted_document=None,
             )
 
+    @override
+    async def delete_many(
+        self,
+        filters: Where,
+    ) -> DeleteManyResult:
+        async with self._lock.writer_lock:
+            ids = self._unembedded_collection.get(where=cast(chromadb.Where, filters) or None)[
+                "ids"
+            ]
+
+            if ids:
+                self._version += 1
+
+                self._unembedded_collection.delete(ids=ids)
+                self._unembedded_collection.modify(
+                    metadata={**self._unembedded_collection.metadata, **{"version": self._version}}
+                )
+
+                self.embedded_collection.delete(ids=ids)
+                self.embedded_collection.modify(
+                    metadata={**self.embedded_collection.metadata, **{"version": self._version}}
+                )
+
+        return DeleteManyResult(acknowledged=True, deleted_count=len(ids))
+
     @override
     async def find_similar_documents(
         self,
@@ -642,6 +991,10 @@ class ChromaCollection(Generic[TDocument], VectorCollection[TDocument]):
                 where=cast(chromadb.Where, filters) or None,
                 query_embeddings=query_embeddings,
                 n_results=k,
+                include=[
+                    IncludeEnum.metadatas,
+                    IncludeEnum.embeddings,
+                ],
             )
 
             if not docs["metadatas"]:
@@ -651,8 +1004,29 @@ class ChromaCollection(Generic[TDocument], VectorCollection[TDocument]):
                 f"Similar documents found\n{json.dumps(docs['metadatas'][0], indent=2)}"
             )
 
-            assert docs["distances"]
+            assert docs["embeddings"] is not None
+
+            # Collections rank by their configured space (L2 by default), which agrees
+            # with cosine similarity for normalized embeddings; report the latter.
             return [
-                SimilarDocumentResult(document=cast(TDocument, m), distance=d)
-                for m, d in zip(docs["metadatas"][0], docs["distances"][0])
+                SimilarDocumentResult(document=cast(TDocument, m), distance=1.0 - s)
+                for m, s in zip(
+                    docs["metadatas"][0],
+                    _cosine_similarities(query_embeddings[0], docs["embeddings"][0]),
+                )
             ]
+
+
+def _cosine_similarities(query: Sequence[float], vectors: Any) -> list[float]:
+    query_array = np.asarray(query, dtype=np.float32)
+    matrix = np.asarray(vectors, dtype=np.float32).reshape(-1, len(query_array))
+
+    norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(query_array)
+    similarities = np.divide(
+        matrix @ query_array,
+        norms,
+        out=np.zeros(len(matrix), dtype=np.float32),
+        where=norms > 0,
+    )
+
+    return [float(s) for s in similarities]
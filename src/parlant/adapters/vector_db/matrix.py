@@ -0,0 +1,768 @@
+# Copyright 2025 Emcie Co Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+import asyncio
+import json
+import os
+from pathlib import Path
+from typing import IO, Any, Awaitable, Callable, Generic, Optional, Sequence, cast
+import numpy as np
+from numpy.typing import NDArray
+from typing_extensions import NotRequired, TypedDict, override, Self
+
+from Daneel.core.common import JSONSerializable
+from Daneel.core.loggers import Logger
+from Daneel.core.nlp.embedding import Embedder, EmbedderFactory
+from Daneel.core.persistence.common import Where, ensure_is_total
+from Daneel.core.persistence.document_index import DEFAULT_INDEXED_FIELDS, IndexedDocuments
+from Daneel.core.persistence.vector_index import IVFIndex, IVFParameters, top_k
+from Daneel.core.persistence.vector_database import (
+    BaseDocument,
+    DeleteManyResult,
+    DeleteResult,
+    InsertManyResult,
+    InsertResult,
+    SimilarDocumentResult,
+    UpdateManyResult,
+    UpdateResult,
+    VectorCollection,
+    VectorDatabase,
+    TDocument,
+)
+
+# Tag lists are indexed by each tag, so that searches within tags are narrowed down
+# through the index rather than by scanning
+DEFAULT_INDEXED_VECTOR_FIELDS = (*DEFAULT_INDEXED_FIELDS, "tags")
+
+
+class MatrixVectorDatabase(VectorDatabase):
+    """Stores each collection's embeddings in a contiguous, memory-mapped float32 matrix.
+
+    Similarity search is a single matrix-vector product over the (filtered) rows,
+    followed by a partial sort, so its cost has no per-document Python overhead.
+    Embeddings persist across restarts; only documents whose content changed
+    during loading (or all of them, if the embedder changed) are re-embedded.
+
+    With ann parameters, large collections are searched approximately through an
+    IVF index (see IVFIndex) rather than exhaustively.
+    """
+
+    def __init__(
+        self,
+        logger: Logger,
+        dir_path: Path,
+        embedder_factory: EmbedderFactory,
+        indexed_fields: Sequence[str] = DEFAULT_INDEXED_VECTOR_FIELDS,
+        ann: Optional[IVFParameters] = None,
+    ) -> None:
+        self._dir_path = dir_path
+        self._logger = logger
+        self._embedder_factory = embedder_factory
+        self._indexed_fields = indexed_fields
+        self._ann = ann
+
+        self._collections: dict[str, MatrixVectorCollection[BaseDocument]] = {}
+        self._metadata: dict[str, JSONSerializable] = {}
+
+    @property
+    def _metadata_path(self) -> Path:
+        return self._dir_path / "metadata.json"
+
+    async def __aenter__(self) -> Self:
+        self._dir_path.mkdir(parents=True, exist_ok=True)
+
+        if self._metadata_path.exists():
+            self._metadata = json.loads(self._metadata_path.read_text())
+
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: Optional[type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[object],
+    ) -> None:
+        for collection in self._collections.values():
+            collection.close()
+
+    def _collection_path(self, name: str) -> Path:
+        return self._dir_path / name
+
+    async def _open_collection(
+        self,
+        name: str,
+        schema: type[TDocument],
+        embedder_type: type[Embedder],
+        document_loader: Optional[Callable[[BaseDocument], Awaitable[Optional[TDocument]]]],
+    ) -> MatrixVectorCollection[TDocument]:
+        collection = MatrixVectorCollection(
+            self._logger,
+            dir_path=self._collection_path(name),
+            name=name,
+            schema=schema,
+            embedder=self._embedder_factory.create_embedder(embedder_type),
+            indexed_fields=self._indexed_fields,
+            ann=self._ann,
+        )
+
+        await collection.load(document_loader)
+
+        self._collections[name] = cast(MatrixVectorCollection[BaseDocument], collection)
+
+        return collection
+
+    @override
+    async def create_collection(
+        self,
+        name: str,
+        schema: type[TDocument],
+        embedder_type: type[Embedder],
+    ) -> MatrixVectorCollection[TDocument]:
+        if name in self._collections or self._collection_path(name).exists():
+            raise ValueError(f'Collection "{name}" already exists.')
+
+        return await self._open_collection(name, schema, embedder_type, document_loader=None)
+
+    @override
+    async def get_collection(
+        self,
+        name: str,
+        schema: type[TDocument],
+        embedder_type: type[Embedder],
+        document_loader: Callable[[BaseDocument], Awaitable[Optional[TDocument]]],
+    ) -> MatrixVectorCollection[TDocument]:
+        if collection := self._collections.get(name):
+            return cast(MatrixVectorCollection[TDocument], collection)
+
+        if self._collection_path(name).exists():
+            return await self._open_collection(name, schema, embedder_type, document_loader)
+
+        raise ValueError(f'Matrix collection "{name}" not found.')
+
+    @override
+    async def get_or_create_collection(
+        self,
+        name: str,
+        schema: type[TDocument],
+        embedder_type: type[Embedder],
+        document_loader: Callable[[BaseDocument], Awaitable[Optional[TDocument]]],
+    ) -> MatrixVectorCollection[TDocument]:
+        if collection := self._collections.get(name):
+            assert schema == collection._schema
+            return cast(MatrixVectorCollection[TDocument], collection)
+
+        return await self._open_collection(name, schema, embedder_type, document_loader)
+
+    @override
+    async def delete_collection(
+        self,
+        name: str,
+    ) -> None:
+        if name not in self._collections:
+            raise ValueError(f'Collection "{name}" not found.')
+
+        self._collections.pop(name).destroy()
+
+    @override
+    async def upsert_metadata(
+        self,
+        key: str,
+        value: JSONSerializable,
+    ) -> None:
+        self._metadata[key] = value
+        self._metadata_path.write_text(json.dumps(self._metadata))
+
+    @override
+    async def remove_metadata(
+        self,
+        key: str,
+    ) -> None:
+        self._metadata.pop(key)
+        self._metadata_path.write_text(json.dumps(self._metadata))
+
+    @override
+    async def read_metadata(
+        self,
+    ) -> dict[str, JSONSerializable]:
+        return self._metadata
+
+
+class _DocumentLogEntry(TypedDict):
+    row: int
+    document: NotRequired[BaseDocument]
+    """Absent if the document in this row was deleted"""
+
+
+class MatrixVectorCollection(Generic[TDocument], VectorCollection[TDocument]):
+    INITIAL_CAPACITY = 256
+
+    LOG_COMPACTION_THRESHOLD = 1000
+    """Minimal number of logged changes before they're folded into the documents snapshot"""
+
+    def __init__(
+        self,
+        logger: Logger,
+        dir_path: Path,
+        name: str,
+        schema: type[TDocument],
+        embedder: Embedder,
+        indexed_fields: Sequence[str] = DEFAULT_INDEXED_VECTOR_FIELDS,
+        ann: Optional[IVFParameters] = None,
+    ) -> None:
+        self._logger = logger
+        self._dir_path = dir_path
+        self._name = name
+        self._schema = schema
+        self._embedder = embedder
+        self._indexed_fields = indexed_fields
+        self._ann = ann
+
+        self._lock = asyncio.Lock()
+
+        # Document keys double as row numbers in the vector matrix.
+        # Rows of deleted documents are masked out, and compacted on the next load.
+        self._documents: IndexedDocuments[TDocument] = IndexedDocuments([], indexed_fields)
+        self._vectors: NDArray[np.float32] = np.zeros((0, embedder.dimensions), np.float32)
+        self._live: NDArray[np.bool_] = np.zeros(0, dtype=np.bool_)
+        self._size = 0
+
+        # Approximate search index, only used if enabled and the collection is large enough
+        self._index: Optional[IVFIndex] = IVFIndex(ann) if ann else None
+
+        # Writes append their changes to a log rather than rewriting the documents snapshot.
+        # Each snapshot has its own log, named by the snapshot's generation.
+        self._generation = 0
+        self._log_file: Optional[IO[str]] = None
+        self._logged_changes = 0
+
+        # Loading renumbers rows, so it writes the vectors to a new file, which only the
+        # snapshot written after it refers to. A crash in between leaves the old pair intact.
+        self._vectors_file = "vectors.npy"
+
+    @property
+    def _documents_path(self) -> Path:
+        return self._dir_path / "documents.json"
+
+    @property
+    def _vectors_path(self) -> Path:
+        return self._dir_path / self._vectors_file
+
+    @property
+    def _index_path(self) -> Path:
+        return self._dir_path / "ivf.npz"
+
+    def _log_path(self, generation: int) -> Path:
+        return self._dir_path / f"documents.{generation}.log"
+
+    async def load(
+        self,
+        document_loader: Optional[Callable[[BaseDocument], Awaitable[Optional[TDocument]]]],
+    ) -> None:
+        self._dir_path.mkdir(parents=True, exist_ok=True)
+
+        stored_documents: list[BaseDocument] = []
+        stored_rows: list[int] = []
+        stored_vectors: Optional[NDArray[np.float32]] = None
+
+        if self._documents_path.exists():
+            data = json.loads(self._documents_path.read_text())
+            self._generation = data.get("generation", 0)
+            self._vectors_file = data.get("vectors_file", "vectors.npy")
+
+            stored = self._replay_log(dict(zip(data["rows"], data["documents"])))
+            stored_rows, stored_documents = list(stored.keys()), list(stored.values())
+
+            if data["embedder_id"] != self._embedder.id:
+                self._logger.info(
+                    f"Embedder of vector collection '{self._name}' changed; re-embedding "
+                    f"{len(stored_documents)} documents"
+                )
+            elif not self._vectors_path.exists():
+                self._logger.warning(
+                    f"Vectors of vector collection '{self._name}' are missing; re-embedding "
+                    f"{len(stored_documents)} documents"
+                )
+            else:
+                stored_vectors = np.load(self._vectors_path, mmap_mode="r")
+
+        loaded: list[tuple[TDocument, Optional[NDArray[np.float32]]]] = []
+        source_rows: list[int] = []
+
+        for row, stored in zip(stored_rows, stored_documents):
+            document = await document_loader(stored) if document_loader else stored
+
+            if not document:
+                self._logger.warning(f'Failed to load document "{stored}"')
+                continue
+
+            reusable = stored_vectors is not None and document["checksum"] == stored["checksum"]
+            source_rows.append(row if reusable else -1)
+            loaded.append(
+                (
+                    cast(TDocument, document),
+                    np.array(stored_vectors[row])
+                    if reusable and stored_vectors is not None
+                    else None,
+                )
+            )
+
+        if outdated := [i for i, (_, vector) in enumerate(loaded) if vector is None]:
+            embeddings = (
+                await self._embedder.embed([loaded[i][0]["content"] for i in outdated])
+            ).vectors
+
+            for i, embedding in zip(outdated, embeddings):
+                loaded[i] = (loaded[i][0], _normalize(embedding))
+
+        del stored_vectors
+
+        stored_vectors_path = self._vectors_path
+        self._vectors_file = f"vectors.{self._generation + 1}.npy"
+
+        self._allocate(max(self.INITIAL_CAPACITY, len(loaded)))
+
+        # Rows are re-assigned contiguously, which compacts away deleted ones
+        for document, vector in loaded:
+            self._append(document, cast(NDArray[np.float32], vector))
+
+        self._write_snapshot()
+
+        if stored_vectors_path != self._vectors_path:
+            stored_vectors_path.unlink(missing_ok=True)
+
+        if self._ann:
+            self._load_index(np.array(source_rows, dtype=np.int64))
+
+    def _replay_log(self, documents: dict[int, BaseDocument]) -> dict[int, BaseDocument]:
+        log_path = self._log_path(self._generation)
+
+        if not log_path.exists():
+            return documents
+
+        lines = log_path.read_text().splitlines()
+
+        for i, line in enumerate(lines):
+            try:
+                entry = cast(_DocumentLogEntry, json.loads(line))
+            except json.JSONDecodeError:
+                if i < len(lines) - 1:
+                    raise
+
+                self._logger.warning(
+                    f"Discarding torn trailing entry in the log of vector collection '{self._name}'"
+                )
+                break
+
+            if "document" in entry:
+                documents[entry["row"]] = entry["document"]
+            else:
+                documents.pop(entry["row"], None)
+
+        return documents
+
+    def _load_index(self, source_rows: NDArray[np.int64]) -> None:
+        assert self._ann
+
+        if self._index_path.exists() and (source_rows >= 0).any():
+            # Cluster assignments of reused vectors carry over to their new rows
+            self._index = IVFIndex.load(self._index_path, self._ann)
+            self._index.add(self._vectors, self._index.remap(source_rows))
+        else:
+            self._index_path.unlink(missing_ok=True)
+
+        self._maintain_index()
+
+    def _maintain_index(self) -> None:
+        if self._index and self._index.needs_training(len(self._documents)):
+            self._logger.info(
+                f"Training approximate search index of vector collection '{self._name}' "
+                f"over {len(self._documents)} documents"
+            )
+
+            self._index.train(self._vectors, np.flatnonzero(self._live[: self._size]))
+            self._index.save(self._index_path)
+
+    def close(self) -> None:
+        if self._logged_changes:
+            self._write_snapshot()
+
+        self._close_log()
+
+        if isinstance(self._vectors, np.memmap):
+            self._vectors.flush()
+
+        # Row assignments are saved on close only. Rows missing from a stale index
+        # are simply re-assigned on load.
+        if self._index and self._index.is_trained:
+            self._index.save(self._index_path)
+
+    def destroy(self) -> None:
+        self.close()
+
+        for vectors_path in self._dir_path.glob("vectors*.npy"):
+            vectors_path.unlink()
+
+        self._documents_path.unlink(missing_ok=True)
+        self._log_path(self._generation).unlink(missing_ok=True)
+        self._index_path.unlink(missing_ok=True)
+        self._dir_path.rmdir()
+
+    def _allocate(self, capacity: int) -> None:
+        """(Re)creates the memory-mapped matrix with the given capacity, keeping existing rows."""
+        staging_path = self._vectors_path.with_suffix(".staging.npy")
+
+        vectors = np.lib.format.open_memmap(
+            staging_path,
+            mode="w+",
+            dtype=np.float32,
+            shape=(capacity, self._embedder.dimensions),
+        )
+        vectors[: self._size] = self._vectors[: self._size]
+        vectors.flush()
+
+        live = np.zeros(capacity, dtype=np.bool_)
+        live[: self._size] = self._live[: self._size]
+
+        del self._vectors
+        os.replace(staging_path, self._vectors_path)
+
+        self._vectors = np.load(self._vectors_path, mmap_mode="r+")
+        self._live = live
+
+    def _append(self, document: TDocument, vector: NDArray[np.float32]) -> None:
+        if self._size == len(self._vectors):
+            self._allocate(2 * len(self._vectors))
+
+        row = self._documents.append(document)
+        assert row == self._size
+
+        self._vectors[row] = vector
+        self._live[row] = True
+        self._size += 1
+
+    def _write_snapshot(self) -> None:
+        """Folds all of the logged changes into a new snapshot of the documents"""
+        if isinstance(self._vectors, np.memmap):
+            self._vectors.flush()
+
+        self._close_log()
+
+        rows, documents = zip(*self._documents.find({})) if len(self._documents) else ((), ())
+        previous_log_path = self._log_path(self._generation)
+        self._generation += 1
+
+        # The snapshot is replaced atomically, and only then is the log it covers dropped
+        staging_path = self._documents_path.with_suffix(".staging.json")
+        staging_path.write_text(
+            json.dumps(
+                {
+                    "embedder_id": self._embedder.id,
+                    "generation": self._generation,
+                    "vectors_file": self._vectors_file,
+                    "rows": rows,
+                    "documents": documents,
+                },
+                ensure_ascii=False,
+            )
+        )
+        os.replace(staging_path, self._documents_path)
+
+        previous_log_path.unlink(missing_ok=True)
+        self._logged_changes = 0
+
+    def _log_changes(self, entries: Sequence[_DocumentLogEntry]) -> None:
+        # Vectors of logged rows must reach the disk before the entries referring to them
+        if isinstance(self._vectors, np.memmap):
+            self._vectors.flush()
+
+        if not self._log_file:
+            self._log_file = self._log_path(self._generation).open("a", encoding="utf-8")
+
+        self._log_file.write(
+            "".join(json.dumps(entry, ensure_ascii=False) + "\n" for entry in entries)
+        )
+        self._log_file.flush()
+
+        self._logged_changes += len(entries)
+
+        if self._logged_changes >= max(self.LOG_COMPACTION_THRESHOLD, len(self._documents)):
+            self._write_snapshot()
+
+    def _close_log(self) -> None:
+        if self._log_file:
+            self._log_file.close()
+            self._log_file = None
+
+    async def _embed(self, content: str) -> NDArray[np.float32]:
+        return _normalize((await self._embedder.embed([content])).vectors[0])
+
+    @override
+    async def find(
+        self,
+        filters: Where,
+    ) -> Sequence[TDocument]:
+        return [doc for _, doc in self._documents.find(filters)]
+
+    @override
+    async def find_one(
+        self,
+        filters: Where,
+    ) -> Optional[TDocument]:
+        if result := self._documents.find_first(filters):
+            return result[1]
+
+        return None
+
+    @override
+    async def insert_one(
+        self,
+        document: TDocument,
+    ) -> InsertResult:
+        ensure_is_total(document, self._schema)
+
+        vector = await self._embed(document["content"])
+
+        async with self._lock:
+            self._append(document, vector)
+            self._log_changes([{"row": self._size - 1, "document": document}])
+
+            if self._index:
+                self._index.add(self._vectors, np.array([self._size - 1]))
+                self._maintain_index()
+
+        return InsertResult(acknowledged=True)
+
+    @override
+    async def insert_many(
+        self,
+        documents: Sequence[TDocument],
+    ) -> InsertManyResult:
+        for document in documents:
+            ensure_is_total(document, self._schema)
+
+        if not documents:
+            return InsertManyResult(acknowledged=True, inserted_count=0)
+
+        embeddings = (await self._embedder.embed([d["content"] for d in documents])).vectors
+
+        async with self._lock:
+            first_row = self._size
+
+            for document, embedding in zip(documents, embeddings):
+                self._append(document, _normalize(embedding))
+
+            self._log_changes(
+                [
+                    {"row": row, "document": document}
+                    for row, document in enumerate(documents, start=first_row)
+                ]
+            )
+
+            if self._index:
+                self._index.add(self._vectors, np.arange(first_row, self._size))
+                self._maintain_index()
+
+        return InsertManyResult(acknowledged=True, inserted_count=len(documents))
+
+    @override
+    async def update_one(
+        self,
+        filters: Where,
+        params: TDocument,
+        upsert: bool = False,
+    ) -> UpdateResult[TDocument]:
+        async with self._lock:
+            if result := self._documents.find_first(filters):
+                row, document = result
+                updated_document = cast(TDocument, {**document, **params})
+
+                if updated_document["content"] != document["content"]:
+                    self._vectors[row] = await self._embed(updated_document["content"])
+
+                    if self._index:
+                        self._index.add(self._vectors, np.array([row]))
+
+                self._documents.replace(row, updated_document)
+                self._log_changes([{"row": row, "document": updated_document}])
+
+                return UpdateResult(
+                    acknowledged=True,
+                    matched_count=1,
+                    modified_count=1,
+                    updated_document=updated_document,
+                )
+
+        if upsert:
+            await self.insert_one(params)
+
+            return UpdateResult(
+                acknowledged=True,
+                matched_count=0,
+                modified_count=0,
+                updated_document=params,
+            )
+
+        return UpdateResult(
+            acknowledged=True,
+            matched_count=0,
+            modified_count=0,
+            updated_document=None,
+        )
+
+    @override
+    async def update_many(
+        self,
+        filters: Where,
+        params: TDocument,
+        upsert: bool = False,
+    ) -> UpdateManyResult:
+        embeddings_by_content: dict[str, NDArray[np.float32]] = {}
+
+        while True:
+            async with self._lock:
+                matches = self._documents.find(filters)
+
+                updated = [(row, cast(TDocument, {**d, **params})) for row, d in matches]
+                changed = [
+                    (row, u)
+                    for (row, u), (_, d) in zip(updated, matches)
+                    if u["content"] != d["content"]
+                ]
+                unembedded = [
+                    u["content"] for _, u in changed if u["content"] not in embeddings_by_content
+                ]
+
+                if not unembedded:
+                    for row, u in changed:
+                        self._vectors[row] = embeddings_by_content[u["content"]]
+
+                    if changed and self._index:
+                        self._index.add(self._vectors, np.array([row for row, _ in changed]))
+
+                    for row, updated_document in updated:
+                        self._documents.replace(row, updated_document)
+
+                    if matches:
+                        self._log_changes([{"row": row, "document": u} for row, u in updated])
+
+                    break
+
+            # Embedding happens outside the lock, after which the documents are matched again
+            embeddings = (await self._embedder.embed(unembedded)).vectors
+            embeddings_by_content.update(zip(unembedded, map(_normalize, embeddings)))
+
+        if not matches and upsert:
+            await self.insert_one(params)
+
+        return UpdateManyResult(
+            acknowledged=True,
+            matched_count=len(matches),
+            modified_count=len(matches),
+        )
+
+    @override
+    async def delete_one(
+        self,
+        filters: Where,
+    ) -> DeleteResult[TDocument]:
+        async with self._lock:
+            if result := self._documents.find_first(filters):
+                row, _ = result
+
+                document = self._documents.remove(row)
+                self._live[row] = False
+
+                if self._index:
+                    self._index.remove(np.array([row]))
+                self._log_changes([{"row": row}])
+
+                return DeleteResult(deleted_count=1, acknowledged=True, deleted_document=document)
+
+        return DeleteResult(
+            acknowledged=True,
+            deleted_count=0,
+            deleted_document=None,
+        )
+
+    @override
+    async def delete_many(
+        self,
+        filters: Where,
+    ) -> DeleteManyResult:
+        async with self._lock:
+            rows = np.array([row for row, _ in self._documents.find(filters)], dtype=np.int64)
+
+            if len(rows):
+                for row in rows:
+                    self._documents.remove(int(row))
+                self._live[rows] = False
+
+                if self._index:
+                    self._index.remove(rows)
+                self._log_changes([{"row": int(row)} for row in rows])
+
+        return DeleteManyResult(acknowledged=True, deleted_count=len(rows))
+
+    @override
+    async def find_similar_documents(
+        self,
+        filters: Where,
+        query: str,
+        k: int,
+    ) -> Sequence[SimilarDocumentResult[TDocument]]:
+        if not len(self._documents) or k <= 0:
+            return []
+
+        query_vector = await self._embed(query)
+
+        if filters:
+            rows = np.fromiter(
+                (row for row, _ in self._documents.find(filters)),
+                dtype=np.int64,
+            )
+        else:
+            rows = np.flatnonzero(self._live[: self._size])
+
+        if not len(rows):
+            return []
+
+        if self._index and self._index.is_trained and len(rows) >= self._index.parameters.min_size:
+            candidates: Optional[NDArray[np.bool_]] = None
+
+            if filters:
+                candidates = np.zeros(len(self._live), dtype=np.bool_)
+                candidates[rows] = True
+
+            rows, similarities = self._index.search(self._vectors, query_vector, k, candidates)
+        else:
+            similarities = self._vectors[rows] @ query_vector
+
+            top = top_k(similarities, k)
+            rows, similarities = rows[top], similarities[top]
+
+        return [
+            SimilarDocumentResult(
+                document=self._documents.get(int(row)),
+                # Vectors are normalized, so this is the cosine distance
+                distance=float(1.0 - similarity),
+            )
+            for row, similarity in zip(rows, similarities)
+        ]
+
+
+def _normalize(vector: Sequence[float] | Any) -> NDArray[np.float32]:
+    array = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(array)
+    return cast(NDArray[np.float32], array / norm if norm else array)
@@ -24,12 +24,15 @@ import nano_vectordb  # type: ignore
 from Daneel.core.common import JSONSerializable
 from Daneel.core.nlp.embedding import Embedder, EmbedderFactory
 from Daneel.core.loggers import Logger
-from Daneel.core.persistence.common import ensure_is_total, matches_filters, Where
+from Daneel.core.persistence.common import compile_filter, ensure_is_total, Where
 from Daneel.core.persistence.vector_database import (
     BaseDocument,
+    DeleteManyResult,
     DeleteResult,
+    InsertManyResult,
     InsertResult,
     SimilarDocumentResult,
+    UpdateManyResult,
     UpdateResult,
     VectorCollection,
     VectorDatabase,
@@ -178,8 +181,10 @@ class TransientVectorCollection(Generic[TDocument], VectorCollection[TDocument])
     def _build_filter_lambda(
         filters: Where,
     ) -> nano_vectordb.dbs.ConditionLambda:
+        predicate = compile_filter(filters)
+
         def filter_lambda(candidate: Mapping[str, Any]) -> bool:
-            return matches_filters(filters, candidate)
+            return predicate(candidate)
 
         return filter_lambda
 
@@ -188,22 +193,19 @@ class TransientVectorCollection(Generic[TDocument], VectorCollection[TDocument])
         self,
         filters: Where,
     ) -> Sequence[TDocument]:
-        result = []
-        for doc in filter(
-            lambda d: matches_filters(filters, d),
-            self._documents,
-        ):
-            result.append(doc)
+        predicate = compile_filter(filters)
 
-        return result
+        return [doc for doc in self._documents if predicate(doc)]
 
     @override
     async def find_one(
         self,
         filters: Where,
     ) -> Optional[TDocument]:
+        predicate = compile_filter(filters)
+
         for doc in self._documents:
-            if matches_filters(filters, doc):
+            if predicate(doc):
                 return doc
 
         return None
@@ -226,6 +228,32 @@ class TransientVectorCollection(Generic[TDocument], VectorCollection[TDocument])
 
         return InsertResult(acknowledged=True)
 
+    @override
+    async def insert_many(
+        self,
+        documents: Sequence[TDocument],
+    ) -> InsertManyResult:
+        for document in documents:
+            ensure_is_total(document, self._schema)
+
+        if documents:
+            await self._upsert_embedded(documents)
+
+            async with self._lock:
+                self._documents.extend(documents)
+
+        return InsertManyResult(acknowledged=True, inserted_count=len(documents))
+
+    async def _upsert_embedded(self, documents: Sequence[TDocument]) -> None:
+        embeddings = (await self._embedder.embed([d["content"] for d in documents])).vectors
+
+        self._nano_db.upsert(
+            [
+                {**d, "__id__": d["id"], "__vector__": np.array(e, dtype=np.float32)}
+                for d, e in zip(documents, embeddings)
+            ]
+        )
+
     @override
     async def update_one(
         self,
@@ -234,8 +262,10 @@ class TransientVectorCollection(Generic[TDocument], VectorCollection[TDocument])
         upsert: bool = False,
     ) -> UpdateResult[TDocument]:
         async with self._lock:
+            predicate = compile_filter(filters)
+
             for i, doc in enumerate(self._documents):
-                if matches_filters(filters, doc):
+                if predicate(doc):
                     if "content" in params:
                         embeddings = list((await self._embedder.embed([params["content"]])).vectors)
                     else:
@@ -272,13 +302,77 @@ class TransientVectorCollection(Generic[TDocument], VectorCollection[TDocument])
                 updated_document=None,
             )
 
+    @override
+    async def update_many(
+        self,
+        filters: Where,
+        params: TDocument,
+        upsert: bool = False,
+    ) -> UpdateManyResult:
+        predicate = compile_filter(filters)
+        embeddings_by_content: dict[str, Sequence[float]] = {}
+
+        while True:
+            async with self._lock:
+                matches = [i for i, doc in enumerate(self._documents) if predicate(doc)]
+
+                updated = [(i, cast(TDocument, {**self._documents[i], **params})) for i in matches]
+                changed = [u for i, u in updated if u["content"] != self._documents[i]["content"]]
+                unembedded = [
+                    u["content"] for u in changed if u["content"] not in embeddings_by_content
+                ]
+
+                if not unembedded:
+                    for i, updated_document in updated:
+                        self._documents[i] = updated_document
+
+                    if changed:
+                        self._nano_db.upsert(
+                            [
+                                {
+                                    **d,
+                                    "__id__": d["id"],
+                                    "__vector__": np.array(
+                                        embeddings_by_content[d["content"]], dtype=np.float32
+                                    ),
+                                }
+                                for d in changed
+                            ]
+                        )
+
+                    # Documents whose content is unchanged keep their vectors;
+                    # nano-vectordb hands out its stored data, which is updated in place
+                    changed_ids = {d["id"] for d in changed}
+                    unchanged_by_id = {u["id"]: u for _, u in updated if u["id"] not in changed_ids}
+
+                    if unchanged_by_id:
+                        for data in self._nano_db.get(list(unchanged_by_id)):
+                            data.update(unchanged_by_id[data["__id__"]])
+
+                    break
+
+            # Embedding happens outside the lock, after which the documents are matched again
+            embeddings = (await self._embedder.embed(unembedded)).vectors
+            embeddings_by_content.update(zip(unembedded, embeddings))
+
+        if not matches and upsert:
+            await self.insert_one(params)
+
+        return UpdateManyResult(
+            acknowledged=True,
+            matched_count=len(matches),
+            modified_count=len(matches),
+        )
+
     @override
     async def delete_one(
         self,
         filters: Where,
     ) -> DeleteResult[TDocument]:
+        predicate = compile_filter(filters)
+
         for i, d in enumerate(self._documents):
-            if matches_filters(filters, d):
+            if predicate(d):
                 document = self._documents.pop(i)
 
                 self._nano_db.delete([d["id"]])
@@ -291,6 +385,21 @@ class TransientVectorCollection(Generic[TDocument], VectorCollection[TDocument])
             deleted_document=None,
         )
 
+    @override
+    async def delete_many(
+        self,
+        filters: Where,
+    ) -> DeleteManyResult:
+        predicate = compile_filter(filters)
+
+        deleted_ids = [d["id"] for d in self._documents if predicate(d)]
+
+        if deleted_ids:
+            self._documents = [d for d in self._documents if not predicate(d)]
+            self._nano_db.delete(deleted_ids)
+
+        return DeleteManyResult(acknowledged=True, deleted_count=len(deleted_ids))
+
     async def find_similar_documents(
         self,
         filters: Where,
@@ -300,18 +409,23 @@ class TransientVectorCollection(Generic[TDocument], VectorCollection[TDocument])
         if not self._documents:
             return []
 
+        # nano-vectordb fails on filters that match nothing
+        if filters and not any(map(compile_filter(filters), self._documents)):
+            return []
+
         query_embeddings = list((await self._embedder.embed([query])).vectors)
         vector = np.array(query_embeddings[0], dtype=np.float32)
 
         keys_to_exclude = {"__id__", "__metrics__"}
 
+        results = self._nano_db.query(
+            query=vector,
+            top_k=k,
+            filter_lambda=self._build_filter_lambda(filters),
+        )
+
         docs = [
-            {key: value for key, value in d.items() if key not in keys_to_exclude}
-            for d in self._nano_db.query(
-                query=vector,
-                top_k=k,
-                filter_lambda=self._build_filter_lambda(filters),
-            )
+            {key: value for key, value in d.items() if key not in keys_to_exclude} for d in results
         ]
 
         self._logger.debug(f"Similar documents found\n{json.dumps(docs, indent=2)}")
@@ -319,7 +433,9 @@ class TransientVectorCollection(Generic[TDocument], VectorCollection[TDocument])
         return [
             SimilarDocumentResult(
                 document=cast(TDocument, d),
-                distance=i,
+                # nano-vectordb normalizes vectors, so its metric is the cosine similarity
+                # (or NaN, for zero vectors)
+                distance=1.0 - float(np.nan_to_num(m["__metrics__"])),
             )
-            for i, d in enumerate(docs)
+            for d, m in zip(docs, results)
         ]
@@ -105,12 +105,14 @@ class CompositionModeDTO(Enum):
 
     Available options:
     - fluid
+    - fluid_streaming
     - strict_utterance
     - composited_utterance
     - fluid_utterance
     """
 
     FLUID = "fluid"
+    FLUID_STREAMING = "fluid_streaming"
     STRICT_UTTERANCE = "strict_utterance"
     COMPOSITED_UTTERANCE = "composited_utterance"
     FLUID_UTTERANCE = "fluid_utterance"
@@ -221,6 +223,8 @@ def _composition_mode_dto_to_composition_mode(dto: CompositionModeDTO) -> Compos
     match dto:
         case CompositionModeDTO.FLUID:
             return CompositionMode.FLUID
+        case CompositionModeDTO.FLUID_STREAMING:
+            return CompositionMode.FLUID_STREAMING
         case CompositionModeDTO.STRICT_UTTERANCE:
             return CompositionMode.STRICT_UTTERANCE
         case CompositionModeDTO.COMPOSITED_UTTERANCE:
@@ -235,6 +239,8 @@ def _composition_mode_to_composition_mode_dto(
     match composition_mode:
         case CompositionMode.FLUID:
             return CompositionModeDTO.FLUID
+        case CompositionMode.FLUID_STREAMING:
+            return CompositionModeDTO.FLUID_STREAMING
         case CompositionMode.STRICT_UTTERANCE:
             return CompositionModeDTO.STRICT_UTTERANCE
         case CompositionMode.COMPOSITED_UTTERANCE:
@@ -40,11 +40,14 @@ from Daneel.core.contextual_correlator import ContextualCorrelator
 from Daneel.core.agents import AgentStore
 from Daneel.core.common import ItemNotFoundError, generate_id
 from Daneel.core.customers import CustomerStore
+from Daneel.core.emission.draft_channel import MessageDraftChannel
 from Daneel.core.evaluations import EvaluationStore, EvaluationListener
 from Daneel.core.utterances import UtteranceStore
 from Daneel.core.relationships import RelationshipStore
 from Daneel.core.guidelines import GuidelineStore
+from Daneel.core.engines.alpha.guideline_matcher import GuidelineMatcher
 from Daneel.core.guideline_tool_associations import GuidelineToolAssociationStore
+from Daneel.core.nlp.embedding import Embedder
 from Daneel.core.nlp.service import NLPService
 from Daneel.core.services.tools.service_registry import ServiceRegistry
 from Daneel.core.sessions import SessionListener, SessionStore
@@ -91,6 +94,7 @@ async def create_api_app(container: Container) -> ASGIApplication:
     tag_store = container[TagStore]
     session_store = container[SessionStore]
     session_listener = container[SessionListener]
+    draft_channel = container[MessageDraftChannel]
     evaluation_store = container[EvaluationStore]
     evaluation_listener = container[EvaluationListener]
     evaluation_service = container[BehavioralChangeEvaluator]
@@ -103,6 +107,8 @@ async def create_api_app(container: Container) -> ASGIApplication:
     service_registry = container[ServiceRegistry]
     nlp_service = container[NLPService]
     application = container[Application]
+    guideline_matcher = container[GuidelineMatcher]
+    embedder = container[Embedder] if Embedder in container.defined_types else None
 
     api_app = FastAPI()
 
@@ -200,6 +206,7 @@ async def create_api_app(container: Container) -> ASGIApplication:
             customer_store=customer_store,
             session_store=session_store,
             session_listener=session_listener,
+            draft_channel=draft_channel,
             nlp_service=nlp_service,
         ),
     )
@@ -297,6 +304,8 @@ async def create_api_app(container: Container) -> ASGIApplication:
             session_store=session_store,
             customer_store=customer_store,
             guideline_store=guideline_store,
+            guideline_retriever=guideline_matcher.retriever,
+            embedder=embedder,
         )
     )
 
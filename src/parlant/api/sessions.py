@@ -12,12 +12,14 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import asyncio
 from datetime import datetime
 from enum import Enum
-from fastapi import APIRouter, HTTPException, Path, Query, status
+from fastapi import APIRouter, Header, HTTPException, Path, Query, status
+from fastapi.responses import StreamingResponse
 from itertools import chain
 from pydantic import Field
-from typing import Annotated, Mapping, Optional, Sequence, Set, TypeAlias, cast
+from typing import Annotated, AsyncIterator, Mapping, Optional, Sequence, Set, TypeAlias, cast
 
 
 from Daneel.api.common import GuidelineIdField, ExampleJson, JSONSerializableDTO, apigen_config
@@ -25,8 +27,9 @@ from Daneel.api.glossary import TermSynonymsField, TermIdPath, TermNameField, Te
 from Daneel.core.agents import AgentId, AgentStore
 from Daneel.core.application import Application
 from Daneel.core.async_utils import Timeout
-from Daneel.core.common import DefaultBaseModel
+from Daneel.core.common import DefaultBaseModel, ItemNotFoundError
 from Daneel.core.customers import CustomerId, CustomerStore
+from Daneel.core.emission.draft_channel import MessageDraftChannel
 from Daneel.core.engines.types import UtteranceReason, UtteranceRequest
 from Daneel.core.loggers import Logger
 from Daneel.core.nlp.generation_info import GenerationInfo
@@ -51,6 +54,8 @@ from Daneel.core.utterances import UtteranceId
 
 API_GROUP = "sessions"
 
+EVENT_STREAM_KEEP_ALIVE_INTERVAL = 15
+
 
 class EventKindDTO(Enum):
     """
@@ -314,6 +319,40 @@ class EventDTO(
     deleted: bool
 
 
+MessageDraftDeltaField: TypeAlias = Annotated[
+    str,
+    Field(
+        description="Text added to the draft since the previous one",
+        examples=["Hello, how can I"],
+    ),
+]
+
+MessageDraftRestartField: TypeAlias = Annotated[
+    bool,
+    Field(
+        description="Whether the draft started over, discarding the text received before",
+        examples=[False],
+    ),
+]
+
+message_draft_example: ExampleJson = {
+    "correlation_id": "corr_13xyz",
+    "delta": "Hello, how can I",
+    "restart": False,
+}
+
+
+class MessageDraftDTO(
+    DefaultBaseModel,
+    json_schema_extra={"example": message_draft_example},
+):
+    """New text of an agent message that is still being composed."""
+
+    correlation_id: EventCorrelationIdField
+    delta: MessageDraftDeltaField
+    restart: MessageDraftRestartField
+
+
 class ConsumptionOffsetsUpdateParamsDTO(
     DefaultBaseModel,
     json_schema_extra={"example": consumption_offsets_example},
@@ -863,6 +902,94 @@ PreparationIterationContextVariablesField: TypeAlias = Annotated[
     ),
 ]
 
+ToolResultCacheInspectionHitsField: TypeAlias = Annotated[
+    int,
+    Field(
+        description="Number of tool calls that were served from the tool result cache",
+        examples=[2],
+    ),
+]
+
+
+ToolResultCacheInspectionMissesField: TypeAlias = Annotated[
+    int,
+    Field(
+        description="Number of calls to cacheable tools that had to be executed",
+        examples=[1],
+    ),
+]
+
+
+ToolResultCacheInspectionHitRateField: TypeAlias = Annotated[
+    float,
+    Field(
+        description="Fraction of calls to cacheable tools that were served from the cache",
+        examples=[0.67],
+    ),
+]
+
+tool_result_cache_inspection_example = {
+    "hits": 2,
+    "misses": 1,
+    "hit_rate": 0.67,
+}
+
+
+class ToolResultCacheInspectionDTO(
+    DefaultBaseModel,
+    json_schema_extra={"example": tool_result_cache_inspection_example},
+):
+    """Tool result cache usage during a preparation iteration."""
+
+    hits: ToolResultCacheInspectionHitsField
+    misses: ToolResultCacheInspectionMissesField
+    hit_rate: ToolResultCacheInspectionHitRateField
+
+
+GuidelineMatchCacheInspectionHitsField: TypeAlias = Annotated[
+    int,
+    Field(
+        description="Number of guideline matching rounds that were served from the match cache",
+        examples=[1],
+    ),
+]
+
+
+GuidelineMatchCacheInspectionMissesField: TypeAlias = Annotated[
+    int,
+    Field(
+        description="Number of guideline matching rounds that required inference",
+        examples=[0],
+    ),
+]
+
+
+GuidelineMatchCacheInspectionHitRateField: TypeAlias = Annotated[
+    float,
+    Field(
+        description="Fraction of guideline matching rounds that were served from the cache",
+        examples=[1.0],
+    ),
+]
+
+guideline_match_cache_inspection_example = {
+    "hits": 1,
+    "misses": 0,
+    "hit_rate": 1.0,
+}
+
+
+class GuidelineMatchCacheInspectionDTO(
+    DefaultBaseModel,
+    json_schema_extra={"example": guideline_match_cache_inspection_example},
+):
+    """Guideline match cache usage during a preparation iteration."""
+
+    hits: GuidelineMatchCacheInspectionHitsField
+    misses: GuidelineMatchCacheInspectionMissesField
+    hit_rate: GuidelineMatchCacheInspectionHitRateField
+
+
 preparation_iteration_example = {
     "generations": preparation_iteration_generations_example,
     "guideline_matches": [guideline_match_example],
@@ -876,6 +1003,8 @@ preparation_iteration_example = {
         }
     ],
     "context_variables": [context_variable_and_value_example],
+    "tool_result_cache": tool_result_cache_inspection_example,
+    "guideline_match_cache": guideline_match_cache_inspection_example,
 }
 
 
@@ -890,6 +1019,8 @@ class PreparationIterationDTO(
     tool_calls: PreparationIterationToolCallsField
     terms: PreparationIterationTermsField
     context_variables: PreparationIterationContextVariablesField
+    tool_result_cache: ToolResultCacheInspectionDTO
+    guideline_match_cache: GuidelineMatchCacheInspectionDTO
 
 
 EventTraceToolCallsField: TypeAlias = Annotated[
@@ -1048,6 +1179,16 @@ def preparation_iteration_to_dto(iteration: PreparationIteration) -> Preparation
             )
             for cv in iteration.context_variables
         ],
+        tool_result_cache=ToolResultCacheInspectionDTO(
+            hits=iteration.tool_result_cache.hits,
+            misses=iteration.tool_result_cache.misses,
+            hit_rate=iteration.tool_result_cache.hit_rate,
+        ),
+        guideline_match_cache=GuidelineMatchCacheInspectionDTO(
+            hits=iteration.guideline_match_cache.hits,
+            misses=iteration.guideline_match_cache.misses,
+            hit_rate=iteration.guideline_match_cache.hit_rate,
+        ),
     )
 
 
@@ -1180,6 +1321,7 @@ def create_router(
     customer_store: CustomerStore,
     session_store: SessionStore,
     session_listener: SessionListener,
+    draft_channel: MessageDraftChannel,
     nlp_service: NLPService,
 ) -> APIRouter:
     router = APIRouter()
@@ -1344,14 +1486,11 @@ def create_router(
         Can filter by agent_id and/or customer_id. Will delete all sessions if no
         filters are provided."""
 
-        sessions = await session_store.list_sessions(
+        await session_store.delete_sessions(
             agent_id=agent_id,
             customer_id=customer_id,
         )
 
-        for s in sessions:
-            await session_store.delete_session(s.id)
-
     @router.patch(
         "/{session_id}",
         operation_id="update_session",
@@ -1692,14 +1831,175 @@ def create_router(
 
         This operation is permanent and cannot be undone."""
 
-        events = await session_store.list_events(
+        await session_store.delete_events(
             session_id=session_id,
             min_offset=min_offset,
-            exclude_deleted=True,
         )
 
-        for e in events:
-            await session_store.delete_event(e.id)
+    @router.get(
+        "/{session_id}/events/stream",
+        operation_id="stream_events",
+        response_class=StreamingResponse,
+        responses={
+            status.HTTP_200_OK: {
+                "description": "Server-sent event stream of the session's events",
+                "content": {"text/event-stream": {}},
+            },
+            status.HTTP_404_NOT_FOUND: {"description": "Session not found"},
+            status.HTTP_422_UNPROCESSABLE_ENTITY: {
+                "description": "Validation error in request parameters"
+            },
+        },
+        **apigen_config(group_name=API_GROUP, method_name="stream_events"),
+    )
+    async def stream_events(
+        session_id: SessionIdPath,
+        min_offset: Optional[MinOffsetQuery] = None,
+        source: Optional[EventSourceDTO] = None,
+        kinds: Optional[KindsQuery] = None,
+        last_event_id: Annotated[Optional[str], Header()] = None,
+    ) -> StreamingResponse:
+        """Streams a session's events as server-sent events, as they are created.
+
+        Each event is sent with its offset as the SSE event ID and its kind as the SSE
+        event type, and its data is the event, serialized as in `list_events`.
+
+        Notes:
+            Resuming:
+            - Events are streamed starting from `min_offset` (or from the beginning)
+            - A reconnecting client that sends the standard `Last-Event-ID` header
+              resumes right after the last event it received
+            Back-pressure:
+            - Events are read from the session store only as fast as the client
+              consumes them, so slow clients never cause events to pile up in memory
+            - A keep-alive comment is sent whenever no events arrive for a while
+        """
+        # Trigger exception if not found
+        _ = await session_store.read_session(session_id)
+
+        kind_list: Sequence[EventKind] = [
+            _event_kind_dto_to_event_kind(EventKindDTO(k))
+            for k in (kinds.split(",") if kinds else [])
+        ]
+        event_source = _event_source_dto_to_event_source(source) if source else None
+
+        next_offset = min_offset or 0
+
+        if last_event_id is not None:
+            try:
+                next_offset = max(next_offset, int(last_event_id) + 1)
+            except ValueError:
+                raise HTTPException(
+                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    detail="Last-Event-ID must be an event offset",
+                )
+
+        async def event_stream() -> AsyncIterator[str]:
+            nonlocal next_offset
+
+            try:
+                while True:
+                    events = await session_store.list_events(
+                        session_id=session_id,
+                        min_offset=next_offset,
+                        source=event_source,
+                        kinds=kind_list,
+                    )
+
+                    for e in events:
+                        # Yielding suspends us until the server has handed the
+                        # previous chunk over to the client, which is what
+                        # applies back-pressure to slow consumers.
+                        yield (
+                            f"id: {e.offset}\n"
+                            f"event: {_event_kind_to_event_kind_dto(e.kind).value}\n"
+                            f"data: {event_to_dto(e).model_dump_json()}\n\n"
+                        )
+
+                        next_offset = e.offset + 1
+
+                    if not events and not await session_listener.wait_for_events(
+                        session_id=session_id,
+                        min_offset=next_offset,
+                        source=event_source,
+                        kinds=kind_list,
+                        timeout=Timeout(EVENT_STREAM_KEEP_ALIVE_INTERVAL),
+                    ):
+                        yield ": keep-alive\n\n"
+            except ItemNotFoundError:
+                # The session was deleted while streaming
+                return
+
+        return StreamingResponse(
+            event_stream(),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    @router.get(
+        "/{session_id}/drafts/stream",
+        operation_id="stream_drafts",
+        response_class=StreamingResponse,
+        responses={
+            status.HTTP_200_OK: {
+                "description": "Server-sent event stream of the session's message drafts",
+                "content": {"text/event-stream": {"example": message_draft_example}},
+            },
+            status.HTTP_404_NOT_FOUND: {"description": "Session not found"},
+        },
+        **apigen_config(group_name=API_GROUP, method_name="stream_drafts"),
+    )
+    async def stream_drafts(
+        session_id: SessionIdPath,
+    ) -> StreamingResponse:
+        """Streams drafts of agent messages as server-sent events, while they are being composed.
+
+        Drafts are only sent by agents using the `fluid_streaming` composition mode.
+        Each draft is sent with the `draft` SSE event type, and its data is a `MessageDraftDTO`.
+
+        Notes:
+            Transience:
+            - Drafts are not stored, so only drafts composed while connected are received
+            - Each draft carries the text added since the previous one;
+              a draft with `restart` set replaces all of the text received before it
+            - The message event emitted once composition is done is the agent's reply,
+              and may differ from the drafts
+            - A keep-alive comment is sent whenever no drafts arrive for a while
+        """
+        # Trigger exception if not found
+        _ = await session_store.read_session(session_id)
+
+        async def draft_stream() -> AsyncIterator[str]:
+            with draft_channel.subscribe(session_id) as drafts:
+                while True:
+                    try:
+                        draft = await asyncio.wait_for(
+                            drafts.get(),
+                            timeout=EVENT_STREAM_KEEP_ALIVE_INTERVAL,
+                        )
+                    except asyncio.TimeoutError:
+                        try:
+                            _ = await session_store.read_session(session_id)
+                        except ItemNotFoundError:
+                            # The session was deleted while streaming
+                            return
+
+                        yield ": keep-alive\n\n"
+                        continue
+
+                    dto = MessageDraftDTO(
+                        correlation_id=draft.correlation_id,
+                        delta=draft.delta,
+                        restart=draft.restart,
+                    )
+
+                    yield f"event: draft\ndata: {dto.model_dump_json()}\n\n"
+
+        return StreamingResponse(
+            draft_stream(),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
 
     @router.get(
         "/{session_id}/events/{event_id}",
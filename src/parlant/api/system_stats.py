@@ -6,7 +6,7 @@ import asyncio
 import psutil
 import time
 from datetime import datetime, timedelta
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from fastapi import APIRouter, status
 from pydantic import BaseModel
 
@@ -14,6 +14,8 @@ from Daneel.core.agents import AgentStore
 from Daneel.core.sessions import SessionStore
 from Daneel.core.customers import CustomerStore
 from Daneel.core.guidelines import GuidelineStore
+from Daneel.core.engines.alpha.guideline_retriever import GuidelineRetriever
+from Daneel.core.nlp.embedding import Embedder
 
 
 class SystemStatus(BaseModel):
@@ -25,6 +27,24 @@ class SystemStatus(BaseModel):
     uptime: float
 
 
+class GuidelineRetrievalStats(BaseModel):
+    retrievals: int
+    candidates: int
+    selected: int
+    selection_ratio: float
+    average_latency: float
+    recall_samples: int
+    average_recall: Optional[float]
+
+
+class EmbeddingInferenceStats(BaseModel):
+    batches: int
+    texts: int
+    average_batch_size: float
+    average_queue_latency: float
+    total_inference_time: float
+
+
 class SystemStats(BaseModel):
     total_agents: int
     active_agents: int
@@ -34,6 +54,8 @@ class SystemStats(BaseModel):
     success_rate: float
     total_guidelines: int
     total_customers: int
+    guideline_retrieval: Optional[GuidelineRetrievalStats] = None
+    embedding_inference: Optional[EmbeddingInferenceStats] = None
 
 
 class SystemInfo(BaseModel):
@@ -47,6 +69,8 @@ def create_router(
     session_store: SessionStore,
     customer_store: CustomerStore,
     guideline_store: GuidelineStore,
+    guideline_retriever: Optional[GuidelineRetriever] = None,
+    embedder: Optional[Embedder] = None,
 ) -> APIRouter:
     router = APIRouter()
     
@@ -101,6 +125,34 @@ def create_router(
                 uptime=time.time() - startup_time,
             )
 
+    def get_guideline_retrieval_stats() -> Optional[GuidelineRetrievalStats]:
+        if not guideline_retriever:
+            return None
+
+        stats = guideline_retriever.stats
+
+        return GuidelineRetrievalStats(
+            retrievals=stats.retrievals,
+            candidates=stats.candidates,
+            selected=stats.selected,
+            selection_ratio=stats.selection_ratio,
+            average_latency=stats.average_latency,
+            recall_samples=stats.recall_samples,
+            average_recall=stats.average_recall,
+        )
+
+    def get_embedding_inference_stats() -> Optional[EmbeddingInferenceStats]:
+        if not embedder or not (stats := embedder.inference_stats):
+            return None
+
+        return EmbeddingInferenceStats(
+            batches=stats.batches,
+            texts=stats.texts,
+            average_batch_size=stats.average_batch_size,
+            average_queue_latency=stats.average_queue_latency,
+            total_inference_time=stats.total_inference_time,
+        )
+
     @router.get(
         "/system/stats",
         operation_id="get_system_stats",
@@ -142,6 +194,8 @@ def create_router(
                 success_rate=98.5,  # Would be calculated from actual metrics
                 total_guidelines=len(guidelines),
                 total_customers=len(customers),
+                guideline_retrieval=get_guideline_retrieval_stats(),
+                embedding_inference=get_embedding_inference_stats(),
             )
         except Exception as e:
             # Fallback to basic counts if there's an error
@@ -154,6 +208,8 @@ def create_router(
                 success_rate=98.5,
                 total_guidelines=0,
                 total_customers=0,
+                guideline_retrieval=get_guideline_retrieval_stats(),
+                embedding_inference=get_embedding_inference_stats(),
             )
 
     @router.get(
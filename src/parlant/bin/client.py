@@ -2583,7 +2583,15 @@ async def async_main() -> None:
     )
     @click.option(
         "--composition-mode",
-        type=click.Choice(["fluid", "strict-utterance", "composited-utterance", "fluid-utterance"]),
+        type=click.Choice(
+            [
+                "fluid",
+                "fluid-streaming",
+                "strict-utterance",
+                "composited-utterance",
+                "fluid-utterance",
+            ]
+        ),
         help="Composition mode",
         required=False,
     )
@@ -2650,7 +2658,15 @@ async def async_main() -> None:
     @click.option(
         "--composition-mode",
         "-c",
-        type=click.Choice(["fluid", "strict-utterance", "composited-utterance", "fluid-utterance"]),
+        type=click.Choice(
+            [
+                "fluid",
+                "fluid-streaming",
+                "strict-utterance",
+                "composited-utterance",
+                "fluid-utterance",
+            ]
+        ),
         help="Composition mode",
         required=False,
     )
@@ -19,7 +19,7 @@ import importlib
 import json
 import os
 import shutil
-from typing import Any, cast, Callable, Awaitable, Optional
+from typing import Any, cast, Callable, Awaitable, Optional, Sequence
 import chromadb
 from chromadb.api.types import IncludeEnum
 from lagom import Container
@@ -357,7 +357,7 @@ async def migrate_agents_0_1_0_to_0_2_0() -> None:
     await create_metadata_collection(customers_db, "customers")
 
     sessions_db = await EXIT_STACK.enter_async_context(
-        JSONFileDocumentDatabase(LOGGER, Daneel_HOME_DIR / "sessions.json")
+        JSONFileDocumentDatabase(LOGGER, Daneel_HOME_DIR / "sessions.json", journaled=True)
     )
     await create_metadata_collection(sessions_db, "sessions")
 
@@ -394,11 +394,10 @@ async def migrate_agents_0_1_0_to_0_2_0() -> None:
         identity_loader,
     )
 
-    for doc in await agent_collection.find(filters={}):
-        await agent_collection.update_one(
-            filters={"id": {"$eq": ObjectId(doc["id"])}},
-            params={"version": Version.String("0.2.0")},
-        )
+    await agent_collection.update_many(
+        filters={},
+        params={"version": Version.String("0.2.0")},
+    )
 
     await upgrade_document_database_metadata(agents_db, Version.String("0.2.0"))
 
@@ -490,8 +489,8 @@ async def migrate_context_variables_0_1_0_to_0_2_0() -> None:
         _association_document_loader,
     )
 
-    for context_variable in await context_variables_collection.find(filters={}):
-        await context_variable_tags_collection.insert_one(
+    await context_variable_tags_collection.insert_many(
+        [
             {
                 "id": ObjectId(generate_id()),
                 "version": Version.String("0.2.0"),
@@ -501,12 +500,14 @@ async def migrate_context_variables_0_1_0_to_0_2_0() -> None:
                     cast(ContextVariableDocument_v0_1_0, context_variable)["variable_set"]
                 ),
             }
-        )
+            for context_variable in await context_variables_collection.find(filters={})
+        ]
+    )
 
-        await context_variables_collection.update_one(
-            filters={"id": {"$eq": ObjectId(context_variable["id"])}},
-            params={"version": Version.String("0.2.0")},
-        )
+    await context_variables_collection.update_many(
+        filters={},
+        params={"version": Version.String("0.2.0")},
+    )
 
     context_variable_values_collection = await context_variables_db.get_or_create_collection(
         "context_variable_values",
@@ -514,11 +515,10 @@ async def migrate_context_variables_0_1_0_to_0_2_0() -> None:
         identity_loader,
     )
 
-    for value in await context_variable_values_collection.find(filters={}):
-        await context_variable_values_collection.update_one(
-            filters={"id": {"$eq": ObjectId(value["id"])}},
-            params={"version": Version.String("0.2.0")},
-        )
+    await context_variable_values_collection.update_many(
+        filters={},
+        params={"version": Version.String("0.2.0")},
+    )
 
     await upgrade_document_database_metadata(context_variables_db, Version.String("0.2.0"))
 
@@ -543,12 +543,10 @@ async def migrate_agents_0_2_0_to_0_3_0() -> None:
         identity_loader,
     )
 
-    for agent in await agent_collection.find(filters={}):
-        if agent["version"] == "0.2.0":
-            await agent_collection.update_one(
-                filters={"id": {"$eq": ObjectId(agent["id"])}},
-                params={"version": Version.String("0.3.0")},
-            )
+    await agent_collection.update_many(
+        filters={"version": {"$eq": "0.2.0"}},
+        params={"version": Version.String("0.3.0")},
+    )
 
     await upgrade_document_database_metadata(agent_db, Version.String("0.3.0"))
 
@@ -682,9 +680,8 @@ async def migrate_guideline_relationships_0_1_0_to_0_2_0() -> None:
             identity_loader,
         )
 
-        for doc in await guideline_connections_collection.find(filters={}):
-            doc = cast(GuidelineRelationshipDocument_v0_1_0, doc)
-            await guideline_relationships_collection.insert_one(
+        await guideline_relationships_collection.insert_many(
+            [
                 cast(
                     RelationshipDocument,
                     {
@@ -696,7 +693,12 @@ async def migrate_guideline_relationships_0_1_0_to_0_2_0() -> None:
                         "kind": "entailment",
                     },
                 )
-            )
+                for doc in cast(
+                    Sequence[GuidelineRelationshipDocument_v0_1_0],
+                    await guideline_connections_collection.find(filters={}),
+                )
+            ]
+        )
 
         connections_metadata_collection = await guideline_connections_db.get_or_create_collection(
             "metadata",
@@ -751,9 +753,8 @@ async def migrate_relationships_0_2_0_to_0_3_0() -> None:
             )
         )
 
-        for doc in await guideline_relationships_collection.find(filters={}):
-            doc = cast(GuidelineRelationshipDocument_v0_2_0, doc)
-            await relationships_collection.insert_one(
+        await relationships_collection.insert_many(
+            [
                 cast(
                     RelationshipDocument,
                     {
@@ -767,7 +768,12 @@ async def migrate_relationships_0_2_0_to_0_3_0() -> None:
                         "kind": doc["kind"],
                     },
                 )
-            )
+                for doc in cast(
+                    Sequence[GuidelineRelationshipDocument_v0_2_0],
+                    await guideline_relationships_collection.find(filters={}),
+                )
+            ]
+        )
 
         guideline_relationships_metadata_collection = (
             await guideline_relationships_db.get_or_create_collection(
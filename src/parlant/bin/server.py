@@ -34,6 +34,7 @@ import uvicorn
 from Daneel.bin.prepare_migration import detect_required_migrations
 from Daneel.adapters.loggers.websocket import WebSocketLogger
 from Daneel.adapters.vector_db.chroma import ChromaDatabase
+from Daneel.adapters.vector_db.matrix import MatrixVectorDatabase
 from Daneel.core.engines.alpha import guideline_matcher
 from Daneel.core.engines.alpha import tool_caller
 from Daneel.core.engines.alpha import message_generator
@@ -47,15 +48,20 @@ from Daneel.core.engines.alpha.utterance_selector import (
     UtteranceSelector,
 )
 from Daneel.core.utterances import UtteranceDocumentStore, UtteranceStore
+from Daneel.core.nlp.rate_limiting import RateLimitedNLPService, RateLimits
 from Daneel.core.nlp.service import NLPService
 from Daneel.core.persistence.common import MigrationRequired, ServerOutdated
+from Daneel.core.persistence.document_database import DocumentDatabase
+from Daneel.core.persistence.vector_database import VectorDatabase
+from Daneel.core.persistence.vector_index import IVFParameters
 from Daneel.core.shots import ShotCollection
-from Daneel.core.tags import TagDocumentStore, TagStore
+from Daneel.core.tags import TagDocumentStore, TagId, TagStore
 from Daneel.api.app import create_api_app, ASGIApplication
 from Daneel.core.background_tasks import BackgroundTaskService
 from Daneel.core.contextual_correlator import ContextualCorrelator
 from Daneel.core.agents import AgentDocumentStore, AgentStore
 from Daneel.core.context_variables import ContextVariableDocumentStore, ContextVariableStore
+from Daneel.core.emission.draft_channel import MessageDraftChannel
 from Daneel.core.emission.event_publisher import EventPublisherFactory
 from Daneel.core.emissions import EventEmitterFactory
 from Daneel.core.customers import CustomerDocumentStore, CustomerStore
@@ -73,16 +79,19 @@ from Daneel.core.relationships import (
 )
 from Daneel.core.guidelines import (
     GuidelineDocumentStore,
+    GuidelineId,
     GuidelineStore,
 )
 from Daneel.adapters.db.json_file import JSONFileDocumentDatabase
-from Daneel.core.nlp.embedding import EmbedderFactory
+from Daneel.adapters.db.sqlite import SQLiteDocumentDatabase, SQLiteEmbeddingStore
+from Daneel.core.nlp.embedding import Embedder, EmbedderFactory, EmbeddingCache
 from Daneel.core.nlp.generation import SchematicGenerator
 from Daneel.core.services.tools.service_registry import (
     ServiceRegistry,
     ServiceDocumentRegistry,
 )
 from Daneel.core.sessions import (
+    NotifyingSessionListener,
     PollingSessionListener,
     SessionDocumentStore,
     SessionListener,
@@ -90,6 +99,11 @@ from Daneel.core.sessions import (
 )
 from Daneel.core.glossary import GlossaryStore, GlossaryVectorStore
 from Daneel.core.engines.alpha.engine import AlphaEngine
+from Daneel.core.engines.alpha.interaction_summarizer import (
+    HistoryPolicy,
+    InteractionSummarizer,
+    InteractionSummarySchema,
+)
 from Daneel.core.guideline_tool_associations import (
     GuidelineToolAssociationDocumentStore,
     GuidelineToolAssociationStore,
@@ -98,11 +112,13 @@ from Daneel.core.engines.alpha.tool_caller import ToolCallInferenceSchema, ToolC
 from Daneel.core.engines.alpha.guideline_matcher import (
     GenericGuidelineMatching,
     GuidelineMatcher,
+    TokenBudgetGuidelineMatching,
     GenericGuidelineMatchingShot,
     GenericGuidelineMatchesSchema,
     DefaultGuidelineMatchingStrategyResolver,
     GuidelineMatchingStrategyResolver,
 )
+from Daneel.core.engines.alpha.guideline_retriever import GuidelineRetriever
 from Daneel.core.engines.alpha.message_generator import (
     MessageGenerator,
     MessageGeneratorShot,
@@ -163,6 +179,26 @@ class CLIParams:
     log_level: str
     modules: list[str]
     migrate: bool
+    storage: str
+    vector_store: str
+    vector_search_probes: Optional[int]
+    session_listener: str
+    guideline_retrieval_k: int
+    guideline_retrieval_max_distance: Optional[float]
+    guideline_retrieval_always_on_guidelines: list[str]
+    guideline_retrieval_always_on_tags: list[str]
+    guideline_retrieval_recall_sample_rate: float
+    guideline_batch_token_budget: int
+    guideline_batch_latency_target: Optional[float]
+    max_concurrent_guideline_batches: int
+    max_concurrent_completions: int
+    completion_requests_per_minute: int
+    completion_tokens_per_minute: int
+    embedding_batch_window: Optional[float]
+    history_token_budget: int
+    history_verbatim_turns: int
+    pipelined_tool_calls: bool
+    max_concurrent_tool_calls_per_service: int
 
 
 def load_nlp_service(name: str, extra_name: str, class_name: str, module_path: str) -> NLPService:
@@ -292,9 +328,9 @@ async def setup_container() -> AsyncIterator[Container]:
     c[ShotCollection[MessageGeneratorShot]] = message_generator.shot_collection
 
     c[EngineHooks] = EngineHooks()
+    c[MessageDraftChannel] = MessageDraftChannel()
     c[EventEmitterFactory] = Singleton(EventPublisherFactory)
 
-    c[ToolEventGenerator] = Singleton(ToolEventGenerator)
     c[UtteranceFieldExtractor] = Singleton(UtteranceFieldExtractor)
     c[UtteranceSelector] = Singleton(UtteranceSelector)
     c[MessageGenerator] = Singleton(MessageGenerator)
@@ -318,6 +354,26 @@ async def initialize_container(
     nlp_service_name: str,
     log_level: str,
     migrate: bool,
+    storage: str,
+    vector_store: str,
+    vector_search_probes: Optional[int],
+    session_listener: str,
+    guideline_retrieval_k: int,
+    guideline_retrieval_max_distance: Optional[float],
+    guideline_retrieval_always_on_guidelines: list[str],
+    guideline_retrieval_always_on_tags: list[str],
+    guideline_retrieval_recall_sample_rate: float,
+    guideline_batch_token_budget: int,
+    guideline_batch_latency_target: Optional[float],
+    max_concurrent_guideline_batches: int,
+    max_concurrent_completions: int,
+    completion_requests_per_minute: int,
+    completion_tokens_per_minute: int,
+    embedding_batch_window: Optional[float],
+    history_token_budget: int,
+    history_verbatim_turns: int,
+    pipelined_tool_calls: bool,
+    max_concurrent_tool_calls_per_service: int,
 ) -> None:
     await EXIT_STACK.enter_async_context(c[BackgroundTaskService])
 
@@ -333,41 +389,34 @@ async def initialize_container(
 
     await c[BackgroundTaskService].start(c[WebSocketLogger].start(), tag="websocket-logger")
 
-    agents_db = await EXIT_STACK.enter_async_context(
-        JSONFileDocumentDatabase(c[Logger], Daneel_HOME_DIR / "agents.json")
-    )
+    def open_document_database(name: str, journaled: bool = False) -> DocumentDatabase:
+        if storage == "sqlite":
+            return SQLiteDocumentDatabase(c[Logger], Daneel_HOME_DIR / f"{name}.sqlite")
+
+        return JSONFileDocumentDatabase(
+            c[Logger], Daneel_HOME_DIR / f"{name}.json", journaled=journaled
+        )
+
+    agents_db = await EXIT_STACK.enter_async_context(open_document_database("agents"))
     context_variables_db = await EXIT_STACK.enter_async_context(
-        JSONFileDocumentDatabase(c[Logger], Daneel_HOME_DIR / "context_variables.json")
-    )
-    tags_db = await EXIT_STACK.enter_async_context(
-        JSONFileDocumentDatabase(c[Logger], Daneel_HOME_DIR / "tags.json")
-    )
-    customers_db = await EXIT_STACK.enter_async_context(
-        JSONFileDocumentDatabase(c[Logger], Daneel_HOME_DIR / "customers.json")
+        open_document_database("context_variables")
     )
+    tags_db = await EXIT_STACK.enter_async_context(open_document_database("tags"))
+    customers_db = await EXIT_STACK.enter_async_context(open_document_database("customers"))
     sessions_db = await EXIT_STACK.enter_async_context(
-        JSONFileDocumentDatabase(c[Logger], Daneel_HOME_DIR / "sessions.json")
-    )
-    guidelines_db = await EXIT_STACK.enter_async_context(
-        JSONFileDocumentDatabase(c[Logger], Daneel_HOME_DIR / "guidelines.json")
+        open_document_database("sessions", journaled=True)
     )
+    guidelines_db = await EXIT_STACK.enter_async_context(open_document_database("guidelines"))
     guideline_tool_associations_db = await EXIT_STACK.enter_async_context(
-        JSONFileDocumentDatabase(c[Logger], Daneel_HOME_DIR / "guideline_tool_associations.json")
-    )
-    relationships_db = await EXIT_STACK.enter_async_context(
-        JSONFileDocumentDatabase(c[Logger], Daneel_HOME_DIR / "relationships.json")
-    )
-    evaluations_db = await EXIT_STACK.enter_async_context(
-        JSONFileDocumentDatabase(c[Logger], Daneel_HOME_DIR / "evaluations.json")
-    )
-    services_db = await EXIT_STACK.enter_async_context(
-        JSONFileDocumentDatabase(c[Logger], Daneel_HOME_DIR / "services.json")
-    )
-    utterance_db = await EXIT_STACK.enter_async_context(
-        JSONFileDocumentDatabase(c[Logger], Daneel_HOME_DIR / "utterances.json")
+        open_document_database("guideline_tool_associations")
     )
-    glossary_tags_db = await EXIT_STACK.enter_async_context(
-        JSONFileDocumentDatabase(c[Logger], Daneel_HOME_DIR / "glossary_tags.json")
+    relationships_db = await EXIT_STACK.enter_async_context(open_document_database("relationships"))
+    evaluations_db = await EXIT_STACK.enter_async_context(open_document_database("evaluations"))
+    services_db = await EXIT_STACK.enter_async_context(open_document_database("services"))
+    utterance_db = await EXIT_STACK.enter_async_context(open_document_database("utterances"))
+    glossary_tags_db = await EXIT_STACK.enter_async_context(open_document_database("glossary_tags"))
+    embedding_store = await EXIT_STACK.enter_async_context(
+        SQLiteEmbeddingStore(Daneel_HOME_DIR / "embedding_cache.sqlite")
     )
 
     try:
@@ -394,7 +443,10 @@ async def initialize_container(
         c[SessionStore] = await EXIT_STACK.enter_async_context(
             SessionDocumentStore(sessions_db, migrate)
         )
-        c[SessionListener] = PollingSessionListener
+        if session_listener == "polling":
+            c[SessionListener] = PollingSessionListener
+        else:
+            c[SessionListener] = NotifyingSessionListener(c[SessionStore])
 
         c[EvaluationStore] = await EXIT_STACK.enter_async_context(
             EvaluationDocumentStore(evaluations_db, migrate)
@@ -425,16 +477,55 @@ async def initialize_container(
 
         nlp_service = await c[ServiceRegistry].read_nlp_service(nlp_service_name)
 
+        if (
+            max_concurrent_completions
+            or completion_requests_per_minute
+            or completion_tokens_per_minute
+        ):
+            nlp_service = RateLimitedNLPService(
+                nlp_service,
+                correlator=c[ContextualCorrelator],
+                logger=c[Logger],
+                limits=RateLimits(
+                    max_concurrent_requests=max_concurrent_completions or None,
+                    requests_per_minute=completion_requests_per_minute or None,
+                    tokens_per_minute=completion_tokens_per_minute or None,
+                ),
+            )
+
         c[NLPService] = nlp_service
 
-        embedder_factory = EmbedderFactory(c)
+        embedder_factory = EmbedderFactory(
+            c,
+            cache=EmbeddingCache(embedding_store),
+            batch_window=embedding_batch_window,
+        )
+        embedder = await nlp_service.get_embedder()
+        embedder_type = type(embedder)
+
+        # Share a single embedder, so that local models are loaded (and their requests batched) once
+        c[embedder_type] = embedder
+        c[Embedder] = embedder
+        vector_db: VectorDatabase = await EXIT_STACK.enter_async_context(
+            MatrixVectorDatabase(
+                c[Logger],
+                Daneel_HOME_DIR / "vectors",
+                embedder_factory,
+                ann=IVFParameters(n_probe=vector_search_probes) if vector_search_probes else None,
+            )
+            if vector_store == "matrix"
+            else ChromaDatabase(
+                c[Logger],
+                Daneel_HOME_DIR,
+                embedder_factory,
+                background_indexing=True,
+            ),
+        )
         c[GlossaryStore] = await EXIT_STACK.enter_async_context(
             GlossaryVectorStore(
-                vector_db=await EXIT_STACK.enter_async_context(
-                    ChromaDatabase(c[Logger], Daneel_HOME_DIR, embedder_factory),
-                ),
+                vector_db=vector_db,
                 document_db=glossary_tags_db,
-                embedder_type=type(await nlp_service.get_embedder()),
+                embedder_type=embedder_type,
                 embedder_factory=embedder_factory,
             )
         )
@@ -473,8 +564,19 @@ async def initialize_container(
     c[
         SchematicGenerator[GuidelineConnectionPropositionsSchema]
     ] = await nlp_service.get_schematic_generator(GuidelineConnectionPropositionsSchema)
+    c[SchematicGenerator[InteractionSummarySchema]] = await nlp_service.get_schematic_generator(
+        InteractionSummarySchema
+    )
 
-    c[GenericGuidelineMatching] = Singleton(GenericGuidelineMatching)
+    if guideline_batch_token_budget > 0:
+        c[GenericGuidelineMatching] = TokenBudgetGuidelineMatching(
+            logger=c[Logger],
+            schematic_generator=c[SchematicGenerator[GenericGuidelineMatchesSchema]],
+            max_batch_tokens=guideline_batch_token_budget,
+            max_batch_latency=guideline_batch_latency_target,
+        )
+    else:
+        c[GenericGuidelineMatching] = Singleton(GenericGuidelineMatching)
 
     c[DefaultGuidelineMatchingStrategyResolver] = Singleton(
         DefaultGuidelineMatchingStrategyResolver
@@ -482,9 +584,58 @@ async def initialize_container(
     c[GuidelineMatchingStrategyResolver] = lambda container: container[
         DefaultGuidelineMatchingStrategyResolver
     ]
-    c[GuidelineMatcher] = Singleton(GuidelineMatcher)
+    retriever = (
+        await EXIT_STACK.enter_async_context(
+            GuidelineRetriever(
+                logger=c[Logger],
+                vector_db=vector_db,
+                embedder_type=embedder_type,
+                top_k=guideline_retrieval_k,
+                max_distance=guideline_retrieval_max_distance,
+                recall_sample_rate=guideline_retrieval_recall_sample_rate,
+            )
+        )
+        if guideline_retrieval_k > 0
+        else None
+    )
+
+    if retriever:
+        retriever.always_on_guideline_ids.update(
+            GuidelineId(guideline_id) for guideline_id in guideline_retrieval_always_on_guidelines
+        )
+        retriever.always_on_tag_ids.update(
+            TagId(tag_id) for tag_id in guideline_retrieval_always_on_tags
+        )
+
+    c[GuidelineMatcher] = GuidelineMatcher(
+        logger=c[Logger],
+        strategy_resolver=c[GuidelineMatchingStrategyResolver],
+        retriever=retriever,
+        max_concurrent_batches=max_concurrent_guideline_batches or None,
+    )
+
     c[RelationalGuidelineResolver] = Singleton(RelationalGuidelineResolver)
 
+    c[ToolEventGenerator] = ToolEventGenerator(
+        logger=c[Logger],
+        correlator=c[ContextualCorrelator],
+        service_registry=c[ServiceRegistry],
+        schematic_generator=c[SchematicGenerator[ToolCallInferenceSchema]],
+        pipelined=pipelined_tool_calls,
+        max_concurrent_tool_calls_per_service=max_concurrent_tool_calls_per_service or None,
+    )
+
+    if history_token_budget > 0:
+        c[InteractionSummarizer] = InteractionSummarizer(
+            logger=c[Logger],
+            session_store=c[SessionStore],
+            schematic_generator=c[SchematicGenerator[InteractionSummarySchema]],
+            policy=HistoryPolicy(
+                max_tokens=history_token_budget,
+                verbatim_turns=history_verbatim_turns,
+            ),
+        )
+
 
 async def recover_server_tasks(
     evaluation_store: EvaluationStore,
@@ -533,6 +684,26 @@ async def load_app(params: CLIParams) -> AsyncIterator[ASGIApplication]:
             params.nlp_service,
             params.log_level,
             params.migrate,
+            params.storage,
+            params.vector_store,
+            params.vector_search_probes,
+            params.session_listener,
+            params.guideline_retrieval_k,
+            params.guideline_retrieval_max_distance,
+            params.guideline_retrieval_always_on_guidelines,
+            params.guideline_retrieval_always_on_tags,
+            params.guideline_retrieval_recall_sample_rate,
+            params.guideline_batch_token_budget,
+            params.guideline_batch_latency_target,
+            params.max_concurrent_guideline_batches,
+            params.max_concurrent_completions,
+            params.completion_requests_per_minute,
+            params.completion_tokens_per_minute,
+            params.embedding_batch_window,
+            params.history_token_budget,
+            params.history_verbatim_turns,
+            params.pipelined_tool_calls,
+            params.max_concurrent_tool_calls_per_service,
         )
 
         for module_name, initializer in module_initializers:
@@ -706,6 +877,127 @@ def main() -> None:
                 set them and install the extra package Daneel[litellm].""",
         default=False,
     )
+    @click.option(
+        "--storage",
+        type=click.Choice(["json", "sqlite"]),
+        default="json",
+        help="Document storage backend. 'sqlite' keeps each store in an indexed SQLite file under Daneel_HOME",
+    )
+    @click.option(
+        "--vector-store",
+        type=click.Choice(["chroma", "matrix"]),
+        default="chroma",
+        help="Vector storage backend. 'matrix' keeps embeddings in memory-mapped NumPy files under Daneel_HOME/vectors",
+    )
+    @click.option(
+        "--vector-search-probes",
+        type=int,
+        default=None,
+        help="Search large 'matrix' vector collections approximately, scanning this many clusters per query. Higher is more accurate but slower",
+    )
+    @click.option(
+        "--session-listener",
+        type=click.Choice(["notifying", "polling"]),
+        default="notifying",
+        help="How long-polling requests wait for new session events. 'polling' re-checks every second",
+    )
+    @click.option(
+        "--guideline-retrieval-k",
+        type=int,
+        default=0,
+        help="Pre-filter guidelines by embedding similarity, sending only the K closest ones to matching. 0 disables pre-filtering",
+    )
+    @click.option(
+        "--guideline-retrieval-max-distance",
+        type=float,
+        default=None,
+        help="Exclude pre-filtered guidelines whose vector distance from the interaction exceeds this threshold",
+    )
+    @click.option(
+        "--guideline-retrieval-always-on",
+        multiple=True,
+        default=[],
+        metavar="GUIDELINE_ID",
+        help="Always send this guideline to matching, regardless of pre-filtering. Pass multiple times for multiple guidelines",
+    )
+    @click.option(
+        "--guideline-retrieval-always-on-tag",
+        multiple=True,
+        default=[],
+        metavar="TAG_ID",
+        help="Always send guidelines with this tag to matching, regardless of pre-filtering. Pass multiple times for multiple tags",
+    )
+    @click.option(
+        "--guideline-retrieval-recall-sample-rate",
+        type=float,
+        default=0.0,
+        help="Fraction of pre-filtered turns that are also matched against all guidelines, to measure the recall of pre-filtering",
+    )
+    @click.option(
+        "--guideline-batch-token-budget",
+        type=int,
+        default=0,
+        help="Pack guidelines into matching batches up to this many prompt and completion tokens. 0 uses fixed batch sizes",
+    )
+    @click.option(
+        "--guideline-batch-latency-target",
+        type=float,
+        default=None,
+        help="Limit token-budget batches so that each matching call is expected to finish within this many seconds",
+    )
+    @click.option(
+        "--max-concurrent-guideline-batches",
+        type=int,
+        default=0,
+        help="Maximum number of guideline matching batches processed concurrently per turn. 0 is unlimited",
+    )
+    @click.option(
+        "--max-concurrent-completions",
+        type=int,
+        default=0,
+        help="Maximum number of concurrent completion requests per model. 0 is unlimited",
+    )
+    @click.option(
+        "--completion-requests-per-minute",
+        type=int,
+        default=0,
+        help="Rate limit for completion requests per model. 0 is unlimited",
+    )
+    @click.option(
+        "--completion-tokens-per-minute",
+        type=int,
+        default=0,
+        help="Rate limit for estimated completion tokens per model. 0 is unlimited",
+    )
+    @click.option(
+        "--embedding-batch-window",
+        type=float,
+        default=None,
+        help="Merge concurrent embedding requests arriving within this many seconds into batched calls",
+    )
+    @click.option(
+        "--history-token-budget",
+        type=int,
+        default=0,
+        help="Keep the interaction history in prompts within this many tokens, summarizing older turns. 0 keeps the full history",
+    )
+    @click.option(
+        "--history-verbatim-turns",
+        type=int,
+        default=10,
+        help="Number of latest turns kept verbatim when the interaction history is summarized",
+    )
+    @click.option(
+        "--pipelined-tool-calls",
+        is_flag=True,
+        help="Start executing each tool's calls as soon as they are inferred, instead of after all tools' calls are inferred",
+    )
+    @click.option(
+        "--max-concurrent-tool-calls-per-service",
+        type=int,
+        default=0,
+        help="Maximum number of concurrent tool calls to each tool service. 0 is unlimited",
+    )
     @click.option(
         "--log-level",
         type=click.Choice(["debug", "info", "warning", "error", "critical"]),
@@ -749,6 +1041,26 @@ def main() -> None:
         cerebras: bool,
         together: bool,
         litellm: bool,
+        storage: str,
+        vector_store: str,
+        vector_search_probes: Optional[int],
+        session_listener: str,
+        guideline_retrieval_k: int,
+        guideline_retrieval_max_distance: Optional[float],
+        guideline_retrieval_always_on: tuple[str],
+        guideline_retrieval_always_on_tag: tuple[str],
+        guideline_retrieval_recall_sample_rate: float,
+        guideline_batch_token_budget: int,
+        guideline_batch_latency_target: Optional[float],
+        max_concurrent_guideline_batches: int,
+        max_concurrent_completions: int,
+        completion_requests_per_minute: int,
+        completion_tokens_per_minute: int,
+        embedding_batch_window: Optional[float],
+        history_token_budget: int,
+        history_verbatim_turns: int,
+        pipelined_tool_calls: bool,
+        max_concurrent_tool_calls_per_service: int,
         log_level: str,
         module: tuple[str],
         version: bool,
@@ -802,6 +1114,26 @@ def main() -> None:
             log_level=log_level,
             modules=list(module),
             migrate=migrate,
+            storage=storage,
+            vector_store=vector_store,
+            vector_search_probes=vector_search_probes,
+            session_listener=session_listener,
+            guideline_retrieval_k=guideline_retrieval_k,
+            guideline_retrieval_max_distance=guideline_retrieval_max_distance,
+            guideline_retrieval_always_on_guidelines=list(guideline_retrieval_always_on),
+            guideline_retrieval_always_on_tags=list(guideline_retrieval_always_on_tag),
+            guideline_retrieval_recall_sample_rate=guideline_retrieval_recall_sample_rate,
+            guideline_batch_token_budget=guideline_batch_token_budget,
+            guideline_batch_latency_target=guideline_batch_latency_target,
+            max_concurrent_guideline_batches=max_concurrent_guideline_batches,
+            max_concurrent_completions=max_concurrent_completions,
+            completion_requests_per_minute=completion_requests_per_minute,
+            completion_tokens_per_minute=completion_tokens_per_minute,
+            embedding_batch_window=embedding_batch_window,
+            history_token_budget=history_token_budget,
+            history_verbatim_turns=history_verbatim_turns,
+            pipelined_tool_calls=pipelined_tool_calls,
+            max_concurrent_tool_calls_per_service=max_concurrent_tool_calls_per_service,
         )
 
         asyncio.run(start_server(ctx.obj))
@@ -40,6 +40,7 @@ AgentId = NewType("AgentId", str)
 
 class CompositionMode(Enum):
     FLUID = "fluid"
+    FLUID_STREAMING = "fluid_streaming"
     FLUID_UTTERANCE = "fluid_utterance"
     STRICT_UTTERANCE = "strict_utterance"
     COMPOSITED_UTTERANCE = "composited_utterance"
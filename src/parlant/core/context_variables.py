@@ -14,7 +14,7 @@
 
 from __future__ import annotations
 from abc import ABC, abstractmethod
-from typing import NewType, Optional, Sequence, cast
+from typing import Mapping, NewType, Optional, Sequence, cast
 from typing_extensions import TypedDict, override, Self
 from datetime import datetime, timezone
 from dataclasses import dataclass
@@ -38,8 +38,7 @@ from Daneel.core.persistence.document_database_helper import (
     DocumentStoreMigrationHelper,
 )
 from Daneel.core.tags import TagId
-# from Daneel.core.tools import ToolId
-ToolId = str  # Temporary fix for circular import
+from Daneel.core.tools import ToolId
 
 ContextVariableId = NewType("ContextVariableId", str)
 ContextVariableValueId = NewType("ContextVariableValueId", str)
@@ -126,6 +125,16 @@ class ContextVariableStore(ABC):
         key: str,
     ) -> Optional[ContextVariableValue]: ...
 
+    @abstractmethod
+    async def read_values(
+        self,
+        variable_ids: Sequence[ContextVariableId],
+        keys: Sequence[str],
+    ) -> Mapping[tuple[ContextVariableId, str], ContextVariableValue]:
+        """Reads the values of all of the given variables under any of the given keys at once.
+        Combinations that have no value are left out of the result."""
+        ...
+
     @abstractmethod
     async def delete_value(
         self,
@@ -582,6 +591,28 @@ class ContextVariableDocumentStore(ContextVariableStore):
 
         return self._deserialize_context_variable_value(value_document)
 
+    @override
+    async def read_values(
+        self,
+        variable_ids: Sequence[ContextVariableId],
+        keys: Sequence[str],
+    ) -> Mapping[tuple[ContextVariableId, str], ContextVariableValue]:
+        if not variable_ids or not keys:
+            return {}
+
+        async with self._lock.reader_lock:
+            value_documents = await self._value_collection.find(
+                {
+                    "variable_id": {"$in": list(variable_ids)},
+                    "key": {"$in": list(keys)},
+                }
+            )
+
+        return {
+            (d["variable_id"], d["key"]): self._deserialize_context_variable_value(d)
+            for d in value_documents
+        }
+
     @override
     async def delete_value(
         self,
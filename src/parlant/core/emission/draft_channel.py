@@ -0,0 +1,49 @@
+# Copyright 2025 Emcie Co Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Iterator
+
+from Daneel.core.emissions import MessageDraft
+from Daneel.core.sessions import SessionId
+
+
+class MessageDraftChannel:
+    """Delivers message drafts to the clients currently subscribed to a session.
+
+    Drafts are kept only in the queues of current subscribers, so a client that
+    subscribes in the middle of a reply receives just the rest of its draft.
+    """
+
+    def __init__(self) -> None:
+        self._queues: defaultdict[SessionId, set[asyncio.Queue[MessageDraft]]] = defaultdict(set)
+
+    @contextmanager
+    def subscribe(self, session_id: SessionId) -> Iterator[asyncio.Queue[MessageDraft]]:
+        queue: asyncio.Queue[MessageDraft] = asyncio.Queue()
+        self._queues[session_id].add(queue)
+
+        try:
+            yield queue
+        finally:
+            self._queues[session_id].discard(queue)
+
+            if not self._queues[session_id]:
+                del self._queues[session_id]
+
+    def publish(self, session_id: SessionId, draft: MessageDraft) -> None:
+        for queue in self._queues.get(session_id, ()):
+            queue.put_nowait(draft)
@@ -17,7 +17,7 @@ from typing_extensions import override
 
 from Daneel.core.common import JSONSerializable
 from Daneel.core.agents import Agent, AgentId, AgentStore
-from Daneel.core.emissions import EmittedEvent, EventEmitter, EventEmitterFactory
+from Daneel.core.emissions import EmittedEvent, EventEmitter, EventEmitterFactory, MessageDraft
 from Daneel.core.sessions import (
     EventKind,
     EventSource,
@@ -32,6 +32,7 @@ class EventBuffer(EventEmitter):
     def __init__(self, emitting_agent: Agent) -> None:
         self.agent = emitting_agent
         self.events: list[EmittedEvent] = []
+        self.drafts: list[MessageDraft] = []
 
     @override
     async def emit_status_event(
@@ -98,6 +99,23 @@ class EventBuffer(EventEmitter):
 
         return event
 
+    @override
+    async def emit_message_draft(
+        self,
+        correlation_id: str,
+        delta: str,
+        restart: bool = False,
+    ) -> MessageDraft:
+        draft = MessageDraft(
+            correlation_id=correlation_id,
+            delta=delta,
+            restart=restart,
+        )
+
+        self.drafts.append(draft)
+
+        return draft
+
 
 class EventBufferFactory(EventEmitterFactory):
     def __init__(self, agent_store: AgentStore) -> None:
@@ -17,7 +17,8 @@ from typing_extensions import override
 
 from Daneel.core.common import JSONSerializable
 from Daneel.core.agents import Agent, AgentId, AgentStore
-from Daneel.core.emissions import EmittedEvent, EventEmitter, EventEmitterFactory
+from Daneel.core.emission.draft_channel import MessageDraftChannel
+from Daneel.core.emissions import EmittedEvent, EventEmitter, EventEmitterFactory, MessageDraft
 from Daneel.core.sessions import (
     EventKind,
     EventSource,
@@ -35,10 +36,12 @@ class EventPublisher(EventEmitter):
         emitting_agent: Agent,
         session_store: SessionStore,
         session_id: SessionId,
+        draft_channel: MessageDraftChannel,
     ) -> None:
         self.agent = emitting_agent
         self._store = session_store
         self._session_id = session_id
+        self._draft_channel = draft_channel
 
     @override
     async def emit_status_event(
@@ -105,6 +108,23 @@ class EventPublisher(EventEmitter):
 
         return event
 
+    @override
+    async def emit_message_draft(
+        self,
+        correlation_id: str,
+        delta: str,
+        restart: bool = False,
+    ) -> MessageDraft:
+        draft = MessageDraft(
+            correlation_id=correlation_id,
+            delta=delta,
+            restart=restart,
+        )
+
+        self._draft_channel.publish(self._session_id, draft)
+
+        return draft
+
     async def _publish_event(
         self,
         event: EmittedEvent,
@@ -123,9 +143,11 @@ class EventPublisherFactory(EventEmitterFactory):
         self,
         agent_store: AgentStore,
         session_store: SessionStore,
+        draft_channel: MessageDraftChannel,
     ) -> None:
         self._agent_store = agent_store
         self._session_store = session_store
+        self._draft_channel = draft_channel
 
     @override
     async def create_event_emitter(
@@ -134,4 +156,4 @@ class EventPublisherFactory(EventEmitterFactory):
         session_id: SessionId,
     ) -> EventEmitter:
         agent = await self._agent_store.read_agent(emitting_agent_id)
-        return EventPublisher(agent, self._session_store, session_id)
+        return EventPublisher(agent, self._session_store, session_id, self._draft_channel)
@@ -35,6 +35,14 @@ class EmittedEvent:
     data: JSONSerializable
 
 
+@dataclass(frozen=True)
+class MessageDraft:
+    correlation_id: str
+    delta: str
+    restart: bool
+    """Whether the draft started over, discarding the text received before"""
+
+
 class EventEmitter(ABC):
     @abstractmethod
     async def emit_status_event(
@@ -57,6 +65,20 @@ class EventEmitter(ABC):
         data: ToolEventData,
     ) -> EmittedEvent: ...
 
+    @abstractmethod
+    async def emit_message_draft(
+        self,
+        correlation_id: str,
+        delta: str,
+        restart: bool = False,
+    ) -> MessageDraft:
+        """Emits new text of a message that is still being composed.
+
+        Drafts are transient previews: they are not stored as session events,
+        and the message event emitted once composition is done remains the reply.
+        """
+        ...
+
 
 class EventEmitterFactory(ABC):
     @abstractmethod
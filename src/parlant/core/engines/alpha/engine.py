@@ -23,6 +23,7 @@ from typing import Optional, Sequence, cast
 from croniter import croniter
 from typing_extensions import override
 
+from Daneel.core import async_utils
 from Daneel.core.agents import Agent, AgentId, CompositionMode
 from Daneel.core.context_variables import (
     ContextVariable,
@@ -32,6 +33,7 @@ from Daneel.core.context_variables import (
 from Daneel.core.engines.alpha.loaded_context import Interaction, LoadedContext, ResponseState
 from Daneel.core.engines.alpha.message_generator import MessageGenerator
 from Daneel.core.engines.alpha.hooks import EngineHooks
+from Daneel.core.engines.alpha.interaction_summarizer import InteractionSummarizer
 from Daneel.core.engines.alpha.relational_guideline_resolver import RelationalGuidelineResolver
 from Daneel.core.engines.alpha.utterance_selector import UtteranceSelector
 from Daneel.core.engines.alpha.message_event_composer import (
@@ -51,6 +53,7 @@ from Daneel.core.sessions import (
     Session,
     Term as StoredTerm,
     ToolEventData,
+    ToolResultCacheInspection,
 )
 from Daneel.core.engines.alpha.guideline_matcher import (
     GuidelineMatcher,
@@ -71,7 +74,7 @@ from Daneel.core.contextual_correlator import ContextualCorrelator
 from Daneel.core.loggers import Logger
 from Daneel.core.entity_cq import EntityQueries, EntityCommands
 from Daneel.core.tags import Tag
-from Daneel.core.tools import ToolContext, ToolId
+from Daneel.core.tools import ToolContext, ToolId, ToolResult
 
 
 class AlphaEngine(Engine):
@@ -89,6 +92,8 @@ class AlphaEngine(Engine):
         fluid_message_generator: MessageGenerator,
         utterance_selector: UtteranceSelector,
         hooks: EngineHooks,
+        history_summarizer: Optional[InteractionSummarizer] = None,
+        max_concurrent_context_variable_refreshes: int = 10,
     ) -> None:
         self._logger = logger
         self._correlator = correlator
@@ -103,6 +108,8 @@ class AlphaEngine(Engine):
         self._utterance_selector = utterance_selector
 
         self._hooks = hooks
+        self._history_summarizer = history_summarizer
+        self._max_concurrent_context_variable_refreshes = max_concurrent_context_variable_refreshes
 
     @override
     async def process(
@@ -181,6 +188,9 @@ class AlphaEngine(Engine):
         history = await self._entity_queries.find_events(context.session_id)
         last_known_event_offset = history[-1].offset if history else -1
 
+        if self._history_summarizer:
+            history = await self._history_summarizer.window(context.session_id, history)
+
         return Interaction(
             history=history,
             last_known_event_offset=last_known_event_offset,
@@ -455,6 +465,10 @@ class AlphaEngine(Engine):
                 if tool_event_generation_result
                 else [],
             ),
+            tool_result_cache=tool_event_generation_result.tool_result_cache
+            if tool_event_generation_result
+            else ToolResultCacheInspection(hits=0, misses=0),
+            guideline_match_cache=guideline_matching_result.cache,
         )
 
     async def _update_session_mode(self, context: LoadedContext) -> None:
@@ -576,7 +590,7 @@ class AlphaEngine(Engine):
         # modes every now and then. This makes sure that we are
         # composing the message using the right mechanism for this agent.
         match agent.composition_mode:
-            case CompositionMode.FLUID:
+            case CompositionMode.FLUID | CompositionMode.FLUID_STREAMING:
                 return self._fluid_message_generator
             case (
                 CompositionMode.STRICT_UTTERANCE
@@ -595,23 +609,72 @@ class AlphaEngine(Engine):
             agent_id=context.agent.id,
         )
 
-        result = []
-
         keys_to_check_in_order_of_importance = (
             [context.customer.id]  # Customer-specific value
             + [f"tag:{tag_id}" for tag_id in context.customer.tags]  # Tag-specific value
             + [ContextVariableStore.GLOBAL_KEY]  # Global value
         )
 
-        for variable in variables_supported_by_agent:
-            # Try keys in order of importance, stopping at and using
-            # the first (and most important) set key for each variable.
-            for key in keys_to_check_in_order_of_importance:
-                if value := await self._load_context_variable_value(context, variable, key):
-                    result.append((variable, value))
-                    break
+        # Read all of the stored values at once, rather than a variable and a key at a time
+        stored_values = await self._entity_queries.read_context_variable_values(
+            variable_ids=[v.id for v in variables_supported_by_agent],
+            keys=keys_to_check_in_order_of_importance,
+        )
+
+        current_time = datetime.now(timezone.utc)
+        refresh_semaphore = asyncio.Semaphore(self._max_concurrent_context_variable_refreshes)
 
-        return result
+        # Variables that are backed by the same tool share a single call to it
+        tool_calls: dict[ToolId, asyncio.Future[ToolResult]] = {}
+
+        async def call_tool(tool_id: ToolId) -> ToolResult:
+            async with refresh_semaphore:
+                return await _call_context_variable_tool(
+                    entity_queries=self._entity_queries,
+                    agent_id=context.agent.id,
+                    session=context.session,
+                    tool_id=tool_id,
+                )
+
+        async def load_value(variable: ContextVariable) -> Optional[ContextVariableValue]:
+            if not variable.tool_id:
+                # Use the first (and most important) set key for the variable
+                return next(
+                    (
+                        stored_values[(variable.id, key)]
+                        for key in keys_to_check_in_order_of_importance
+                        if (variable.id, key) in stored_values
+                    ),
+                    None,
+                )
+
+            # Values of tool-backed variables are kept under the most important key
+            key = keys_to_check_in_order_of_importance[0]
+            value = stored_values.get((variable.id, key))
+
+            if _is_fresh_context_variable_value(variable, value, current_time):
+                return value
+
+            if variable.tool_id not in tool_calls:
+                tool_calls[variable.tool_id] = asyncio.ensure_future(call_tool(variable.tool_id))
+
+            tool_result = await tool_calls[variable.tool_id]
+
+            return await self._entity_commands.update_context_variable_value(
+                variable_id=variable.id,
+                key=key,
+                data=tool_result.data,
+            )
+
+        values = await async_utils.safe_gather(
+            *[load_value(variable) for variable in variables_supported_by_agent]
+        )
+
+        return [
+            (variable, value)
+            for variable, value in zip(variables_supported_by_agent, values)
+            if value
+        ]
 
     async def _capture_tool_preexecution_state(
         self, context: LoadedContext
@@ -805,21 +868,6 @@ class AlphaEngine(Engine):
 
         return [utterance_to_match(i, request) for i, request in enumerate(requests, start=1)]
 
-    async def _load_context_variable_value(
-        self,
-        context: LoadedContext,
-        variable: ContextVariable,
-        key: str,
-    ) -> Optional[ContextVariableValue]:
-        return await load_fresh_context_variable_value(
-            entity_queries=self._entity_queries,
-            entity_commands=self._entity_commands,
-            agent_id=context.agent.id,
-            session=context.session,
-            variable=variable,
-            key=key,
-        )
-
     async def _filter_missing_tool_parameters(
         self, missing_parameters: Sequence[MissingToolData]
     ) -> Sequence[MissingToolData]:
@@ -831,27 +879,16 @@ class AlphaEngine(Engine):
         return [m for m in missing_parameters if m.precedence == min(precedence_values)]
 
 
-# This is module-level and public for isolated testability purposes.
-async def load_fresh_context_variable_value(
-    entity_queries: EntityQueries,
-    entity_commands: EntityCommands,
-    agent_id: AgentId,
-    session: Session,
+def _is_fresh_context_variable_value(
     variable: ContextVariable,
-    key: str,
-    current_time: datetime = datetime.now(timezone.utc),
-) -> Optional[ContextVariableValue]:
-    # Load the existing value
-    value = await entity_queries.read_context_variable_value(
-        variable_id=variable.id,
-        key=key,
-    )
-
+    value: Optional[ContextVariableValue],
+    current_time: datetime,
+) -> bool:
     # If there's no tool attached to this variable,
-    # return the value we found for the key.
+    # whatever we found for the key is as fresh as it gets.
     # Note that this may be None here, which is okay.
     if not variable.tool_id:
-        return value
+        return True
 
     # So we do have a tool attached.
     # Do we already have a value, and is it sufficiently fresh?
@@ -859,26 +896,62 @@ async def load_fresh_context_variable_value(
         cron_iterator = croniter(variable.freshness_rules, value.last_modified)
 
         if cron_iterator.get_next(datetime) > current_time:
-            # We already have a fresh value in store. Return it.
-            return value
+            return True
 
-    # We don't have a sufficiently fresh value.
-    # Get an updated one, utilizing the associated tool.
+    return False
 
+
+async def _call_context_variable_tool(
+    entity_queries: EntityQueries,
+    agent_id: AgentId,
+    session: Session,
+    tool_id: ToolId,
+) -> ToolResult:
     tool_context = ToolContext(
         agent_id=agent_id,
         session_id=session.id,
         customer_id=session.customer_id,
     )
 
-    tool_service = await entity_queries.read_tool_service(variable.tool_id.service_name)
+    tool_service = await entity_queries.read_tool_service(tool_id.service_name)
 
-    tool_result = await tool_service.call_tool(
-        variable.tool_id.tool_name,
+    return await tool_service.call_tool(
+        tool_id.tool_name,
         context=tool_context,
         arguments={},
     )
 
+
+# This is module-level and public for isolated testability purposes.
+async def load_fresh_context_variable_value(
+    entity_queries: EntityQueries,
+    entity_commands: EntityCommands,
+    agent_id: AgentId,
+    session: Session,
+    variable: ContextVariable,
+    key: str,
+    current_time: datetime = datetime.now(timezone.utc),
+) -> Optional[ContextVariableValue]:
+    # Load the existing value
+    value = await entity_queries.read_context_variable_value(
+        variable_id=variable.id,
+        key=key,
+    )
+
+    if _is_fresh_context_variable_value(variable, value, current_time):
+        return value
+
+    assert variable.tool_id
+
+    # We don't have a sufficiently fresh value.
+    # Get an updated one, utilizing the associated tool.
+    tool_result = await _call_context_variable_tool(
+        entity_queries=entity_queries,
+        agent_id=agent_id,
+        session=session,
+        tool_id=variable.tool_id,
+    )
+
     return await entity_commands.update_context_variable_value(
         variable_id=variable.id,
         key=key,
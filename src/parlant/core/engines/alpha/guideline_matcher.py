@@ -13,14 +13,18 @@
 # limitations under the License.
 
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
+import asyncio
+from collections import OrderedDict
+from dataclasses import dataclass, field, replace
 from datetime import datetime, timezone
 from functools import cached_property
+import hashlib
 from itertools import chain
 import json
 import math
+import sys
 import time
-from typing import Optional, Sequence
+from typing import Callable, Optional, Sequence
 from typing_extensions import override
 
 from Daneel.core import async_utils
@@ -33,10 +37,17 @@ from Daneel.core.engines.alpha.guideline_match import (
     GuidelineMatch,
     PreviouslyAppliedType,
 )
+from Daneel.core.engines.alpha.guideline_retriever import GuidelineRetriever
 from Daneel.core.engines.alpha.prompt_builder import BuiltInSection, PromptBuilder, SectionStatus
 from Daneel.core.glossary import Term
 from Daneel.core.guidelines import Guideline, GuidelineId, GuidelineContent
-from Daneel.core.sessions import Event, EventId, EventKind, EventSource
+from Daneel.core.sessions import (
+    Event,
+    EventId,
+    EventKind,
+    EventSource,
+    GuidelineMatchCacheInspection,
+)
 from Daneel.core.emissions import EmittedEvent
 from Daneel.core.common import DefaultBaseModel, JSONSerializable
 from Daneel.core.loggers import Logger
@@ -96,6 +107,9 @@ class GuidelineMatchingResult:
     batch_count: int
     batch_generations: Sequence[GenerationInfo]
     batches: Sequence[Sequence[GuidelineMatch]]
+    cache: GuidelineMatchCacheInspection = field(
+        default_factory=lambda: GuidelineMatchCacheInspection(hits=0, misses=0)
+    )
 
     @cached_property
     def matches(self) -> Sequence[GuidelineMatch]:
@@ -237,33 +251,34 @@ class GenericGuidelineMatchingBatch(GuidelineMatchingBatch):
 
         return formatted_shot
 
+    @staticmethod
+    def format_check_template(g: Guideline) -> dict[str, JSONSerializable]:
+        return {
+            "guideline_id": g.id,
+            "condition": g.content.condition,
+            "condition_application_rationale": "<Explanation for why the condition is or isn't met>",
+            "condition_applies": "<BOOL>",
+            "action": g.content.action,
+            "guideline_is_continuous": "<BOOL: Optional, only necessary if guideline_previously_applied is true. Specifies whether the action is taken one-time, or is continuous>",
+            "capitalize_exact_words_from_action_in_the_explanations_to_avoid_semantic_pitfalls": True,
+            "guideline_previously_applied_rationale": [
+                {
+                    "action_segment": "<action_segment_description>",
+                    "rationale": "<explanation of whether this action segment was already applied; to avoid pitfalls, try to use the exact same words here as the action segment to determine this. use CAPITALS to highlight the same words in the segment as in your explanation>",
+                }
+            ],
+            "guideline_current_application_refers_to_a_new_or_subtly_different_context_or_information": "<if the guideline DID previously apply, explain here whether or not it needs to re-apply due to it being applicable to new context or information>",
+            "guideline_previously_applied": "<str: either 'no', 'partially' or 'fully' depanding on whether and to what degree the action was previously preformed>",
+            "is_missing_part_cosmetic_or_functional": "<str: only included if guideline_previously_applied is 'partially'. Value is either 'cosmetic' or 'functional' depending on the nature of the missing segment.",
+            "guideline_should_reapply": "<BOOL: Optional, only necessary if guideline_previously_applied is not 'no'>",
+            "applies_score": "<Relevance score of the guideline between 1 and 10. A higher score indicates that the guideline should be active>",
+        }
+
     def _build_prompt(
         self,
         shots: Sequence[GenericGuidelineMatchingShot],
     ) -> PromptBuilder:
-        result_structure = [
-            {
-                "guideline_id": g.id,
-                "condition": g.content.condition,
-                "condition_application_rationale": "<Explanation for why the condition is or isn't met>",
-                "condition_applies": "<BOOL>",
-                "action": g.content.action,
-                "guideline_is_continuous": "<BOOL: Optional, only necessary if guideline_previously_applied is true. Specifies whether the action is taken one-time, or is continuous>",
-                "capitalize_exact_words_from_action_in_the_explanations_to_avoid_semantic_pitfalls": True,
-                "guideline_previously_applied_rationale": [
-                    {
-                        "action_segment": "<action_segment_description>",
-                        "rationale": "<explanation of whether this action segment was already applied; to avoid pitfalls, try to use the exact same words here as the action segment to determine this. use CAPITALS to highlight the same words in the segment as in your explanation>",
-                    }
-                ],
-                "guideline_current_application_refers_to_a_new_or_subtly_different_context_or_information": "<if the guideline DID previously apply, explain here whether or not it needs to re-apply due to it being applicable to new context or information>",
-                "guideline_previously_applied": "<str: either 'no', 'partially' or 'fully' depanding on whether and to what degree the action was previously preformed>",
-                "is_missing_part_cosmetic_or_functional": "<str: only included if guideline_previously_applied is 'partially'. Value is either 'cosmetic' or 'functional' depending on the nature of the missing segment.",
-                "guideline_should_reapply": "<BOOL: Optional, only necessary if guideline_previously_applied is not 'no'>",
-                "applies_score": "<Relevance score of the guideline between 1 and 10. A higher score indicates that the guideline should be active>",
-            }
-            for g in self._guidelines.values()
-        ]
+        result_structure = [self.format_check_template(g) for g in self._guidelines.values()]
         guidelines_text = "\n".join(
             f"{i}) Condition: {g.content.condition}. Action: {g.content.action}"
             for i, g in self._guidelines.items()
@@ -440,6 +455,152 @@ class GenericGuidelineMatching(GuidelineMatchingStrategy):
         )
 
 
+class _MeasuredGuidelineMatchingBatch(GuidelineMatchingBatch):
+    def __init__(
+        self,
+        batch: GuidelineMatchingBatch,
+        guideline_count: int,
+        on_processed: Callable[[int, GenerationInfo], None],
+    ) -> None:
+        self._batch = batch
+        self._guideline_count = guideline_count
+        self._on_processed = on_processed
+
+    @override
+    async def process(self) -> GuidelineMatchingBatchResult:
+        result = await self._batch.process()
+        self._on_processed(self._guideline_count, result.generation_info)
+        return result
+
+
+class TokenBudgetGuidelineMatching(GenericGuidelineMatching):
+    """Packs as many guidelines into each batch as a token budget allows.
+
+    The fixed batch sizes of the generic strategy produce many small prompts,
+    each repeating the same interaction history. Here, batch sizes follow from
+    the estimated prompt and completion sizes, and (optionally) from the observed
+    generation latency per guideline, so that no single call exceeds a latency target.
+    """
+
+    def __init__(
+        self,
+        logger: Logger,
+        schematic_generator: SchematicGenerator[GenericGuidelineMatchesSchema],
+        max_batch_tokens: Optional[int] = None,
+        max_batch_latency: Optional[float] = None,
+    ) -> None:
+        super().__init__(logger, schematic_generator)
+
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_latency = max_batch_latency
+
+        self._guideline_token_counts: dict[tuple[GuidelineId, str, str], int] = {}
+        self._seconds_per_guideline: Optional[float] = None
+
+    @property
+    def token_budget(self) -> int:
+        if self.max_batch_tokens is None:
+            return self._schematic_generator.max_tokens
+        return min(self.max_batch_tokens, self._schematic_generator.max_tokens)
+
+    @override
+    async def create_batches(
+        self,
+        guidelines: Sequence[Guideline],
+        context: GuidelineMatchingContext,
+    ) -> Sequence[GuidelineMatchingBatch]:
+        guidelines = list({g.id: g for g in guidelines}.values())
+
+        if not guidelines:
+            return []
+
+        available_tokens = self.token_budget - await self._estimate_shared_prompt_tokens(context)
+
+        if available_tokens <= 0:
+            self._logger.warning(
+                f"Shared guideline matching prompt exceeds the token budget ({self.token_budget}); "
+                "matching one guideline per batch"
+            )
+
+        max_guidelines_per_batch = self._max_guidelines_per_batch()
+
+        packed: list[list[Guideline]] = [[]]
+        packed_tokens = 0
+
+        for guideline in guidelines:
+            guideline_tokens = await self._estimate_guideline_tokens(guideline)
+
+            if packed[-1] and (
+                packed_tokens + guideline_tokens > available_tokens
+                or len(packed[-1]) >= max_guidelines_per_batch
+            ):
+                packed.append([])
+                packed_tokens = 0
+
+            packed[-1].append(guideline)
+            packed_tokens += guideline_tokens
+
+        self._logger.debug(
+            f"Packed {len(guidelines)} guidelines into {len(packed)} batches "
+            f"(token budget: {self.token_budget})"
+        )
+
+        return [
+            _MeasuredGuidelineMatchingBatch(
+                batch=self._create_batch(guidelines=batch_guidelines, context=context),
+                guideline_count=len(batch_guidelines),
+                on_processed=self._record_batch_latency,
+            )
+            for batch_guidelines in packed
+        ]
+
+    async def _estimate_shared_prompt_tokens(self, context: GuidelineMatchingContext) -> int:
+        empty_batch = self._create_batch(guidelines=[], context=context)
+        builder = empty_batch._build_prompt(shots=await empty_batch.shots())
+
+        # Rendered without build() so that this estimate isn't logged as a prompt
+        prompt = "\n\n".join(s.template.format(**s.props) for s in builder.sections.values())
+
+        return await self._schematic_generator.tokenizer.estimate_token_count(prompt)
+
+    async def _estimate_guideline_tokens(self, guideline: Guideline) -> int:
+        key = (guideline.id, guideline.content.condition, guideline.content.action)
+
+        if key not in self._guideline_token_counts:
+            tokenizer = self._schematic_generator.tokenizer
+
+            check_tokens = await tokenizer.estimate_token_count(
+                json.dumps(GenericGuidelineMatchingBatch.format_check_template(guideline))
+            )
+            listing_tokens = await tokenizer.estimate_token_count(
+                f"{guideline.id}) Condition: {guideline.content.condition}. Action: {guideline.content.action}"
+            )
+
+            # The completion fills in a check of roughly the same size as its template
+            self._guideline_token_counts[key] = 2 * check_tokens + listing_tokens
+
+        return self._guideline_token_counts[key]
+
+    def _max_guidelines_per_batch(self) -> int:
+        if self.max_batch_latency is None or not self._seconds_per_guideline:
+            return sys.maxsize
+
+        return max(1, math.floor(self.max_batch_latency / self._seconds_per_guideline))
+
+    def _record_batch_latency(self, guideline_count: int, generation_info: GenerationInfo) -> None:
+        if not guideline_count:
+            return
+
+        seconds_per_guideline = generation_info.duration / guideline_count
+
+        if self._seconds_per_guideline is None:
+            self._seconds_per_guideline = seconds_per_guideline
+        else:
+            self._seconds_per_guideline = (
+                0.8 * self._seconds_per_guideline + 0.2 * seconds_per_guideline
+            )
+
+
 class GuidelineMatchingStrategyResolver(ABC):
     @abstractmethod
     async def resolve(self, guideline: Guideline) -> GuidelineMatchingStrategy: ...
@@ -474,14 +635,98 @@ class DefaultGuidelineMatchingStrategyResolver(GuidelineMatchingStrategyResolver
         return self._generic_strategy
 
 
+class GuidelineMatchCache:
+    """A bounded LRU cache of guideline matching results with a time-to-live.
+
+    Results are keyed on a fingerprint of everything that goes into matching,
+    so a hit is only possible when the exact same inference would be repeated.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: float = 600.0) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+
+        self.hits = 0
+        self.misses = 0
+
+        self._entries: OrderedDict[str, tuple[float, GuidelineMatchingResult]] = OrderedDict()
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def get(self, key: str) -> Optional[GuidelineMatchingResult]:
+        if entry := self._entries.get(key):
+            expiration, result = entry
+
+            if expiration > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return result
+
+            del self._entries[key]
+
+        self.misses += 1
+        return None
+
+    def set(self, key: str, result: GuidelineMatchingResult) -> None:
+        if self.max_size <= 0:
+            return
+
+        self._entries[key] = (time.monotonic() + self.ttl, result)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+def _fingerprint_matching_inputs(
+    context: GuidelineMatchingContext,
+    guideline_strategies: Sequence[tuple[Guideline, GuidelineMatchingStrategy]],
+) -> str:
+    def event_content(source: EventSource, kind: EventKind, data: JSONSerializable) -> object:
+        return [source.value, kind.value, data]
+
+    inputs = {
+        "agent": [context.agent.id, context.agent.name, context.agent.description],
+        "customer": [context.customer.id, context.customer.name, context.customer.extra],
+        "context_variables": [
+            [variable.id, value.data] for variable, value in context.context_variables
+        ],
+        "interaction_history": [
+            event_content(e.source, e.kind, e.data) for e in context.interaction_history
+        ],
+        "terms": [[t.id, t.name, t.description, t.synonyms] for t in context.terms],
+        "staged_events": [event_content(e.source, e.kind, e.data) for e in context.staged_events],
+        "guidelines": [
+            [g.id, g.content.condition, g.content.action, strategy.__class__.__name__]
+            for g, strategy in guideline_strategies
+        ],
+    }
+
+    serialized = json.dumps(inputs, sort_keys=True, default=str)
+    return hashlib.sha256(serialized.encode()).hexdigest()
+
+
 class GuidelineMatcher:
     def __init__(
         self,
         logger: Logger,
         strategy_resolver: GuidelineMatchingStrategyResolver,
+        cache_size: int = 1024,
+        cache_ttl: float = 600.0,
+        retriever: Optional[GuidelineRetriever] = None,
+        max_concurrent_batches: Optional[int] = None,
     ) -> None:
         self._logger = logger
         self.strategy_resolver = strategy_resolver
+        self.cache = GuidelineMatchCache(max_size=cache_size, ttl=cache_ttl)
+        self.retriever = retriever
+        self._max_concurrent_batches = max_concurrent_batches
 
     async def match_guidelines(
         self,
@@ -492,6 +737,61 @@ class GuidelineMatcher:
         terms: Sequence[Term],
         staged_events: Sequence[EmittedEvent],
         guidelines: Sequence[Guideline],
+    ) -> GuidelineMatchingResult:
+        t_start = time.time()
+
+        context = GuidelineMatchingContext(
+            agent,
+            customer,
+            context_variables,
+            interaction_history,
+            terms,
+            staged_events,
+        )
+
+        with self._logger.scope("GuidelineMatcher"):
+            if not self.retriever:
+                return await self._match_guidelines(context, guidelines, t_start)
+
+            with self._logger.operation("Retrieving candidate guidelines"):
+                candidates = await self.retriever.retrieve(
+                    guidelines,
+                    interaction_history,
+                    staged_events,
+                )
+
+            result = await self._match_guidelines(context, candidates, t_start)
+
+            if len(candidates) < len(guidelines) and self.retriever.should_sample_recall():
+                # Measure what pre-filtering cost us by also matching against everything
+                full_result = await self._match_guidelines(context, guidelines, time.time())
+
+                recall = self.retriever.record_recall(
+                    [m.guideline.id for m in result.matches],
+                    [m.guideline.id for m in full_result.matches],
+                )
+
+                self._logger.debug(
+                    f"Guideline retrieval recall: {recall:.2f} "
+                    f"(average: {self.retriever.stats.average_recall:.2f})"
+                )
+
+                # The sampled full match consulted the cache too, so report both lookups
+                result = replace(
+                    result,
+                    cache=GuidelineMatchCacheInspection(
+                        hits=result.cache.hits + full_result.cache.hits,
+                        misses=result.cache.misses + full_result.cache.misses,
+                    ),
+                )
+
+            return result
+
+    async def _match_guidelines(
+        self,
+        context: GuidelineMatchingContext,
+        guidelines: Sequence[Guideline],
+        t_start: float,
     ) -> GuidelineMatchingResult:
         if not guidelines:
             return GuidelineMatchingResult(
@@ -501,49 +801,76 @@ class GuidelineMatcher:
                 batches=[],
             )
 
-        t_start = time.time()
+        with self._logger.operation("Creating batches"):
+            resolved_strategies = [
+                (guideline, await self.strategy_resolver.resolve(guideline))
+                for guideline in guidelines
+            ]
 
-        with self._logger.scope("GuidelineMatcher"):
-            with self._logger.operation("Creating batches"):
-                guideline_strategies: dict[
-                    str, tuple[GuidelineMatchingStrategy, list[Guideline]]
-                ] = {}
-                for guideline in guidelines:
-                    strategy = await self.strategy_resolver.resolve(guideline)
-                    if strategy.__class__.__name__ not in guideline_strategies:
-                        guideline_strategies[strategy.__class__.__name__] = (strategy, [])
-                    guideline_strategies[strategy.__class__.__name__][1].append(guideline)
-
-                batches = await async_utils.safe_gather(
-                    *[
-                        strategy.create_batches(
-                            guidelines,
-                            context=GuidelineMatchingContext(
-                                agent,
-                                customer,
-                                context_variables,
-                                interaction_history,
-                                terms,
-                                staged_events,
-                            ),
-                        )
-                        for _, (strategy, guidelines) in guideline_strategies.items()
-                    ]
+            fingerprint = _fingerprint_matching_inputs(context, resolved_strategies)
+
+            if cached_result := self.cache.get(fingerprint):
+                self._logger.debug(
+                    f"Serving matches from cache (hits={self.cache.hits}, misses={self.cache.misses})"
+                )
+
+                # No inference took place, so there are no generations to report
+                return GuidelineMatchingResult(
+                    total_duration=time.time() - t_start,
+                    batch_count=cached_result.batch_count,
+                    batch_generations=[],
+                    batches=cached_result.batches,
+                    cache=GuidelineMatchCacheInspection(hits=1, misses=0),
                 )
 
-            with self._logger.operation("Processing batches"):
-                batch_tasks = [batch.process() for batch in batches[0]]
-                batch_results = await async_utils.safe_gather(*batch_tasks)
+            guideline_strategies: dict[str, tuple[GuidelineMatchingStrategy, list[Guideline]]] = {}
+            for guideline, strategy in resolved_strategies:
+                if strategy.__class__.__name__ not in guideline_strategies:
+                    guideline_strategies[strategy.__class__.__name__] = (strategy, [])
+                guideline_strategies[strategy.__class__.__name__][1].append(guideline)
+
+            batches = await async_utils.safe_gather(
+                *[
+                    strategy.create_batches(
+                        guidelines,
+                        context=context,
+                    )
+                    for _, (strategy, guidelines) in guideline_strategies.items()
+                ]
+            )
+
+        with self._logger.operation("Processing batches"):
+            batch_results = await self._process_batches(batches[0])
 
         t_end = time.time()
 
-        return GuidelineMatchingResult(
+        result = GuidelineMatchingResult(
             total_duration=t_end - t_start,
             batch_count=len(batches[0]),
             batch_generations=[result.generation_info for result in batch_results],
             batches=[result.matches for result in batch_results],
+            cache=GuidelineMatchCacheInspection(hits=0, misses=1),
         )
 
+        self.cache.set(fingerprint, result)
+
+        return result
+
+    async def _process_batches(
+        self,
+        batches: Sequence[GuidelineMatchingBatch],
+    ) -> Sequence[GuidelineMatchingBatchResult]:
+        if not self._max_concurrent_batches:
+            return list(await async_utils.safe_gather(*[batch.process() for batch in batches]))
+
+        semaphore = asyncio.Semaphore(self._max_concurrent_batches)
+
+        async def process_batch(batch: GuidelineMatchingBatch) -> GuidelineMatchingBatchResult:
+            async with semaphore:
+                return await batch.process()
+
+        return list(await async_utils.safe_gather(*[process_batch(batch) for batch in batches]))
+
 
 def _make_event(e_id: str, source: EventSource, message: str) -> Event:
     return Event(
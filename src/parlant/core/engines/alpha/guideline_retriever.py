@@ -0,0 +1,256 @@
+# Copyright 2025 Emcie Co Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+from dataclasses import dataclass
+from itertools import chain
+import random
+import time
+from typing import Any, Mapping, Optional, Sequence, TypedDict, cast
+from typing_extensions import Required, Self
+
+from Daneel.core.async_utils import ReaderWriterLock
+from Daneel.core.common import Version, md5_checksum
+from Daneel.core.emissions import EmittedEvent
+from Daneel.core.guidelines import Guideline, GuidelineId
+from Daneel.core.loggers import Logger
+from Daneel.core.nlp.embedding import Embedder
+from Daneel.core.persistence.common import ObjectId
+from Daneel.core.persistence.vector_database import (
+    BaseDocument,
+    VectorCollection,
+    VectorDatabase,
+)
+from Daneel.core.sessions import Event, EventKind
+from Daneel.core.tags import TagId
+
+
+class _GuidelineConditionDocument(TypedDict, total=False):
+    id: ObjectId
+    version: Version.String
+    content: str
+    checksum: Required[str]
+
+
+@dataclass
+class GuidelineRetrievalStats:
+    retrievals: int = 0
+    candidates: int = 0
+    selected: int = 0
+    total_duration: float = 0.0
+    recall_samples: int = 0
+    total_recall: float = 0.0
+
+    @property
+    def average_latency(self) -> float:
+        return self.total_duration / self.retrievals if self.retrievals else 0.0
+
+    @property
+    def selection_ratio(self) -> float:
+        return self.selected / self.candidates if self.candidates else 0.0
+
+    @property
+    def average_recall(self) -> Optional[float]:
+        return self.total_recall / self.recall_samples if self.recall_samples else None
+
+
+class GuidelineRetriever:
+    """Pre-filters guidelines by the similarity of their conditions to the interaction.
+
+    Conditions are embedded once (and re-embedded only when they change), so that
+    each turn only the top-K closest guidelines, plus those marked as always-on,
+    go on to the (far more expensive) LLM-based matching.
+    """
+
+    VERSION = Version.from_string("0.1.0")
+
+    def __init__(
+        self,
+        logger: Logger,
+        vector_db: VectorDatabase,
+        embedder_type: type[Embedder],
+        top_k: int = 20,
+        max_distance: Optional[float] = None,
+        query_window: int = 5,
+        recall_sample_rate: float = 0.0,
+    ) -> None:
+        self._logger = logger
+        self._vector_db = vector_db
+        self._embedder_type = embedder_type
+
+        self.top_k = top_k
+        self.max_distance = max_distance
+        self.query_window = query_window
+        self.recall_sample_rate = recall_sample_rate
+
+        self.always_on_guideline_ids: set[GuidelineId] = set()
+        self.always_on_tag_ids: set[TagId] = set()
+
+        self.stats = GuidelineRetrievalStats()
+
+        self._collection: VectorCollection[_GuidelineConditionDocument]
+        self._indexed_checksums: dict[GuidelineId, str] = {}
+        self._lock = ReaderWriterLock()
+
+    async def _document_loader(
+        self,
+        document: BaseDocument,
+    ) -> Optional[_GuidelineConditionDocument]:
+        # This collection is a derived index; outdated documents are
+        # simply dropped and re-embedded on the next retrieval.
+        if document["version"] == self.VERSION.to_string():
+            return cast(_GuidelineConditionDocument, document)
+
+        return None
+
+    async def __aenter__(self) -> Self:
+        self._collection = await self._vector_db.get_or_create_collection(
+            name="guideline_conditions",
+            schema=_GuidelineConditionDocument,
+            embedder_type=self._embedder_type,
+            document_loader=self._document_loader,
+        )
+
+        self._indexed_checksums = {
+            GuidelineId(d["id"]): d["checksum"] for d in await self._collection.find({})
+        }
+
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: Optional[type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[object],
+    ) -> None:
+        pass
+
+    def is_always_on(self, guideline: Guideline) -> bool:
+        return guideline.id in self.always_on_guideline_ids or any(
+            tag_id in self.always_on_tag_ids for tag_id in guideline.tags
+        )
+
+    def should_sample_recall(self) -> bool:
+        return self.recall_sample_rate > 0 and random.random() < self.recall_sample_rate
+
+    def record_recall(
+        self,
+        selected_matches: Sequence[GuidelineId],
+        full_matches: Sequence[GuidelineId],
+    ) -> float:
+        if full_matches:
+            recall = len(set(selected_matches) & set(full_matches)) / len(set(full_matches))
+        else:
+            recall = 1.0
+
+        self.stats.recall_samples += 1
+        self.stats.total_recall += recall
+
+        return recall
+
+    async def retrieve(
+        self,
+        guidelines: Sequence[Guideline],
+        interaction_history: Sequence[Event],
+        staged_events: Sequence[EmittedEvent],
+    ) -> Sequence[Guideline]:
+        if len(guidelines) <= self.top_k:
+            return guidelines
+
+        query = self._build_query(interaction_history, staged_events)
+
+        if not query:
+            return guidelines
+
+        t_start = time.time()
+
+        await self._index(guidelines)
+
+        async with self._lock.reader_lock:
+            results = await self._collection.find_similar_documents(
+                filters={"id": {"$in": [g.id for g in guidelines]}},
+                query=query,
+                k=self.top_k,
+            )
+
+        closest_ids = {
+            r.document["id"]
+            for r in results
+            if self.max_distance is None or r.distance <= self.max_distance
+        }
+
+        selected = [g for g in guidelines if g.id in closest_ids or self.is_always_on(g)]
+
+        self.stats.retrievals += 1
+        self.stats.candidates += len(guidelines)
+        self.stats.selected += len(selected)
+        self.stats.total_duration += time.time() - t_start
+
+        self._logger.debug(
+            f"Retrieved {len(selected)} of {len(guidelines)} guidelines for matching "
+            f"(average latency: {self.stats.average_latency:.3f}s)"
+        )
+
+        return selected
+
+    async def _index(self, guidelines: Sequence[Guideline]) -> None:
+        if not self._find_outdated(guidelines):
+            return
+
+        async with self._lock.writer_lock:
+            # Another retrieval may have indexed these while we waited for the lock
+            if not (outdated := self._find_outdated(guidelines)):
+                return
+
+            if changed_ids := [g.id for g, _ in outdated if g.id in self._indexed_checksums]:
+                await self._collection.delete_many(filters={"id": {"$in": changed_ids}})
+
+                for guideline_id in changed_ids:
+                    del self._indexed_checksums[guideline_id]
+
+            # Inserting everything at once embeds all outdated conditions in a single request
+            await self._collection.insert_many(
+                [
+                    _GuidelineConditionDocument(
+                        id=ObjectId(guideline.id),
+                        version=self.VERSION.to_string(),
+                        content=guideline.content.condition,
+                        checksum=checksum,
+                    )
+                    for guideline, checksum in outdated
+                ]
+            )
+
+            for guideline, checksum in outdated:
+                self._indexed_checksums[guideline.id] = checksum
+
+    def _find_outdated(self, guidelines: Sequence[Guideline]) -> list[tuple[Guideline, str]]:
+        return [
+            (g, checksum)
+            for g in guidelines
+            if self._indexed_checksums.get(g.id) != (checksum := md5_checksum(g.content.condition))
+        ]
+
+    def _build_query(
+        self,
+        interaction_history: Sequence[Event],
+        staged_events: Sequence[EmittedEvent],
+    ) -> str:
+        messages = [
+            str(cast(Mapping[str, Any], e.data).get("message", ""))
+            for e in chain(interaction_history[-self.query_window :], staged_events)
+            if e.kind == EventKind.MESSAGE and isinstance(e.data, Mapping)
+        ]
+
+        return "\n".join(m for m in messages if m)
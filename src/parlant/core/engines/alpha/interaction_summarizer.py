@@ -0,0 +1,226 @@
+# Copyright 2025 Emcie Co Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Optional, Sequence
+
+from Daneel.core.common import DefaultBaseModel
+from Daneel.core.engines.alpha.prompt_builder import PromptBuilder
+from Daneel.core.loggers import Logger
+from Daneel.core.nlp.generation import SchematicGenerator
+from Daneel.core.sessions import (
+    Event,
+    EventId,
+    EventKind,
+    EventSource,
+    InteractionSummary,
+    SessionId,
+    SessionStore,
+)
+
+
+class InteractionSummarySchema(DefaultBaseModel):
+    summary: str
+
+
+@dataclass(frozen=True)
+class HistoryPolicy:
+    max_tokens: int
+    """Token budget for the interaction events that are kept verbatim in prompts"""
+
+    verbatim_turns: int = 10
+    """How many of the latest turns are kept verbatim, as long as they fit within the budget"""
+
+
+class InteractionSummarizer:
+    """Keeps the interaction history in prompts within a token budget.
+
+    Once a session's history exceeds the budget, only its latest turns are kept
+    verbatim, and everything before them is folded into a rolling summary. The
+    summary is stored per session, so that each turn only needs to summarize the
+    events that have just fallen out of the window.
+    """
+
+    def __init__(
+        self,
+        logger: Logger,
+        session_store: SessionStore,
+        schematic_generator: SchematicGenerator[InteractionSummarySchema],
+        policy: HistoryPolicy,
+    ) -> None:
+        self._logger = logger
+        self._session_store = session_store
+        self._schematic_generator = schematic_generator
+        self._policy = policy
+
+    async def window(
+        self,
+        session_id: SessionId,
+        history: Sequence[Event],
+    ) -> Sequence[Event]:
+        """Returns the history to show in prompts: a summary event followed by the latest turns"""
+
+        events = [e for e in history if e.kind != EventKind.STATUS]
+
+        if await self._estimate_tokens(events) <= self._policy.max_tokens:
+            return history
+
+        turns = self._split_into_turns(events)
+
+        kept_turns = 0
+        kept_tokens = 0
+
+        for turn in reversed(turns[-max(self._policy.verbatim_turns, 1) :]):
+            turn_tokens = await self._estimate_tokens(turn)
+
+            # The latest turn is always kept, even if it exceeds the budget by itself
+            if kept_turns and kept_tokens + turn_tokens > self._policy.max_tokens:
+                break
+
+            kept_turns += 1
+            kept_tokens += turn_tokens
+
+        window_offset = turns[-kept_turns][0].offset
+        folded_events = [e for e in events if e.offset < window_offset]
+
+        if not folded_events:
+            return history
+
+        summary = await self._summarize(session_id, folded_events)
+
+        return [self._summary_event(summary)] + [e for e in history if e.offset >= window_offset]
+
+    def _split_into_turns(self, events: Sequence[Event]) -> list[list[Event]]:
+        turns: list[list[Event]] = []
+
+        for e in events:
+            if not turns or (e.kind == EventKind.MESSAGE and e.source == EventSource.CUSTOMER):
+                turns.append([])
+            turns[-1].append(e)
+
+        return turns
+
+    async def _estimate_tokens(self, events: Sequence[Event]) -> int:
+        return await self._schematic_generator.tokenizer.estimate_token_count(
+            "\n".join(PromptBuilder.adapt_event(e) for e in events)
+        )
+
+    async def _summarize(
+        self,
+        session_id: SessionId,
+        folded_events: Sequence[Event],
+    ) -> InteractionSummary:
+        summary = await self._session_store.read_interaction_summary(session_id)
+
+        # The stored summary can only be extended if it covers a prefix of the folded
+        # events, and none of the events it covers have been deleted since.
+        if summary and (
+            summary.last_event_offset > folded_events[-1].offset
+            or summary.event_count
+            != sum(1 for e in folded_events if e.offset <= summary.last_event_offset)
+        ):
+            summary = None
+
+        new_events = [
+            e for e in folded_events if not summary or e.offset > summary.last_event_offset
+        ]
+
+        if summary and not new_events:
+            return summary
+
+        with self._logger.operation(f"Summarizing {len(new_events)} interaction events"):
+            result = await self._schematic_generator.generate(
+                prompt=self._build_prompt(summary, new_events),
+                hints={"temperature": 0.1},
+            )
+
+        return await self._session_store.update_interaction_summary(
+            session_id,
+            content=result.content.summary,
+            last_event_offset=folded_events[-1].offset,
+            event_count=len(folded_events),
+        )
+
+    def _build_prompt(
+        self,
+        summary: Optional[InteractionSummary],
+        events: Sequence[Event],
+    ) -> PromptBuilder:
+        builder = PromptBuilder(on_build=lambda prompt: self._logger.debug(f"Prompt:\n{prompt}"))
+
+        builder.add_section(
+            name="interaction-summarizer-general-instructions",
+            template="""
+You are summarizing the earlier part of an interaction between an AI agent and a user,
+so that the agent can keep following the interaction without reading all of it.
+Keep every detail that the agent may still need: what the user asked for and prefers, facts and identifiers they provided,
+information, offers and commitments the agent gave, results of tool calls, and anything that was left unresolved.
+Leave out small talk and repetitions. Write in the third person and the past tense, as concisely as possible.
+""",
+        )
+
+        if summary:
+            builder.add_section(
+                name="interaction-summarizer-previous-summary",
+                template="""
+The following summarizes the interaction up to the events below: ###
+{summary}
+###
+""",
+                props={"summary": summary.content},
+            )
+
+        builder.add_section(
+            name="interaction-summarizer-events",
+            template="""
+The following are the events to {action}: ###
+{events}
+###
+""",
+            props={
+                "action": "add to the summary" if summary else "summarize",
+                "events": "\n".join(PromptBuilder.adapt_event(e) for e in events),
+            },
+        )
+
+        builder.add_section(
+            name="interaction-summarizer-output-format",
+            template="""
+Produce a JSON object of the following format: ###
+{{
+    "summary": "<{summary_description}>"
+}}
+###
+""",
+            props={
+                "summary_description": "THE PREVIOUS SUMMARY, UPDATED WITH THESE EVENTS"
+                if summary
+                else "SUMMARY OF THESE EVENTS"
+            },
+        )
+
+        return builder
+
+    def _summary_event(self, summary: InteractionSummary) -> Event:
+        return Event(
+            id=EventId(f"interaction-summary-{summary.last_event_offset}"),
+            source=EventSource.SYSTEM,
+            kind=EventKind.CUSTOM,
+            creation_utc=summary.creation_utc,
+            offset=summary.last_event_offset,
+            correlation_id="",
+            data={"summary_of_earlier_events": summary.content},
+            deleted=False,
+        )
@@ -15,11 +15,12 @@
 from dataclasses import dataclass
 from itertools import chain
 import json
+import time
 import traceback
-from typing import Any, Mapping, Optional, Sequence, cast
+from typing import Any, Awaitable, Callable, Mapping, Optional, Sequence, cast
 
 from Daneel.core.contextual_correlator import ContextualCorrelator
-from Daneel.core.agents import Agent
+from Daneel.core.agents import Agent, CompositionMode
 from Daneel.core.context_variables import ContextVariable, ContextVariableValue
 from Daneel.core.customers import Customer
 from Daneel.core.engines.alpha.message_event_composer import (
@@ -28,8 +29,9 @@ from Daneel.core.engines.alpha.message_event_composer import (
     MessageEventComposition,
 )
 from Daneel.core.engines.alpha.tool_caller import MissingToolData, ToolInsights
-from Daneel.core.nlp.generation import SchematicGenerator
+from Daneel.core.nlp.generation import CompletionDelta, SchematicGenerator
 from Daneel.core.nlp.generation_info import GenerationInfo
+from Daneel.core.nlp.streaming import JSONStreamScanner
 from Daneel.core.engines.alpha.guideline_match import GuidelineMatch
 from Daneel.core.engines.alpha.prompt_builder import PromptBuilder, SectionStatus
 from Daneel.core.glossary import Term
@@ -109,6 +111,8 @@ class MessageGeneratorShot(Shot):
 
 
 class MessageGenerator(MessageEventComposer):
+    draft_update_interval = 0.1  # Minimum seconds between streamed draft updates
+
     def __init__(
         self,
         logger: Logger,
@@ -212,6 +216,17 @@ class MessageGenerator(MessageEventComposer):
             },
         )
 
+        on_draft: Optional[Callable[[str, bool], Awaitable[None]]] = None
+
+        if agent.composition_mode == CompositionMode.FLUID_STREAMING:
+
+            async def on_draft(delta: str, restart: bool) -> None:
+                await event_emitter.emit_message_draft(
+                    correlation_id=self._correlator.correlation_id,
+                    delta=delta,
+                    restart=restart,
+                )
+
         generation_attempt_temperatures = {
             0: 0.1,
             1: 0.3,
@@ -226,6 +241,7 @@ class MessageGenerator(MessageEventComposer):
                     prompt,
                     temperature=generation_attempt_temperatures[generation_attempt],
                     final_attempt=(generation_attempt + 1) == len(generation_attempt_temperatures),
+                    on_draft=on_draft,
                 )
 
                 if response_message is not None:
@@ -666,11 +682,23 @@ Produce a valid JSON object in the following format: ###
         prompt: PromptBuilder,
         temperature: float,
         final_attempt: bool,
+        on_draft: Optional[Callable[[str, bool], Awaitable[None]]] = None,
     ) -> tuple[GenerationInfo, Optional[str]]:
-        message_event_response = await self._schematic_generator.generate(
-            prompt=prompt,
-            hints={"temperature": temperature},
-        )
+        if on_draft:
+            on_progress, flush_drafts = self._track_revision_drafts(on_draft)
+
+            message_event_response = await self._schematic_generator.generate_streaming(
+                prompt=prompt,
+                on_progress=on_progress,
+                hints={"temperature": temperature},
+            )
+
+            await flush_drafts()
+        else:
+            message_event_response = await self._schematic_generator.generate(
+                prompt=prompt,
+                hints={"temperature": temperature},
+            )
 
         self._logger.debug(
             f"Completion:\n{message_event_response.content.model_dump_json(indent=2)}"
@@ -719,6 +747,48 @@ Produce a valid JSON object in the following format: ###
 
         return message_event_response.info, str(final_revision.content)
 
+    def _track_revision_drafts(
+        self,
+        on_draft: Callable[[str, bool], Awaitable[None]],
+    ) -> tuple[Callable[[CompletionDelta], Awaitable[None]], Callable[[], Awaitable[None]]]:
+        # Drafts are only a preview of the revision currently being written;
+        # the message event emitted once the completion is done remains the
+        # authoritative reply, since it may pick an earlier revision.
+        # Returns the progress callback, and a function that emits the text still held
+        # back by throttling, to be called once the completion is done.
+        scanner = JSONStreamScanner()
+        revision_index = -1
+        pending: list[str] = []
+        restart_pending = False
+        last_emission_time = 0.0
+
+        async def on_progress(delta: CompletionDelta) -> None:
+            nonlocal scanner, revision_index, pending, restart_pending, last_emission_time
+
+            if delta.restart:
+                # The completion started over, so the next revision will restart the draft
+                scanner, revision_index, pending = JSONStreamScanner(), -1, []
+
+            for fragment in scanner.feed(delta.text):
+                match fragment.path:
+                    case ("revisions", int(index), "content"):
+                        if index != revision_index:
+                            revision_index, pending, restart_pending = index, [], True
+                        pending.append(fragment.text)
+
+            if pending and time.monotonic() - last_emission_time >= self.draft_update_interval:
+                await flush()
+
+        async def flush() -> None:
+            nonlocal pending, restart_pending, last_emission_time
+
+            if pending:
+                text, restart = "".join(pending), restart_pending
+                pending, restart_pending, last_emission_time = [], False, time.monotonic()
+                await on_draft(text, restart)
+
+        return on_progress, flush
+
 
 example_1_expected = MessageSchema(
     last_message_of_customer="Hi, I'd like to know the schedule for the next trains to Boston, please.",
@@ -12,13 +12,15 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import asyncio
 from collections import defaultdict
+from contextlib import asynccontextmanager
 from dataclasses import dataclass, asdict, field
 from itertools import chain
 import json
 import time
 import traceback
-from typing import Any, Mapping, NewType, Optional, Sequence
+from typing import Any, AsyncIterator, Callable, Mapping, NewType, Optional, Sequence
 
 from Daneel.core import async_utils
 from Daneel.core.agents import Agent
@@ -27,6 +29,7 @@ from Daneel.core.context_variables import ContextVariable, ContextVariableValue
 from Daneel.core.emissions import EmittedEvent
 from Daneel.core.engines.alpha.guideline_match import GuidelineMatch
 from Daneel.core.engines.alpha.prompt_builder import PromptBuilder, BuiltInSection, SectionStatus
+from Daneel.core.engines.alpha.tool_result_cache import ToolResultCache
 from Daneel.core.glossary import Term
 from Daneel.core.loggers import Logger
 from Daneel.core.nlp.generation import SchematicGenerator
@@ -101,6 +104,8 @@ class ToolCall:
     id: ToolCallId
     tool_id: ToolId
     arguments: Mapping[str, JSONSerializable]
+    # The descriptor the call was inferred from, which holds the tool's cache policy
+    tool: Optional[Tool] = field(default=None, compare=False, repr=False)
 
     def __eq__(self, value: object) -> bool:
         if isinstance(value, ToolCall):
@@ -113,6 +118,8 @@ class ToolCallResult:
     id: ToolResultId
     tool_call: ToolCall
     result: ToolResult
+    cache_hit: Optional[bool] = None
+    """Whether the result was served from the result cache, or None if the tool isn't cacheable"""
 
 
 @dataclass(frozen=True)
@@ -144,11 +151,16 @@ class ToolCaller:
         logger: Logger,
         service_registry: ServiceRegistry,
         schematic_generator: SchematicGenerator[ToolCallInferenceSchema],
+        max_concurrent_calls_per_service: Optional[int] = None,
     ) -> None:
         self._service_registry = service_registry
         self._logger = logger
         self._schematic_generator = schematic_generator
 
+        self.result_cache = ToolResultCache()
+        self._max_concurrent_calls_per_service = max_concurrent_calls_per_service
+        self._service_semaphores: dict[str, asyncio.Semaphore] = {}
+
     async def infer_tool_calls(
         self,
         agent: Agent,
@@ -158,7 +170,13 @@ class ToolCaller:
         ordinary_guideline_matches: Sequence[GuidelineMatch],
         tool_enabled_guideline_matches: Mapping[GuidelineMatch, Sequence[ToolId]],
         staged_events: Sequence[EmittedEvent],
+        on_batch_inferred: Optional[Callable[[Sequence[ToolCall]], None]] = None,
     ) -> ToolCallInferenceResult:
+        """Infers the calls to make for each of the candidate tools.
+
+        If on_batch_inferred is given, it is called with each tool's calls as soon as
+        they are inferred, without waiting for the inference of the other tools.
+        """
         with self._logger.scope("ToolCaller"):
             return await self._do_infer_tool_calls(
                 agent,
@@ -168,6 +186,7 @@ class ToolCaller:
                 ordinary_guideline_matches,
                 tool_enabled_guideline_matches,
                 staged_events,
+                on_batch_inferred,
             )
 
     async def _do_infer_tool_calls(
@@ -179,6 +198,7 @@ class ToolCaller:
         ordinary_guideline_matches: Sequence[GuidelineMatch],
         tool_enabled_guideline_matches: Mapping[GuidelineMatch, Sequence[ToolId]],
         staged_events: Sequence[EmittedEvent],
+        on_batch_inferred: Optional[Callable[[Sequence[ToolCall]], None]],
     ) -> ToolCallInferenceResult:
         if not tool_enabled_guideline_matches:
             return ToolCallInferenceResult(
@@ -220,6 +240,7 @@ class ToolCaller:
                         if tool_descriptor != (tool_id, tool)
                     ],
                     staged_events=staged_events,
+                    on_inferred=on_batch_inferred,
                 )
                 for (tool_id, tool), props in batches.items()
             ]
@@ -254,6 +275,7 @@ class ToolCaller:
         candidate_descriptor: tuple[ToolId, Tool, list[GuidelineMatch]],
         reference_tools: Sequence[tuple[ToolId, Tool]],
         staged_events: Sequence[EmittedEvent],
+        on_inferred: Optional[Callable[[Sequence[ToolCall]], None]] = None,
     ) -> tuple[GenerationInfo, list[ToolCall], list[MissingToolData]]:
         inference_prompt = self._build_tool_call_inference_prompt(
             agent,
@@ -278,6 +300,9 @@ class ToolCaller:
             inference_output, candidate_descriptor
         )
 
+        if on_inferred:
+            on_inferred(tool_calls)
+
         return generation_info, tool_calls, missing_data
 
     async def _evaluate_tool_calls_parameters(
@@ -320,6 +345,7 @@ class ToolCaller:
                             id=ToolCallId(generate_id()),
                             tool_id=tool_id,
                             arguments=arguments,
+                            tool=tool,
                         )
                     )
 
@@ -789,6 +815,20 @@ Guidelines:
 
         return inference.info, inference.content.tool_calls_for_candidate_tool
 
+    @asynccontextmanager
+    async def _service_call_slot(self, service_name: str) -> AsyncIterator[None]:
+        if not self._max_concurrent_calls_per_service:
+            yield
+            return
+
+        if service_name not in self._service_semaphores:
+            self._service_semaphores[service_name] = asyncio.Semaphore(
+                self._max_concurrent_calls_per_service
+            )
+
+        async with self._service_semaphores[service_name]:
+            yield
+
     async def _run_tool(
         self,
         context: ToolContext,
@@ -804,12 +844,33 @@ Guidelines:
             try:
                 service = await self._service_registry.read_tool_service(tool_id.service_name)
 
-                result = await service.call_tool(
-                    tool_id.tool_name,
-                    context,
-                    tool_call.arguments,
+                # Calls that weren't inferred here carry no descriptor, and so aren't cached
+                tool = tool_call.tool
+                cache_key = (
+                    self.result_cache.key(tool_id, tool, context, tool_call.arguments)
+                    if tool
+                    else None
                 )
 
+                if cache_key and (cached_result := self.result_cache.get(cache_key)):
+                    self._logger.debug(
+                        f"Execution::Result: Tool call served from cache ({tool_call.tool_id.to_string()}/{tool_call.id})"
+                    )
+
+                    return ToolCallResult(
+                        id=ToolResultId(generate_id()),
+                        tool_call=tool_call,
+                        result=cached_result,
+                        cache_hit=True,
+                    )
+
+                async with self._service_call_slot(tool_id.service_name):
+                    result = await service.call_tool(
+                        tool_id.tool_name,
+                        context,
+                        tool_call.arguments,
+                    )
+
                 self._logger.debug(
                     f"Execution::Result: Tool call succeeded ({tool_call.tool_id.to_string()}/{tool_call.id})\n{json.dumps(asdict(result), indent=2, default=str)}"
                 )
@@ -819,16 +880,23 @@ Guidelines:
                 )
                 raise
 
+            tool_result: ToolResult = {
+                "data": result.data,
+                "metadata": result.metadata,
+                "control": result.control,
+                "utterances": result.utterances,
+                "utterance_fields": result.utterance_fields,
+            }
+
+            # Only successful results are cached, so that failed calls are retried
+            if tool and cache_key:
+                self.result_cache.set(cache_key, tool_result, ttl=tool.cache_ttl)
+
             return ToolCallResult(
                 id=ToolResultId(generate_id()),
                 tool_call=tool_call,
-                result={
-                    "data": result.data,
-                    "metadata": result.metadata,
-                    "control": result.control,
-                    "utterances": result.utterances,
-                    "utterance_fields": result.utterance_fields,
-                },
+                result=tool_result,
+                cache_hit=False if cache_key else None,
             )
         except Exception as e:
             self._logger.error(
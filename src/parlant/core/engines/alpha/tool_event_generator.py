@@ -12,10 +12,12 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from dataclasses import dataclass
+import asyncio
+from dataclasses import dataclass, field
 from itertools import chain
 from typing import Mapping, Optional, Sequence
 
+from Daneel.core import async_utils
 from Daneel.core.customers import Customer
 from Daneel.core.tools import ToolContext
 from Daneel.core.contextual_correlator import ContextualCorrelator
@@ -25,10 +27,16 @@ from Daneel.core.loggers import Logger
 from Daneel.core.agents import Agent
 from Daneel.core.context_variables import ContextVariable, ContextVariableValue
 from Daneel.core.services.tools.service_registry import ServiceRegistry
-from Daneel.core.sessions import Event, SessionId, ToolEventData
+from Daneel.core.sessions import Event, SessionId, ToolEventData, ToolResultCacheInspection
 from Daneel.core.engines.alpha.guideline_match import GuidelineMatch
 from Daneel.core.glossary import Term
-from Daneel.core.engines.alpha.tool_caller import ToolCallInferenceSchema, ToolCaller, ToolInsights
+from Daneel.core.engines.alpha.tool_caller import (
+    ToolCall,
+    ToolCallInferenceSchema,
+    ToolCallResult,
+    ToolCaller,
+    ToolInsights,
+)
 from Daneel.core.emissions import EmittedEvent, EventEmitter
 from Daneel.core.tools import ToolId
 
@@ -38,6 +46,9 @@ class ToolEventGenerationResult:
     generations: Sequence[GenerationInfo]
     events: Sequence[Optional[EmittedEvent]]
     insights: ToolInsights
+    tool_result_cache: ToolResultCacheInspection = field(
+        default_factory=lambda: ToolResultCacheInspection(hits=0, misses=0)
+    )
 
 
 @dataclass(frozen=True)
@@ -61,12 +72,23 @@ class ToolEventGenerator:
         correlator: ContextualCorrelator,
         service_registry: ServiceRegistry,
         schematic_generator: SchematicGenerator[ToolCallInferenceSchema],
+        pipelined: bool = False,
+        max_concurrent_tool_calls_per_service: Optional[int] = None,
     ) -> None:
         self._logger = logger
         self._correlator = correlator
         self._service_registry = service_registry
 
-        self.tool_caller = ToolCaller(logger, service_registry, schematic_generator)
+        self.tool_caller = ToolCaller(
+            logger,
+            service_registry,
+            schematic_generator,
+            max_concurrent_calls_per_service=max_concurrent_tool_calls_per_service,
+        )
+
+        # When pipelined, each tool's calls start executing as soon as they're inferred,
+        # instead of waiting for the inference of all of the other candidate tools
+        self._pipelined = pipelined
 
     async def create_preexecution_state(
         self,
@@ -114,16 +136,38 @@ class ToolEventGenerator:
             self._logger.debug("Skipping tool calling; no tools associated with guidelines found")
             return ToolEventGenerationResult(generations=[], events=[], insights=ToolInsights())
 
-        inference_result = await self.tool_caller.infer_tool_calls(
-            agent,
-            context_variables,
-            interaction_history,
-            terms,
-            ordinary_guideline_matches,
-            tool_enabled_guideline_matches,
-            staged_events,
+        tool_context = ToolContext(
+            agent_id=agent.id,
+            session_id=session_id,
+            customer_id=customer.id,
         )
 
+        execution_tasks: list[asyncio.Task[Sequence[ToolCallResult]]] = []
+
+        def execute_inferred_calls(tool_calls: Sequence[ToolCall]) -> None:
+            if tool_calls:
+                execution_tasks.append(
+                    asyncio.create_task(
+                        self.tool_caller.execute_tool_calls(tool_context, tool_calls)
+                    )
+                )
+
+        try:
+            inference_result = await self.tool_caller.infer_tool_calls(
+                agent,
+                context_variables,
+                interaction_history,
+                terms,
+                ordinary_guideline_matches,
+                tool_enabled_guideline_matches,
+                staged_events,
+                on_batch_inferred=execute_inferred_calls if self._pipelined else None,
+            )
+        except BaseException:
+            for task in execution_tasks:
+                task.cancel()
+            raise
+
         tool_calls = list(chain.from_iterable(inference_result.batches))
 
         if not tool_calls:
@@ -133,14 +177,17 @@ class ToolEventGenerator:
                 insights=inference_result.insights,
             )
 
-        tool_results = await self.tool_caller.execute_tool_calls(
-            ToolContext(
-                agent_id=agent.id,
-                session_id=session_id,
-                customer_id=customer.id,
-            ),
-            tool_calls,
-        )
+        if self._pipelined:
+            results_by_call_id = {
+                r.tool_call.id: r
+                for batch_results in await async_utils.safe_gather(*execution_tasks)
+                for r in batch_results
+            }
+
+            # Keep the results in the order of the calls, regardless of which finished first
+            tool_results: Sequence[ToolCallResult] = [results_by_call_id[c.id] for c in tool_calls]
+        else:
+            tool_results = await self.tool_caller.execute_tool_calls(tool_context, tool_calls)
 
         if not tool_results:
             return ToolEventGenerationResult(
@@ -169,4 +216,8 @@ class ToolEventGenerator:
             generations=inference_result.batch_generations,
             events=[event],
             insights=inference_result.insights,
+            tool_result_cache=ToolResultCacheInspection(
+                hits=sum(1 for r in tool_results if r.cache_hit is True),
+                misses=sum(1 for r in tool_results if r.cache_hit is False),
+            ),
         )
@@ -0,0 +1,97 @@
+# Copyright 2025 Emcie Co Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from collections import OrderedDict
+import copy
+from dataclasses import dataclass
+import json
+import time
+from typing import Mapping, Optional
+
+from Daneel.core.common import JSONSerializable, md5_checksum
+from Daneel.core.sessions import ToolResult
+from Daneel.core.tools import Tool, ToolContext, ToolId
+
+
+@dataclass
+class ToolResultCacheStats:
+    hits: int = 0
+    misses: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class ToolResultCache:
+    """Serves repeated calls of idempotent tools from the results of earlier calls.
+
+    Tools opt in through their cache scope, and their results are kept for the tool's TTL.
+    Results of "session"-scoped tools are only reused within the session that produced them.
+    Results are copied in and out, so that callers modifying them don't affect the cache.
+    """
+
+    def __init__(self, max_entries: int = 10_000) -> None:
+        self._max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, ToolResult]] = OrderedDict()
+
+        self.stats = ToolResultCacheStats()
+
+    def key(
+        self,
+        tool_id: ToolId,
+        tool: Tool,
+        context: ToolContext,
+        arguments: Mapping[str, JSONSerializable],
+    ) -> Optional[str]:
+        """Returns the key of a call, or None if the tool's results may not be cached"""
+
+        match tool.cache_scope:
+            case "none":
+                return None
+            case "session":
+                scope = f"session:{context.session_id}"
+            case "global":
+                scope = "global"
+
+        # Sorting the keys makes the key independent of the order of the arguments
+        return md5_checksum(
+            json.dumps(
+                [tool_id.to_string(), scope, arguments],
+                sort_keys=True,
+                default=str,
+            )
+        )
+
+    def get(self, key: str) -> Optional[ToolResult]:
+        if entry := self._entries.get(key):
+            expiration, result = entry
+
+            if time.time() < expiration:
+                self._entries.move_to_end(key)
+                self.stats.hits += 1
+                return copy.deepcopy(result)
+
+            del self._entries[key]
+
+        self.stats.misses += 1
+        return None
+
+    def set(self, key: str, result: ToolResult, ttl: float) -> None:
+        self._entries[key] = (time.time() + ttl, copy.deepcopy(result))
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
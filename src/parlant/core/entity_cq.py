@@ -13,7 +13,7 @@
 # limitations under the License.
 
 from itertools import chain
-from typing import Optional, Sequence
+from typing import Mapping, Optional, Sequence
 
 from Daneel.core.agents import Agent, AgentId, AgentStore
 from Daneel.core.common import JSONSerializable
@@ -135,6 +135,13 @@ class EntityQueries:
     ) -> Optional[ContextVariableValue]:
         return await self._context_variable_store.read_value(variable_id, key)
 
+    async def read_context_variable_values(
+        self,
+        variable_ids: Sequence[ContextVariableId],
+        keys: Sequence[str],
+    ) -> Mapping[tuple[ContextVariableId, str], ContextVariableValue]:
+        return await self._context_variable_store.read_values(variable_ids, keys)
+
     async def find_events(
         self,
         session_id: SessionId,
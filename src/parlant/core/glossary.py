@@ -15,7 +15,6 @@
 from abc import abstractmethod
 from dataclasses import dataclass
 from datetime import datetime, timezone
-from itertools import chain
 from typing import NewType, Optional, Sequence, TypedDict, cast
 from typing_extensions import override, Self, Required
 
@@ -28,6 +27,7 @@ from Daneel.core.persistence.vector_database import (
     BaseDocument as VectorBaseDocument,
     VectorCollection,
     VectorDatabase,
+    fuse_similar_documents,
 )
 from Daneel.core.persistence.vector_database_helper import (
     VectorDocumentMigrationHelper,
@@ -183,6 +183,11 @@ class GlossaryVectorStore(GlossaryStore):
 
         self._lock = ReaderWriterLock()
 
+        # Tag associations are mirrored in memory, so that relevance searches
+        # can be filtered without going through the association collection
+        self._term_ids_by_tag: dict[TagId, set[TermId]] = {}
+        self._relevance_filters: dict[Optional[tuple[TagId, ...]], Optional[Where]] = {}
+
     async def _document_loader(self, document: VectorBaseDocument) -> Optional[_TermDocument]:
         async def v0_1_0_to_v_0_2_0(document: VectorBaseDocument) -> Optional[VectorBaseDocument]:
             raise Exception(
@@ -224,6 +229,9 @@ class GlossaryVectorStore(GlossaryStore):
                 document_loader=self._association_document_loader,
             )
 
+        for association in await self._association_collection.find(filters={}):
+            self._add_tag_association(association["term_id"], association["tag_id"])
+
         return self
 
     async def __aexit__(
@@ -234,6 +242,41 @@ class GlossaryVectorStore(GlossaryStore):
     ) -> None:
         pass
 
+    def _add_tag_association(self, term_id: TermId, tag_id: TagId) -> None:
+        self._term_ids_by_tag.setdefault(tag_id, set()).add(term_id)
+        self._relevance_filters.clear()
+
+    def _remove_tag_association(self, term_id: TermId, tag_id: TagId) -> None:
+        if term_ids := self._term_ids_by_tag.get(tag_id):
+            term_ids.discard(term_id)
+
+            if not term_ids:
+                del self._term_ids_by_tag[tag_id]
+
+        self._relevance_filters.clear()
+
+    def _relevance_filter(self, tags: Optional[Sequence[TagId]]) -> Optional[Where]:
+        """Returns the filter selecting terms with any of the given tags, or None if there are none.
+
+        As in list_terms(), no tags means all terms, and an empty sequence means untagged terms.
+        Filters are cached until tag associations change.
+        """
+        key = tuple(sorted(tags)) if tags is not None else None
+
+        if key not in self._relevance_filters:
+            if key is None:
+                filters: Optional[Where] = {}
+            elif not key:
+                tagged_term_ids = set().union(*self._term_ids_by_tag.values())
+                filters = {"id": {"$nin": sorted(tagged_term_ids)}} if tagged_term_ids else {}
+            else:
+                term_ids = set().union(*(self._term_ids_by_tag.get(tag, set()) for tag in key))
+                filters = {"id": {"$in": sorted(term_ids)}} if term_ids else None
+
+            self._relevance_filters[key] = filters
+
+        return self._relevance_filters[key]
+
     def _serialize(
         self,
         term: Term,
@@ -310,6 +353,8 @@ class GlossaryVectorStore(GlossaryStore):
                         "tag_id": tag,
                     }
                 )
+
+                self._add_tag_association(term.id, tag)
         return term
 
     @override
@@ -413,10 +458,10 @@ class GlossaryVectorStore(GlossaryStore):
                 raise ItemNotFoundError(item_id=UniqueId(term_id))
 
             await self._collection.delete_one(filters={"id": {"$eq": term_id}})
+            await self._association_collection.delete_many(filters={"term_id": {"$eq": term_id}})
+
             for tag_association in term_tag_associations:
-                await self._association_collection.delete_one(
-                    filters={"id": {"$eq": tag_association["id"]}}
-                )
+                self._remove_tag_association(term_id, tag_association["tag_id"])
 
     async def _query_chunks(self, query: str) -> list[str]:
         max_length = self._embedder.max_tokens // 5
@@ -448,13 +493,12 @@ class GlossaryVectorStore(GlossaryStore):
         max_terms: int = 20,
     ) -> Sequence[Term]:
         async with self._lock.reader_lock:
-            queries = await self._query_chunks(query)
+            filters = self._relevance_filter(tags)
 
-            filters: Where = {}
+            if filters is None:
+                return []
 
-            terms = await self.list_terms(tags=tags)
-            if terms:
-                filters = {"id": {"$in": [str(t.id) for t in terms]}}
+            queries = await self._query_chunks(query)
 
             tasks = [
                 self._collection.find_similar_documents(
@@ -465,9 +509,7 @@ class GlossaryVectorStore(GlossaryStore):
                 for q in queries
             ]
 
-        all_results = chain.from_iterable(await async_utils.safe_gather(*tasks))
-        unique_results = list(set(all_results))
-        top_results = sorted(unique_results, key=lambda r: r.distance)[:max_terms]
+        top_results = fuse_similar_documents(await async_utils.safe_gather(*tasks), max_terms)
 
         return [await self._deserialize(r.document) for r in top_results]
 
@@ -510,6 +552,8 @@ class GlossaryVectorStore(GlossaryStore):
 
             _ = await self._association_collection.insert_one(document=association_document)
 
+            self._add_tag_association(term_id, tag_id)
+
             term_document = await self._collection.find_one({"id": {"$eq": term_id}})
 
         if not term_document:
@@ -534,6 +578,8 @@ class GlossaryVectorStore(GlossaryStore):
             if delete_result.deleted_count == 0:
                 raise ItemNotFoundError(item_id=UniqueId(tag_id))
 
+            self._remove_tag_association(term_id, tag_id)
+
             term_document = await self._collection.find_one({"id": {"$eq": term_id}})
 
         if not term_document:
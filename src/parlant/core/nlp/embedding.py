@@ -13,12 +13,18 @@
 # limitations under the License.
 
 from abc import ABC, abstractmethod
+import asyncio
+from collections import OrderedDict
 from collections.abc import Mapping
 from dataclasses import dataclass
+from itertools import chain
+import json
 from lagom import Container
-from typing import Any, Sequence
+from typing import Any, Optional, Sequence, cast
 from typing_extensions import override
 
+from Daneel.core import async_utils
+from Daneel.core.common import md5_checksum
 from Daneel.core.nlp.tokenization import EstimatingTokenizer, ZeroEstimatingTokenizer
 
 
@@ -27,6 +33,22 @@ class EmbeddingResult:
     vectors: Sequence[Sequence[float]]
 
 
+@dataclass
+class EmbedderInferenceStats:
+    batches: int = 0
+    texts: int = 0
+    total_queue_latency: float = 0.0
+    total_inference_time: float = 0.0
+
+    @property
+    def average_queue_latency(self) -> float:
+        return self.total_queue_latency / self.texts if self.texts else 0.0
+
+    @property
+    def average_batch_size(self) -> float:
+        return self.texts / self.batches if self.batches else 0.0
+
+
 class Embedder(ABC):
     @abstractmethod
     async def embed(
@@ -52,16 +74,330 @@ class Embedder(ABC):
     @abstractmethod
     def dimensions(self) -> int: ...
 
+    @property
+    def inference_stats(self) -> Optional[EmbedderInferenceStats]:
+        """Statistics of embedders that run inference locally, or None for remote ones"""
+        return None
+
+
+class EmbeddingStore(ABC):
+    """Persistent storage of embeddings, keyed by the cache keys of EmbeddingCache"""
+
+    @abstractmethod
+    async def get_many(self, keys: Sequence[str]) -> Mapping[str, Sequence[float]]: ...
+
+    @abstractmethod
+    async def set_many(self, vectors: Mapping[str, Sequence[float]]) -> None: ...
+
+
+class EmbeddingCache:
+    """Content-addressed store of embeddings, keyed by embedder ID, text checksum and hints.
+
+    Recently used embeddings are kept in a bounded in-memory LRU. When a persistent
+    store is provided, every embedding is also written there, so that it survives
+    restarts (e.g., when vector collections are re-indexed on startup).
+    """
+
+    def __init__(
+        self,
+        store: Optional[EmbeddingStore] = None,
+        max_size: int = 10_000,
+    ) -> None:
+        self._store = store
+
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+
+        self._entries: OrderedDict[str, Sequence[float]] = OrderedDict()
+
+    @staticmethod
+    def key(embedder_id: str, text: str, hints: Mapping[str, Any] = {}) -> str:
+        key = f"{embedder_id}:{md5_checksum(text)}"
+
+        # Hints may change the embedding (e.g., a query vs. a document task type)
+        if hints:
+            key += f":{md5_checksum(json.dumps(hints, sort_keys=True, default=str))}"
+
+        return key
+
+    async def get_many(
+        self,
+        embedder_id: str,
+        texts: Sequence[str],
+        hints: Mapping[str, Any] = {},
+    ) -> list[Optional[Sequence[float]]]:
+        """Looks up the embeddings of all of the given texts, querying the store at most once"""
+
+        keys = [self.key(embedder_id, text, hints) for text in texts]
+        vectors: dict[str, Sequence[float]] = {}
+
+        for key in keys:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                vectors[key] = self._entries[key]
+
+        if self._store and (missing_keys := [k for k in keys if k not in vectors]):
+            stored = await self._store.get_many(list(dict.fromkeys(missing_keys)))
+
+            for key, vector in stored.items():
+                vectors[key] = vector
+                self._remember(key, vector)
+
+        result = [vectors.get(key) for key in keys]
+
+        self.hits += sum(1 for v in result if v is not None)
+        self.misses += sum(1 for v in result if v is None)
+
+        return result
+
+    async def set_many(
+        self,
+        embedder_id: str,
+        vectors: Mapping[str, Sequence[float]],
+        hints: Mapping[str, Any] = {},
+    ) -> None:
+        """Stores the embeddings of the given texts, writing to the store at most once"""
+
+        new_vectors: dict[str, Sequence[float]] = {}
+
+        for text, vector in vectors.items():
+            key = self.key(embedder_id, text, hints)
+
+            # Another request may have stored the same embedding in the meantime
+            if key not in self._entries:
+                new_vectors[key] = vector
+
+            self._remember(key, vector)
+
+        if self._store and new_vectors:
+            await self._store.set_many(new_vectors)
+
+    def _remember(self, key: str, vector: Sequence[float]) -> None:
+        self._entries[key] = vector
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+
+class CachedEmbedder(Embedder):
+    def __init__(self, embedder: Embedder, cache: EmbeddingCache) -> None:
+        self._embedder = embedder
+        self._cache = cache
+
+    @override
+    async def embed(
+        self,
+        texts: list[str],
+        hints: Mapping[str, Any] = {},
+    ) -> EmbeddingResult:
+        vectors = await self._cache.get_many(self.id, texts, hints)
+
+        # Embed each missing text once, even if it appears more than once
+        missing_texts = list(dict.fromkeys(t for t, v in zip(texts, vectors) if v is None))
+
+        if missing_texts:
+            result = await self._embedder.embed(missing_texts, hints)
+            embedded = dict(zip(missing_texts, result.vectors))
+
+            await self._cache.set_many(self.id, embedded, hints)
+
+            vectors = [v if v is not None else embedded[t] for t, v in zip(texts, vectors)]
+
+        return EmbeddingResult(vectors=cast(list[Sequence[float]], vectors))
+
+    @property
+    @override
+    def id(self) -> str:
+        return self._embedder.id
+
+    @property
+    @override
+    def max_tokens(self) -> int:
+        return self._embedder.max_tokens
+
+    @property
+    @override
+    def tokenizer(self) -> EstimatingTokenizer:
+        return self._embedder.tokenizer
+
+    @property
+    @override
+    def dimensions(self) -> int:
+        return self._embedder.dimensions
+
+
+@dataclass
+class _PendingEmbedding:
+    texts: list[str]
+    future: asyncio.Future[EmbeddingResult]
+
+
+class BatchingEmbedder(Embedder):
+    """Merges concurrent embedding requests into batched calls to the wrapped embedder.
+
+    Requests arriving within a short window of each other (e.g., from different
+    sessions) are embedded together, while large requests (e.g., bulk re-indexing)
+    are split so that no single call exceeds the batch size or token limits.
+    """
+
+    def __init__(
+        self,
+        embedder: Embedder,
+        max_batch_size: int = 64,
+        max_batch_tokens: Optional[int] = None,
+        batch_window: float = 0.005,
+    ) -> None:
+        self._embedder = embedder
+
+        self.max_batch_size = max_batch_size
+        self.max_batch_tokens = max_batch_tokens
+        self.batch_window = batch_window
+
+        self._pending: list[_PendingEmbedding] = []
+        self._flush_tasks: set[asyncio.Task[None]] = set()
+
+    @override
+    async def embed(
+        self,
+        texts: list[str],
+        hints: Mapping[str, Any] = {},
+    ) -> EmbeddingResult:
+        if hints:
+            # Requests with hints can't safely be merged with others
+            return await self._embed_in_batches(texts, hints)
+
+        pending = _PendingEmbedding(texts=texts, future=asyncio.get_running_loop().create_future())
+
+        self._pending.append(pending)
+
+        if sum(len(p.texts) for p in self._pending) >= self.max_batch_size:
+            self._schedule_flush(delay=0)
+        elif len(self._pending) == 1:
+            self._schedule_flush(delay=self.batch_window)
+
+        return await asyncio.shield(pending.future)
+
+    def _schedule_flush(self, delay: float) -> None:
+        task = asyncio.create_task(self._flush(delay))
+        self._flush_tasks.add(task)
+        task.add_done_callback(self._flush_tasks.discard)
+
+    async def _flush(self, delay: float) -> None:
+        if delay:
+            await asyncio.sleep(delay)
+
+        pending, self._pending = self._pending, []
+
+        if not pending:
+            return
+
+        try:
+            result = await self._embed_in_batches(
+                list(chain.from_iterable(p.texts for p in pending))
+            )
+        except Exception as exc:
+            for p in pending:
+                if not p.future.done():
+                    p.future.set_exception(exc)
+            return
+
+        offset = 0
+
+        for p in pending:
+            vectors = result.vectors[offset : offset + len(p.texts)]
+            offset += len(p.texts)
+
+            if not p.future.done():
+                p.future.set_result(EmbeddingResult(vectors=vectors))
+
+    async def _embed_in_batches(
+        self,
+        texts: list[str],
+        hints: Mapping[str, Any] = {},
+    ) -> EmbeddingResult:
+        max_batch_tokens = self.max_batch_tokens or self._embedder.max_tokens
+
+        batches: list[list[str]] = [[]]
+        batch_tokens = 0
+
+        for text in texts:
+            text_tokens = await self._embedder.tokenizer.estimate_token_count(text)
+
+            if batches[-1] and (
+                len(batches[-1]) >= self.max_batch_size
+                or batch_tokens + text_tokens > max_batch_tokens
+            ):
+                batches.append([])
+                batch_tokens = 0
+
+            batches[-1].append(text)
+            batch_tokens += text_tokens
+
+        results = await async_utils.safe_gather(
+            *[self._embedder.embed(batch, hints) for batch in batches if batch]
+        )
+
+        return EmbeddingResult(vectors=list(chain.from_iterable(r.vectors for r in results)))
+
+    @property
+    @override
+    def id(self) -> str:
+        return self._embedder.id
+
+    @property
+    @override
+    def max_tokens(self) -> int:
+        return self._embedder.max_tokens
+
+    @property
+    @override
+    def tokenizer(self) -> EstimatingTokenizer:
+        return self._embedder.tokenizer
+
+    @property
+    @override
+    def dimensions(self) -> int:
+        return self._embedder.dimensions
+
 
 class EmbedderFactory:
-    def __init__(self, container: Container):
+    def __init__(
+        self,
+        container: Container,
+        cache: Optional[EmbeddingCache] = None,
+        batch_window: Optional[float] = None,
+        max_batch_size: int = 64,
+    ):
         self._container = container
+        self._cache = cache
+        self._batch_window = batch_window
+        self._max_batch_size = max_batch_size
+
+        # Batching embedders are shared, so that requests from all callers can be merged
+        self._batching_embedders: dict[type[Embedder], BatchingEmbedder] = {}
 
     def create_embedder(self, embedder_type: type[Embedder]) -> Embedder:
         if embedder_type == NoOpEmbedder:
             return NoOpEmbedder()
-        else:
-            return self._container[embedder_type]
+
+        embedder = self._container[embedder_type]
+
+        if self._batch_window is not None:
+            if embedder_type not in self._batching_embedders:
+                self._batching_embedders[embedder_type] = BatchingEmbedder(
+                    embedder,
+                    max_batch_size=self._max_batch_size,
+                    batch_window=self._batch_window,
+                )
+
+            embedder = self._batching_embedders[embedder_type]
+
+        if self._cache:
+            return CachedEmbedder(embedder, self._cache)
+
+        return embedder
 
 
 class NoOpEmbedder(Embedder):
@@ -15,7 +15,7 @@
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
 from functools import cached_property
-from typing import Any, Generic, Mapping, TypeVar, cast, get_args
+from typing import Any, Awaitable, Callable, Generic, Mapping, TypeVar, cast, get_args
 from typing_extensions import override
 
 from Daneel.core.common import DefaultBaseModel
@@ -33,6 +33,13 @@ class SchematicGenerationResult(Generic[T]):
     info: GenerationInfo
 
 
+@dataclass(frozen=True)
+class CompletionDelta:
+    text: str
+    restart: bool = False
+    """Whether the completion started over (e.g. on a retry), discarding the text reported before"""
+
+
 class SchematicGenerator(ABC, Generic[T]):
     @cached_property
     def schema(self) -> type[T]:
@@ -47,6 +54,19 @@ class SchematicGenerator(ABC, Generic[T]):
         hints: Mapping[str, Any] = {},
     ) -> SchematicGenerationResult[T]: ...
 
+    async def generate_streaming(
+        self,
+        prompt: str | PromptBuilder,
+        on_progress: Callable[[CompletionDelta], Awaitable[None]],
+        hints: Mapping[str, Any] = {},
+    ) -> SchematicGenerationResult[T]:
+        """Generates like generate(), reporting each new piece of the raw completion text as it streams in.
+
+        The first delta of every attempt is marked as a restart.
+        Generators that cannot stream report nothing until they are done.
+        """
+        return await self.generate(prompt, hints)
+
     @property
     @abstractmethod
     def id(self) -> str: ...
@@ -91,6 +111,30 @@ class FallbackSchematicGenerator(SchematicGenerator[T]):
 
         raise last_exception
 
+    @override
+    async def generate_streaming(
+        self,
+        prompt: str | PromptBuilder,
+        on_progress: Callable[[CompletionDelta], Awaitable[None]],
+        hints: Mapping[str, Any] = {},
+    ) -> SchematicGenerationResult[T]:
+        last_exception: Exception
+
+        for index, generator in enumerate(self._generators):
+            try:
+                return await generator.generate_streaming(
+                    prompt=prompt,
+                    on_progress=on_progress,
+                    hints=hints,
+                )
+            except Exception as e:
+                self._logger.warning(
+                    f"Generator {index + 1}/{len(self._generators)} failed: {type(generator).__name__}: {e}"
+                )
+                last_exception = e
+
+        raise last_exception
+
     @property
     @override
     def id(self) -> str:
@@ -0,0 +1,339 @@
+# Copyright 2025 Emcie Co Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+import math
+from typing import Any, AsyncIterator, Awaitable, Callable, Mapping, Optional
+from typing_extensions import override
+
+from Daneel.core.contextual_correlator import ContextualCorrelator
+from Daneel.core.engines.alpha.prompt_builder import PromptBuilder
+from Daneel.core.loggers import Logger
+from Daneel.core.nlp.embedding import Embedder
+from Daneel.core.nlp.generation import (
+    T,
+    CompletionDelta,
+    SchematicGenerationResult,
+    SchematicGenerator,
+)
+from Daneel.core.nlp.moderation import ModerationService
+from Daneel.core.nlp.service import NLPService
+from Daneel.core.nlp.tokenization import EstimatingTokenizer
+
+
+@dataclass(frozen=True)
+class RateLimits:
+    max_concurrent_requests: Optional[int] = None
+    requests_per_minute: Optional[int] = None
+    tokens_per_minute: Optional[int] = None
+
+
+@dataclass(frozen=True)
+class RateLimiterMetrics:
+    queue_depth: int
+    in_flight: int
+    waiting_correlations: int
+    total_requests: int
+    total_wait_time: float
+
+    @property
+    def average_wait_time(self) -> float:
+        return self.total_wait_time / self.total_requests if self.total_requests else 0.0
+
+
+class TokenBucket:
+    def __init__(self, capacity: float, refill_per_second: float) -> None:
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+
+        self._level = capacity
+        self._last_refill: Optional[float] = None
+
+    async def acquire(self, amount: float) -> None:
+        # Requests larger than the whole bucket would otherwise wait forever
+        amount = min(amount, self.capacity)
+
+        while True:
+            self._refill()
+
+            if self._level >= amount:
+                self._level -= amount
+                return
+
+            await asyncio.sleep((amount - self._level) / self.refill_per_second)
+
+    def deduct(self, amount: float) -> None:
+        """Charges the bucket after the fact, e.g. once actual usage is known.
+
+        The level may go negative, which delays subsequent acquisitions accordingly.
+        """
+        self._refill()
+        self._level = min(self.capacity, self._level - amount)
+
+    def _refill(self) -> None:
+        now = asyncio.get_running_loop().time()
+
+        if self._last_refill is not None:
+            self._level = min(
+                self.capacity,
+                self._level + (now - self._last_refill) * self.refill_per_second,
+            )
+
+        self._last_refill = now
+
+
+class ModelRateLimiter:
+    """Admits requests to a single model within its concurrency and rate limits.
+
+    Waiting requests are queued per correlation (i.e., per processing task), and
+    admitted round-robin across correlations, so that one busy session cannot
+    starve the others by fanning out many requests at once.
+    """
+
+    def __init__(self, limits: RateLimits) -> None:
+        self.limits = limits
+
+        self._max_in_flight = limits.max_concurrent_requests or math.inf
+        self._in_flight = 0
+
+        self._queues: dict[str, deque[asyncio.Future[None]]] = {}
+
+        self._request_bucket = (
+            TokenBucket(limits.requests_per_minute, limits.requests_per_minute / 60)
+            if limits.requests_per_minute
+            else None
+        )
+        self._token_bucket = (
+            TokenBucket(limits.tokens_per_minute, limits.tokens_per_minute / 60)
+            if limits.tokens_per_minute
+            else None
+        )
+
+        # Bucket waits are serialized so that admission order is preserved
+        self._bucket_lock = asyncio.Lock()
+
+        self._total_requests = 0
+        self._total_wait_time = 0.0
+
+    @property
+    def metrics(self) -> RateLimiterMetrics:
+        return RateLimiterMetrics(
+            queue_depth=sum(len(q) for q in self._queues.values()),
+            in_flight=self._in_flight,
+            waiting_correlations=len(self._queues),
+            total_requests=self._total_requests,
+            total_wait_time=self._total_wait_time,
+        )
+
+    @asynccontextmanager
+    async def admit(self, correlation_id: str, estimated_tokens: int) -> AsyncIterator[None]:
+        t_start = asyncio.get_running_loop().time()
+
+        await self._acquire_slot(correlation_id)
+
+        try:
+            async with self._bucket_lock:
+                if self._request_bucket:
+                    await self._request_bucket.acquire(1)
+                if self._token_bucket:
+                    await self._token_bucket.acquire(estimated_tokens)
+
+            self._total_requests += 1
+            self._total_wait_time += asyncio.get_running_loop().time() - t_start
+
+            yield
+        finally:
+            self._in_flight -= 1
+            self._admit_next()
+
+    def report_usage(self, estimated_tokens: int, actual_tokens: int) -> None:
+        if self._token_bucket:
+            self._token_bucket.deduct(actual_tokens - estimated_tokens)
+
+    async def _acquire_slot(self, correlation_id: str) -> None:
+        waiter = asyncio.get_running_loop().create_future()
+
+        self._queues.setdefault(correlation_id, deque()).append(waiter)
+        self._admit_next()
+
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was granted just as we were cancelled; pass it on
+                self._in_flight -= 1
+                self._admit_next()
+            else:
+                self._discard(correlation_id, waiter)
+            raise
+
+    def _admit_next(self) -> None:
+        while self._in_flight < self._max_in_flight and self._queues:
+            # Take the head of the first correlation in line, then move
+            # that correlation to the back if it has more waiting requests.
+            correlation_id, queue = next(iter(self._queues.items()))
+            waiter = queue.popleft()
+
+            del self._queues[correlation_id]
+            if queue:
+                self._queues[correlation_id] = queue
+
+            if waiter.done():
+                continue
+
+            self._in_flight += 1
+            waiter.set_result(None)
+
+    def _discard(self, correlation_id: str, waiter: asyncio.Future[None]) -> None:
+        if queue := self._queues.get(correlation_id):
+            if waiter in queue:
+                queue.remove(waiter)
+            if not queue:
+                del self._queues[correlation_id]
+
+
+class RateLimitedSchematicGenerator(SchematicGenerator[T]):
+    def __init__(
+        self,
+        generator: SchematicGenerator[T],
+        limiter: ModelRateLimiter,
+        correlator: ContextualCorrelator,
+        logger: Logger,
+    ) -> None:
+        self._generator = generator
+        self._limiter = limiter
+        self._correlator = correlator
+        self._logger = logger
+
+    @override
+    async def generate(
+        self,
+        prompt: str | PromptBuilder,
+        hints: Mapping[str, Any] = {},
+    ) -> SchematicGenerationResult[T]:
+        return await self._do_generate(
+            prompt,
+            lambda built_prompt: self._generator.generate(prompt=built_prompt, hints=hints),
+        )
+
+    @override
+    async def generate_streaming(
+        self,
+        prompt: str | PromptBuilder,
+        on_progress: Callable[[CompletionDelta], Awaitable[None]],
+        hints: Mapping[str, Any] = {},
+    ) -> SchematicGenerationResult[T]:
+        return await self._do_generate(
+            prompt,
+            lambda built_prompt: self._generator.generate_streaming(
+                prompt=built_prompt,
+                on_progress=on_progress,
+                hints=hints,
+            ),
+        )
+
+    async def _do_generate(
+        self,
+        prompt: str | PromptBuilder,
+        generate: Callable[[str], Awaitable[SchematicGenerationResult[T]]],
+    ) -> SchematicGenerationResult[T]:
+        # Build the prompt only once (which also fires its on_build hook only once),
+        # and hand the same text to the wrapped generator that we estimated from
+        built_prompt = prompt.build() if isinstance(prompt, PromptBuilder) else prompt
+
+        estimated_tokens = await self.tokenizer.estimate_token_count(built_prompt)
+
+        if queue_depth := self._limiter.metrics.queue_depth:
+            self._logger.debug(f"{self.id}: {queue_depth} requests queued for rate limiting")
+
+        async with self._limiter.admit(self._correlator.correlation_id, estimated_tokens):
+            result = await generate(built_prompt)
+
+        self._limiter.report_usage(
+            estimated_tokens,
+            result.info.usage.input_tokens + result.info.usage.output_tokens,
+        )
+
+        return result
+
+    @property
+    @override
+    def id(self) -> str:
+        return self._generator.id
+
+    @property
+    @override
+    def max_tokens(self) -> int:
+        return self._generator.max_tokens
+
+    @property
+    @override
+    def tokenizer(self) -> EstimatingTokenizer:
+        return self._generator.tokenizer
+
+
+class RateLimitedNLPService(NLPService):
+    """Wraps an NLP service so that its schematic generators respect rate limits.
+
+    Limits apply per model: generators of different schemas that share
+    an underlying model also share that model's limiter.
+    """
+
+    def __init__(
+        self,
+        service: NLPService,
+        correlator: ContextualCorrelator,
+        logger: Logger,
+        limits: RateLimits,
+        model_limits: Mapping[str, RateLimits] = {},
+    ) -> None:
+        self._service = service
+        self._correlator = correlator
+        self._logger = logger
+        self._limits = limits
+        self._model_limits = model_limits
+
+        self._limiters: dict[str, ModelRateLimiter] = {}
+
+    @property
+    def metrics(self) -> Mapping[str, RateLimiterMetrics]:
+        return {model_id: limiter.metrics for model_id, limiter in self._limiters.items()}
+
+    @override
+    async def get_schematic_generator(self, t: type[T]) -> SchematicGenerator[T]:
+        generator = await self._service.get_schematic_generator(t)
+
+        if generator.id not in self._limiters:
+            self._limiters[generator.id] = ModelRateLimiter(
+                self._model_limits.get(generator.id, self._limits)
+            )
+
+        return RateLimitedSchematicGenerator[t](  # type: ignore
+            generator=generator,
+            limiter=self._limiters[generator.id],
+            correlator=self._correlator,
+            logger=self._logger,
+        )
+
+    @override
+    async def get_embedder(self) -> Embedder:
+        return await self._service.get_embedder()
+
+    @override
+    async def get_moderation_service(self) -> ModerationService:
+        return await self._service.get_moderation_service()
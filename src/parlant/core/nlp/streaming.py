@@ -0,0 +1,184 @@
+# Copyright 2025 Emcie Co Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from dataclasses import dataclass
+from typing import Literal, Optional, TypeAlias
+
+JSONPath: TypeAlias = tuple[str | int, ...]
+
+
+@dataclass(frozen=True)
+class StringValueFragment:
+    path: JSONPath
+    text: str
+    complete: bool
+
+
+_ESCAPES = {
+    "b": "\b",
+    "f": "\f",
+    "n": "\n",
+    "r": "\r",
+    "t": "\t",
+}
+
+
+@dataclass
+class _Frame:
+    is_object: bool
+    expecting: Literal["key", "colon", "value", "separator"]
+    key: Optional[str] = None
+    index: int = 0
+
+
+class JSONStreamScanner:
+    """Incrementally scans a streamed JSON document, reporting string values as they arrive.
+
+    Anything before the root object or array (such as a markdown code fence) is skipped.
+    The scanner only tracks as much structure as is needed to know the path of each
+    string value; it does not validate the document.
+    """
+
+    def __init__(self) -> None:
+        self._stack: list[_Frame] = []
+        self._started = False
+
+        self._in_string = False
+        self._string_is_key = False
+        self._string: list[str] = []
+        self._escape: Optional[str] = None
+        self._high_surrogate: Optional[int] = None
+
+    @property
+    def done(self) -> bool:
+        return self._started and not self._stack
+
+    def feed(self, text: str) -> list[StringValueFragment]:
+        fragments: list[StringValueFragment] = []
+
+        for c in text:
+            if self._in_string:
+                self._feed_string(c, fragments)
+            else:
+                self._feed_structure(c)
+
+        if self._in_string and not self._string_is_key and self._string:
+            fragments.append(StringValueFragment(self._path(), "".join(self._string), False))
+            self._string.clear()
+
+        return fragments
+
+    def _path(self) -> JSONPath:
+        return tuple(f.key or "" if f.is_object else f.index for f in self._stack)
+
+    def _feed_structure(self, c: str) -> None:
+        if not self._started:
+            if c in "{[":
+                self._started = True
+                self._push(c)
+            return
+
+        if not self._stack:
+            return
+
+        frame = self._stack[-1]
+
+        match c:
+            case '"':
+                self._in_string = True
+                self._string_is_key = frame.is_object and frame.expecting == "key"
+
+                if not self._string_is_key:
+                    frame.expecting = "separator"
+            case ":":
+                frame.expecting = "value"
+            case ",":
+                if frame.is_object:
+                    frame.expecting = "key"
+                else:
+                    frame.index += 1
+                    frame.expecting = "value"
+            case "{" | "[":
+                frame.expecting = "separator"
+                self._push(c)
+            case "}" | "]":
+                self._stack.pop()
+            case _ if not c.isspace():
+                # Part of a number or of a true/false/null literal
+                frame.expecting = "separator"
+
+    def _push(self, c: str) -> None:
+        if c == "{":
+            self._stack.append(_Frame(is_object=True, expecting="key"))
+        else:
+            self._stack.append(_Frame(is_object=False, expecting="value"))
+
+    def _feed_string(self, c: str, fragments: list[StringValueFragment]) -> None:
+        if self._escape is not None:
+            self._escape += c
+
+            if self._escape[0] == "u":
+                if len(self._escape) < 5:
+                    return
+                self._append_code_point(self._escape)
+            else:
+                self._append(_ESCAPES.get(c, c))
+
+            self._escape = None
+        elif c == "\\":
+            self._escape = ""
+        elif c == '"':
+            self._close_string(fragments)
+        else:
+            self._append(c)
+
+    def _append_code_point(self, escape: str) -> None:
+        try:
+            code = int(escape[1:], 16)
+        except ValueError:
+            self._append(escape)
+            return
+
+        if 0xD800 <= code < 0xDC00:
+            self._flush_surrogate()
+            self._high_surrogate = code
+        elif 0xDC00 <= code < 0xE000 and self._high_surrogate is not None:
+            high, self._high_surrogate = self._high_surrogate, None
+            self._string.append(chr(0x10000 + ((high - 0xD800) << 10) + (code - 0xDC00)))
+        else:
+            self._append(chr(code))
+
+    def _append(self, text: str) -> None:
+        self._flush_surrogate()
+        self._string.append(text)
+
+    def _flush_surrogate(self) -> None:
+        if self._high_surrogate is not None:
+            # A high surrogate that wasn't followed by a low one
+            self._high_surrogate = None
+            self._string.append("\ufffd")
+
+    def _close_string(self, fragments: list[StringValueFragment]) -> None:
+        self._flush_surrogate()
+        text = "".join(self._string)
+
+        if self._string_is_key:
+            frame = self._stack[-1]
+            frame.key = text
+            frame.expecting = "colon"
+        else:
+            fragments.append(StringValueFragment(self._path(), text, True))
+
+        self._in_string = False
+        self._string.clear()
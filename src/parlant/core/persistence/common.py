@@ -12,8 +12,9 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from operator import eq, ge, gt, le, lt, ne
 from typing import Any, Callable, Mapping, NewType, Protocol, Union, cast, get_type_hints
-from typing_extensions import Literal, TypedDict
+from typing_extensions import TypedDict
 
 from Daneel.core.common import Version
 
@@ -76,66 +77,95 @@ LogicalOperator = TypedDict(
 Where = Union[WhereExpression, LogicalOperator]
 
 
+Predicate = Callable[[Mapping[str, Any]], bool]
+
+_COMPARISONS: dict[str, Callable[[Any, Any], bool]] = {
+    "$eq": eq,
+    "$ne": ne,
+    "$gt": gt,
+    "$gte": ge,
+    "$lt": lt,
+    "$lte": le,
+}
+
+
 def _evaluate_filter(
     operator: str,
     field_value: LiteralValue,
     filter_value: LiteralValue,
 ) -> bool:
-    tests: dict[str, Callable[[Any, Any], bool]] = {
-        "$eq": lambda field_value, filter_value: field_value == filter_value,
-        "$ne": lambda field_value, filter_value: field_value != filter_value,
-        "$gt": lambda field_value, filter_value: field_value > filter_value,
-        "$gte": lambda field_value, filter_value: field_value >= filter_value,
-        "$lt": lambda field_value, filter_value: field_value < filter_value,
-        "$lte": lambda field_value, filter_value: field_value <= filter_value,
-    }
+    return _COMPARISONS[operator](field_value, filter_value)
 
-    return tests[operator](field_value, filter_value)
 
+def _compile_field_filter(
+    field_name: FieldName,
+    operator: str,
+    filter_value: Union[LiteralValue, list[LiteralValue]],
+) -> Predicate:
+    if operator in ("$eq", "$ne", "$in", "$nin"):
+        values = (
+            tuple(cast(list[LiteralValue], filter_value))
+            if operator in ("$in", "$nin")
+            else (filter_value,)
+        )
 
-def matches_filters(
-    where: Where,
-    candidate: Mapping[str, Any],
-) -> bool:
+        # As in MongoDB, a list field equals a value if any of its elements does
+        def includes(candidate: Mapping[str, Any]) -> bool:
+            field_value = candidate[field_name]
+
+            if isinstance(field_value, list):
+                return any(v in values for v in field_value)
+
+            return field_value in values
+
+        if operator in ("$eq", "$in"):
+            return includes
+
+        return lambda candidate: not includes(candidate)
+
+    compare = _COMPARISONS[operator]
+    return lambda candidate: compare(candidate[field_name], filter_value)
+
+
+def compile_filter(where: Where) -> Predicate:
+    """Turns a Where expression into a predicate that can be applied to many candidates.
+
+    The filter is interpreted once, so evaluating the predicate costs only the
+    comparisons themselves.
+    """
     if not where:
-        return True
+        return lambda candidate: True
+
+    clauses: list[Predicate] = []
 
     if next(iter(where.keys())) in ("$and", "$or"):
-        op = cast(LogicalOperator, where)
-        for operator in op:
-            operands: list[Union[WhereExpression, LogicalOperator]] = op[
-                cast(Literal["$and", "$or"], operator)
-            ]
-            if operator == "$and":
-                if not all(matches_filters(sub_filter, candidate) for sub_filter in operands):
-                    return False
-            elif operator == "$or":
-                if not any(matches_filters(sub_filter, candidate) for sub_filter in operands):
-                    return False
+        for logical_operator, operands in cast(LogicalOperator, where).items():
+            predicates = tuple(
+                compile_filter(sub_filter)
+                for sub_filter in cast(list[Union[WhereExpression, LogicalOperator]], operands)
+            )
+            if logical_operator == "$and":
+                clauses.append(lambda candidate, ps=predicates: all(p(candidate) for p in ps))
+            elif logical_operator == "$or":
+                clauses.append(lambda candidate, ps=predicates: any(p(candidate) for p in ps))
 
     else:
-        field_filters = cast(WhereExpression, where)
-        for field_name, field_filter in field_filters.items():
+        for field_name, field_filter in cast(WhereExpression, where).items():
             for operator, filter_value in field_filter.items():
-                if operator == "$in":
-                    if not any(
-                        candidate[field_name] == val
-                        for val in cast(list[LiteralValue], filter_value)
-                    ):
-                        return False
-                elif operator == "$nin":
-                    if any(
-                        candidate[field_name] == val
-                        for val in cast(list[LiteralValue], filter_value)
-                    ):
-                        return False
-                else:
-                    if not _evaluate_filter(
-                        operator, candidate[field_name], cast(LiteralValue, filter_value)
-                    ):
-                        return False
-
-    return True
+                clauses.append(_compile_field_filter(field_name, operator, filter_value))
+
+    if len(clauses) == 1:
+        return clauses[0]
+
+    compiled = tuple(clauses)
+    return lambda candidate: all(clause(candidate) for clause in compiled)
+
+
+def matches_filters(
+    where: Where,
+    candidate: Mapping[str, Any],
+) -> bool:
+    return compile_filter(where)(candidate)
 
 
 def ensure_is_total(document: Mapping[str, Any], schema: type[Mapping[str, Any]]) -> None:
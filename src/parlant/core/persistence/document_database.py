@@ -57,6 +57,25 @@ class DeleteResult(Generic[TDocument]):
     deleted_document: Optional[TDocument]
 
 
+@dataclass(frozen=True)
+class InsertManyResult:
+    acknowledged: bool
+    inserted_count: int
+
+
+@dataclass(frozen=True)
+class UpdateManyResult:
+    acknowledged: bool
+    matched_count: int
+    modified_count: int
+
+
+@dataclass(frozen=True)
+class DeleteManyResult:
+    acknowledged: bool
+    deleted_count: int
+
+
 async def identity_loader(doc: BaseDocument) -> BaseDocument:
     return doc
 
@@ -133,6 +152,14 @@ class DocumentCollection(ABC, Generic[TDocument]):
         """Inserts a single document into the collection."""
         ...
 
+    @abstractmethod
+    async def insert_many(
+        self,
+        documents: Sequence[TDocument],
+    ) -> InsertManyResult:
+        """Inserts multiple documents into the collection in a single write."""
+        ...
+
     @abstractmethod
     async def update_one(
         self,
@@ -144,6 +171,17 @@ class DocumentCollection(ABC, Generic[TDocument]):
         inserts the document if it does not exist."""
         ...
 
+    @abstractmethod
+    async def update_many(
+        self,
+        filters: Where,
+        params: TDocument,
+        upsert: bool = False,
+    ) -> UpdateManyResult:
+        """Updates all documents that match the query criteria in a single write. If upsert
+        is True, inserts the document if none match."""
+        ...
+
     @abstractmethod
     async def delete_one(
         self,
@@ -151,3 +189,11 @@ class DocumentCollection(ABC, Generic[TDocument]):
     ) -> DeleteResult[TDocument]:
         """Deletes the first document that matches the query criteria."""
         ...
+
+    @abstractmethod
+    async def delete_many(
+        self,
+        filters: Where,
+    ) -> DeleteManyResult:
+        """Deletes all documents that match the query criteria in a single write."""
+        ...
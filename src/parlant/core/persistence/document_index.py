@@ -0,0 +1,200 @@
+# Copyright 2025 Emcie Co Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+from typing import (
+    Any,
+    Generic,
+    Hashable,
+    Iterable,
+    Iterator,
+    Mapping,
+    Optional,
+    Sequence,
+    Union,
+    cast,
+)
+
+from Daneel.core.persistence.common import (
+    LiteralValue,
+    LogicalOperator,
+    Where,
+    WhereExpression,
+    compile_filter,
+)
+from Daneel.core.persistence.document_database import TDocument
+
+DEFAULT_INDEXED_FIELDS = ("id", "session_id", "kind", "correlation_id", "guideline_id")
+
+
+def _intersect(candidates: Sequence[set[int]]) -> Optional[set[int]]:
+    if not candidates:
+        return None
+
+    smallest, *rest = sorted(candidates, key=len)
+    return smallest.intersection(*rest)
+
+
+def _index_values(field_value: Any) -> Sequence[Any]:
+    return field_value if isinstance(field_value, list) else (field_value,)
+
+
+class IndexedDocuments(Generic[TDocument]):
+    """Insertion-ordered documents with hash indexes over selected equality fields.
+
+    Filters whose $eq/$in conditions touch an indexed field are answered from the
+    index; anything else falls back to scanning. List fields are indexed by each
+    of their elements, matching how filters compare them. Matching candidates are always
+    re-checked against the compiled filter, so the index only narrows the search.
+    """
+
+    def __init__(
+        self,
+        documents: Iterable[TDocument] = (),
+        indexed_fields: Sequence[str] = (),
+    ) -> None:
+        self._documents: dict[int, TDocument] = {}
+        self._indexes: dict[str, dict[Hashable, set[int]]] = {field: {} for field in indexed_fields}
+        self._next_key = 0
+
+        for document in documents:
+            self.append(document)
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def __contains__(self, key: int) -> bool:
+        return key in self._documents
+
+    def __iter__(self) -> Iterator[TDocument]:
+        return iter(self._documents.values())
+
+    def append(self, document: TDocument) -> int:
+        key = self._next_key
+        self._next_key += 1
+
+        self._documents[key] = document
+        self._add_to_indexes(key, document)
+
+        return key
+
+    def replace(self, key: int, document: TDocument) -> None:
+        self._remove_from_indexes(key, self._documents[key])
+        self._documents[key] = document
+        self._add_to_indexes(key, document)
+
+    def remove(self, key: int) -> TDocument:
+        document = self._documents.pop(key)
+        self._remove_from_indexes(key, document)
+        return document
+
+    def restore(self, key: int, document: TDocument) -> None:
+        """Puts a removed document back under its original key (though at the end of the order)."""
+        self._documents[key] = document
+        self._add_to_indexes(key, document)
+
+    def get(self, key: int) -> TDocument:
+        return self._documents[key]
+
+    def find(self, filters: Where) -> list[tuple[int, TDocument]]:
+        predicate = compile_filter(filters)
+
+        return [(key, doc) for key, doc in self._candidates(filters) if predicate(doc)]
+
+    def find_first(self, filters: Where) -> Optional[tuple[int, TDocument]]:
+        predicate = compile_filter(filters)
+
+        for key, doc in self._candidates(filters):
+            if predicate(doc):
+                return key, doc
+
+        return None
+
+    def _candidates(self, filters: Where) -> Iterable[tuple[int, TDocument]]:
+        keys = self._plan(filters)
+
+        if keys is None:
+            return self._documents.items()
+
+        return [(key, self._documents[key]) for key in sorted(keys)]
+
+    def _plan(self, where: Where) -> Optional[set[int]]:
+        """Returns the keys that may match, or None if the filter requires a full scan."""
+        if not where or not self._indexes:
+            return None
+
+        candidates: list[set[int]] = []
+
+        if next(iter(where.keys())) in ("$and", "$or"):
+            for logical_operator, operands in cast(LogicalOperator, where).items():
+                plans = [
+                    self._plan(sub_filter)
+                    for sub_filter in cast(list[Union[WhereExpression, LogicalOperator]], operands)
+                ]
+
+                if logical_operator == "$and":
+                    if (narrowed := _intersect([p for p in plans if p is not None])) is not None:
+                        candidates.append(narrowed)
+                elif logical_operator == "$or":
+                    if all(p is not None for p in plans):
+                        candidates.append(set().union(*cast(list[set[int]], plans)))
+
+        else:
+            for field_name, field_filter in cast(WhereExpression, where).items():
+                if (index := self._indexes.get(field_name)) is None:
+                    continue
+
+                for operator, filter_value in field_filter.items():
+                    if operator == "$eq":
+                        candidates.append(index.get(cast(LiteralValue, filter_value), set()))
+                    elif operator == "$in":
+                        candidates.append(
+                            set().union(
+                                *(
+                                    index.get(v, set())
+                                    for v in cast(list[LiteralValue], filter_value)
+                                )
+                            )
+                        )
+
+        return _intersect(candidates)
+
+    def _add_to_indexes(self, key: int, document: Mapping[str, Any]) -> None:
+        for field_name, index in self._indexes.items():
+            if field_name not in document:
+                continue
+
+            for value in _index_values(document[field_name]):
+                try:
+                    index.setdefault(value, set()).add(key)
+                except TypeError:
+                    # Unhashable values can never equal a literal filter value.
+                    pass
+
+    def _remove_from_indexes(self, key: int, document: Mapping[str, Any]) -> None:
+        for field_name, index in self._indexes.items():
+            if field_name not in document:
+                continue
+
+            for value in _index_values(document[field_name]):
+                try:
+                    keys = index.get(value)
+                except TypeError:
+                    continue
+
+                if keys is not None:
+                    keys.discard(key)
+
+                    if not keys:
+                        del index[value]
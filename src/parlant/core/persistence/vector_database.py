@@ -15,7 +15,16 @@
 from __future__ import annotations
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
-from typing import Awaitable, Callable, Generic, Optional, Sequence, TypeVar, TypedDict
+from typing import (
+    Awaitable,
+    Callable,
+    Generic,
+    Iterable,
+    Optional,
+    Sequence,
+    TypeVar,
+    TypedDict,
+)
 from typing_extensions import Required
 
 from Daneel.core.common import JSONSerializable, Version
@@ -57,10 +66,35 @@ class DeleteResult(Generic[TDocument]):
     deleted_document: Optional[TDocument]
 
 
+@dataclass(frozen=True)
+class InsertManyResult:
+    acknowledged: bool
+    inserted_count: int
+
+
+@dataclass(frozen=True)
+class UpdateManyResult:
+    acknowledged: bool
+    matched_count: int
+    modified_count: int
+
+
+@dataclass(frozen=True)
+class DeleteManyResult:
+    acknowledged: bool
+    deleted_count: int
+
+
 @dataclass(frozen=True)
 class SimilarDocumentResult(Generic[TDocument]):
     document: TDocument
     distance: float
+    """Cosine distance between the document and the query, i.e. 1 - score."""
+
+    @property
+    def score(self) -> float:
+        """Cosine similarity between the document and the query."""
+        return 1.0 - self.distance
 
     def __hash__(self) -> int:
         return hash(str(self.document))
@@ -71,6 +105,26 @@ class SimilarDocumentResult(Generic[TDocument]):
         return False
 
 
+def fuse_similar_documents(
+    result_sets: Iterable[Sequence[SimilarDocumentResult[TDocument]]],
+    k: int,
+) -> list[SimilarDocumentResult[TDocument]]:
+    """Merges the results of several queries by max-score fusion.
+
+    Each document is ranked by the best score it got from any of the queries.
+    """
+    best: dict[ObjectId, SimilarDocumentResult[TDocument]] = {}
+
+    for results in result_sets:
+        for result in results:
+            id = result.document["id"]
+
+            if id not in best or result.distance < best[id].distance:
+                best[id] = result
+
+    return sorted(best.values(), key=lambda r: r.distance)[:k]
+
+
 class VectorDatabase(ABC):
     @abstractmethod
     async def create_collection(
@@ -142,6 +196,12 @@ class VectorCollection(ABC, Generic[TDocument]):
         document: TDocument,
     ) -> InsertResult: ...
 
+    @abstractmethod
+    async def insert_many(
+        self,
+        documents: Sequence[TDocument],
+    ) -> InsertManyResult: ...
+
     @abstractmethod
     async def update_one(
         self,
@@ -150,12 +210,26 @@ class VectorCollection(ABC, Generic[TDocument]):
         upsert: bool = False,
     ) -> UpdateResult[TDocument]: ...
 
+    @abstractmethod
+    async def update_many(
+        self,
+        filters: Where,
+        params: TDocument,
+        upsert: bool = False,
+    ) -> UpdateManyResult: ...
+
     @abstractmethod
     async def delete_one(
         self,
         filters: Where,
     ) -> DeleteResult[TDocument]: ...
 
+    @abstractmethod
+    async def delete_many(
+        self,
+        filters: Where,
+    ) -> DeleteManyResult: ...
+
     @abstractmethod
     async def find_similar_documents(
         self,
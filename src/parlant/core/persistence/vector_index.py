@@ -0,0 +1,282 @@
+# Copyright 2025 Emcie Co Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+from dataclasses import dataclass
+import math
+from pathlib import Path
+from typing import Optional, cast
+import numpy as np
+from numpy.typing import NDArray
+
+
+@dataclass(frozen=True)
+class IVFParameters:
+    """Tuning knobs for approximate nearest-neighbor search.
+
+    Raising n_probe trades latency for recall; n_probe == n_lists is exact search.
+    """
+
+    n_lists: Optional[int] = None
+    """Number of clusters. Defaults to the square root of the collection size at training."""
+
+    n_probe: int = 16
+    """Number of clusters scanned per query."""
+
+    min_size: int = 10_000
+    """Searches over fewer candidate rows than this are done exactly."""
+
+    training_sample_size: int = 100_000
+    training_iterations: int = 10
+
+    retrain_growth: float = 4.0
+    """Retrain once the collection grows by this factor since the last training."""
+
+
+def top_k(similarities: NDArray[np.float32], k: int) -> NDArray[np.int64]:
+    """Returns the positions of the k highest similarities, best first."""
+    if len(similarities) > k:
+        top = np.argpartition(-similarities, k - 1)[:k]
+    else:
+        top = np.arange(len(similarities))
+
+    return cast(NDArray[np.int64], top[np.argsort(-similarities[top], kind="stable")])
+
+
+class IVFIndex:
+    """An inverted-file index over the rows of an externally owned matrix of normalized vectors.
+
+    Rows are clustered around centroids trained with spherical k-means. A query only
+    scores the rows of its n_probe most similar clusters. Inserts and deletes only
+    (un)assign single rows; the index is retrained once the matrix has grown enough
+    for the clusters to become unbalanced.
+    """
+
+    def __init__(
+        self,
+        parameters: IVFParameters = IVFParameters(),
+        seed: int = 0,
+    ) -> None:
+        self.parameters = parameters
+
+        self._rng = np.random.default_rng(seed)
+        self._centroids: Optional[NDArray[np.float32]] = None
+        self._trained_size = 0
+
+        # Cluster of each row, or -1 for rows that are not indexed
+        self._assignments: NDArray[np.int32] = np.full(0, -1, dtype=np.int32)
+
+        # Rows grouped by cluster; rebuilt lazily after modifications
+        self._order: Optional[NDArray[np.int64]] = None
+        self._bounds: NDArray[np.int64] = np.zeros(0, dtype=np.int64)
+
+    @property
+    def is_trained(self) -> bool:
+        return self._centroids is not None
+
+    @property
+    def n_lists(self) -> int:
+        return len(self._centroids) if self._centroids is not None else 0
+
+    def needs_training(self, size: int) -> bool:
+        if size < self.parameters.min_size:
+            return False
+
+        return not self.is_trained or size >= self._trained_size * self.parameters.retrain_growth
+
+    def train(self, vectors: NDArray[np.float32], rows: NDArray[np.int64]) -> None:
+        n_lists = max(1, min(self.parameters.n_lists or int(math.sqrt(len(rows))), len(rows)))
+
+        sample_rows = (
+            self._rng.choice(rows, self.parameters.training_sample_size, replace=False)
+            if len(rows) > self.parameters.training_sample_size
+            else rows
+        )
+        sample = np.asarray(vectors[np.sort(sample_rows)], dtype=np.float32)
+
+        centroids = sample[self._rng.choice(len(sample), n_lists, replace=False)]
+
+        for _ in range(self.parameters.training_iterations):
+            assignments = self._nearest(centroids, sample)
+            counts = np.bincount(assignments, minlength=n_lists)
+
+            order = np.argsort(assignments, kind="stable")
+            starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+            occupied = counts > 0
+
+            sums = np.zeros_like(centroids)
+            sums[occupied] = np.add.reduceat(sample[order], starts[occupied], axis=0)
+
+            # Clusters that lost all their members are re-seeded from random samples
+            sums[~occupied] = sample[self._rng.choice(len(sample), int((~occupied).sum()))]
+
+            centroids = _normalize_rows(sums)
+
+        self._centroids = centroids
+        self._trained_size = len(rows)
+
+        self._assignments = np.full(len(vectors), -1, dtype=np.int32)
+        self.add(vectors, rows)
+
+    def add(self, vectors: NDArray[np.float32], rows: NDArray[np.int64]) -> None:
+        if self._centroids is None or not len(rows):
+            return
+
+        self._reserve(int(rows.max()) + 1)
+        self._assignments[rows] = self._nearest(self._centroids, vectors, rows)
+        self._order = None
+
+    def remove(self, rows: NDArray[np.int64]) -> None:
+        rows = rows[rows < len(self._assignments)]
+        self._assignments[rows] = -1
+        self._order = None
+
+    def remap(self, source_rows: NDArray[np.int64]) -> NDArray[np.int64]:
+        """Re-numbers rows after the underlying matrix has been rebuilt.
+
+        source_rows[i] is the previous row of what is now row i, or -1 for new rows.
+        Returns the rows whose assignment could not be carried over, and should be added.
+        """
+        carried = (source_rows >= 0) & (source_rows < len(self._assignments))
+
+        assignments = np.full(len(source_rows), -1, dtype=np.int32)
+        assignments[carried] = self._assignments[source_rows[carried]]
+
+        self._assignments = assignments
+        self._order = None
+
+        return cast(NDArray[np.int64], np.flatnonzero(assignments < 0))
+
+    def search(
+        self,
+        vectors: NDArray[np.float32],
+        query: NDArray[np.float32],
+        k: int,
+        candidates: Optional[NDArray[np.bool_]] = None,
+        n_probe: Optional[int] = None,
+    ) -> tuple[NDArray[np.int64], NDArray[np.float32]]:
+        """Returns the (approximately) k most similar rows, and their similarities, best first.
+
+        If given, candidates masks the rows that may be returned. When the probed clusters
+        hold fewer than k candidates, more clusters are probed until k are found.
+        """
+        assert self._centroids is not None
+
+        order, bounds = self._grouped_rows()
+        ranked_lists = np.argsort(-(self._centroids @ query))
+
+        n_probe = min(n_probe or self.parameters.n_probe, len(ranked_lists))
+        probed = 0
+        rows = np.zeros(0, dtype=np.int64)
+
+        while True:
+            newly_probed = ranked_lists[probed:n_probe]
+            probed = n_probe
+
+            new_rows = np.concatenate(
+                [order[bounds[c] : bounds[c + 1]] for c in newly_probed]
+                + [np.zeros(0, dtype=np.int64)]
+            )
+
+            if candidates is not None:
+                new_rows = new_rows[candidates[new_rows]]
+
+            rows = np.concatenate((rows, new_rows))
+
+            if len(rows) >= k or probed == len(ranked_lists):
+                break
+
+            n_probe = min(2 * n_probe, len(ranked_lists))
+
+        # Reading rows in order is friendlier to memory-mapped matrices
+        rows = np.sort(rows)
+        similarities = vectors[rows] @ query
+
+        top = top_k(similarities, k)
+
+        return rows[top], similarities[top]
+
+    def save(self, path: Path) -> None:
+        assert self._centroids is not None
+
+        staging_path = path.with_suffix(".staging.npz")
+
+        with open(staging_path, "wb") as f:
+            np.savez(
+                f,
+                centroids=self._centroids,
+                assignments=self._assignments,
+                trained_size=np.array(self._trained_size),
+            )
+
+        staging_path.replace(path)
+
+    @classmethod
+    def load(cls, path: Path, parameters: IVFParameters = IVFParameters()) -> IVFIndex:
+        index = cls(parameters)
+
+        with np.load(path) as data:
+            index._centroids = data["centroids"]
+            index._assignments = data["assignments"]
+            index._trained_size = int(data["trained_size"])
+
+        return index
+
+    def _reserve(self, size: int) -> None:
+        if size > len(self._assignments):
+            self._assignments = np.concatenate(
+                (
+                    self._assignments,
+                    np.full(
+                        max(size, 2 * len(self._assignments)) - len(self._assignments),
+                        -1,
+                        dtype=np.int32,
+                    ),
+                )
+            )
+
+    def _grouped_rows(self) -> tuple[NDArray[np.int64], NDArray[np.int64]]:
+        if self._order is None:
+            self._order = np.argsort(self._assignments, kind="stable")
+            self._bounds = np.searchsorted(
+                self._assignments[self._order],
+                np.arange(self.n_lists + 1),
+            )
+
+        return self._order, self._bounds
+
+    @staticmethod
+    def _nearest(
+        centroids: NDArray[np.float32],
+        vectors: NDArray[np.float32],
+        rows: Optional[NDArray[np.int64]] = None,
+        chunk_size: int = 8192,
+    ) -> NDArray[np.int32]:
+        size = len(rows) if rows is not None else len(vectors)
+        nearest = np.empty(size, dtype=np.int32)
+
+        for i in range(0, size, chunk_size):
+            chunk = (
+                vectors[rows[i : i + chunk_size]]
+                if rows is not None
+                else vectors[i : i + chunk_size]
+            )
+            nearest[i : i + chunk_size] = np.argmax(chunk @ centroids.T, axis=1)
+
+        return nearest
+
+
+def _normalize_rows(vectors: NDArray[np.float32]) -> NDArray[np.float32]:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return cast(NDArray[np.float32], vectors / np.where(norms > 0, norms, 1.0))
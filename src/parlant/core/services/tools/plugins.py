@@ -19,6 +19,7 @@ from datetime import datetime, timezone
 import enum
 import inspect
 import json
+import time
 import traceback
 import dateutil.parser
 from types import TracebackType
@@ -38,7 +39,7 @@ from typing import (
 )
 from pydantic import BaseModel, TypeAdapter
 from typing_extensions import Unpack, override
-from fastapi import FastAPI, HTTPException, status
+from fastapi import FastAPI, HTTPException, Request, Response, status
 from fastapi.responses import StreamingResponse
 import httpx
 from urllib.parse import urljoin
@@ -48,19 +49,27 @@ import uvicorn
 from Daneel.core.agents import AgentId
 from Daneel.core.loggers import Logger
 from Daneel.core.tools import (
+    DEFAULT_TOOL_RESULT_CACHE_TTL,
     Tool,
     ToolError,
     ToolParameterDescriptor,
     ToolParameterOptions,
     ToolParameterType,
     ToolResult,
+    ToolResultCacheScope,
     ToolContext,
     EnumValueType,
     ToolResultError,
     normalize_tool_arguments,
     validate_tool_arguments,
 )
-from Daneel.core.common import DefaultBaseModel, ItemNotFoundError, JSONSerializable, UniqueId
+from Daneel.core.common import (
+    DefaultBaseModel,
+    ItemNotFoundError,
+    JSONSerializable,
+    UniqueId,
+    md5_checksum,
+)
 from Daneel.core.contextual_correlator import ContextualCorrelator
 from Daneel.core.emissions import EventEmitterFactory
 from Daneel.core.sessions import SessionId, SessionStatus
@@ -121,6 +130,8 @@ class _ToolDecoratorParams(TypedDict, total=False):
     name: str
     consequential: bool
     metadata: Mapping[str, JSONSerializable]
+    cache_scope: ToolResultCacheScope
+    cache_ttl: float
 
 
 _ToolParameterType = Union[str, int, float, bool, list[Any], None]
@@ -275,12 +286,14 @@ async def _recompute_and_marshal_tool(tool: Tool, plugin_data: Mapping[str, Any]
 
     return Tool(
         name=tool.name,
-        creation_utc=datetime.now(timezone.utc),
+        creation_utc=tool.creation_utc,
         description=tool.description,
         metadata=tool.metadata,
         parameters=new_parameters,
         required=tool.required,
         consequential=tool.consequential,
+        cache_scope=tool.cache_scope,
+        cache_ttl=tool.cache_ttl,
     )
 
 
@@ -397,6 +410,8 @@ def _tool_decorator_impl(
                 parameters=_describe_parameters(func),
                 required=_find_required_params(func),
                 consequential=kwargs.get("consequential", False),
+                cache_scope=kwargs.get("cache_scope", "none"),
+                cache_ttl=kwargs.get("cache_ttl", DEFAULT_TOOL_RESULT_CACHE_TTL),
             ),
             function=func,
         )
@@ -445,6 +460,39 @@ class _ToolResultShim(DefaultBaseModel):
     result: ToolResult
 
 
+class _MessageBuffer:
+    """Splits a streamed response into newline-delimited messages,
+    regardless of how the transport happened to chunk it"""
+
+    def __init__(self) -> None:
+        self._buffer = bytearray()
+
+    @property
+    def pending_size(self) -> int:
+        return len(self._buffer)
+
+    def feed(self, data: bytes) -> list[bytes]:
+        # Only the new data needs to be searched for delimiters
+        search_start = len(self._buffer)
+        self._buffer += data
+
+        messages = []
+        consumed = 0
+
+        while (end := self._buffer.find(b"\n", max(search_start, consumed))) != -1:
+            messages.append(bytes(self._buffer[consumed:end]))
+            consumed = end + 1
+
+        del self._buffer[:consumed]
+
+        return [m for m in messages if m.strip()]
+
+    def flush(self) -> list[bytes]:
+        remainder = bytes(self._buffer)
+        self._buffer.clear()
+        return [remainder] if remainder.strip() else []
+
+
 class PluginServer:
     def __init__(
         self,
@@ -529,8 +577,29 @@ class PluginServer:
         app = FastAPI()
 
         @app.get("/tools")
-        async def list_tools() -> ListToolsResponse:
-            return ListToolsResponse(tools=[t.tool for t in self.tools.values()])
+        async def list_tools(request: Request) -> Response:
+            tools = [
+                await _recompute_and_marshal_tool(spec.tool, self.plugin_data)
+                for spec in self.tools.values()
+            ]
+
+            content = ListToolsResponse(tools=tools).model_dump_json()
+
+            # Lets clients revalidate their cached tool descriptors without
+            # transferring them again if nothing has changed
+            etag = f'"{md5_checksum(content)}"'
+
+            if request.headers.get("if-none-match") == etag:
+                return Response(
+                    status_code=status.HTTP_304_NOT_MODIFIED,
+                    headers={"ETag": etag},
+                )
+
+            return Response(
+                content=content,
+                media_type="application/json",
+                headers={"ETag": etag},
+            )
 
         @app.get("/tools/{name}")
         async def read_tool(name: str) -> ReadToolResponse:
@@ -579,7 +648,7 @@ class PluginServer:
                     if chunks_received_future.done():
                         async with lock:
                             next_chunk = chunks.pop(0)
-                        yield next_chunk
+                        yield next_chunk + "\n"
                         # proceed to next potential acquire/end,
                         # skipping the end-check, otherwise
                         # we may skip emitted chunks.
@@ -603,9 +672,9 @@ class PluginServer:
                                 )
                             ).model_dump_json()
 
-                            yield final_result_chunk
+                            yield final_result_chunk + "\n"
                         except Exception as exc:
-                            yield json.dumps({"error": str(exc)})
+                            yield json.dumps({"error": str(exc)}) + "\n"
 
                         return
                     else:
@@ -660,7 +729,7 @@ class PluginServer:
 
             return StreamingResponse(
                 content=chunk_generator(result_future),
-                media_type="text/plain",
+                media_type="application/x-ndjson",
             )
 
         return app
@@ -673,11 +742,21 @@ class PluginClient(ToolService):
         event_emitter_factory: EventEmitterFactory,
         logger: Logger,
         correlator: ContextualCorrelator,
+        descriptor_ttl: float = 60,
+        max_message_size: int = 16 * 1024 * 1024,
     ) -> None:
         self.url = url
         self._event_emitter_factory = event_emitter_factory
         self._logger = logger
         self._correlator = correlator
+        self._max_message_size = max_message_size
+
+        self._descriptor_ttl = descriptor_ttl
+        self._descriptors: dict[str, Tool] = {}
+        self._descriptors_etag: Optional[str] = None
+        self._descriptors_fetch_time: Optional[float] = None
+        self._descriptors_lock = asyncio.Lock()
+        self._descriptors_refresh_task: Optional[asyncio.Task[None]] = None
 
     async def __aenter__(self) -> PluginClient:
         self._http_client = await httpx.AsyncClient(
@@ -692,6 +771,10 @@ class PluginClient(ToolService):
         exc_value: Optional[BaseException],
         traceback: Optional[TracebackType],
     ) -> bool:
+        if task := self._descriptors_refresh_task:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
         await self._http_client.__aexit__(exc_type, exc_value, traceback)
         return False
 
@@ -707,25 +790,78 @@ class PluginClient(ToolService):
             for name, (descriptor, options) in parameters.items()
         }
 
+    def _translate_tool(self, t: Mapping[str, Any]) -> Tool:
+        return Tool(
+            name=t["name"],
+            creation_utc=dateutil.parser.parse(t["creation_utc"]),
+            description=t["description"],
+            metadata=t["metadata"],
+            parameters=self._translate_parameters(t["parameters"]),
+            required=t["required"],
+            consequential=t["consequential"],
+            cache_scope=t.get("cache_scope", "none"),
+            cache_ttl=t.get("cache_ttl", DEFAULT_TOOL_RESULT_CACHE_TTL),
+        )
+
+    async def _refresh_descriptors(self) -> None:
+        async with self._descriptors_lock:
+            headers = {"If-None-Match": self._descriptors_etag} if self._descriptors_etag else {}
+
+            response = await self._http_client.get(self._get_url("/tools"), headers=headers)
+
+            if response.status_code not in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+                raise ToolError(
+                    "*",
+                    f"Failed to list tools from remote service (url={self.url}, status={response.status_code})",
+                )
+
+            if response.status_code == status.HTTP_200_OK:
+                self._descriptors = {
+                    t["name"]: self._translate_tool(t) for t in response.json()["tools"]
+                }
+                self._descriptors_etag = response.headers.get("etag")
+
+            self._descriptors_fetch_time = time.time()
+
+    async def _refresh_descriptors_in_background(self) -> None:
+        try:
+            await self._refresh_descriptors()
+        except Exception as exc:
+            self._logger.warning(
+                f"[PluginClient] Failed to refresh tool descriptors (url={self.url}): {exc}"
+            )
+        finally:
+            self._descriptors_refresh_task = None
+
+    async def _get_descriptors(self) -> Mapping[str, Tool]:
+        """Returns the cached tool descriptors, fetching them if they were never fetched.
+
+        Stale descriptors are still returned, while a refresh runs in the background.
+        They are kept if the refresh fails.
+        """
+        if self._descriptors_fetch_time is None:
+            await self._refresh_descriptors()
+        elif (
+            time.time() - self._descriptors_fetch_time > self._descriptor_ttl
+            and not self._descriptors_refresh_task
+        ):
+            self._descriptors_refresh_task = asyncio.create_task(
+                self._refresh_descriptors_in_background()
+            )
+
+        return self._descriptors
+
     @override
     async def list_tools(self) -> Sequence[Tool]:
-        response = await self._http_client.get(self._get_url("/tools"))
-        content = response.json()
-        return [
-            Tool(
-                name=t["name"],
-                creation_utc=dateutil.parser.parse(t["creation_utc"]),
-                description=t["description"],
-                metadata=t["metadata"],
-                parameters=self._translate_parameters(t["parameters"]),
-                required=t["required"],
-                consequential=t["consequential"],
-            )
-            for t in content["tools"]
-        ]
+        await self._refresh_descriptors()
+        return list(self._descriptors.values())
 
     @override
     async def read_tool(self, name: str) -> Tool:
+        if tool := (await self._get_descriptors()).get(name):
+            return tool
+
+        # The tool may have been added after the descriptors were last fetched
         response = await self._http_client.get(self._get_url(f"/tools/{name}"))
 
         if response.status_code == status.HTTP_404_NOT_FOUND:
@@ -734,16 +870,9 @@ class PluginClient(ToolService):
             raise ToolError(name, "Failed to read tool from remote service")
 
         content = response.json()
-        t = content["tool"]
-        return Tool(
-            name=t["name"],
-            creation_utc=dateutil.parser.parse(t["creation_utc"]),
-            description=t["description"],
-            metadata=t["metadata"],
-            parameters=self._translate_parameters(t["parameters"]),
-            required=t["required"],
-            consequential=t["consequential"],
-        )
+        tool = self._translate_tool(content["tool"])
+        self._descriptors[tool.name] = tool
+        return tool
 
     @override
     async def call_tool(
@@ -800,14 +929,8 @@ class PluginClient(ToolService):
                     session_id=SessionId(context.session_id),
                 )
 
-                async for chunk in response.aiter_text():
-                    if len(chunk) > (16 * 1024):
-                        raise ToolResultError(
-                            tool_name=name,
-                            message=f"url='{self.url}', arguments='{arguments}', Response exceeds 16KB limit",
-                        )
-
-                    chunk_dict = json.loads(chunk)
+                async for message in self._read_messages(response, name, arguments):
+                    chunk_dict = json.loads(message)
 
                     if "data" and "metadata" in chunk_dict.get("result", {}):
                         return _ToolResultShim.model_validate(chunk_dict).result
@@ -844,5 +967,31 @@ class PluginClient(ToolService):
             message=f"url='{self.url}', Unexpected response (no result chunk)",
         )
 
+    async def _read_messages(
+        self,
+        response: httpx.Response,
+        name: str,
+        arguments: Mapping[str, JSONSerializable],
+    ) -> AsyncIterator[bytes]:
+        buffer = _MessageBuffer()
+
+        async for data in response.aiter_bytes():
+            messages = buffer.feed(data)
+
+            if buffer.pending_size > self._max_message_size or any(
+                len(m) > self._max_message_size for m in messages
+            ):
+                raise ToolResultError(
+                    tool_name=name,
+                    message=f"url='{self.url}', arguments='{arguments}', Message exceeds {self._max_message_size} bytes limit",
+                )
+
+            for message in messages:
+                yield message
+
+        # Plugin servers that predate newline framing don't terminate their last message
+        for message in buffer.flush():
+            yield message
+
     def _get_url(self, path: str) -> str:
         return urljoin(f"{self.url}", path)
@@ -15,10 +15,15 @@
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
+import asyncio
+from contextlib import AsyncExitStack
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from enum import Enum
+import math
 from typing import (
+    Awaitable,
+    Callable,
     Literal,
     Mapping,
     NewType,
@@ -28,8 +33,8 @@ from typing import (
     cast,
 )
 from typing_extensions import override, TypedDict, NotRequired, Self
+import weakref
 
-from Daneel.core import async_utils
 from Daneel.core.async_utils import ReaderWriterLock, Timeout
 from Daneel.core.common import (
     ItemNotFoundError,
@@ -197,6 +202,28 @@ class PreparationIterationGenerations:
     tool_calls: Sequence[GenerationInfo]
 
 
+@dataclass(frozen=True)
+class ToolResultCacheInspection:
+    hits: int
+    misses: int
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+@dataclass(frozen=True)
+class GuidelineMatchCacheInspection:
+    hits: int
+    misses: int
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
 @dataclass(frozen=True)
 class PreparationIteration:
     guideline_matches: Sequence[GuidelineMatch]
@@ -204,6 +231,8 @@ class PreparationIteration:
     terms: Sequence[Term]
     context_variables: Sequence[ContextVariable]
     generations: PreparationIterationGenerations
+    tool_result_cache: ToolResultCacheInspection
+    guideline_match_cache: GuidelineMatchCacheInspection
 
 
 @dataclass(frozen=True)
@@ -229,6 +258,14 @@ class Session:
     consumption_offsets: Mapping[ConsumerId, int]
 
 
+@dataclass(frozen=True)
+class InteractionSummary:
+    content: str
+    last_event_offset: int
+    event_count: int
+    creation_utc: datetime
+
+
 class SessionUpdateParams(TypedDict, total=False):
     customer_id: CustomerId
     agent_id: AgentId
@@ -237,6 +274,9 @@ class SessionUpdateParams(TypedDict, total=False):
     consumption_offsets: Mapping[ConsumerId, int]
 
 
+EventSubscriber: TypeAlias = Callable[[SessionId, Event], Awaitable[None]]
+
+
 class SessionStore(ABC):
     @abstractmethod
     async def create_session(
@@ -259,6 +299,13 @@ class SessionStore(ABC):
         session_id: SessionId,
     ) -> None: ...
 
+    @abstractmethod
+    async def delete_sessions(
+        self,
+        agent_id: Optional[AgentId] = None,
+        customer_id: Optional[CustomerId] = None,
+    ) -> None: ...
+
     @abstractmethod
     async def update_session(
         self,
@@ -297,6 +344,13 @@ class SessionStore(ABC):
         event_id: EventId,
     ) -> None: ...
 
+    @abstractmethod
+    async def delete_events(
+        self,
+        session_id: SessionId,
+        min_offset: Optional[int] = None,
+    ) -> None: ...
+
     @abstractmethod
     async def list_events(
         self,
@@ -324,6 +378,27 @@ class SessionStore(ABC):
         correlation_id: str,
     ) -> Inspection: ...
 
+    @abstractmethod
+    async def read_interaction_summary(
+        self,
+        session_id: SessionId,
+    ) -> Optional[InteractionSummary]: ...
+
+    @abstractmethod
+    async def update_interaction_summary(
+        self,
+        session_id: SessionId,
+        content: str,
+        last_event_offset: int,
+        event_count: int,
+    ) -> InteractionSummary: ...
+
+    @abstractmethod
+    def subscribe_to_events(
+        self,
+        subscriber: EventSubscriber,
+    ) -> None: ...
+
 
 class _SessionDocument(TypedDict, total=False):
     id: ObjectId
@@ -349,6 +424,16 @@ class _EventDocument(TypedDict, total=False):
     deleted: bool
 
 
+class _InteractionSummaryDocument(TypedDict, total=False):
+    id: ObjectId
+    version: Version.String
+    creation_utc: str
+    session_id: SessionId
+    content: str
+    last_event_offset: int
+    event_count: int
+
+
 class _UsageInfoDocument(TypedDict):
     input_tokens: int
     output_tokens: int
@@ -398,12 +483,24 @@ class _PreparationIterationDocument_V_0_2_0(TypedDict):
 _PreparationIterationDocument_V_0_1_0: TypeAlias = _PreparationIterationDocument_V_0_2_0
 
 
+class _ToolResultCacheInspectionDocument(TypedDict):
+    hits: int
+    misses: int
+
+
+class _GuidelineMatchCacheInspectionDocument(TypedDict):
+    hits: int
+    misses: int
+
+
 class _PreparationIterationDocument(TypedDict):
     guideline_matches: Sequence[GuidelineMatch]
     tool_calls: Sequence[ToolCall]
     terms: Sequence[Term]
     context_variables: Sequence[ContextVariable]
     generations: _PreparationIterationGenerationsDocument
+    tool_result_cache: NotRequired[_ToolResultCacheInspectionDocument]
+    guideline_match_cache: NotRequired[_GuidelineMatchCacheInspectionDocument]
 
 
 class _InspectionDocument_V_0_1_0(TypedDict, total=False):
@@ -441,9 +538,22 @@ class SessionDocumentStore(SessionStore):
         self._session_collection: DocumentCollection[_SessionDocument]
         self._event_collection: DocumentCollection[_EventDocument]
         self._inspection_collection: DocumentCollection[_InspectionDocument]
+        self._interaction_summary_collection: DocumentCollection[_InteractionSummaryDocument]
         self._allow_migration = allow_migration
 
         self._lock = ReaderWriterLock()
+        self._session_locks: weakref.WeakValueDictionary[SessionId, asyncio.Lock] = (
+            weakref.WeakValueDictionary()
+        )
+        # Next event offset of each session, recovered from its events on first use
+        self._next_event_offsets: dict[SessionId, int] = {}
+        self._event_subscribers: list[EventSubscriber] = []
+
+    def _session_lock(self, session_id: SessionId) -> asyncio.Lock:
+        if (lock := self._session_locks.get(session_id)) is None:
+            lock = asyncio.Lock()
+            self._session_locks[session_id] = lock
+        return lock
 
     async def _session_document_loader(self, doc: BaseDocument) -> Optional[_SessionDocument]:
         if doc["version"] in ["0.1.0", "0.2.0"]:
@@ -481,6 +591,13 @@ class SessionDocumentStore(SessionStore):
             return cast(_EventDocument, doc)
         return None
 
+    async def _interaction_summary_document_loader(
+        self, doc: BaseDocument
+    ) -> Optional[_InteractionSummaryDocument]:
+        if doc["version"] == "0.3.0":
+            return cast(_InteractionSummaryDocument, doc)
+        return None
+
     async def _inspection_document_loader(self, doc: BaseDocument) -> Optional[_InspectionDocument]:
         async def v0_1_0_to_v_0_2_0(doc: BaseDocument) -> Optional[BaseDocument]:
             doc = cast(_InspectionDocument_V_0_1_0, doc)
@@ -583,6 +700,11 @@ class SessionDocumentStore(SessionStore):
                 schema=_InspectionDocument,
                 document_loader=self._inspection_document_loader,
             )
+            self._interaction_summary_collection = await self._database.get_or_create_collection(
+                name="interaction_summaries",
+                schema=_InteractionSummaryDocument,
+                document_loader=self._interaction_summary_document_loader,
+            )
 
         return self
 
@@ -702,6 +824,14 @@ class SessionDocumentStore(SessionStore):
                         ),
                         tool_calls=[serialize_generation_info(g) for g in i.generations.tool_calls],
                     ),
+                    "tool_result_cache": _ToolResultCacheInspectionDocument(
+                        hits=i.tool_result_cache.hits,
+                        misses=i.tool_result_cache.misses,
+                    ),
+                    "guideline_match_cache": _GuidelineMatchCacheInspectionDocument(
+                        hits=i.guideline_match_cache.hits,
+                        misses=i.guideline_match_cache.misses,
+                    ),
                 }
                 for i in inspection.preparation_iterations
             ],
@@ -725,6 +855,30 @@ class SessionDocumentStore(SessionStore):
                 ),
             )
 
+        def deserialize_tool_result_cache_inspection(
+            iteration_document: _PreparationIterationDocument,
+        ) -> ToolResultCacheInspection:
+            # Iterations that were stored before tool results were cached have no such entry
+            if cache_document := iteration_document.get("tool_result_cache"):
+                return ToolResultCacheInspection(
+                    hits=cache_document["hits"],
+                    misses=cache_document["misses"],
+                )
+
+            return ToolResultCacheInspection(hits=0, misses=0)
+
+        def deserialize_guideline_match_cache_inspection(
+            iteration_document: _PreparationIterationDocument,
+        ) -> GuidelineMatchCacheInspection:
+            # Iterations that were stored before guideline matches were cached have no such entry
+            if cache_document := iteration_document.get("guideline_match_cache"):
+                return GuidelineMatchCacheInspection(
+                    hits=cache_document["hits"],
+                    misses=cache_document["misses"],
+                )
+
+            return GuidelineMatchCacheInspection(hits=0, misses=0)
+
         return Inspection(
             message_generations=[
                 MessageGenerationInspection(
@@ -751,6 +905,8 @@ class SessionDocumentStore(SessionStore):
                             deserialize_generation_info(g) for g in i["generations"]["tool_calls"]
                         ],
                     ),
+                    tool_result_cache=deserialize_tool_result_cache_inspection(i),
+                    guideline_match_cache=deserialize_guideline_match_cache_inspection(i),
                 )
                 for i in inspection_document["preparation_iterations"]
             ],
@@ -789,17 +945,51 @@ class SessionDocumentStore(SessionStore):
         self,
         session_id: SessionId,
     ) -> None:
-        async with self._lock.writer_lock:
-            events = await self._event_collection.find(filters={"session_id": {"$eq": session_id}})
-            await async_utils.safe_gather(
-                *(
-                    self._event_collection.delete_one(filters={"id": {"$eq": e["id"]}})
-                    for e in events
-                )
+        async with self._lock.writer_lock, self._session_lock(session_id):
+            await self._event_collection.delete_many(filters={"session_id": {"$eq": session_id}})
+            await self._interaction_summary_collection.delete_many(
+                filters={"session_id": {"$eq": session_id}}
             )
-
             await self._session_collection.delete_one({"id": {"$eq": session_id}})
 
+            self._next_event_offsets.pop(session_id, None)
+
+    @override
+    async def delete_sessions(
+        self,
+        agent_id: Optional[AgentId] = None,
+        customer_id: Optional[CustomerId] = None,
+    ) -> None:
+        async with self._lock.writer_lock, AsyncExitStack() as session_locks:
+            filters = {
+                **({"agent_id": {"$eq": agent_id}} if agent_id else {}),
+                **({"customer_id": {"$eq": customer_id}} if customer_id else {}),
+            }
+
+            session_ids = sorted(
+                d["id"] for d in await self._session_collection.find(filters=cast(Where, filters))
+            )
+
+            if not session_ids:
+                return
+
+            # Locks are taken in a consistent order, so that they can't deadlock
+            for session_id in session_ids:
+                await session_locks.enter_async_context(self._session_lock(SessionId(session_id)))
+
+            await self._event_collection.delete_many(
+                filters={"session_id": {"$in": cast(list[str], session_ids)}}
+            )
+            await self._interaction_summary_collection.delete_many(
+                filters={"session_id": {"$in": cast(list[str], session_ids)}}
+            )
+            await self._session_collection.delete_many(
+                filters={"id": {"$in": cast(list[str], session_ids)}}
+            )
+
+            for session_id in session_ids:
+                self._next_event_offsets.pop(SessionId(session_id), None)
+
     @override
     async def read_session(
         self,
@@ -865,15 +1055,16 @@ class SessionDocumentStore(SessionStore):
         data: JSONSerializable,
         creation_utc: Optional[datetime] = None,
     ) -> Event:
-        async with self._lock.writer_lock:
+        # Offsets are allocated from a per-session counter, so only events
+        # of the same session need to be serialized with one another.
+        async with self._session_lock(session_id):
             if not await self._session_collection.find_one(filters={"id": {"$eq": session_id}}):
                 raise ItemNotFoundError(item_id=UniqueId(session_id), message="Session not found")
 
-            session_events = await self.list_events(
-                session_id
-            )  # FIXME: we need a more efficient way to do this
+            if (offset := self._next_event_offsets.get(session_id)) is None:
+                offset = await self._recover_next_event_offset(session_id)
+
             creation_utc = creation_utc or datetime.now(timezone.utc)
-            offset = len(list(session_events))
 
             event = Event(
                 id=EventId(generate_id()),
@@ -890,8 +1081,22 @@ class SessionDocumentStore(SessionStore):
                 document=self._serialize_event(event, session_id)
             )
 
+            self._next_event_offsets[session_id] = offset + 1
+
+        for subscriber in self._event_subscribers:
+            await subscriber(session_id, event)
+
         return event
 
+    async def _recover_next_event_offset(self, session_id: SessionId) -> int:
+        # The counter is only kept in memory, so it's recovered with one pass over the
+        # session's events whenever the session is first used, or has had events deleted.
+        # As before, an event's offset is the number of undeleted events that precede it.
+        event_documents = await self._event_collection.find(
+            filters={"session_id": {"$eq": session_id}, "deleted": {"$eq": False}}
+        )
+        return len(event_documents)
+
     @override
     async def read_event(
         self,
@@ -915,13 +1120,44 @@ class SessionDocumentStore(SessionStore):
         event_id: EventId,
     ) -> None:
         async with self._lock.writer_lock:
-            result = await self._event_collection.update_one(
-                filters={"id": {"$eq": event_id}},
-                params=cast(_EventDocument, {"deleted": True}),
+            event_document = await self._event_collection.find_one(
+                filters={"id": {"$eq": event_id}}
             )
 
-        if result.matched_count == 0:
-            raise ItemNotFoundError(item_id=UniqueId(event_id), message="Event not found")
+            if not event_document:
+                raise ItemNotFoundError(item_id=UniqueId(event_id), message="Event not found")
+
+            async with self._session_lock(event_document["session_id"]):
+                await self._event_collection.update_one(
+                    filters={"id": {"$eq": event_id}},
+                    params=cast(_EventDocument, {"deleted": True}),
+                )
+
+                self._next_event_offsets.pop(event_document["session_id"], None)
+
+    @override
+    async def delete_events(
+        self,
+        session_id: SessionId,
+        min_offset: Optional[int] = None,
+    ) -> None:
+        async with self._lock.writer_lock:
+            if not await self._session_collection.find_one(filters={"id": {"$eq": session_id}}):
+                raise ItemNotFoundError(item_id=UniqueId(session_id), message="Session not found")
+
+            filters = {
+                "session_id": {"$eq": session_id},
+                **({"offset": {"$gte": min_offset}} if min_offset else {}),
+                "deleted": {"$eq": False},
+            }
+
+            async with self._session_lock(session_id):
+                await self._event_collection.update_many(
+                    filters=cast(Where, filters),
+                    params=cast(_EventDocument, {"deleted": True}),
+                )
+
+                self._next_event_offsets.pop(session_id, None)
 
     @override
     async def list_events(
@@ -1018,6 +1254,68 @@ class SessionDocumentStore(SessionStore):
             item_id=UniqueId(correlation_id), message="Message inspection not found"
         )
 
+    @override
+    async def read_interaction_summary(
+        self,
+        session_id: SessionId,
+    ) -> Optional[InteractionSummary]:
+        async with self._lock.reader_lock:
+            summary_document = await self._interaction_summary_collection.find_one(
+                filters={"session_id": {"$eq": session_id}}
+            )
+
+        if not summary_document:
+            return None
+
+        return InteractionSummary(
+            content=summary_document["content"],
+            last_event_offset=summary_document["last_event_offset"],
+            event_count=summary_document["event_count"],
+            creation_utc=datetime.fromisoformat(summary_document["creation_utc"]),
+        )
+
+    @override
+    async def update_interaction_summary(
+        self,
+        session_id: SessionId,
+        content: str,
+        last_event_offset: int,
+        event_count: int,
+    ) -> InteractionSummary:
+        summary = InteractionSummary(
+            content=content,
+            last_event_offset=last_event_offset,
+            event_count=event_count,
+            creation_utc=datetime.now(timezone.utc),
+        )
+
+        async with self._lock.writer_lock:
+            if not await self._session_collection.find_one(filters={"id": {"$eq": session_id}}):
+                raise ItemNotFoundError(item_id=UniqueId(session_id), message="Session not found")
+
+            await self._interaction_summary_collection.update_one(
+                filters={"session_id": {"$eq": session_id}},
+                params=_InteractionSummaryDocument(
+                    id=ObjectId(session_id),
+                    version=self.VERSION.to_string(),
+                    creation_utc=summary.creation_utc.isoformat(),
+                    session_id=session_id,
+                    content=content,
+                    last_event_offset=last_event_offset,
+                    event_count=event_count,
+                ),
+                upsert=True,
+            )
+
+        return summary
+
+    @override
+    def subscribe_to_events(
+        self,
+        subscriber: EventSubscriber,
+    ) -> None:
+        self._event_subscribers.append(subscriber)
+
 
 class SessionListener(ABC):
     @abstractmethod
@@ -1064,3 +1362,89 @@ class PollingSessionListener(SessionListener):
                 return False
             else:
                 await timeout.wait_up_to(1)
+
+
+class _SessionChannel:
+    def __init__(self) -> None:
+        self.condition = asyncio.Condition()
+        self.version = 0
+
+
+class NotifyingSessionListener(SessionListener):
+    """Wakes waiters as soon as an event is created in their session.
+
+    Each session with active waiters gets a condition variable, which the store
+    notifies on event creation. Waiters only re-query the store after being woken up.
+    """
+
+    def __init__(self, session_store: SessionStore) -> None:
+        self._session_store = session_store
+        self._channels: weakref.WeakValueDictionary[SessionId, _SessionChannel] = (
+            weakref.WeakValueDictionary()
+        )
+
+        session_store.subscribe_to_events(self._on_event_created)
+
+    def _channel(self, session_id: SessionId) -> _SessionChannel:
+        if (channel := self._channels.get(session_id)) is None:
+            channel = _SessionChannel()
+            self._channels[session_id] = channel
+        return channel
+
+    async def _on_event_created(self, session_id: SessionId, event: Event) -> None:
+        # Sessions without a channel have no waiters, so there is nothing to wake up.
+        if (channel := self._channels.get(session_id)) is None:
+            return
+
+        async with channel.condition:
+            channel.version += 1
+            channel.condition.notify_all()
+
+    @override
+    async def wait_for_events(
+        self,
+        session_id: SessionId,
+        kinds: Sequence[EventKind] = [],
+        min_offset: Optional[int] = None,
+        source: Optional[EventSource] = None,
+        correlation_id: Optional[str] = None,
+        timeout: Timeout = Timeout.infinite(),
+    ) -> bool:
+        # Trigger exception if not found
+        _ = await self._session_store.read_session(session_id)
+
+        # Holding the channel keeps it alive for as long as we're waiting on it
+        channel = self._channel(session_id)
+
+        while True:
+            # The version is taken before querying, so that an event created
+            # while the query runs is never missed by the wait below.
+            observed_version = channel.version
+
+            events = await self._session_store.list_events(
+                session_id,
+                min_offset=min_offset,
+                source=source,
+                kinds=kinds,
+                correlation_id=correlation_id,
+            )
+
+            if events:
+                return True
+            elif timeout.expired():
+                return False
+
+            async with channel.condition:
+                if channel.version != observed_version:
+                    continue
+
+                remaining = timeout.remaining()
+
+                try:
+                    await asyncio.wait_for(
+                        channel.condition.wait(),
+                        timeout=None if math.isinf(remaining) else remaining,
+                    )
+                except asyncio.TimeoutError:
+                    # Fall through to one last query before reporting the timeout
+                    pass
@@ -51,6 +51,12 @@ EnumValueType = Union[str, int]
 
 DEFAULT_PARAMETER_PRECEDENCE: int = sys.maxsize
 
+ToolResultCacheScope: TypeAlias = Literal["none", "session", "global"]
+"""Whether results of a tool may be reused for repeated calls with the same arguments:
+never, only within the session that produced them, or across all sessions."""
+
+DEFAULT_TOOL_RESULT_CACHE_TTL: float = 60
+
 
 class ToolParameterDescriptor(TypedDict, total=False):
     type: ToolParameterType
@@ -170,6 +176,8 @@ class Tool:
     parameters: dict[str, tuple[ToolParameterDescriptor, ToolParameterOptions]]
     required: list[str]
     consequential: bool
+    cache_scope: ToolResultCacheScope = "none"
+    cache_ttl: float = DEFAULT_TOOL_RESULT_CACHE_TTL
 
     def __hash__(self) -> int:
         return hash(self.name)
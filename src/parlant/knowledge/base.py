@@ -12,11 +12,18 @@ from typing import Any, Dict, List, Optional, Sequence, Set, Tuple, Union, cast
 from dataclasses import dataclass, field
 from uuid import uuid4
 
-from Daneel.core.common import JSONSerializable, Version, generate_id, md5_checksum
+from Daneel.core.common import (
+    ItemNotFoundError,
+    JSONSerializable,
+    UniqueId,
+    Version,
+    generate_id,
+    md5_checksum,
+)
 from Daneel.core.async_utils import ReaderWriterLock
 from Daneel.core.loggers import Logger
 from Daneel.core.nlp.embedding import Embedder, EmbedderFactory
-from Daneel.core.persistence.common import ItemNotFoundError, ObjectId, UniqueId, Where
+from Daneel.core.persistence.common import ObjectId
 from Daneel.core.persistence.document_database import DocumentCollection, DocumentDatabase
 from Daneel.core.persistence.vector_database import (
     BaseDocument,
@@ -369,6 +376,44 @@ class KnowledgeBase:
                 ]}
             )
             
+    def _filters(
+        self,
+        type: Optional[KnowledgeItemType],
+        source: Optional[KnowledgeItemSource],
+        tags: Optional[List[str]],
+    ) -> Dict[str, Any]:
+        """Build the filters for an item type, source and tags.
+
+        A list field equals a value if any of its elements does, so items with all
+        the given tags are matched by one condition per tag. Vector collections that
+        index tags (such as the matrix collection) answer these from their index.
+
+        Args:
+            type: Filter by type
+            source: Filter by source
+            tags: Filter by tags
+
+        Returns:
+            Filters matching the given type, source and tags
+        """
+        filters: Dict[str, Any] = {}
+
+        if type is not None:
+            filters["type"] = {"$eq": type.value}
+
+        if source is not None:
+            filters["source"] = {"$eq": source.value}
+
+        if tags:
+            return {
+                "$and": [
+                    *([filters] if filters else []),
+                    *({"tags": {"$eq": tag}} for tag in tags),
+                ]
+            }
+
+        return filters
+
     async def list_items(
         self,
         type: Optional[KnowledgeItemType] = None,
@@ -376,32 +421,20 @@ class KnowledgeBase:
         tags: Optional[List[str]] = None,
     ) -> List[KnowledgeItem]:
         """List knowledge items.
-        
+
         Args:
             type: Filter by type
             source: Filter by source
             tags: Filter by tags
-            
+
         Returns:
             List of knowledge items
         """
         async with self._lock.reader_lock:
-            filters: Dict[str, Any] = {}
-            
-            if type is not None:
-                filters["type"] = {"$eq": type.value}
-                
-            if source is not None:
-                filters["source"] = {"$eq": source.value}
-                
-            if tags is not None and tags:
-                # Match items that have all the specified tags
-                filters["tags"] = {"$all": tags}
-                
-            documents = await self._collection.find(filters=filters)
-            
+            documents = await self._collection.find(filters=self._filters(type, source, tags))
+
         return [await self._deserialize(doc) for doc in documents]
-        
+
     async def search_items(
         self,
         query: str,
@@ -411,34 +444,26 @@ class KnowledgeBase:
         tags: Optional[List[str]] = None,
     ) -> List[Tuple[KnowledgeItem, float]]:
         """Search for knowledge items.
-        
+
+        The search runs on the vector collection, so large knowledge bases stored
+        in a vector database with approximate search enabled (such as the matrix
+        database with IVF parameters) are searched through its index.
+
         Args:
             query: Search query
             k: Number of results to return
             type: Filter by type
             source: Filter by source
             tags: Filter by tags
-            
+
         Returns:
             List of knowledge items with similarity scores
         """
         async with self._lock.reader_lock:
-            filters: Dict[str, Any] = {}
-            
-            if type is not None:
-                filters["type"] = {"$eq": type.value}
-                
-            if source is not None:
-                filters["source"] = {"$eq": source.value}
-                
-            if tags is not None and tags:
-                # Match items that have all the specified tags
-                filters["tags"] = {"$all": tags}
-                
             results = await self._collection.find_similar_documents(
-                filters=filters,
+                filters=self._filters(type, source, tags),
                 query=query,
                 k=k,
             )
-            
+
         return [(await self._deserialize(result.document), result.score) for result in results]
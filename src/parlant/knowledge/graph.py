@@ -9,9 +9,9 @@ from datetime import datetime, timezone
 from typing import Any, Dict, List, Optional, Sequence, Set, Tuple, Union, cast
 import networkx as nx
 
-from Daneel.core.common import JSONSerializable, generate_id
+from Daneel.core.common import ItemNotFoundError, JSONSerializable, UniqueId, generate_id
 from Daneel.core.loggers import Logger
-from Daneel.core.persistence.common import ItemNotFoundError, ObjectId, UniqueId
+from Daneel.core.persistence.common import ObjectId
 
 from Daneel.knowledge.base import KnowledgeBase, KnowledgeItem, KnowledgeItemId
 
@@ -12,12 +12,13 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import asyncio
 from dataclasses import dataclass
 from pathlib import Path
 import tempfile
-from typing import AsyncIterator, Iterator, Optional, TypedDict, cast
+from typing import Any, AsyncIterator, Iterator, Mapping, Optional, TypedDict, cast
 import numpy as np
-from typing_extensions import Required
+from typing_extensions import Required, override
 from lagom import Container
 from pytest import fixture, raises
 from chromadb.api.types import IncludeEnum
@@ -28,9 +29,10 @@ from Daneel.adapters.vector_db.chroma import ChromaCollection, ChromaDatabase
 from Daneel.core.agents import AgentStore, AgentId
 from Daneel.core.common import Version, md5_checksum
 from Daneel.core.glossary import GlossaryVectorStore
-from Daneel.core.nlp.embedding import EmbedderFactory, NoOpEmbedder
+from Daneel.core.nlp.embedding import Embedder, EmbedderFactory, EmbeddingResult, NoOpEmbedder
 from Daneel.core.loggers import Logger
 from Daneel.core.nlp.service import NLPService
+from Daneel.core.nlp.tokenization import EstimatingTokenizer, ZeroEstimatingTokenizer
 from Daneel.core.persistence.common import MigrationRequired, ObjectId
 from Daneel.core.persistence.vector_database import BaseDocument
 from Daneel.core.tags import Tag, TagId
@@ -826,3 +828,300 @@ async def test_that_in_filter_works_with_single_tag(
             assert len(terms) == 1
             assert terms[0].id == first_term.id
             assert terms[0].name == "Bazoo"
+
+
+class _CountingEmbedder(Embedder):
+    def __init__(self) -> None:
+        self.batches: list[list[str]] = []
+        self.blocked = asyncio.Event()
+        self.released = asyncio.Event()
+        self.block_after: Optional[int] = None
+
+    @override
+    async def embed(
+        self,
+        texts: list[str],
+        hints: Mapping[str, Any] = {},
+    ) -> EmbeddingResult:
+        if self.block_after is not None and len(self.batches) >= self.block_after:
+            self.blocked.set()
+            await self.released.wait()
+
+        self.batches.append(texts)
+        return EmbeddingResult(vectors=[[1.0, float(len(t))] for t in texts])
+
+    @property
+    @override
+    def id(self) -> str:
+        return "counting"
+
+    @property
+    @override
+    def max_tokens(self) -> int:
+        return 8192
+
+    @property
+    @override
+    def tokenizer(self) -> EstimatingTokenizer:
+        return ZeroEstimatingTokenizer()
+
+    @property
+    @override
+    def dimensions(self) -> int:
+        return 2
+
+
+async def test_that_interrupted_background_indexing_resumes_in_batches_on_next_load(
+    context: _TestContext,
+    doc_version: Version.String,
+) -> None:
+    embedder = _CountingEmbedder()
+    context.container[_CountingEmbedder] = embedder
+
+    async with create_database(context) as chroma_database:
+        collection = await chroma_database.get_or_create_collection(
+            "test_collection",
+            _TestDocument,
+            embedder_type=NoOpEmbedder,
+            document_loader=_identity_loader,
+        )
+
+        for i in range(5):
+            await collection.insert_one(
+                _TestDocument(
+                    id=ObjectId(str(i)),
+                    version=doc_version,
+                    content=f"content {i}",
+                    name=f"Document {i}",
+                    checksum=md5_checksum(f"content {i}"),
+                )
+            )
+
+    embedder.block_after = 1
+
+    async with ChromaDatabase(
+        logger=context.container[Logger],
+        dir_path=context.home_dir,
+        embedder_factory=EmbedderFactory(context.container),
+        indexing_batch_size=2,
+        background_indexing=True,
+    ) as chroma_database:
+        collection = await chroma_database.get_or_create_collection(
+            "test_collection",
+            _TestDocument,
+            embedder_type=_CountingEmbedder,
+            document_loader=_identity_loader,
+        )
+
+        # Documents are served while the embedded collection is being indexed
+        assert len(await collection.find({})) == 5
+
+        await embedder.blocked.wait()
+
+        assert chroma_database.indexing_progress["test_collection"].indexed == 2
+
+    embedder.block_after = None
+
+    async with ChromaDatabase(
+        logger=context.container[Logger],
+        dir_path=context.home_dir,
+        embedder_factory=EmbedderFactory(context.container),
+        indexing_batch_size=2,
+        background_indexing=True,
+    ) as chroma_database:
+        collection = await chroma_database.get_or_create_collection(
+            "test_collection",
+            _TestDocument,
+            embedder_type=_CountingEmbedder,
+            document_loader=_identity_loader,
+        )
+
+        await chroma_database.wait_for_indexing()
+
+        assert [len(batch) for batch in embedder.batches] == [2, 2, 1]
+        assert collection.embedded_collection.count() == 5
+
+
+async def test_that_background_indexing_keeps_serving_the_previous_index_until_it_completes(
+    context: _TestContext,
+    doc_version: Version.String,
+) -> None:
+    embedder = _CountingEmbedder()
+    context.container[_CountingEmbedder] = embedder
+
+    async with create_database(context) as chroma_database:
+        collection = await chroma_database.get_or_create_collection(
+            "test_collection",
+            _TestDocument,
+            embedder_type=_CountingEmbedder,
+            document_loader=_identity_loader,
+        )
+
+        await collection.insert_many(
+            [
+                _TestDocument(
+                    id=ObjectId(str(i)),
+                    version=doc_version,
+                    content=f"content {i}",
+                    name=f"Document {i}",
+                    checksum=md5_checksum(f"content {i}"),
+                )
+                for i in range(5)
+            ]
+        )
+
+    async def revising_loader(doc: BaseDocument) -> Optional[_TestDocument]:
+        content = str(doc["content"]).replace("content", "revised")
+        return cast(_TestDocument, {**doc, "content": content, "checksum": md5_checksum(content)})
+
+    embedder.block_after = len(embedder.batches) + 1
+
+    async with ChromaDatabase(
+        logger=context.container[Logger],
+        dir_path=context.home_dir,
+        embedder_factory=EmbedderFactory(context.container),
+        indexing_batch_size=2,
+        background_indexing=True,
+    ) as chroma_database:
+        collection = await chroma_database.get_or_create_collection(
+            "test_collection",
+            _TestDocument,
+            embedder_type=_CountingEmbedder,
+            document_loader=revising_loader,
+        )
+
+        await embedder.blocked.wait()
+
+        assert chroma_database.indexing_progress["test_collection"].indexed == 2
+
+        served = collection.embedded_collection.get()["metadatas"] or []
+        assert len(served) == 5
+        assert all(str(d["content"]).startswith("content") for d in served)
+
+        embedder.block_after = None
+
+        await collection.delete_one({"id": {"$eq": "4"}})
+        await collection.update_many({"id": {"$eq": "0"}}, cast(_TestDocument, {"name": "Renamed"}))
+        await collection.insert_one(
+            _TestDocument(
+                id=ObjectId("5"),
+                version=doc_version,
+                content="revised 5",
+                name="Document 5",
+                checksum=md5_checksum("revised 5"),
+            )
+        )
+
+        embedder.released.set()
+        await chroma_database.wait_for_indexing()
+
+        indexed = collection.embedded_collection.get()["metadatas"] or []
+        assert sorted(str(d["id"]) for d in indexed) == ["0", "1", "2", "3", "5"]
+        assert all(str(d["content"]).startswith("revised") for d in indexed)
+        assert next(d["name"] for d in indexed if d["id"] == "0") == "Renamed"
+
+        assert not any(
+            c.name.endswith("_staging") for c in chroma_database.chroma_client.list_collections()
+        )
+
+
+async def test_that_bulk_operations_embed_once_per_call(
+    context: _TestContext,
+    doc_version: Version.String,
+) -> None:
+    embedder = _CountingEmbedder()
+    context.container[_CountingEmbedder] = embedder
+
+    async with create_database(context) as chroma_database:
+        collection = await chroma_database.get_or_create_collection(
+            "test_collection",
+            _TestDocument,
+            embedder_type=_CountingEmbedder,
+            document_loader=_identity_loader,
+        )
+
+        result = await collection.insert_many(
+            [
+                _TestDocument(
+                    id=ObjectId(str(i)),
+                    version=doc_version,
+                    content=f"content {i}",
+                    name="even" if i % 2 == 0 else "odd",
+                    checksum=md5_checksum(f"content {i}"),
+                )
+                for i in range(5)
+            ]
+        )
+
+        assert result.inserted_count == 5
+        assert [len(batch) for batch in embedder.batches] == [5]
+
+        update_result = await collection.update_many(
+            {"name": {"$eq": "even"}},
+            cast(_TestDocument, {"content": "updated"}),
+        )
+
+        assert update_result.matched_count == 3
+        assert [len(batch) for batch in embedder.batches] == [5, 3]
+        assert len(await collection.find({"content": {"$eq": "updated"}})) == 3
+
+        delete_result = await collection.delete_many({"name": {"$eq": "odd"}})
+
+        assert delete_result.deleted_count == 2
+        assert sorted(d["id"] for d in await collection.find({})) == ["0", "2", "4"]
+        assert collection.embedded_collection.count() == 3
+
+
+async def test_that_update_many_embeds_only_changed_content_outside_the_lock(
+    context: _TestContext,
+    doc_version: Version.String,
+) -> None:
+    embedder = _CountingEmbedder()
+    context.container[_CountingEmbedder] = embedder
+
+    async with create_database(context) as chroma_database:
+        collection = await chroma_database.get_or_create_collection(
+            "test_collection",
+            _TestDocument,
+            embedder_type=_CountingEmbedder,
+            document_loader=_identity_loader,
+        )
+
+        await collection.insert_many(
+            [
+                _TestDocument(
+                    id=ObjectId(str(i)),
+                    version=doc_version,
+                    content=f"content {i}",
+                    name="old",
+                    checksum=md5_checksum(f"content {i}"),
+                )
+                for i in range(3)
+            ]
+        )
+
+        await collection.update_many({"name": {"$eq": "old"}}, cast(_TestDocument, {"name": "new"}))
+
+        assert len(embedder.batches) == 1
+        assert {d["name"] for d in collection.embedded_collection.get()["metadatas"] or []} == {
+            "new"
+        }
+
+        embedder.block_after = 1
+
+        update = asyncio.create_task(
+            collection.update_many(
+                {"id": {"$eq": "0"}}, cast(_TestDocument, {"content": "changed"})
+            )
+        )
+
+        await embedder.blocked.wait()
+
+        # Documents can be read while the new content is being embedded
+        assert len(await asyncio.wait_for(collection.find({}), timeout=5)) == 3
+
+        embedder.released.set()
+        await update
+
+        assert embedder.batches[1:] == [["changed"]]
+        assert [d["id"] for d in await collection.find({"content": {"$eq": "changed"}})] == ["0"]
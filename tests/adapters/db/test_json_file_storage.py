@@ -12,6 +12,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import asyncio
 from dataclasses import dataclass
 from datetime import datetime, timezone
 import json
@@ -19,6 +20,7 @@ from pathlib import Path
 from typing import Any, AsyncIterator, Optional, Sequence, cast
 from typing_extensions import Self
 import tempfile
+import time
 from lagom import Container
 from pytest import fixture, mark, raises
 
@@ -44,14 +46,14 @@ from Daneel.core.guidelines import (
     GuidelineId,
 )
 from Daneel.adapters.db.json_file import JSONFileDocumentDatabase
-from Daneel.core.persistence.common import MigrationRequired
+from Daneel.core.persistence.common import MigrationRequired, ObjectId, Where
 from Daneel.core.persistence.document_database import (
     BaseDocument,
     DocumentCollection,
     identity_loader,
 )
 from Daneel.core.persistence.document_database_helper import DocumentStoreMigrationHelper
-from Daneel.core.sessions import EventKind, EventSource, SessionDocumentStore
+from Daneel.core.sessions import EventKind, EventSource, SessionDocumentStore, SessionId
 from Daneel.core.guideline_tool_associations import (
     GuidelineToolAssociationDocumentStore,
 )
@@ -819,3 +821,302 @@ async def test_that_persistence_and_store_version_match_allows_store_to_open_whe
 
             assert meta_document
             assert meta_document["version"] == "2.0.0"
+
+
+async def test_that_journaled_database_appends_mutations_to_the_journal_instead_of_rewriting_the_file(
+    context: _TestContext,
+    new_file: Path,
+) -> None:
+    journal_file = new_file.with_name(new_file.name + ".journal")
+
+    async with JSONFileDocumentDatabase(
+        context.container[Logger], new_file, journaled=True
+    ) as session_db:
+        async with SessionDocumentStore(session_db) as session_store:
+            snapshot_before = new_file.read_text()
+
+            session = await session_store.create_session(
+                customer_id=CustomerId("test_customer"),
+                agent_id=context.agent_id,
+            )
+
+            assert new_file.read_text() == snapshot_before
+
+            entries = [json.loads(line) for line in journal_file.read_text().splitlines()]
+            assert any(e["collection"] == "sessions" and e["id"] == session.id for e in entries)
+
+    with open(new_file) as f:
+        sessions_from_json = json.load(f)
+
+    assert [s["id"] for s in sessions_from_json["sessions"]] == [session.id]
+    assert journal_file.stat().st_size == 0
+
+    journal_file.unlink()
+
+
+async def test_that_journaled_database_replays_the_journal_on_startup(
+    context: _TestContext,
+    new_file: Path,
+) -> None:
+    journal_file = new_file.with_name(new_file.name + ".journal")
+    logger = context.container[Logger]
+
+    db = JSONFileDocumentDatabase(logger, new_file, journaled=True)
+    await db.__aenter__()
+
+    collection = await db.get_or_create_collection("dummy", BaseDocument, identity_loader)
+    await collection.insert_one({"id": ObjectId("1"), "version": Version.String("1.0.0")})
+    await collection.insert_one({"id": ObjectId("2"), "version": Version.String("1.0.0")})
+    await collection.update_one({"id": {"$eq": "1"}}, {"version": Version.String("2.0.0")})
+    await collection.delete_one({"id": {"$eq": "2"}})
+
+    # Simulate a crash: the database is never exited, so nothing is compacted
+    journal_file.write_text(journal_file.read_text() + '{"op": "ins')
+
+    async with JSONFileDocumentDatabase(logger, new_file, journaled=True) as recovered_db:
+        recovered_collection = await recovered_db.get_or_create_collection(
+            "dummy", BaseDocument, identity_loader
+        )
+        documents = await recovered_collection.find({})
+
+        assert documents == [{"id": "1", "version": "2.0.0"}]
+
+    journal_file.unlink()
+
+
+async def test_that_journaled_database_compacts_the_journal_into_the_file_in_the_background(
+    context: _TestContext,
+    new_file: Path,
+) -> None:
+    journal_file = new_file.with_name(new_file.name + ".journal")
+
+    async with JSONFileDocumentDatabase(
+        context.container[Logger], new_file, journaled=True, compaction_threshold=1
+    ) as db:
+        collection = await db.get_or_create_collection("dummy", BaseDocument, identity_loader)
+        await collection.insert_one({"id": ObjectId("1"), "version": Version.String("1.0.0")})
+
+        await db.compact()
+
+        with open(new_file) as f:
+            assert json.load(f)["dummy"] == [{"id": "1", "version": "1.0.0"}]
+
+        assert journal_file.stat().st_size == 0
+
+    journal_file.unlink()
+
+
+async def test_that_event_offsets_count_undeleted_events_across_reloads_and_deletions(
+    context: _TestContext,
+    new_file: Path,
+) -> None:
+    async def create_event(session_store: SessionDocumentStore, session_id: SessionId) -> int:
+        event = await session_store.create_event(
+            session_id=session_id,
+            source=EventSource.CUSTOMER,
+            kind=EventKind.MESSAGE,
+            correlation_id="test_correlation_id",
+            data={"message": "Hello, world!"},
+        )
+        return event.offset
+
+    async with JSONFileDocumentDatabase(context.container[Logger], new_file) as session_db:
+        async with SessionDocumentStore(session_db) as session_store:
+            session = await session_store.create_session(
+                customer_id=CustomerId("test_customer"),
+                agent_id=context.agent_id,
+            )
+
+            assert [await create_event(session_store, session.id) for _ in range(3)] == [0, 1, 2]
+
+            last_event = (await session_store.list_events(session.id))[-1]
+            await session_store.delete_event(last_event.id)
+
+            assert await create_event(session_store, session.id) == 2
+
+            snapshot = json.loads(new_file.read_text())
+            assert "next_event_offset" not in snapshot["sessions"][0]
+
+    async with JSONFileDocumentDatabase(context.container[Logger], new_file) as session_db:
+        async with SessionDocumentStore(session_db) as session_store:
+            assert await create_event(session_store, session.id) == 3
+
+            await session_store.delete_events(session.id, min_offset=1)
+
+            assert await create_event(session_store, session.id) == 1
+
+
+async def test_that_journaled_bulk_operations_are_written_in_a_single_commit(
+    context: _TestContext,
+    new_file: Path,
+) -> None:
+    journal_file = new_file.with_name(new_file.name + ".journal")
+    logger = context.container[Logger]
+
+    db = JSONFileDocumentDatabase(logger, new_file, journaled=True)
+    await db.__aenter__()
+
+    collection = await db.get_or_create_collection("dummy", BaseDocument, identity_loader)
+
+    assert db._journal
+    writes = 0
+    write = db._journal._write
+
+    def counting_write(data: str) -> None:
+        nonlocal writes
+        writes += 1
+        write(data)
+
+    db._journal._write = counting_write  # type: ignore
+
+    await collection.insert_many(
+        [{"id": ObjectId(str(i)), "version": Version.String("1.0.0")} for i in range(5)]
+    )
+    result = await collection.update_many(
+        cast(Where, {"id": {"$in": ["0", "1", "2"]}}),
+        {"version": Version.String("2.0.0")},
+    )
+    deleted = await collection.delete_many(cast(Where, {"id": {"$in": ["2", "3"]}}))
+
+    assert writes == 3
+    assert result.matched_count == 3
+    assert deleted.deleted_count == 2
+
+    # Simulate a crash: the database is never exited, so nothing is compacted
+    async with JSONFileDocumentDatabase(logger, new_file, journaled=True) as recovered_db:
+        recovered_collection = await recovered_db.get_or_create_collection(
+            "dummy", BaseDocument, identity_loader
+        )
+
+        assert await recovered_collection.find({}) == [
+            {"id": "0", "version": "2.0.0"},
+            {"id": "1", "version": "2.0.0"},
+            {"id": "4", "version": "1.0.0"},
+        ]
+
+    journal_file.unlink()
+
+
+async def test_that_concurrent_journaled_writes_to_a_collection_share_a_commit(
+    context: _TestContext,
+    new_file: Path,
+) -> None:
+    journal_file = new_file.with_name(new_file.name + ".journal")
+
+    async with JSONFileDocumentDatabase(context.container[Logger], new_file, journaled=True) as db:
+        collection = await db.get_or_create_collection("dummy", BaseDocument, identity_loader)
+
+        assert db._journal
+        writes = 0
+        write = db._journal._write
+
+        def slow_write(data: str) -> None:
+            nonlocal writes
+            writes += 1
+            time.sleep(0.1)
+            write(data)
+
+        db._journal._write = slow_write  # type: ignore
+
+        await asyncio.gather(
+            *(
+                collection.insert_one({"id": ObjectId(str(i)), "version": Version.String("1.0.0")})
+                for i in range(10)
+            )
+        )
+
+        # At most the first insert is committed alone; the rest are staged
+        # while it's in flight, and share the next commit
+        assert writes <= 2
+        assert len(await collection.find({})) == 10
+
+    journal_file.unlink()
+
+
+async def test_that_a_failed_journal_write_is_rolled_back_without_losing_later_writes(
+    context: _TestContext,
+    new_file: Path,
+) -> None:
+    journal_file = new_file.with_name(new_file.name + ".journal")
+    logger = context.container[Logger]
+
+    db = JSONFileDocumentDatabase(logger, new_file, journaled=True)
+    await db.__aenter__()
+
+    collection = await db.get_or_create_collection("dummy", BaseDocument, identity_loader)
+    await collection.insert_one({"id": ObjectId("0"), "version": Version.String("1.0.0")})
+
+    assert db._journal
+    write = db._journal._write
+
+    def failing_write(data: str) -> None:
+        # A partial line reaches the file before the write fails
+        assert db._journal and db._journal._file
+        db._journal._file.write(data[:10])
+        db._journal._file.flush()
+        raise OSError("Disk full")
+
+    db._journal._write = failing_write  # type: ignore
+
+    with raises(OSError):
+        await collection.update_one({"id": {"$eq": "0"}}, {"version": Version.String("2.0.0")})
+
+    with raises(OSError):
+        await collection.insert_one({"id": ObjectId("1"), "version": Version.String("1.0.0")})
+
+    assert await collection.find({}) == [{"id": "0", "version": "1.0.0"}]
+
+    db._journal._write = write  # type: ignore
+
+    await collection.insert_one({"id": ObjectId("2"), "version": Version.String("1.0.0")})
+
+    # Simulate a crash: the database is never exited, so nothing is compacted
+    async with JSONFileDocumentDatabase(logger, new_file, journaled=True) as recovered_db:
+        recovered_collection = await recovered_db.get_or_create_collection(
+            "dummy", BaseDocument, identity_loader
+        )
+
+        assert await recovered_collection.find({}) == [
+            {"id": "0", "version": "1.0.0"},
+            {"id": "2", "version": "1.0.0"},
+        ]
+
+    journal_file.unlink()
+
+
+async def test_that_sessions_and_their_events_are_deleted_in_bulk(
+    context: _TestContext,
+    new_file: Path,
+) -> None:
+    async with JSONFileDocumentDatabase(context.container[Logger], new_file) as session_db:
+        async with SessionDocumentStore(session_db) as session_store:
+            sessions = [
+                await session_store.create_session(
+                    customer_id=CustomerId(customer_id),
+                    agent_id=context.agent_id,
+                )
+                for customer_id in ["first_customer", "first_customer", "second_customer"]
+            ]
+
+            for session in sessions:
+                for _ in range(3):
+                    await session_store.create_event(
+                        session_id=session.id,
+                        source=EventSource.CUSTOMER,
+                        kind=EventKind.MESSAGE,
+                        correlation_id="test_correlation_id",
+                        data={"message": "Hello, world!"},
+                    )
+
+            await session_store.delete_events(sessions[2].id, min_offset=1)
+
+            assert [e.offset for e in await session_store.list_events(sessions[2].id)] == [0]
+
+            await session_store.delete_sessions(customer_id=CustomerId("first_customer"))
+
+            assert [s.id for s in await session_store.list_sessions()] == [sessions[2].id]
+
+    with open(new_file) as f:
+        events_from_json = json.load(f)["events"]
+
+    assert {e["session_id"] for e in events_from_json} == {sessions[2].id}
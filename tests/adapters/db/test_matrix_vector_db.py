@@ -0,0 +1,466 @@
+# Copyright 2025 Emcie Co Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from pathlib import Path
+import tempfile
+from typing import Any, Iterator, Mapping, Optional, TypedDict, cast
+from unittest.mock import patch
+from typing_extensions import Required, override
+from lagom import Container
+from pytest import fixture, raises
+
+from Daneel.adapters.db.transient import TransientDocumentDatabase
+from Daneel.adapters.vector_db.matrix import MatrixVectorCollection, MatrixVectorDatabase
+from Daneel.core.common import Version, md5_checksum
+from Daneel.core.glossary import GlossaryVectorStore
+from Daneel.knowledge.base import KnowledgeBase, KnowledgeItemSource, KnowledgeItemType
+from Daneel.core.loggers import Logger
+from Daneel.core.nlp.embedding import Embedder, EmbedderFactory, EmbeddingResult
+from Daneel.core.nlp.tokenization import EstimatingTokenizer
+from Daneel.core.persistence.common import ObjectId
+from Daneel.core.persistence.vector_database import BaseDocument
+from Daneel.core.persistence.vector_index import IVFParameters
+from Daneel.core.tags import TagId
+
+
+class _TestDocument(TypedDict, total=False):
+    id: ObjectId
+    version: Version.String
+    content: str
+    checksum: Required[str]
+    name: str
+
+
+class _WordCountingTokenizer(EstimatingTokenizer):
+    @override
+    async def estimate_token_count(self, prompt: str) -> int:
+        return len(prompt.split())
+
+
+class _KeywordEmbedder(Embedder):
+    KEYWORDS = ["apple", "banana", "cherry"]
+
+    def __init__(self) -> None:
+        self.embedded_texts: list[str] = []
+
+    @override
+    async def embed(
+        self,
+        texts: list[str],
+        hints: Mapping[str, Any] = {},
+    ) -> EmbeddingResult:
+        self.embedded_texts.extend(texts)
+        return EmbeddingResult(
+            vectors=[[float(k in t.lower()) for k in self.KEYWORDS] + [0.1] for t in texts]
+        )
+
+    @property
+    @override
+    def id(self) -> str:
+        return "keyword"
+
+    @property
+    @override
+    def max_tokens(self) -> int:
+        return 10
+
+    @property
+    @override
+    def tokenizer(self) -> EstimatingTokenizer:
+        return _WordCountingTokenizer()
+
+    @property
+    @override
+    def dimensions(self) -> int:
+        return len(self.KEYWORDS) + 1
+
+
+class _OtherKeywordEmbedder(_KeywordEmbedder):
+    @property
+    @override
+    def id(self) -> str:
+        return "other-keyword"
+
+
+async def _identity_loader(doc: BaseDocument) -> _TestDocument:
+    return cast(_TestDocument, doc)
+
+
+@fixture
+def home_dir() -> Iterator[Path]:
+    with tempfile.TemporaryDirectory() as home_dir:
+        yield Path(home_dir)
+
+
+@fixture
+def embedder(container: Container) -> _KeywordEmbedder:
+    embedder = _KeywordEmbedder()
+    container[_KeywordEmbedder] = embedder
+    return embedder
+
+
+def create_database(container: Container, home_dir: Path) -> MatrixVectorDatabase:
+    return MatrixVectorDatabase(
+        logger=container[Logger],
+        dir_path=home_dir,
+        embedder_factory=EmbedderFactory(container),
+    )
+
+
+def _make_document(id: str, content: str, name: Optional[str] = None) -> _TestDocument:
+    return _TestDocument(
+        id=ObjectId(id),
+        version=Version.from_string("0.1.0").to_string(),
+        content=content,
+        name=name or content,
+        checksum=md5_checksum(content),
+    )
+
+
+async def test_that_similar_documents_are_ranked_by_cosine_distance(
+    container: Container,
+    home_dir: Path,
+    embedder: _KeywordEmbedder,
+) -> None:
+    async with create_database(container, home_dir) as db:
+        collection = await db.get_or_create_collection(
+            "test_collection",
+            _TestDocument,
+            embedder_type=_KeywordEmbedder,
+            document_loader=_identity_loader,
+        )
+
+        for i, content in enumerate(["apple", "banana", "cherry", "apple banana"]):
+            await collection.insert_one(_make_document(str(i), content))
+
+        result = await collection.find_similar_documents({}, "apple banana", k=2)
+
+        assert [r.document["content"] for r in result] == ["apple banana", "apple"]
+        assert result[0].distance < result[1].distance
+        assert abs(result[0].distance) < 1e-6
+
+
+async def test_that_similarity_search_respects_filters_and_deletions(
+    container: Container,
+    home_dir: Path,
+    embedder: _KeywordEmbedder,
+) -> None:
+    async with create_database(container, home_dir) as db:
+        collection = await db.get_or_create_collection(
+            "test_collection",
+            _TestDocument,
+            embedder_type=_KeywordEmbedder,
+            document_loader=_identity_loader,
+        )
+
+        await collection.insert_one(_make_document("1", "apple", name="a"))
+        await collection.insert_one(_make_document("2", "apple pie", name="b"))
+        await collection.insert_one(_make_document("3", "banana", name="b"))
+
+        filtered_result = await collection.find_similar_documents(
+            {"name": {"$eq": "b"}}, "apple", k=3
+        )
+
+        assert [r.document["id"] for r in filtered_result] == ["2", "3"]
+
+        await collection.delete_one({"id": {"$eq": "2"}})
+
+        result = await collection.find_similar_documents({}, "apple", k=3)
+
+        assert [r.document["id"] for r in result] == ["1", "3"]
+
+
+async def test_that_stored_vectors_are_reused_when_reopening_a_collection(
+    container: Container,
+    home_dir: Path,
+    embedder: _KeywordEmbedder,
+) -> None:
+    async with create_database(container, home_dir) as db:
+        collection = await db.get_or_create_collection(
+            "test_collection",
+            _TestDocument,
+            embedder_type=_KeywordEmbedder,
+            document_loader=_identity_loader,
+        )
+
+        await collection.insert_one(_make_document("1", "apple"))
+        await collection.insert_one(_make_document("2", "banana"))
+        await collection.delete_one({"id": {"$eq": "1"}})
+
+    embedder.embedded_texts.clear()
+
+    async with create_database(container, home_dir) as db:
+        collection = await db.get_collection(
+            "test_collection",
+            _TestDocument,
+            embedder_type=_KeywordEmbedder,
+            document_loader=_identity_loader,
+        )
+
+        result = await collection.find_similar_documents({}, "banana", k=2)
+
+        assert [r.document["id"] for r in result] == ["2"]
+
+    assert embedder.embedded_texts == ["banana"]
+
+
+async def test_that_documents_are_reembedded_when_the_embedder_changes(
+    container: Container,
+    home_dir: Path,
+    embedder: _KeywordEmbedder,
+) -> None:
+    async with create_database(container, home_dir) as db:
+        collection = await db.get_or_create_collection(
+            "test_collection",
+            _TestDocument,
+            embedder_type=_KeywordEmbedder,
+            document_loader=_identity_loader,
+        )
+
+        await collection.insert_one(_make_document("1", "apple"))
+
+    other_embedder = _OtherKeywordEmbedder()
+    container[_OtherKeywordEmbedder] = other_embedder
+
+    async with create_database(container, home_dir) as db:
+        await db.get_or_create_collection(
+            "test_collection",
+            _TestDocument,
+            embedder_type=_OtherKeywordEmbedder,
+            document_loader=_identity_loader,
+        )
+
+    assert other_embedder.embedded_texts == ["apple"]
+
+
+async def test_that_relevant_glossary_terms_are_filtered_by_tag_and_ranked_by_best_chunk_score(
+    container: Container,
+    home_dir: Path,
+    embedder: _KeywordEmbedder,
+) -> None:
+    async with create_database(container, home_dir) as db:
+        async with GlossaryVectorStore(
+            vector_db=db,
+            document_db=TransientDocumentDatabase(),
+            embedder_factory=EmbedderFactory(container),
+            embedder_type=_KeywordEmbedder,
+        ) as store:
+            await store.create_term("Apple", "a fruit", tags=[TagId("a")])
+            await store.create_term("Banana", "a yellow fruit", tags=[TagId("b")])
+            cherry = await store.create_term("Cherry", "a red fruit")
+
+            # The query is embedded in two-word chunks, one of which matches each term exactly
+            query = "about cherry and then something about banana"
+
+            terms = await store.find_relevant_terms(query, max_terms=2)
+            assert {t.name for t in terms} == {"Cherry", "Banana"}
+
+            terms = await store.find_relevant_terms(query, tags=[TagId("a"), TagId("b")])
+            assert [t.name for t in terms] == ["Banana", "Apple"]
+
+            assert await store.find_relevant_terms(query, tags=[TagId("c")]) == []
+
+            await store.upsert_tag(cherry.id, TagId("c"))
+
+            terms = await store.find_relevant_terms(query, tags=[TagId("c")])
+            assert [t.name for t in terms] == ["Cherry"]
+
+
+async def test_that_bulk_operations_embed_once_per_call_and_persist(
+    container: Container,
+    home_dir: Path,
+    embedder: _KeywordEmbedder,
+) -> None:
+    async with create_database(container, home_dir) as db:
+        collection = await db.get_or_create_collection(
+            "test_collection",
+            _TestDocument,
+            embedder_type=_KeywordEmbedder,
+            document_loader=_identity_loader,
+        )
+
+        await collection.insert_many(
+            [
+                _make_document("1", "apple", name="a"),
+                _make_document("2", "banana", name="b"),
+                _make_document("3", "cherry", name="b"),
+            ]
+        )
+
+        assert embedder.embedded_texts == ["apple", "banana", "cherry"]
+
+        result = await collection.update_many(
+            {"name": {"$eq": "b"}},
+            cast(_TestDocument, {"content": "apple pie"}),
+        )
+
+        assert result.matched_count == 2
+        assert embedder.embedded_texts[3:] == ["apple pie", "apple pie"]
+
+        await collection.update_many(
+            {"name": {"$eq": "b"}},
+            cast(_TestDocument, {"name": "c"}),
+        )
+
+        assert len(embedder.embedded_texts) == 5
+
+        assert (await collection.delete_many({"id": {"$in": ["1", "3"]}})).deleted_count == 2
+
+    async with create_database(container, home_dir) as db:
+        collection = await db.get_collection(
+            "test_collection",
+            _TestDocument,
+            embedder_type=_KeywordEmbedder,
+            document_loader=_identity_loader,
+        )
+
+        result = await collection.find_similar_documents({}, "apple", k=3)
+
+        assert [(r.document["id"], r.document["content"]) for r in result] == [("2", "apple pie")]
+
+
+async def test_that_a_crash_while_compacting_on_load_keeps_documents_and_vectors_consistent(
+    container: Container,
+    home_dir: Path,
+    embedder: _KeywordEmbedder,
+) -> None:
+    async with create_database(container, home_dir) as db:
+        collection = await db.get_or_create_collection(
+            "test_collection",
+            _TestDocument,
+            embedder_type=_KeywordEmbedder,
+            document_loader=_identity_loader,
+        )
+
+        await collection.insert_many(
+            [
+                _make_document("1", "apple"),
+                _make_document("2", "banana"),
+                _make_document("3", "cherry"),
+            ]
+        )
+        await collection.delete_one({"id": {"$eq": "1"}})
+
+    # Loading compacts the rows, but here the process dies before the new snapshot is written
+    with patch.object(MatrixVectorCollection, "_write_snapshot", side_effect=RuntimeError("crash")):
+        with raises(RuntimeError):
+            async with create_database(container, home_dir) as db:
+                await db.get_collection(
+                    "test_collection",
+                    _TestDocument,
+                    embedder_type=_KeywordEmbedder,
+                    document_loader=_identity_loader,
+                )
+
+    async with create_database(container, home_dir) as db:
+        collection = await db.get_collection(
+            "test_collection",
+            _TestDocument,
+            embedder_type=_KeywordEmbedder,
+            document_loader=_identity_loader,
+        )
+
+        for content, id in [("banana", "2"), ("cherry", "3")]:
+            result = await collection.find_similar_documents({}, content, k=1)
+            assert [r.document["id"] for r in result] == [id]
+
+    assert len(list((home_dir / "test_collection").glob("vectors*.npy"))) == 1
+    assert embedder.embedded_texts.count("banana") == 2
+
+
+async def test_that_writes_are_logged_instead_of_rewriting_the_documents_snapshot(
+    container: Container,
+    home_dir: Path,
+    embedder: _KeywordEmbedder,
+) -> None:
+    async with create_database(container, home_dir) as db:
+        collection = await db.get_or_create_collection(
+            "test_collection",
+            _TestDocument,
+            embedder_type=_KeywordEmbedder,
+            document_loader=_identity_loader,
+        )
+
+        snapshot_path = home_dir / "test_collection" / "documents.json"
+        snapshot = snapshot_path.read_text()
+
+        await collection.insert_many([_make_document("1", "apple"), _make_document("2", "banana")])
+        await collection.update_one({"id": {"$eq": "2"}}, cast(_TestDocument, {"name": "b"}))
+        await collection.delete_one({"id": {"$eq": "1"}})
+        await collection.insert_one(_make_document("3", "cherry"))
+
+        assert snapshot_path.read_text() == snapshot
+
+    async with create_database(container, home_dir) as db:
+        collection = await db.get_collection(
+            "test_collection",
+            _TestDocument,
+            embedder_type=_KeywordEmbedder,
+            document_loader=_identity_loader,
+        )
+
+        assert [(d["id"], d["name"]) for d in await collection.find({})] == [
+            ("2", "b"),
+            ("3", "cherry"),
+        ]
+
+        result = await collection.find_similar_documents({}, "cherry", k=1)
+
+        assert [r.document["id"] for r in result] == ["3"]
+
+
+async def test_that_knowledge_base_searches_are_served_by_the_approximate_search_index(
+    container: Container,
+    home_dir: Path,
+    embedder: _KeywordEmbedder,
+) -> None:
+    async with MatrixVectorDatabase(
+        logger=container[Logger],
+        dir_path=home_dir,
+        embedder_factory=EmbedderFactory(container),
+        ann=IVFParameters(n_lists=2, n_probe=1, min_size=3),
+    ) as db:
+        async with KnowledgeBase(
+            vector_db=db,
+            document_db=TransientDocumentDatabase(),
+            embedder_type=_KeywordEmbedder,
+            embedder_factory=EmbedderFactory(container),
+            logger=container[Logger],
+        ) as knowledge_base:
+            for content, tags in [
+                ("apple", ["a"]),
+                ("apple pie", ["a", "b"]),
+                ("banana", ["b"]),
+                ("cherry", ["a", "b"]),
+            ]:
+                await knowledge_base.create_item(
+                    title=content,
+                    content=content,
+                    type=KnowledgeItemType.TEXT,
+                    source=KnowledgeItemSource.USER,
+                    tags=tags,
+                )
+
+            assert (home_dir / "knowledge_items" / "ivf.npz").exists()
+
+            results = await knowledge_base.search_items("apple", k=1)
+            assert [item.title for item, _ in results] == ["apple"]
+
+            results = await knowledge_base.search_items("apple", k=1, tags=["b"])
+            assert [item.title for item, _ in results] == ["apple pie"]
+
+            assert await knowledge_base.search_items("apple", tags=["c"]) == []
+
+            items = await knowledge_base.list_items(tags=["a", "b"])
+            assert [item.title for item in items] == ["apple pie", "cherry"]
@@ -0,0 +1,340 @@
+# Copyright 2025 Emcie Co Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+import sqlite3
+from typing import AsyncIterator, Optional, Sequence, cast
+import tempfile
+from lagom import Container
+from pytest import fixture, raises
+from typing_extensions import Self
+
+from Daneel.adapters.db.sqlite import SQLiteDocumentDatabase, translate_where
+from Daneel.core.agents import AgentDocumentStore, AgentId, AgentStore
+from Daneel.core.common import Version
+from Daneel.core.customers import CustomerId
+from Daneel.core.guidelines import GuidelineDocumentStore
+from Daneel.core.loggers import Logger
+from Daneel.core.persistence.common import ObjectId, Where
+from Daneel.core.persistence.document_database import (
+    BaseDocument,
+    DocumentCollection,
+    identity_loader,
+)
+from Daneel.core.persistence.document_database_helper import DocumentStoreMigrationHelper
+from Daneel.core.sessions import EventKind, EventSource, SessionDocumentStore
+
+from tests.test_utilities import SyncAwaiter
+
+
+@fixture
+def agent_id(
+    container: Container,
+    sync_await: SyncAwaiter,
+) -> AgentId:
+    store = container[AgentStore]
+    agent = sync_await(store.create_agent(name="test-agent", max_engine_iterations=2))
+    return agent.id
+
+
+@dataclass
+class _TestContext:
+    container: Container
+    agent_id: AgentId
+    sync_await: SyncAwaiter
+
+
+@fixture
+def context(
+    container: Container,
+    agent_id: AgentId,
+    sync_await: SyncAwaiter,
+) -> _TestContext:
+    return _TestContext(container, agent_id, sync_await)
+
+
+@fixture
+async def new_file() -> AsyncIterator[Path]:
+    with tempfile.TemporaryDirectory() as directory:
+        yield Path(directory) / "test.sqlite"
+
+
+class DummyStore:
+    VERSION = Version.from_string("2.0.0")
+
+    class DummyDocumentV1(BaseDocument):
+        name: str
+
+    class DummyDocumentV2(BaseDocument):
+        name: str
+        additional_field: str
+
+    def __init__(self, database: SQLiteDocumentDatabase, allow_migration: bool = True):
+        self._database = database
+        self._collection: DocumentCollection[DummyStore.DummyDocumentV2]
+        self.allow_migration = allow_migration
+
+    async def _document_loader(self, doc: BaseDocument) -> Optional[DummyDocumentV2]:
+        if doc["version"] == "1.0.0":
+            doc = cast(DummyStore.DummyDocumentV1, doc)
+            return self.DummyDocumentV2(
+                id=doc["id"],
+                version=Version.String("2.0.0"),
+                name=doc["name"],
+                additional_field="default_value",
+            )
+        elif doc["version"] == "2.0.0":
+            return cast(DummyStore.DummyDocumentV2, doc)
+        return None
+
+    async def __aenter__(self) -> Self:
+        async with DocumentStoreMigrationHelper(
+            store=self,
+            database=self._database,
+            allow_migration=self.allow_migration,
+        ):
+            self._collection = await self._database.get_or_create_collection(
+                name="dummy_collection",
+                schema=DummyStore.DummyDocumentV2,
+                document_loader=self._document_loader,
+            )
+
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: Optional[type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[object],
+    ) -> None:
+        pass
+
+    async def list_dummy(self) -> Sequence[DummyDocumentV2]:
+        return await self._collection.find({})
+
+
+async def test_agent_creation_and_loading_data_from_file(
+    context: _TestContext,
+    new_file: Path,
+) -> None:
+    async with SQLiteDocumentDatabase(context.container[Logger], new_file) as agent_db:
+        async with AgentDocumentStore(agent_db) as agent_store:
+            agent = await agent_store.create_agent(name="Test Agent")
+
+    async with SQLiteDocumentDatabase(context.container[Logger], new_file) as agent_db:
+        async with AgentDocumentStore(agent_db) as agent_store:
+            agents = list(await agent_store.list_agents())
+
+            assert agents == [agent]
+
+
+async def test_event_creation_and_listing(
+    context: _TestContext,
+    new_file: Path,
+) -> None:
+    async with SQLiteDocumentDatabase(context.container[Logger], new_file) as session_db:
+        async with SessionDocumentStore(session_db) as session_store:
+            session = await session_store.create_session(
+                creation_utc=datetime.now(timezone.utc),
+                customer_id=CustomerId("test_customer"),
+                agent_id=context.agent_id,
+            )
+
+            message_event = await session_store.create_event(
+                session_id=session.id,
+                source=EventSource.CUSTOMER,
+                kind=EventKind.MESSAGE,
+                correlation_id="test_correlation_id",
+                data={"message": "Hello, world!"},
+            )
+
+            await session_store.create_event(
+                session_id=session.id,
+                source=EventSource.AI_AGENT,
+                kind=EventKind.STATUS,
+                correlation_id="test_correlation_id",
+                data={"status": "ready"},
+            )
+
+            await session_store.delete_event(message_event.id)
+
+            assert len(await session_store.list_events(session.id, exclude_deleted=False)) == 2
+            assert len(await session_store.list_events(session.id)) == 1
+            assert len(await session_store.list_events(session.id, kinds=[EventKind.MESSAGE])) == 0
+
+
+async def test_guideline_update_and_deletion(
+    context: _TestContext,
+    new_file: Path,
+) -> None:
+    async with SQLiteDocumentDatabase(context.container[Logger], new_file) as guideline_db:
+        async with GuidelineDocumentStore(guideline_db) as guideline_store:
+            first = await guideline_store.create_guideline(
+                condition="the customer greets you",
+                action="greet them back",
+            )
+            second = await guideline_store.create_guideline(
+                condition="the customer says goodbye",
+                action="say goodbye",
+            )
+
+            await guideline_store.update_guideline(first.id, {"action": "greet them warmly"})
+            await guideline_store.delete_guideline(second.id)
+
+            guidelines = list(await guideline_store.list_guidelines())
+
+            assert len(guidelines) == 1
+            assert guidelines[0].id == first.id
+            assert guidelines[0].content.action == "greet them warmly"
+
+
+async def test_that_filters_are_served_from_expression_indexes(
+    context: _TestContext,
+    new_file: Path,
+) -> None:
+    async with SQLiteDocumentDatabase(context.container[Logger], new_file) as db:
+        await db.get_or_create_collection("events", BaseDocument, identity_loader)
+
+        condition, params = translate_where({"session_id": {"$eq": "s1"}})
+
+        plan = await db.execute(
+            lambda connection: connection.execute(
+                f'EXPLAIN QUERY PLAN SELECT data FROM "events" WHERE {condition}',
+                params,
+            ).fetchall()
+        )
+
+        assert "USING INDEX events__session_id" in str(plan)
+
+
+async def test_that_logical_and_inclusion_operators_are_translated(
+    context: _TestContext,
+    new_file: Path,
+) -> None:
+    async with SQLiteDocumentDatabase(context.container[Logger], new_file) as db:
+        collection = await db.get_or_create_collection("dummy", BaseDocument, identity_loader)
+
+        for i in range(6):
+            await collection.insert_one(
+                cast(
+                    BaseDocument,
+                    {"id": ObjectId(str(i)), "version": Version.String("1.0.0"), "n": i},
+                )
+            )
+
+        filters = cast(
+            Where,
+            {
+                "$or": [
+                    {"n": {"$in": [0, 1]}},
+                    {"$and": [{"n": {"$gt": 3}}, {"n": {"$nin": [5]}}]},
+                ]
+            },
+        )
+
+        assert [d["id"] for d in await collection.find(filters)] == ["0", "1", "4"]
+        assert await collection.find(cast(Where, {"n": {"$in": []}})) == []
+
+
+async def test_failed_migration_collection(
+    container: Container,
+    new_file: Path,
+) -> None:
+    logger = container[Logger]
+
+    async with SQLiteDocumentDatabase(logger, new_file) as db:
+        metadata = await db.get_or_create_collection("metadata", BaseDocument, identity_loader)
+        await metadata.insert_one({"id": ObjectId("meta_id"), "version": Version.String("1.0.0")})
+
+        dummies = await db.get_or_create_collection(
+            "dummy_collection", BaseDocument, identity_loader
+        )
+        await dummies.insert_one(
+            cast(
+                BaseDocument,
+                {
+                    "id": ObjectId("invalid_dummy_id"),
+                    "version": Version.String("3.0"),
+                    "name": "Unmigratable Document",
+                },
+            )
+        )
+
+    async with SQLiteDocumentDatabase(logger, new_file) as db:
+        async with DummyStore(db, allow_migration=True) as store:
+            assert len(await store.list_dummy()) == 0
+
+            failed_migrations_collection = await db.get_collection(
+                "failed_migrations", BaseDocument, identity_loader
+            )
+            failed_docs = await failed_migrations_collection.find({})
+
+            assert len(failed_docs) == 1
+            assert failed_docs[0]["id"] == "invalid_dummy_id"
+
+
+async def test_delete_collection(
+    container: Container,
+    new_file: Path,
+) -> None:
+    async with SQLiteDocumentDatabase(container[Logger], new_file) as db:
+        await db.create_collection("dummy", BaseDocument)
+        await db.delete_collection("dummy")
+
+        with raises(ValueError):
+            await db.get_collection("dummy", BaseDocument, identity_loader)
+
+    with sqlite3.connect(new_file) as connection:
+        assert not connection.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'dummy'"
+        ).fetchone()
+
+
+async def test_that_bulk_operations_apply_to_all_matching_documents(
+    context: _TestContext,
+    new_file: Path,
+) -> None:
+    async with SQLiteDocumentDatabase(context.container[Logger], new_file) as db:
+        collection = await db.get_or_create_collection("dummy", BaseDocument, identity_loader)
+
+        result = await collection.insert_many(
+            [
+                cast(
+                    BaseDocument,
+                    {"id": ObjectId(str(i)), "version": Version.String("1.0.0"), "n": i},
+                )
+                for i in range(6)
+            ]
+        )
+
+        assert result.inserted_count == 6
+
+        update_result = await collection.update_many(
+            cast(Where, {"n": {"$gte": 3}}),
+            {"version": Version.String("2.0.0")},
+        )
+
+        assert update_result.matched_count == 3
+
+        delete_result = await collection.delete_many(cast(Where, {"n": {"$in": [0, 4]}}))
+
+        assert delete_result.deleted_count == 2
+        assert [(d["id"], d["version"]) for d in await collection.find({})] == [
+            ("1", "1.0.0"),
+            ("2", "1.0.0"),
+            ("3", "2.0.0"),
+            ("5", "2.0.0"),
+        ]
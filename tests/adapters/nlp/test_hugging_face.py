@@ -0,0 +1,159 @@
+# Copyright 2025 Emcie Co Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import os
+import threading
+import time
+from typing import Any
+from unittest.mock import MagicMock, patch
+
+from lagom import Container
+import pytest
+from typing_extensions import override
+
+pytest.importorskip("torch")
+
+from Daneel.adapters.nlp.hugging_face import (  # noqa: E402
+    HuggingFaceEmbedder,
+    HuggingFaceEstimatingTokenizer,
+)
+from Daneel.core.loggers import Logger  # noqa: E402
+
+
+class _ThreadRecordingTokenizer:
+    copies: list["_ThreadRecordingTokenizer"] = []
+
+    def __init__(self) -> None:
+        self.threads: set[int] = set()
+
+    def __deepcopy__(self, memo: dict[int, Any]) -> "_ThreadRecordingTokenizer":
+        copy = _ThreadRecordingTokenizer()
+        self.copies.append(copy)
+        return copy
+
+    def tokenize(self, prompt: str) -> list[str]:
+        self.threads.add(threading.get_ident())
+        time.sleep(0.01)
+        return prompt.split()
+
+
+class _LengthEmbedder(HuggingFaceEmbedder):
+    def __init__(self, logger: Logger, max_batch_size: int) -> None:
+        super().__init__(logger, "length", max_batch_size)
+        self.forward_passes: list[tuple[str, list[str]]] = []
+
+    @property
+    @override
+    def dimensions(self) -> int:
+        return 1
+
+    @override
+    def _infer(self, texts: list[str]) -> list[list[float]]:
+        self.forward_passes.append((threading.current_thread().name, texts))
+        time.sleep(0.05)
+        return [[float(len(t))] for t in texts]
+
+
+async def test_that_each_thread_tokenizes_with_its_own_tokenizer() -> None:
+    tokenizer = _ThreadRecordingTokenizer()
+
+    with (
+        patch.dict(os.environ, {"Daneel_HF_INFERENCE_THREADS": "1"}),
+        patch(
+            "Daneel.adapters.nlp.hugging_face._create_tokenizer",
+            return_value=tokenizer,
+        ),
+    ):
+        estimating_tokenizer = HuggingFaceEstimatingTokenizer("thread-recording-tokenizer")
+
+        counts = await asyncio.gather(
+            *[estimating_tokenizer.estimate_token_count("one two three") for _ in range(20)]
+        )
+
+    assert counts == [3] * 20
+
+    # The loaded tokenizer itself is only ever copied, never used
+    assert tokenizer.threads == set()
+    assert tokenizer.copies
+
+    used_threads = [c.threads for c in tokenizer.copies]
+
+    assert all(len(threads) == 1 for threads in used_threads)
+    assert len(set().union(*used_threads)) == len(used_threads)
+
+
+async def test_that_queued_embedding_requests_are_batched_on_the_inference_thread(
+    container: Container,
+) -> None:
+    with (
+        patch.dict(os.environ, {"Daneel_HF_INFERENCE_THREADS": "1"}),
+        patch("Daneel.adapters.nlp.hugging_face._create_auto_model"),
+        patch("Daneel.adapters.nlp.hugging_face._create_tokenizer", return_value=MagicMock()),
+    ):
+        embedder = _LengthEmbedder(container[Logger], max_batch_size=4)
+
+        results = await asyncio.gather(
+            embedder.embed(["a"]),
+            embedder.embed(["bb", "ccc"]),
+            embedder.embed(["dddd"]),
+            embedder.embed(["e"] * 6),
+        )
+
+    assert all(thread.startswith("hf-inference") for thread, _ in embedder.forward_passes)
+
+    # Requests that queued up behind the first forward pass are embedded together,
+    # while the request that exceeds the batch size is split
+    assert [texts for _, texts in embedder.forward_passes] == [
+        ["a"],
+        ["bb", "ccc", "dddd"],
+        ["e"] * 4,
+        ["e"] * 2,
+    ]
+
+    assert [list(r.vectors) for r in results] == [
+        [[1.0]],
+        [[2.0], [3.0]],
+        [[4.0]],
+        [[1.0]] * 6,
+    ]
+
+    assert embedder.stats.batches == 4
+    assert embedder.stats.texts == 10
+
+
+async def test_that_embedding_requests_are_settled_when_their_batch_is_cancelled(
+    container: Container,
+) -> None:
+    async def never_finishing_inference(*args: Any) -> Any:
+        await asyncio.Event().wait()
+
+    with (
+        patch.dict(os.environ, {"Daneel_HF_INFERENCE_THREADS": "1"}),
+        patch("Daneel.adapters.nlp.hugging_face._create_auto_model"),
+        patch("Daneel.adapters.nlp.hugging_face._create_tokenizer", return_value=MagicMock()),
+        patch("Daneel.adapters.nlp.hugging_face._run_off_loop", never_finishing_inference),
+    ):
+        embedder = _LengthEmbedder(container[Logger], max_batch_size=4)
+
+        embed_task = asyncio.create_task(embedder.embed(["a"]))
+        await asyncio.sleep(0.01)
+
+        (batch_task,) = [t for t in asyncio.all_tasks() if "_process_batch" in repr(t.get_coro())]
+        batch_task.cancel()
+
+        with pytest.raises(asyncio.CancelledError):
+            await asyncio.wait_for(embed_task, timeout=1)
+
+    assert embedder.inference_stats.batches == 0
@@ -13,6 +13,7 @@
 # limitations under the License.
 
 import asyncio
+import json
 import os
 import time
 from typing import Any, cast
@@ -20,9 +21,10 @@ import dateutil
 from fastapi import status
 import httpx
 from lagom import Container
-from pytest import fixture, mark
+from pytest import MonkeyPatch, fixture, mark
 from datetime import datetime, timezone
 
+from Daneel.api import sessions as sessions_api
 from Daneel.core.engines.alpha.message_generator import MessageSchema
 from Daneel.core.utterances import UtteranceStore
 from Daneel.core.nlp.service import NLPService
@@ -31,6 +33,7 @@ from Daneel.core.tools import ToolResult
 from Daneel.core.agents import AgentId, AgentStore, AgentUpdateParams, CompositionMode
 from Daneel.core.async_utils import Timeout
 from Daneel.core.customers import CustomerId
+from Daneel.core.emissions import EventEmitterFactory
 from Daneel.core.sessions import (
     EventKind,
     EventSource,
@@ -794,6 +797,124 @@ async def test_that_deleted_events_no_longer_show_up_in_the_listing(
     assert all(e["offset"] > event_to_delete["offset"] for e in remaining_events) is False
 
 
+def parse_event_stream(body: str) -> list[dict[str, Any]]:
+    return [
+        dict(line.split(": ", 1) for line in message.splitlines())
+        for message in body.split("\n\n")
+        if message and not message.startswith(":")
+    ]
+
+
+async def test_that_events_are_streamed_as_they_are_created(
+    async_client: httpx.AsyncClient,
+    container: Container,
+    session_id: SessionId,
+    monkeypatch: MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(sessions_api, "EVENT_STREAM_KEEP_ALIVE_INTERVAL", 0.1)
+
+    await populate_session_id(
+        container,
+        session_id,
+        [make_event_params(EventSource.CUSTOMER), make_event_params(EventSource.AI_AGENT)],
+    )
+
+    stream_task = asyncio.create_task(async_client.get(f"/sessions/{session_id}/events/stream"))
+
+    await asyncio.sleep(0.2)
+    await populate_session_id(
+        container,
+        session_id,
+        [make_event_params(EventSource.AI_AGENT, kind=EventKind.STATUS)],
+    )
+    await asyncio.sleep(1)
+
+    # Deleting the session ends the stream
+    await container[SessionStore].delete_session(session_id)
+
+    response = (await stream_task).raise_for_status()
+    messages = parse_event_stream(response.text)
+
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert [m["id"] for m in messages] == ["0", "1", "2"]
+    assert [m["event"] for m in messages] == ["custom", "custom", "status"]
+    assert json.loads(messages[2]["data"])["source"] == "ai_agent"
+
+
+async def test_that_an_event_stream_can_be_resumed_and_filtered(
+    async_client: httpx.AsyncClient,
+    container: Container,
+    session_id: SessionId,
+    monkeypatch: MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(sessions_api, "EVENT_STREAM_KEEP_ALIVE_INTERVAL", 0.1)
+
+    await populate_session_id(
+        container,
+        session_id,
+        [
+            make_event_params(EventSource.CUSTOMER),
+            make_event_params(EventSource.AI_AGENT),
+            make_event_params(EventSource.CUSTOMER),
+            make_event_params(EventSource.AI_AGENT),
+            make_event_params(EventSource.CUSTOMER),
+        ],
+    )
+
+    stream_task = asyncio.create_task(
+        async_client.get(
+            f"/sessions/{session_id}/events/stream",
+            params={"source": "customer"},
+            headers={"Last-Event-ID": "1"},
+        )
+    )
+
+    await asyncio.sleep(1)
+
+    # Deleting the session ends the stream
+    await container[SessionStore].delete_session(session_id)
+
+    messages = parse_event_stream((await stream_task).raise_for_status().text)
+
+    assert [m["id"] for m in messages] == ["2", "4"]
+
+
+async def test_that_message_drafts_are_streamed_without_being_stored(
+    async_client: httpx.AsyncClient,
+    container: Container,
+    agent_id: AgentId,
+    session_id: SessionId,
+    monkeypatch: MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(sessions_api, "EVENT_STREAM_KEEP_ALIVE_INTERVAL", 0.1)
+
+    event_emitter = await container[EventEmitterFactory].create_event_emitter(
+        emitting_agent_id=agent_id,
+        session_id=session_id,
+    )
+
+    stream_task = asyncio.create_task(async_client.get(f"/sessions/{session_id}/drafts/stream"))
+
+    await asyncio.sleep(0.2)
+    await event_emitter.emit_message_draft("corr_1", "Hello, how", restart=True)
+    await event_emitter.emit_message_draft("corr_1", " can I help?")
+    await asyncio.sleep(0.5)
+
+    assert await container[SessionStore].list_events(session_id) == []
+
+    # Deleting the session ends the stream
+    await container[SessionStore].delete_session(session_id)
+
+    response = (await stream_task).raise_for_status()
+    messages = parse_event_stream(response.text)
+
+    assert [m["event"] for m in messages] == ["draft", "draft"]
+    assert [json.loads(m["data"]) for m in messages] == [
+        {"correlation_id": "corr_1", "delta": "Hello, how", "restart": True},
+        {"correlation_id": "corr_1", "delta": " can I help?", "restart": False},
+    ]
+
+
 async def test_that_a_message_can_be_inspected(
     async_client: httpx.AsyncClient,
     container: Container,
@@ -29,6 +29,7 @@ from Daneel.api.app import create_api_app, ASGIApplication
 from Daneel.core.background_tasks import BackgroundTaskService
 from Daneel.core.contextual_correlator import ContextualCorrelator
 from Daneel.core.context_variables import ContextVariableDocumentStore, ContextVariableStore
+from Daneel.core.emission.draft_channel import MessageDraftChannel
 from Daneel.core.emission.event_publisher import EventPublisherFactory
 from Daneel.core.emissions import EventEmitterFactory
 from Daneel.core.customers import CustomerDocumentStore, CustomerStore
@@ -246,6 +247,7 @@ async def container(
         )
         container[EvaluationListener] = PollingEvaluationListener
         container[BehavioralChangeEvaluator] = BehavioralChangeEvaluator
+        container[MessageDraftChannel] = MessageDraftChannel()
         container[EventEmitterFactory] = Singleton(EventPublisherFactory)
 
         container[ServiceRegistry] = await stack.enter_async_context(
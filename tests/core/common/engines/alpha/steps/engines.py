@@ -150,7 +150,7 @@ def when_messages_are_emitted(
     message_event_composer: MessageEventComposer
 
     match agent.composition_mode:
-        case CompositionMode.FLUID:
+        case CompositionMode.FLUID | CompositionMode.FLUID_STREAMING:
             message_event_composer = context.container[MessageGenerator]
         case (
             CompositionMode.STRICT_UTTERANCE
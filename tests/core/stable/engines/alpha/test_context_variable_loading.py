@@ -12,20 +12,35 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import asyncio
 from datetime import datetime, timedelta, timezone
 from croniter import croniter
 from lagom import Container
 from pytest import mark
 
-from Daneel.core.agents import AgentId
-from Daneel.core.sessions import Session
+from Daneel.core.agents import Agent, AgentId
+from Daneel.core.contextual_correlator import ContextualCorrelator
+from Daneel.core.customers import CustomerStore
+from Daneel.core.emission.event_buffer import EventBuffer
+from Daneel.core.engines.alpha.engine import AlphaEngine, load_fresh_context_variable_value
+from Daneel.core.engines.alpha.guideline_matcher import GuidelineMatcher
+from Daneel.core.engines.alpha.hooks import EngineHooks
+from Daneel.core.engines.alpha.message_generator import MessageGenerator
+from Daneel.core.engines.alpha.relational_guideline_resolver import RelationalGuidelineResolver
+from Daneel.core.engines.alpha.tool_event_generator import ToolEventGenerator
+from Daneel.core.engines.alpha.utterance_selector import UtteranceSelector
+from Daneel.core.engines.types import Context
+from Daneel.core.loggers import Logger
+from Daneel.core.services.tools.plugins import tool
+from Daneel.core.services.tools.service_registry import ServiceRegistry
+from Daneel.core.sessions import Session, SessionStore
 from Daneel.core.context_variables import ContextVariableStore
-from Daneel.core.engines.alpha.engine import load_fresh_context_variable_value
-from Daneel.core.tags import Tag
-from Daneel.core.tools import LocalToolService, ToolId
+from Daneel.core.tags import Tag, TagId
+from Daneel.core.tools import LocalToolService, ToolContext, ToolId, ToolResult
 from Daneel.core.entity_cq import EntityQueries, EntityCommands
 
 from tests.core.common.utils import ContextOfTest
+from tests.test_utilities import run_service_server
 
 
 async def create_fetch_account_balance_tool(container: Container) -> None:
@@ -224,3 +239,158 @@ async def test_that_value_is_created_when_need_to_be_freshed(
         key=test_key,
     )
     assert stored_value == created_value
+
+
+async def test_that_values_of_many_variables_and_keys_are_read_at_once(
+    context: ContextOfTest,
+) -> None:
+    context_variable_store = context.container[ContextVariableStore]
+
+    first_variable = await context_variable_store.create_variable(
+        name="first",
+        description="",
+    )
+    second_variable = await context_variable_store.create_variable(
+        name="second",
+        description="",
+    )
+
+    await context_variable_store.update_value(first_variable.id, "customer", {"value": 1})
+    await context_variable_store.update_value(first_variable.id, "other", {"value": 2})
+    await context_variable_store.update_value(
+        second_variable.id, ContextVariableStore.GLOBAL_KEY, {"value": 3}
+    )
+
+    values = await context_variable_store.read_values(
+        variable_ids=[first_variable.id, second_variable.id],
+        keys=["customer", ContextVariableStore.GLOBAL_KEY],
+    )
+
+    assert {k: v.data for k, v in values.items()} == {
+        (first_variable.id, "customer"): {"value": 1},
+        (second_variable.id, ContextVariableStore.GLOBAL_KEY): {"value": 3},
+    }
+
+
+async def test_that_the_engine_loads_context_variables_by_key_precedence_and_bounds_tool_refreshes(
+    container: Container,
+    agent: Agent,
+) -> None:
+    context_variable_store = container[ContextVariableStore]
+    service_registry = container[ServiceRegistry]
+
+    customer = await container[CustomerStore].create_customer(
+        name="Tagged Customer",
+        tags=[TagId("vip")],
+    )
+    session = await container[SessionStore].create_session(
+        customer_id=customer.id,
+        agent_id=agent.id,
+    )
+
+    shared_tool_calls = 0
+    running_calls = 0
+    max_running_calls = 0
+
+    async def track_call() -> None:
+        nonlocal running_calls, max_running_calls
+        running_calls += 1
+        max_running_calls = max(max_running_calls, running_calls)
+        await asyncio.sleep(0.1)
+        running_calls -= 1
+
+    @tool
+    async def shared_tool(context: ToolContext) -> ToolResult:
+        nonlocal shared_tool_calls
+        shared_tool_calls += 1
+        await track_call()
+        return ToolResult({"value": "shared"})
+
+    @tool
+    async def other_tool(context: ToolContext) -> ToolResult:
+        await track_call()
+        return ToolResult({"value": "other"})
+
+    @tool
+    async def another_tool(context: ToolContext) -> ToolResult:
+        await track_call()
+        return ToolResult({"value": "another"})
+
+    async def create_variable(name: str, tool_name: str | None = None) -> str:
+        variable = await context_variable_store.create_variable(
+            name=name,
+            description="",
+            tool_id=ToolId(service_name="my_sdk_service", tool_name=tool_name)
+            if tool_name
+            else None,
+        )
+        await context_variable_store.add_variable_tag(variable.id, Tag.for_agent_id(agent.id))
+        return variable.id
+
+    # Stored values are taken from the most important key that has one
+    customer_variable = await create_variable("customer_variable")
+    tag_variable = await create_variable("tag_variable")
+    global_variable = await create_variable("global_variable")
+
+    for variable_id, keys in [
+        (customer_variable, [customer.id, "tag:vip", ContextVariableStore.GLOBAL_KEY]),
+        (tag_variable, ["tag:vip", ContextVariableStore.GLOBAL_KEY]),
+        (global_variable, [ContextVariableStore.GLOBAL_KEY]),
+    ]:
+        for key in keys:
+            await context_variable_store.update_value(variable_id, key, {"value": key})
+
+    tool_variables = {
+        await create_variable("shared_1", "shared_tool"): {"value": "shared"},
+        await create_variable("shared_2", "shared_tool"): {"value": "shared"},
+        await create_variable("other", "other_tool"): {"value": "other"},
+        await create_variable("another", "another_tool"): {"value": "another"},
+    }
+
+    engine = AlphaEngine(
+        logger=container[Logger],
+        correlator=container[ContextualCorrelator],
+        entity_queries=container[EntityQueries],
+        entity_commands=container[EntityCommands],
+        guideline_matcher=container[GuidelineMatcher],
+        relational_guideline_resolver=container[RelationalGuidelineResolver],
+        tool_event_generator=container[ToolEventGenerator],
+        fluid_message_generator=container[MessageGenerator],
+        utterance_selector=container[UtteranceSelector],
+        hooks=container[EngineHooks],
+        max_concurrent_context_variable_refreshes=2,
+    )
+
+    async with run_service_server([shared_tool, other_tool, another_tool]) as server:
+        await service_registry.update_tool_service(
+            name="my_sdk_service",
+            kind="sdk",
+            url=server.url,
+        )
+
+        loaded_context = await engine._load_context(
+            Context(session_id=session.id, agent_id=agent.id),
+            EventBuffer(emitting_agent=agent),
+            load_interaction=False,
+        )
+
+        values = {
+            variable.id: value.data
+            for variable, value in await engine._load_context_variables(loaded_context)
+        }
+
+    assert values == {
+        customer_variable: {"value": customer.id},
+        tag_variable: {"value": "tag:vip"},
+        global_variable: {"value": ContextVariableStore.GLOBAL_KEY},
+        **tool_variables,
+    }
+
+    assert shared_tool_calls == 1
+    assert max_running_calls == 2
+
+    # Refreshed values are stored under the customer's key
+    for variable_id, data in tool_variables.items():
+        value = await context_variable_store.read_value(variable_id, customer.id)
+        assert value
+        assert value.data == data
@@ -12,16 +12,18 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from dataclasses import dataclass
+import asyncio
+from dataclasses import dataclass, replace
 from datetime import datetime, timezone
 from itertools import chain
-from typing import Sequence, cast
+from typing import Any, Mapping, Sequence, cast
 from typing_extensions import override
 
 from lagom import Container
 from more_itertools import unique
 from pytest import fixture
 
+from Daneel.adapters.vector_db.transient import TransientVectorDatabase
 from Daneel.core.agents import Agent, AgentId
 from Daneel.core.common import generate_id, JSONSerializable
 from Daneel.core.context_variables import (
@@ -33,7 +35,9 @@ from Daneel.core.context_variables import (
 from Daneel.core.customers import Customer
 from Daneel.core.emissions import EmittedEvent
 from Daneel.core.glossary import Term
-from Daneel.core.nlp.generation import SchematicGenerator
+from Daneel.core.nlp.embedding import Embedder, EmbedderFactory, EmbeddingResult
+from Daneel.core.nlp.generation import SchematicGenerationResult, SchematicGenerator
+from Daneel.core.nlp.tokenization import EstimatingTokenizer, ZeroEstimatingTokenizer
 from Daneel.core.engines.alpha.guideline_matcher import (
     DefaultGuidelineMatchingStrategyResolver,
     GuidelineMatcher,
@@ -43,14 +47,17 @@ from Daneel.core.engines.alpha.guideline_matcher import (
     GuidelineMatchingStrategy,
     GuidelineMatchingContext,
     GuidelineMatchingStrategyResolver,
+    TokenBudgetGuidelineMatching,
 )
+from Daneel.core.engines.alpha.guideline_retriever import GuidelineRetriever
+from Daneel.core.engines.alpha.prompt_builder import PromptBuilder
 from Daneel.core.engines.alpha.guideline_match import (
     GuidelineMatch,
     PreviouslyAppliedType,
 )
 from Daneel.core.guidelines import Guideline, GuidelineContent, GuidelineId
 from Daneel.core.nlp.generation_info import GenerationInfo, UsageInfo
-from Daneel.core.sessions import EventKind, EventSource
+from Daneel.core.sessions import EventKind, EventSource, GuidelineMatchCacheInspection
 from Daneel.core.loggers import Logger
 from Daneel.core.glossary import TermId
 
@@ -1179,3 +1186,323 @@ def test_that_strategy_for_specific_guideline_can_be_overridden_in_default_strat
     guideline_matches = match_guidelines(context, agent, customer, conversation_context)
 
     assert guideline.id in [match.guideline.id for match in guideline_matches]
+
+
+def test_that_identical_matching_inputs_are_served_from_the_cache(
+    context: ContextOfTest,
+    agent: Agent,
+    customer: Customer,
+) -> None:
+    created_batches: list[GuidelineMatchingBatch] = []
+
+    class CountingGuidelineMatchingStrategy(GuidelineMatchingStrategy):
+        @override
+        async def create_batches(
+            self,
+            guidelines: Sequence[Guideline],
+            context: GuidelineMatchingContext,
+        ) -> Sequence[GuidelineMatchingBatch]:
+            batch = ActivateEveryGuidelineBatch(guidelines=guidelines)
+            created_batches.append(batch)
+            return [batch]
+
+    class CountingGuidelineMatchingStrategyResolver(GuidelineMatchingStrategyResolver):
+        @override
+        async def resolve(self, guideline: Guideline) -> GuidelineMatchingStrategy:
+            return CountingGuidelineMatchingStrategy()
+
+    guideline_matcher = context.container[GuidelineMatcher]
+    guideline_matcher.strategy_resolver = CountingGuidelineMatchingStrategyResolver()
+
+    guideline = create_guideline(context, "the customer asks for a drink", "check stock")
+
+    conversation_context: list[tuple[EventSource, str]] = [
+        (EventSource.CUSTOMER, "Can I get a coke?"),
+    ]
+
+    first_matches = match_guidelines(context, agent, customer, conversation_context)
+    second_matches = match_guidelines(context, agent, customer, conversation_context)
+
+    assert len(created_batches) == 1
+    assert [m.guideline.id for m in first_matches] == [m.guideline.id for m in second_matches]
+    assert [m.guideline.id for m in second_matches] == [guideline.id]
+    assert guideline_matcher.cache.hits == 1
+
+    cached_result = context.sync_await(
+        guideline_matcher.match_guidelines(
+            agent=agent,
+            customer=customer,
+            context_variables=[],
+            interaction_history=[
+                create_event_message(
+                    offset=0,
+                    source=EventSource.CUSTOMER,
+                    message="Can I get a coke?",
+                )
+            ],
+            terms=[],
+            staged_events=[],
+            guidelines=context.guidelines,
+        )
+    )
+
+    assert cached_result.cache == GuidelineMatchCacheInspection(hits=1, misses=0)
+
+    match_guidelines(
+        context,
+        agent,
+        customer,
+        conversation_context + [(EventSource.AI_AGENT, "Sure, let me check")],
+    )
+
+    assert len(created_batches) == 2
+    assert guideline_matcher.cache.misses == 2
+
+
+def test_that_guidelines_are_pre_filtered_by_condition_similarity(
+    context: ContextOfTest,
+    agent: Agent,
+    customer: Customer,
+) -> None:
+    vocabulary = ["drink", "pizza", "refund", "weather", "hello"]
+    embedding_requests: list[list[str]] = []
+
+    class KeywordEmbedder(Embedder):
+        @override
+        async def embed(
+            self,
+            texts: list[str],
+            hints: Mapping[str, Any] = {},
+        ) -> EmbeddingResult:
+            embedding_requests.append(texts)
+            return EmbeddingResult(
+                vectors=[
+                    [float(word in text.lower()) for word in vocabulary] + [0.1] for text in texts
+                ]
+            )
+
+        @property
+        @override
+        def id(self) -> str:
+            return "keyword"
+
+        @property
+        @override
+        def max_tokens(self) -> int:
+            return 8192
+
+        @property
+        @override
+        def tokenizer(self) -> EstimatingTokenizer:
+            return ZeroEstimatingTokenizer()
+
+        @property
+        @override
+        def dimensions(self) -> int:
+            return len(vocabulary) + 1
+
+    class ActivateEveryGuidelineStrategy(GuidelineMatchingStrategy):
+        @override
+        async def create_batches(
+            self,
+            guidelines: Sequence[Guideline],
+            context: GuidelineMatchingContext,
+        ) -> Sequence[GuidelineMatchingBatch]:
+            return [ActivateEveryGuidelineBatch(guidelines=guidelines)]
+
+    class ActivateEveryGuidelineStrategyResolver(GuidelineMatchingStrategyResolver):
+        @override
+        async def resolve(self, guideline: Guideline) -> GuidelineMatchingStrategy:
+            return ActivateEveryGuidelineStrategy()
+
+    context.container[KeywordEmbedder] = KeywordEmbedder()
+
+    retriever = context.sync_await(
+        GuidelineRetriever(
+            logger=context.logger,
+            vector_db=TransientVectorDatabase(context.logger, EmbedderFactory(context.container)),
+            embedder_type=KeywordEmbedder,
+            top_k=1,
+            recall_sample_rate=1.0,
+        ).__aenter__()
+    )
+
+    guideline_matcher = context.container[GuidelineMatcher]
+    guideline_matcher.strategy_resolver = ActivateEveryGuidelineStrategyResolver()
+    guideline_matcher.retriever = retriever
+
+    drink_guideline = create_guideline(context, "the customer asks for a drink", "check stock")
+    refund_guideline = create_guideline(
+        context, "the customer asks for a refund", "ask for the order number"
+    )
+    weather_guideline = create_guideline(context, "the customer mentions the weather", "agree")
+
+    retriever.always_on_guideline_ids.add(weather_guideline.id)
+
+    matches = match_guidelines(
+        context, agent, customer, [(EventSource.CUSTOMER, "Can I get a drink?")]
+    )
+
+    assert {m.guideline.id for m in matches} == {drink_guideline.id, weather_guideline.id}
+    assert retriever.stats.retrievals == 1
+    assert retriever.stats.candidates == 3
+    assert retriever.stats.selected == 2
+    assert retriever.stats.average_recall == 2 / 3
+
+    # All conditions are embedded together, in a single request
+    assert [r for r in embedding_requests if r[0].startswith("the customer")] == [
+        [g.content.condition for g in context.guidelines]
+    ]
+
+    context.guidelines[context.guidelines.index(refund_guideline)] = replace(
+        refund_guideline,
+        content=GuidelineContent(
+            condition="the customer wants a refund for a pizza",
+            action=refund_guideline.content.action,
+        ),
+    )
+
+    matches = match_guidelines(
+        context, agent, customer, [(EventSource.CUSTOMER, "I'd like a refund")]
+    )
+
+    assert refund_guideline.id in {m.guideline.id for m in matches}
+
+    # Unchanged conditions are not embedded again
+    assert [r for r in embedding_requests if r[0].startswith("the customer")][1:] == [
+        ["the customer wants a refund for a pizza"]
+    ]
+
+
+class WordCountingTokenizer(EstimatingTokenizer):
+    @override
+    async def estimate_token_count(self, prompt: str) -> int:
+        return len(prompt.split())
+
+
+class TokenCountingSchematicGenerator(SchematicGenerator[GenericGuidelineMatchesSchema]):
+    @override
+    async def generate(
+        self,
+        prompt: str | PromptBuilder,
+        hints: Mapping[str, Any] = {},
+    ) -> SchematicGenerationResult[GenericGuidelineMatchesSchema]:
+        raise NotImplementedError()
+
+    @property
+    @override
+    def id(self) -> str:
+        return "token-counting"
+
+    @property
+    @override
+    def max_tokens(self) -> int:
+        return 1_000_000
+
+    @property
+    @override
+    def tokenizer(self) -> EstimatingTokenizer:
+        return WordCountingTokenizer()
+
+
+def test_that_token_budget_batching_packs_guidelines_up_to_the_budget(
+    context: ContextOfTest,
+    agent: Agent,
+    customer: Customer,
+) -> None:
+    strategy = TokenBudgetGuidelineMatching(
+        logger=context.logger,
+        schematic_generator=TokenCountingSchematicGenerator(),
+    )
+
+    guidelines = [
+        create_guideline(context, "the customer asks for a drink", "check stock") for _ in range(6)
+    ]
+
+    matching_context = GuidelineMatchingContext(agent, customer, [], [], [], [])
+
+    assert len(context.sync_await(strategy.create_batches(guidelines, matching_context))) == 1
+
+    shared_prompt_tokens = context.sync_await(
+        strategy._estimate_shared_prompt_tokens(matching_context)
+    )
+    guideline_tokens = context.sync_await(strategy._estimate_guideline_tokens(guidelines[0]))
+
+    strategy.max_batch_tokens = shared_prompt_tokens + 2 * guideline_tokens
+
+    assert len(context.sync_await(strategy.create_batches(guidelines, matching_context))) == 3
+
+
+def test_that_token_budget_batching_respects_the_latency_target(
+    context: ContextOfTest,
+    agent: Agent,
+    customer: Customer,
+) -> None:
+    strategy = TokenBudgetGuidelineMatching(
+        logger=context.logger,
+        schematic_generator=TokenCountingSchematicGenerator(),
+        max_batch_latency=3.0,
+    )
+
+    guidelines = [
+        create_guideline(context, "the customer asks for a drink", "check stock") for _ in range(6)
+    ]
+
+    strategy._record_batch_latency(
+        2,
+        GenerationInfo(
+            schema_name="",
+            model="",
+            duration=2.0,
+            usage=UsageInfo(input_tokens=0, output_tokens=0, extra={}),
+        ),
+    )
+
+    matching_context = GuidelineMatchingContext(agent, customer, [], [], [], [])
+
+    assert len(context.sync_await(strategy.create_batches(guidelines, matching_context))) == 2
+
+
+def test_that_concurrent_batch_processing_can_be_capped(
+    context: ContextOfTest,
+    agent: Agent,
+    customer: Customer,
+) -> None:
+    concurrency = {"current": 0, "max": 0}
+
+    class ConcurrencyTrackingBatch(ActivateEveryGuidelineBatch):
+        @override
+        async def process(self) -> GuidelineMatchingBatchResult:
+            concurrency["current"] += 1
+            concurrency["max"] = max(concurrency["max"], concurrency["current"])
+            await asyncio.sleep(0.01)
+            concurrency["current"] -= 1
+            return await super().process()
+
+    class OneBatchPerGuidelineStrategy(GuidelineMatchingStrategy):
+        @override
+        async def create_batches(
+            self,
+            guidelines: Sequence[Guideline],
+            context: GuidelineMatchingContext,
+        ) -> Sequence[GuidelineMatchingBatch]:
+            return [ConcurrencyTrackingBatch(guidelines=[g]) for g in guidelines]
+
+    class OneBatchPerGuidelineStrategyResolver(GuidelineMatchingStrategyResolver):
+        @override
+        async def resolve(self, guideline: Guideline) -> GuidelineMatchingStrategy:
+            return OneBatchPerGuidelineStrategy()
+
+    context.container[GuidelineMatcher] = GuidelineMatcher(
+        logger=context.logger,
+        strategy_resolver=OneBatchPerGuidelineStrategyResolver(),
+        max_concurrent_batches=2,
+    )
+
+    for _ in range(5):
+        create_guideline(context, "the customer asks for a drink", "check stock")
+
+    matches = match_guidelines(context, agent, customer, [(EventSource.CUSTOMER, "A coke please")])
+
+    assert len(matches) == 5
+    assert concurrency["max"] == 2
@@ -0,0 +1,182 @@
+# Copyright 2025 Emcie Co Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from typing import Any, Mapping, Sequence
+from lagom import Container
+from typing_extensions import override
+
+from Daneel.adapters.db.transient import TransientDocumentDatabase
+from Daneel.core.agents import AgentId
+from Daneel.core.customers import CustomerId
+from Daneel.core.engines.alpha.interaction_summarizer import (
+    HistoryPolicy,
+    InteractionSummarizer,
+    InteractionSummarySchema,
+)
+from Daneel.core.engines.alpha.prompt_builder import PromptBuilder
+from Daneel.core.loggers import Logger
+from Daneel.core.nlp.generation import SchematicGenerationResult, SchematicGenerator
+from Daneel.core.nlp.generation_info import GenerationInfo, UsageInfo
+from Daneel.core.nlp.tokenization import EstimatingTokenizer
+from Daneel.core.sessions import (
+    Event,
+    EventKind,
+    EventSource,
+    SessionDocumentStore,
+    SessionId,
+    SessionStore,
+)
+
+
+class _CharacterCountingTokenizer(EstimatingTokenizer):
+    @override
+    async def estimate_token_count(self, prompt: str) -> int:
+        return len(prompt)
+
+
+class _RecordingSummaryGenerator(SchematicGenerator[InteractionSummarySchema]):
+    def __init__(self) -> None:
+        self.prompts: list[str] = []
+
+    @override
+    async def generate(
+        self,
+        prompt: str | PromptBuilder,
+        hints: Mapping[str, Any] = {},
+    ) -> SchematicGenerationResult[InteractionSummarySchema]:
+        self.prompts.append(prompt.build() if isinstance(prompt, PromptBuilder) else prompt)
+
+        return SchematicGenerationResult(
+            content=InteractionSummarySchema(summary=f"summary #{len(self.prompts)}"),
+            info=GenerationInfo(
+                schema_name="InteractionSummarySchema",
+                model="recording",
+                duration=0,
+                usage=UsageInfo(input_tokens=0, output_tokens=0),
+            ),
+        )
+
+    @property
+    @override
+    def id(self) -> str:
+        return "recording"
+
+    @property
+    @override
+    def max_tokens(self) -> int:
+        return 1000
+
+    @property
+    @override
+    def tokenizer(self) -> EstimatingTokenizer:
+        return _CharacterCountingTokenizer()
+
+
+async def _add_turns(session_store: SessionStore, session_id: SessionId, count: int) -> None:
+    for _ in range(count):
+        for source in [EventSource.CUSTOMER, EventSource.AI_AGENT]:
+            await session_store.create_event(
+                session_id=session_id,
+                source=source,
+                kind=EventKind.MESSAGE,
+                correlation_id="<main>",
+                data={"participant": {"display_name": source.value}, "message": "x" * 50},
+            )
+
+        await session_store.create_event(
+            session_id=session_id,
+            source=EventSource.AI_AGENT,
+            kind=EventKind.STATUS,
+            correlation_id="<main>",
+            data={"status": "ready", "data": {}},
+        )
+
+
+def _message_offsets(events: Sequence[Event]) -> list[int]:
+    return [e.offset for e in events if e.kind == EventKind.MESSAGE]
+
+
+async def test_that_history_within_the_budget_is_returned_as_is(container: Container) -> None:
+    async with SessionDocumentStore(TransientDocumentDatabase()) as session_store:
+        session = await session_store.create_session(CustomerId("c"), AgentId("a"))
+        await _add_turns(session_store, session.id, 3)
+
+        generator = _RecordingSummaryGenerator()
+        summarizer = InteractionSummarizer(
+            logger=container[Logger],
+            session_store=session_store,
+            schematic_generator=generator,
+            policy=HistoryPolicy(max_tokens=100_000),
+        )
+
+        history = await session_store.list_events(session.id)
+
+        assert await summarizer.window(session.id, history) == history
+        assert generator.prompts == []
+
+
+async def test_that_older_turns_are_folded_into_an_incrementally_updated_summary(
+    container: Container,
+) -> None:
+    async with SessionDocumentStore(TransientDocumentDatabase()) as session_store:
+        session = await session_store.create_session(CustomerId("c"), AgentId("a"))
+        await _add_turns(session_store, session.id, 5)
+
+        generator = _RecordingSummaryGenerator()
+        summarizer = InteractionSummarizer(
+            logger=container[Logger],
+            session_store=session_store,
+            schematic_generator=generator,
+            policy=HistoryPolicy(max_tokens=1_000, verbatim_turns=2),
+        )
+
+        window = await summarizer.window(session.id, await session_store.list_events(session.id))
+
+        assert window[0].kind == EventKind.CUSTOM
+        assert window[0].data == {"summary_of_earlier_events": "summary #1"}
+        assert _message_offsets(window) == [9, 10, 12, 13]
+
+        # Asking again reuses the stored summary
+        await summarizer.window(session.id, await session_store.list_events(session.id))
+        assert len(generator.prompts) == 1
+
+        await _add_turns(session_store, session.id, 1)
+
+        window = await summarizer.window(session.id, await session_store.list_events(session.id))
+
+        assert window[0].data == {"summary_of_earlier_events": "summary #2"}
+        assert _message_offsets(window) == [12, 13, 15, 16]
+
+        # Only the turn that just fell out of the window is summarized
+        assert "summary #1" in generator.prompts[1]
+        assert generator.prompts[1].count('"message": "xxx') == 2
+
+
+async def test_that_the_latest_turns_are_dropped_from_the_window_to_fit_the_budget(
+    container: Container,
+) -> None:
+    async with SessionDocumentStore(TransientDocumentDatabase()) as session_store:
+        session = await session_store.create_session(CustomerId("c"), AgentId("a"))
+        await _add_turns(session_store, session.id, 5)
+
+        summarizer = InteractionSummarizer(
+            logger=container[Logger],
+            session_store=session_store,
+            schematic_generator=_RecordingSummaryGenerator(),
+            policy=HistoryPolicy(max_tokens=300, verbatim_turns=3),
+        )
+
+        window = await summarizer.window(session.id, await session_store.list_events(session.id))
+
+        assert _message_offsets(window) == [12, 13]
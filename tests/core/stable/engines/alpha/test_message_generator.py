@@ -0,0 +1,121 @@
+# Copyright 2025 Emcie Co Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from typing import Any, Awaitable, Callable, Mapping
+from lagom import Container
+from typing_extensions import override
+
+from Daneel.core.contextual_correlator import ContextualCorrelator
+from Daneel.core.engines.alpha.message_generator import MessageGenerator, MessageSchema, Revision
+from Daneel.core.engines.alpha.prompt_builder import PromptBuilder
+from Daneel.core.loggers import Logger
+from Daneel.core.nlp.generation import (
+    CompletionDelta,
+    SchematicGenerationResult,
+    SchematicGenerator,
+)
+from Daneel.core.nlp.generation_info import GenerationInfo, UsageInfo
+from Daneel.core.nlp.tokenization import EstimatingTokenizer, ZeroEstimatingTokenizer
+
+
+class _StreamingMessageSchematicGenerator(SchematicGenerator[MessageSchema]):
+    def __init__(self, chunks: list[str], result: MessageSchema) -> None:
+        self._chunks = chunks
+        self._result = result
+
+    @override
+    async def generate(
+        self,
+        prompt: str | PromptBuilder,
+        hints: Mapping[str, Any] = {},
+    ) -> SchematicGenerationResult[MessageSchema]:
+        return SchematicGenerationResult(
+            content=self._result,
+            info=GenerationInfo(
+                schema_name="MessageSchema",
+                model="not-real-model",
+                duration=1,
+                usage=UsageInfo(input_tokens=1, output_tokens=1),
+            ),
+        )
+
+    @override
+    async def generate_streaming(
+        self,
+        prompt: str | PromptBuilder,
+        on_progress: Callable[[CompletionDelta], Awaitable[None]],
+        hints: Mapping[str, Any] = {},
+    ) -> SchematicGenerationResult[MessageSchema]:
+        for i, chunk in enumerate(self._chunks):
+            await on_progress(CompletionDelta(text=chunk, restart=i == 0))
+
+        return await self.generate(prompt, hints)
+
+    @property
+    @override
+    def id(self) -> str:
+        return "streaming"
+
+    @property
+    @override
+    def max_tokens(self) -> int:
+        return 8192
+
+    @property
+    @override
+    def tokenizer(self) -> EstimatingTokenizer:
+        return ZeroEstimatingTokenizer()
+
+
+async def test_that_draft_text_held_back_by_throttling_is_flushed_when_generation_completes(
+    container: Container,
+) -> None:
+    message_generator = MessageGenerator(
+        logger=container[Logger],
+        correlator=container[ContextualCorrelator],
+        schematic_generator=_StreamingMessageSchematicGenerator(
+            chunks=[
+                '{"produced_reply": true, "revisions": [{"revision_number": 1, "content": "Hello',
+                " there,",
+                ' friend"',
+                ', "followed_all_instructions": true}]}',
+            ],
+            result=MessageSchema(
+                produced_reply=True,
+                revisions=[
+                    Revision(
+                        revision_number=1,
+                        content="Hello there, friend",
+                        followed_all_instructions=True,
+                    )
+                ],
+            ),
+        ),
+    )
+    message_generator.draft_update_interval = 60
+
+    drafts: list[tuple[str, bool]] = []
+
+    async def on_draft(delta: str, restart: bool) -> None:
+        drafts.append((delta, restart))
+
+    _, message = await message_generator._generate_response_message(
+        PromptBuilder(),
+        temperature=0.1,
+        final_attempt=True,
+        on_draft=on_draft,
+    )
+
+    assert message == "Hello there, friend"
+    assert drafts == [("Hello", True), (" there, friend", False)]
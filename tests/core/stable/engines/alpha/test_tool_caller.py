@@ -12,27 +12,38 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import asyncio
 from datetime import datetime, timezone
 import enum
 from itertools import chain
-from typing import Annotated, Any, Optional
+from typing import Annotated, Any, Mapping, Optional, cast
 from lagom import Container
 from pytest import fixture
+from typing_extensions import override
 
 from Daneel.core.agents import Agent
 from Daneel.core.common import generate_id
+from Daneel.core.contextual_correlator import ContextualCorrelator
 from Daneel.core.customers import Customer, CustomerStore, CustomerId
+from Daneel.core.emission.event_buffer import EventBuffer
 from Daneel.core.engines.alpha.guideline_match import GuidelineMatch
+from Daneel.core.engines.alpha.prompt_builder import PromptBuilder
 from Daneel.core.engines.alpha.tool_caller import (
+    ToolCall,
+    ToolCallEvaluation,
+    ToolCallId,
     ToolCallInferenceSchema,
     ToolCaller,
 )
+from Daneel.core.engines.alpha.tool_event_generator import ToolEventGenerator
 from Daneel.core.guidelines import Guideline, GuidelineId, GuidelineContent
 from Daneel.core.loggers import Logger
-from Daneel.core.nlp.generation import SchematicGenerator
+from Daneel.core.nlp.generation import SchematicGenerationResult, SchematicGenerator
+from Daneel.core.nlp.generation_info import GenerationInfo, UsageInfo
+from Daneel.core.nlp.tokenization import EstimatingTokenizer, ZeroEstimatingTokenizer
 from Daneel.core.services.tools.plugins import tool
 from Daneel.core.services.tools.service_registry import ServiceRegistry
-from Daneel.core.sessions import Event, EventSource
+from Daneel.core.sessions import Event, EventSource, SessionId
 from Daneel.core.tags import TagId, Tag
 from Daneel.core.tools import (
     LocalToolService,
@@ -569,3 +580,252 @@ async def test_that_a_tool_from_a_plugin_with_missing_parameters_returns_the_mis
         map(lambda x: x.parameter, inference_tool_calls_result.insights.missing_data)
     )
     assert missing_parameters == {"full_name", "city", "street", "house_number"}
+
+
+async def test_that_repeated_calls_of_a_session_cached_tool_are_served_from_the_result_cache(
+    container: Container,
+    tool_caller: ToolCaller,
+    agent: Agent,
+) -> None:
+    service_registry = container[ServiceRegistry]
+    executions = 0
+
+    @tool(cache_scope="session", cache_ttl=60)
+    def get_exchange_rate(context: ToolContext, currency: str) -> ToolResult:
+        nonlocal executions
+        executions += 1
+        return ToolResult({"currency": currency, "rate": 1.1})
+
+    async with run_service_server([get_exchange_rate]) as server:
+        await service_registry.update_tool_service(
+            name="my_sdk_service",
+            kind="sdk",
+            url=server.url,
+        )
+
+        tool_id = ToolId(service_name="my_sdk_service", tool_name="get_exchange_rate")
+        service = await service_registry.read_tool_service(tool_id.service_name)
+        tool_descriptor = await service.read_tool(tool_id.tool_name)
+        cache_hits = []
+
+        for session_id in ["session_1", "session_1", "session_2"]:
+            results = await tool_caller.execute_tool_calls(
+                ToolContext(agent_id=agent.id, session_id=session_id, customer_id="customer"),
+                [
+                    ToolCall(
+                        id=ToolCallId(generate_id()),
+                        tool_id=tool_id,
+                        arguments={"currency": "EUR"},
+                        tool=tool_descriptor,
+                    )
+                ],
+            )
+
+            assert results[0].result["data"] == {"currency": "EUR", "rate": 1.1}
+            cache_hits.append(results[0].cache_hit)
+
+            # Modifying a result must not affect the cached one
+            cast(dict[str, Any], results[0].result["data"])["rate"] = 0
+
+    assert executions == 2
+    assert cache_hits == [False, True, False]
+    assert tool_caller.result_cache.stats.hits == 1
+    assert tool_caller.result_cache.stats.misses == 2
+
+
+async def test_that_concurrent_calls_to_a_tool_service_are_bounded(
+    container: Container,
+    agent: Agent,
+) -> None:
+    service_registry = container[ServiceRegistry]
+    running_calls = 0
+    max_running_calls = 0
+
+    @tool
+    async def send_notification(context: ToolContext, recipient: str) -> ToolResult:
+        nonlocal running_calls, max_running_calls
+        running_calls += 1
+        max_running_calls = max(max_running_calls, running_calls)
+        await asyncio.sleep(0.1)
+        running_calls -= 1
+        return ToolResult({"recipient": recipient})
+
+    tool_caller = ToolCaller(
+        container[Logger],
+        service_registry,
+        container[SchematicGenerator[ToolCallInferenceSchema]],
+        max_concurrent_calls_per_service=2,
+    )
+
+    async with run_service_server([send_notification]) as server:
+        await service_registry.update_tool_service(
+            name="my_sdk_service",
+            kind="sdk",
+            url=server.url,
+        )
+
+        results = await tool_caller.execute_tool_calls(
+            ToolContext(agent_id=agent.id, session_id="session", customer_id="customer"),
+            [
+                ToolCall(
+                    id=ToolCallId(generate_id()),
+                    tool_id=ToolId(service_name="my_sdk_service", tool_name="send_notification"),
+                    arguments={"recipient": recipient},
+                )
+                for recipient in ["a", "b", "c", "d", "e"]
+            ],
+        )
+
+    assert [r.result["data"] for r in results] == [{"recipient": r} for r in "abcde"]
+    assert max_running_calls == 2
+
+
+class _ToolCallingSchematicGenerator(SchematicGenerator[ToolCallInferenceSchema]):
+    """Decides to run every candidate tool, holding back the inference of slow_tool
+    until fast_tool has been called."""
+
+    def __init__(self, fast_tool_called: asyncio.Event) -> None:
+        self._fast_tool_called = fast_tool_called
+
+    @override
+    async def generate(
+        self,
+        prompt: str | PromptBuilder,
+        hints: Mapping[str, Any] = {},
+    ) -> SchematicGenerationResult[ToolCallInferenceSchema]:
+        assert isinstance(prompt, PromptBuilder)
+        candidate_tool = prompt.build().split("Candidate tool: ###")[1]
+
+        if "slow_tool" in candidate_tool:
+            await asyncio.wait_for(self._fast_tool_called.wait(), timeout=10)
+
+        return SchematicGenerationResult(
+            content=ToolCallInferenceSchema(
+                name="slow_tool" if "slow_tool" in candidate_tool else "fast_tool",
+                subtleties_to_be_aware_of="",
+                tool_calls_for_candidate_tool=[
+                    ToolCallEvaluation(
+                        applicability_rationale="",
+                        applicability_score=9,
+                        same_call_is_already_staged=False,
+                        comparison_with_rejected_tools_including_references_to_subtleties="",
+                        relevant_subtleties="",
+                        a_rejected_tool_would_have_been_a_better_fit_if_it_werent_already_rejected=False,
+                        are_optional_arguments_missing=False,
+                        are_non_optional_arguments_missing=False,
+                        allowed_to_run_without_optional_arguments_even_if_they_are_missing=True,
+                        should_run=True,
+                    )
+                ],
+            ),
+            info=GenerationInfo(
+                schema_name="ToolCallInferenceSchema",
+                model="not-real-model",
+                duration=1,
+                usage=UsageInfo(input_tokens=1, output_tokens=1),
+            ),
+        )
+
+    @property
+    @override
+    def id(self) -> str:
+        return "tool-calling"
+
+    @property
+    @override
+    def max_tokens(self) -> int:
+        return 8192
+
+    @property
+    @override
+    def tokenizer(self) -> EstimatingTokenizer:
+        return ZeroEstimatingTokenizer()
+
+
+async def test_that_pipelined_tool_calls_run_as_soon_as_they_are_inferred_and_keep_call_order(
+    container: Container,
+    agent: Agent,
+    customer: Customer,
+) -> None:
+    service_registry = container[ServiceRegistry]
+    fast_tool_called = asyncio.Event()
+
+    @tool
+    def slow_tool(context: ToolContext) -> ToolResult:
+        return ToolResult("slow")
+
+    @tool
+    def fast_tool(context: ToolContext) -> ToolResult:
+        fast_tool_called.set()
+        return ToolResult("fast")
+
+    tool_event_generator = ToolEventGenerator(
+        container[Logger],
+        container[ContextualCorrelator],
+        service_registry,
+        _ToolCallingSchematicGenerator(fast_tool_called),
+        pipelined=True,
+    )
+
+    async with run_service_server([slow_tool, fast_tool]) as server:
+        await service_registry.update_tool_service(
+            name="my_sdk_service",
+            kind="sdk",
+            url=server.url,
+        )
+
+        tool_enabled_guideline_matches = {
+            create_guideline_match(
+                condition=f"the customer needs {name}",
+                action=f"call {name}",
+                score=9,
+                rationale="",
+                tags=[Tag.for_agent_id(agent.id)],
+            ): [ToolId(service_name="my_sdk_service", tool_name=name)]
+            for name in ["slow_tool", "fast_tool"]
+        }
+
+        event_emitter = EventBuffer(emitting_agent=agent)
+        interaction_history = create_interaction_history(
+            [(EventSource.CUSTOMER, "Please run both tools")]
+        )
+
+        preexecution_state = await tool_event_generator.create_preexecution_state(
+            event_emitter,
+            SessionId("session"),
+            agent,
+            customer,
+            [],
+            interaction_history,
+            [],
+            [],
+            tool_enabled_guideline_matches,
+            [],
+        )
+
+        result = await tool_event_generator.generate_events(
+            preexecution_state,
+            event_emitter,
+            SessionId("session"),
+            agent,
+            customer,
+            context_variables=[],
+            interaction_history=interaction_history,
+            terms=[],
+            ordinary_guideline_matches=[],
+            tool_enabled_guideline_matches=tool_enabled_guideline_matches,
+            staged_events=[],
+        )
+
+    # slow_tool's inference only finished after fast_tool was called,
+    # yet its call still comes first, following the order of the calls
+    assert len(result.events) == 1
+    event = result.events[0]
+    assert event
+    assert [
+        (tool_call["tool_id"], tool_call["result"]["data"])
+        for tool_call in cast(Mapping[str, Any], event.data)["tool_calls"]
+    ] == [
+        ("my_sdk_service:slow_tool", "slow"),
+        ("my_sdk_service:fast_tool", "fast"),
+    ]
@@ -0,0 +1,191 @@
+# Copyright 2025 Emcie Co Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+from pathlib import Path
+from typing import Any, Mapping, Sequence
+from typing_extensions import override
+
+from Daneel.adapters.db.sqlite import SQLiteEmbeddingStore
+from Daneel.core.nlp.embedding import (
+    BatchingEmbedder,
+    CachedEmbedder,
+    Embedder,
+    EmbeddingCache,
+    EmbeddingResult,
+)
+from Daneel.core.nlp.tokenization import EstimatingTokenizer, ZeroEstimatingTokenizer
+
+
+class CountingEmbedder(Embedder):
+    def __init__(self) -> None:
+        self.embedded_texts: list[str] = []
+        self.calls = 0
+
+    @override
+    async def embed(
+        self,
+        texts: list[str],
+        hints: Mapping[str, Any] = {},
+    ) -> EmbeddingResult:
+        self.calls += 1
+        self.embedded_texts.extend(texts)
+        return EmbeddingResult(vectors=[[float(len(t)), 1.0] for t in texts])
+
+    @property
+    @override
+    def id(self) -> str:
+        return "counting"
+
+    @property
+    @override
+    def max_tokens(self) -> int:
+        return 8192
+
+    @property
+    @override
+    def tokenizer(self) -> EstimatingTokenizer:
+        return ZeroEstimatingTokenizer()
+
+    @property
+    @override
+    def dimensions(self) -> int:
+        return 2
+
+
+async def test_that_cached_embeddings_skip_the_underlying_embedder() -> None:
+    embedder = CountingEmbedder()
+    cached_embedder = CachedEmbedder(embedder, EmbeddingCache())
+
+    first_result = await cached_embedder.embed(["hello", "world", "hello"])
+    second_result = await cached_embedder.embed(["world", "hi"])
+
+    assert embedder.embedded_texts == ["hello", "world", "hi"]
+    assert list(first_result.vectors) == [[5.0, 1.0], [5.0, 1.0], [5.0, 1.0]]
+    assert list(second_result.vectors) == [[5.0, 1.0], [2.0, 1.0]]
+
+
+async def test_that_embeddings_are_persisted_across_cache_instances(tmp_path: Path) -> None:
+    embedder = CountingEmbedder()
+
+    async with SQLiteEmbeddingStore(tmp_path / "embeddings.sqlite") as store:
+        await CachedEmbedder(embedder, EmbeddingCache(store)).embed(["hello"])
+
+    async with SQLiteEmbeddingStore(tmp_path / "embeddings.sqlite") as store:
+        cache = EmbeddingCache(store)
+        result = await CachedEmbedder(embedder, cache).embed(["hello"])
+
+        assert cache.hits == 1
+
+    assert embedder.embedded_texts == ["hello"]
+    assert list(result.vectors) == [[5.0, 1.0]]
+
+
+async def test_that_cached_embeddings_are_read_and_written_in_bulk(tmp_path: Path) -> None:
+    embedder = CountingEmbedder()
+    store_calls: list[str] = []
+
+    class CountingEmbeddingStore(SQLiteEmbeddingStore):
+        @override
+        async def get_many(self, keys: Sequence[str]) -> Mapping[str, Sequence[float]]:
+            store_calls.append("get_many")
+            return await super().get_many(keys)
+
+        @override
+        async def set_many(self, vectors: Mapping[str, Sequence[float]]) -> None:
+            store_calls.append("set_many")
+            await super().set_many(vectors)
+
+    async with SQLiteEmbeddingStore(tmp_path / "embeddings.sqlite") as store:
+        await CachedEmbedder(embedder, EmbeddingCache(store)).embed(["a", "bb"])
+
+    async with CountingEmbeddingStore(tmp_path / "embeddings.sqlite") as store:
+        result = await CachedEmbedder(embedder, EmbeddingCache(store)).embed(
+            ["a", "bb", "ccc", "dddd", "ccc"]
+        )
+
+        assert len(await store.get_many([EmbeddingCache.key("counting", "dddd")])) == 1
+
+    assert store_calls == ["get_many", "set_many", "get_many"]
+    assert embedder.embedded_texts == ["a", "bb", "ccc", "dddd"]
+    assert list(result.vectors) == [[1.0, 1.0], [2.0, 1.0], [3.0, 1.0], [4.0, 1.0], [3.0, 1.0]]
+
+
+async def test_that_the_embedding_store_evicts_least_recently_used_embeddings(
+    tmp_path: Path,
+) -> None:
+    async with SQLiteEmbeddingStore(tmp_path / "embeddings.sqlite", max_entries=2) as store:
+        await store.set_many({"a": [1.0, 0.5]})
+        await store.set_many({"b": [2.0, 0.5]})
+        await store.get_many(["a"])
+        await store.set_many({"c": [3.0, 0.5]})
+
+        assert await store.get_many(["a", "b", "c"]) == {"a": [1.0, 0.5], "c": [3.0, 0.5]}
+
+    async with SQLiteEmbeddingStore(tmp_path / "embeddings.sqlite", max_entries=2) as store:
+        await store.get_many(["c"])
+        await store.set_many({"d": [4.0, 0.5]})
+
+        assert set(await store.get_many(["a", "b", "c", "d"])) == {"c", "d"}
+
+
+async def test_that_embeddings_with_different_hints_are_cached_separately() -> None:
+    embedder = CountingEmbedder()
+    cached_embedder = CachedEmbedder(embedder, EmbeddingCache())
+
+    await cached_embedder.embed(["hello"])
+    await cached_embedder.embed(["hello"], hints={"task_type": "query"})
+    await cached_embedder.embed(["hello"], hints={"task_type": "query"})
+
+    assert embedder.embedded_texts == ["hello", "hello"]
+
+
+async def test_that_the_in_memory_cache_evicts_least_recently_used_embeddings() -> None:
+    embedder = CountingEmbedder()
+    cached_embedder = CachedEmbedder(embedder, EmbeddingCache(max_size=2))
+
+    await cached_embedder.embed(["a"])
+    await cached_embedder.embed(["bb"])
+    await cached_embedder.embed(["a"])
+    await cached_embedder.embed(["ccc"])
+    await cached_embedder.embed(["a", "bb"])
+
+    assert embedder.embedded_texts == ["a", "bb", "ccc", "bb"]
+
+
+async def test_that_concurrent_embedding_requests_are_merged_into_batches() -> None:
+    embedder = CountingEmbedder()
+    batching_embedder = BatchingEmbedder(embedder, max_batch_size=3)
+
+    results = await asyncio.gather(
+        *[batching_embedder.embed([text]) for text in ["a", "bb", "ccc", "dddd"]]
+    )
+
+    assert embedder.calls == 2
+    assert [list(r.vectors) for r in results] == [
+        [[1.0, 1.0]],
+        [[2.0, 1.0]],
+        [[3.0, 1.0]],
+        [[4.0, 1.0]],
+    ]
+
+
+async def test_that_bulk_embedding_requests_are_split_into_batches() -> None:
+    embedder = CountingEmbedder()
+    batching_embedder = BatchingEmbedder(embedder, max_batch_size=2)
+
+    result = await batching_embedder.embed(["a", "bb", "ccc", "dddd", "eeeee"])
+
+    assert embedder.calls == 3
+    assert [v[0] for v in result.vectors] == [1.0, 2.0, 3.0, 4.0, 5.0]
@@ -12,7 +12,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from typing import Any, Mapping, cast
+import asyncio
+from typing import Any, Awaitable, Callable, Mapping, cast
 from typing_extensions import override
 from lagom import Container
 from unittest.mock import AsyncMock
@@ -20,6 +21,7 @@ from unittest.mock import AsyncMock
 from pytest import raises
 
 from Daneel.core.common import DefaultBaseModel
+from Daneel.core.contextual_correlator import ContextualCorrelator
 from Daneel.core.engines.alpha.prompt_builder import (
     BuiltInSection,
     PromptBuilder,
@@ -29,12 +31,18 @@ from Daneel.core.engines.alpha.prompt_builder import (
 from Daneel.core.loggers import Logger
 from Daneel.core.nlp.embedding import EmbeddingResult
 from Daneel.core.nlp.generation import (
+    CompletionDelta,
     FallbackSchematicGenerator,
     SchematicGenerationResult,
     SchematicGenerator,
 )
 from Daneel.core.nlp.generation_info import GenerationInfo, UsageInfo
 from Daneel.core.nlp.policies import policy, retry
+from Daneel.core.nlp.rate_limiting import (
+    ModelRateLimiter,
+    RateLimitedSchematicGenerator,
+    RateLimits,
+)
 from Daneel.core.nlp.tokenization import EstimatingTokenizer, ZeroEstimatingTokenizer
 
 
@@ -353,3 +361,173 @@ async def test_that_prompt_builder_edits_are_reflected_in_generation() -> None:
 
     result = await mock_service.generate(builder.build())
     assert result.content.result == "You are Bob"
+
+
+class SlowGenerator(SchematicGenerator[DummySchema]):
+    def __init__(self) -> None:
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.prompts: list[str] = []
+
+    @override
+    @property
+    def id(self) -> str:
+        return "slow"
+
+    @override
+    @property
+    def max_tokens(self) -> int:
+        return 1000
+
+    @override
+    @property
+    def tokenizer(self) -> EstimatingTokenizer:
+        return ZeroEstimatingTokenizer()
+
+    @override
+    async def generate(
+        self,
+        prompt: str | PromptBuilder,
+        hints: Mapping[str, Any] = {},
+    ) -> SchematicGenerationResult[DummySchema]:
+        self.prompts.append(str(prompt))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+        await asyncio.sleep(0.01)
+
+        self.in_flight -= 1
+
+        return SchematicGenerationResult(
+            content=DummySchema(result="Success"),
+            info=GenerationInfo(
+                schema_name="DummySchema",
+                model="slow",
+                duration=0.01,
+                usage=UsageInfo(input_tokens=1, output_tokens=1),
+            ),
+        )
+
+
+async def test_that_rate_limited_generation_caps_concurrent_requests(
+    container: Container,
+) -> None:
+    generator = SlowGenerator()
+
+    rate_limited_generator = RateLimitedSchematicGenerator[DummySchema](
+        generator=generator,
+        limiter=ModelRateLimiter(RateLimits(max_concurrent_requests=2)),
+        correlator=container[ContextualCorrelator],
+        logger=container[Logger],
+    )
+
+    results = await asyncio.gather(
+        *[rate_limited_generator.generate(prompt=f"prompt {i}") for i in range(6)]
+    )
+
+    assert all(r.content.result == "Success" for r in results)
+    assert generator.max_in_flight == 2
+
+
+async def test_that_rate_limited_generation_admits_requests_fairly_across_correlations(
+    container: Container,
+) -> None:
+    generator = SlowGenerator()
+    correlator = container[ContextualCorrelator]
+    limiter = ModelRateLimiter(RateLimits(max_concurrent_requests=1))
+
+    rate_limited_generator = RateLimitedSchematicGenerator[DummySchema](
+        generator=generator,
+        limiter=limiter,
+        correlator=correlator,
+        logger=container[Logger],
+    )
+
+    async def generate_in_scope(scope_id: str, prompt: str) -> None:
+        with correlator.correlation_scope(scope_id):
+            await rate_limited_generator.generate(prompt=prompt)
+
+    tasks = [asyncio.create_task(generate_in_scope("busy", f"busy {i}")) for i in range(4)] + [
+        asyncio.create_task(generate_in_scope("quiet", "quiet 0"))
+    ]
+
+    await asyncio.sleep(0)
+
+    assert limiter.metrics.queue_depth == 4
+    assert limiter.metrics.waiting_correlations == 2
+
+    await asyncio.gather(*tasks)
+
+    # The quiet correlation is served before the rest of the busy one's backlog
+    assert generator.prompts == ["busy 0", "busy 1", "quiet 0", "busy 2", "busy 3"]
+    assert limiter.metrics.total_requests == 5
+
+
+class StreamingGenerator(SlowGenerator):
+    @override
+    async def generate_streaming(
+        self,
+        prompt: str | PromptBuilder,
+        on_progress: Callable[[CompletionDelta], Awaitable[None]],
+        hints: Mapping[str, Any] = {},
+    ) -> SchematicGenerationResult[DummySchema]:
+        await on_progress(CompletionDelta('{"result": "Su', restart=True))
+        await on_progress(CompletionDelta('ccess"}'))
+
+        return await self.generate(prompt, hints)
+
+
+async def test_that_rate_limited_generation_passes_streamed_progress_through(
+    container: Container,
+) -> None:
+    rate_limited_generator = RateLimitedSchematicGenerator[DummySchema](
+        generator=StreamingGenerator(),
+        limiter=ModelRateLimiter(RateLimits(max_concurrent_requests=1)),
+        correlator=container[ContextualCorrelator],
+        logger=container[Logger],
+    )
+
+    progress: list[CompletionDelta] = []
+
+    async def on_progress(delta: CompletionDelta) -> None:
+        progress.append(delta)
+
+    result = await rate_limited_generator.generate_streaming(
+        prompt="prompt",
+        on_progress=on_progress,
+    )
+
+    assert result.content.result == "Success"
+    assert progress == [
+        CompletionDelta('{"result": "Su', restart=True),
+        CompletionDelta('ccess"}'),
+    ]
+
+
+async def test_that_rate_limited_generation_builds_the_prompt_once(
+    container: Container,
+) -> None:
+    generator = SlowGenerator()
+    built_prompts: list[str] = []
+
+    rate_limited_generator = RateLimitedSchematicGenerator[DummySchema](
+        generator=generator,
+        limiter=ModelRateLimiter(RateLimits(tokens_per_minute=1000)),
+        correlator=container[ContextualCorrelator],
+        logger=container[Logger],
+    )
+
+    class CountingPromptBuilder(PromptBuilder):
+        @override
+        def build(self) -> str:
+            prompt = super().build()
+            built_prompts.append(prompt)
+            return prompt
+
+    builder = CountingPromptBuilder()
+    builder.add_section("greeting", "Hello, {name}", props={"name": "Bob"})
+
+    await rate_limited_generator.generate(prompt=builder)
+
+    assert built_prompts == ["Hello, Bob"]
+    assert generator.prompts == ["Hello, Bob"]
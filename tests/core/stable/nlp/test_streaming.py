@@ -0,0 +1,74 @@
+# Copyright 2025 Emcie Co Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+
+from Daneel.core.nlp.streaming import JSONPath, JSONStreamScanner, StringValueFragment
+
+
+def _scan_in_chunks(document: str, chunk_size: int) -> list[StringValueFragment]:
+    scanner = JSONStreamScanner()
+    fragments = []
+
+    for i in range(0, len(document), chunk_size):
+        fragments.extend(scanner.feed(document[i : i + chunk_size]))
+
+    assert scanner.done
+
+    return fragments
+
+
+def _join_by_path(fragments: list[StringValueFragment]) -> dict[JSONPath, str]:
+    values: dict[JSONPath, str] = {}
+
+    for f in fragments:
+        values[f.path] = values.get(f.path, "") + f.text
+
+    return values
+
+
+def test_that_string_values_are_reassembled_with_their_paths_regardless_of_chunking() -> None:
+    document = json.dumps(
+        {
+            "produced_reply": True,
+            "count": -1.5e3,
+            "revisions": [
+                {"revision_number": 1, "content": 'Say "hi" \\ to\nyou 😀', "tags": [None, "x"]},
+                {"revision_number": 2, "content": "Héllo"},
+            ],
+        }
+    )
+
+    expected = {
+        ("revisions", 0, "content"): 'Say "hi" \\ to\nyou 😀',
+        ("revisions", 0, "tags", 1): "x",
+        ("revisions", 1, "content"): "Héllo",
+    }
+
+    for chunk_size in [1, 2, 5, len(document)]:
+        assert _join_by_path(_scan_in_chunks(document, chunk_size)) == expected
+
+
+def test_that_partial_string_values_are_reported_before_they_are_complete() -> None:
+    scanner = JSONStreamScanner()
+
+    assert scanner.feed('```json\n{"revisions": [{"content": "Hel') == [
+        StringValueFragment(("revisions", 0, "content"), "Hel", complete=False)
+    ]
+
+    assert scanner.feed('lo"}]}\n```') == [
+        StringValueFragment(("revisions", 0, "content"), "lo", complete=True)
+    ]
+
+    assert scanner.done
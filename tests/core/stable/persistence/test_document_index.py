@@ -0,0 +1,154 @@
+# Copyright 2025 Emcie Co Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import operator
+import random
+from typing import Any, Callable, Mapping, cast
+
+from Daneel.core.persistence.common import Where, compile_filter
+from Daneel.core.persistence.document_index import IndexedDocuments
+
+
+def _make_documents(count: int) -> list[dict[str, Any]]:
+    rng = random.Random(0)
+
+    return [
+        {
+            "id": str(i),
+            "session_id": f"s{rng.randint(0, 4)}",
+            "kind": rng.choice(["message", "status", "tool"]),
+            "offset": i,
+        }
+        for i in range(count)
+    ]
+
+
+FILTERS: list[Where] = cast(
+    list[Where],
+    [
+        {},
+        {"session_id": {"$eq": "s1"}},
+        {"session_id": {"$eq": "missing"}},
+        {"session_id": {"$in": ["s1", "s3"]}},
+        {"session_id": {"$eq": "s2"}, "kind": {"$in": ["message", "tool"]}},
+        {"session_id": {"$ne": "s2"}},
+        {"offset": {"$gte": 10}},
+        {"$and": [{"session_id": {"$eq": "s0"}}, {"offset": {"$lt": 50}}]},
+        {"$or": [{"session_id": {"$eq": "s0"}}, {"kind": {"$eq": "tool"}}]},
+        {"$or": [{"session_id": {"$eq": "s0"}}, {"offset": {"$gt": 90}}]},
+        {"$or": []},
+        {"$and": [{"$or": [{"id": {"$eq": "3"}}, {"id": {"$eq": "7"}}]}, {"kind": {"$nin": []}}]},
+    ],
+)
+
+
+_REFERENCE_OPERATORS: dict[str, Callable[[Any, Any], bool]] = {
+    "$eq": operator.eq,
+    "$ne": operator.ne,
+    "$gt": operator.gt,
+    "$gte": operator.ge,
+    "$lt": operator.lt,
+    "$lte": operator.le,
+    "$in": lambda value, values: value in values,
+    "$nin": lambda value, values: value not in values,
+}
+
+
+def _reference_matches(where: Mapping[str, Any], candidate: Mapping[str, Any]) -> bool:
+    """A plain, uncompiled evaluation of a filter, to check compiled filters against"""
+
+    result = True
+
+    for key, condition in where.items():
+        if key == "$and":
+            result &= all(_reference_matches(sub_filter, candidate) for sub_filter in condition)
+        elif key == "$or":
+            result &= any(_reference_matches(sub_filter, candidate) for sub_filter in condition)
+        else:
+            result &= all(
+                _REFERENCE_OPERATORS[op](candidate[key], value) for op, value in condition.items()
+            )
+
+    return result
+
+
+def test_that_compiled_filter_agrees_with_a_reference_scan() -> None:
+    documents = _make_documents(100)
+
+    for filters in FILTERS:
+        predicate = compile_filter(filters)
+
+        assert [predicate(d) for d in documents] == [
+            _reference_matches(filters, d) for d in documents
+        ]
+
+
+def test_that_indexed_find_returns_the_same_documents_in_insertion_order_as_a_scan() -> None:
+    documents = _make_documents(100)
+
+    indexed = IndexedDocuments(documents, indexed_fields=["id", "session_id", "kind"])
+    unindexed = IndexedDocuments(documents)
+
+    for filters in FILTERS:
+        assert indexed.find(filters) == unindexed.find(filters)
+
+
+def test_that_indexes_follow_replacements_and_removals() -> None:
+    documents = IndexedDocuments(_make_documents(10), indexed_fields=["session_id"])
+
+    key, document = documents.find(cast(Where, {"id": {"$eq": "4"}}))[0]
+    documents.replace(key, {**document, "session_id": "moved"})
+
+    assert [d["id"] for _, d in documents.find(cast(Where, {"session_id": {"$eq": "moved"}}))] == [
+        "4"
+    ]
+    assert all(
+        d["id"] != "4"
+        for _, d in documents.find(cast(Where, {"session_id": {"$eq": document["session_id"]}}))
+    )
+
+    documents.remove(key)
+
+    assert documents.find(cast(Where, {"session_id": {"$eq": "moved"}})) == []
+    assert len(documents) == 9
+
+
+def test_that_list_fields_are_indexed_by_each_of_their_elements() -> None:
+    documents = IndexedDocuments(
+        [
+            {"id": "1", "tags": ["a"]},
+            {"id": "2", "tags": ["a", "b"]},
+            {"id": "3", "tags": ["b"]},
+            {"id": "4", "tags": []},
+        ],
+        indexed_fields=["tags"],
+    )
+
+    both_tags = cast(Where, {"$and": [{"tags": {"$eq": "a"}}, {"tags": {"$eq": "b"}}]})
+
+    assert documents._plan(both_tags) == {1}
+    assert [d["id"] for _, d in documents.find(both_tags)] == ["2"]
+    assert [d["id"] for _, d in documents.find(cast(Where, {"tags": {"$in": ["b"]}}))] == [
+        "2",
+        "3",
+    ]
+    assert [d["id"] for _, d in documents.find(cast(Where, {"tags": {"$ne": "a"}}))] == [
+        "3",
+        "4",
+    ]
+
+    documents.replace(1, {"id": "2", "tags": ["c"]})
+
+    assert documents.find(both_tags) == []
+    assert documents._plan(cast(Where, {"tags": {"$eq": "c"}})) == {1}
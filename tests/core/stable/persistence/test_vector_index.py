@@ -0,0 +1,121 @@
+# Copyright 2025 Emcie Co Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from pathlib import Path
+import tempfile
+import numpy as np
+from numpy.typing import NDArray
+
+from Daneel.core.persistence.vector_index import IVFIndex, IVFParameters, top_k
+
+
+def _make_vectors(count: int, dimensions: int = 32, clusters: int = 20) -> NDArray[np.float32]:
+    rng = np.random.default_rng(0)
+
+    centers = rng.normal(size=(clusters, dimensions))
+    vectors = centers[rng.integers(0, clusters, count)] + 0.3 * rng.normal(size=(count, dimensions))
+
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+def _recall(
+    index: IVFIndex,
+    vectors: NDArray[np.float32],
+    queries: NDArray[np.float32],
+    k: int,
+    candidates: NDArray[np.bool_],
+) -> float:
+    found = 0
+
+    for query in queries:
+        rows, _ = index.search(vectors, query, k, candidates=candidates)
+
+        allowed = np.flatnonzero(candidates)
+        exact = allowed[top_k(vectors[allowed] @ query, k)]
+
+        found += len(set(rows) & set(exact))
+
+    return found / (k * len(queries))
+
+
+def test_that_probing_more_lists_increases_recall_up_to_exact_search() -> None:
+    vectors = _make_vectors(2000)
+    queries = _make_vectors(20)[:, ::-1].copy()
+    everything = np.ones(len(vectors), dtype=np.bool_)
+
+    index = IVFIndex(IVFParameters(n_lists=40, min_size=0))
+    index.train(vectors, np.arange(len(vectors)))
+
+    low_recall = _recall(index, vectors, queries, 10, everything)
+
+    index = IVFIndex(IVFParameters(n_lists=40, n_probe=40, min_size=0))
+    index.train(vectors, np.arange(len(vectors)))
+
+    assert low_recall <= _recall(index, vectors, queries, 10, everything) == 1.0
+
+
+def test_that_search_returns_only_candidate_rows_with_their_similarities() -> None:
+    vectors = _make_vectors(1000)
+
+    index = IVFIndex(IVFParameters(n_lists=20, n_probe=1, min_size=0))
+    index.train(vectors, np.arange(len(vectors)))
+
+    candidates = np.zeros(len(vectors), dtype=np.bool_)
+    candidates[::97] = True
+
+    rows, similarities = index.search(vectors, vectors[0], 5, candidates=candidates)
+
+    assert len(rows) == 5
+    assert all(candidates[rows])
+    assert np.allclose(similarities, vectors[rows] @ vectors[0])
+    assert list(similarities) == sorted(similarities, reverse=True)
+
+
+def test_that_rows_can_be_added_and_removed_incrementally() -> None:
+    vectors = _make_vectors(1100)
+
+    index = IVFIndex(IVFParameters(n_lists=20, n_probe=20, min_size=0))
+    index.train(vectors, np.arange(1000))
+
+    index.add(vectors, np.arange(1000, 1100))
+    index.remove(np.array([1050]))
+
+    rows, _ = index.search(vectors, vectors[1020], 1)
+    assert list(rows) == [1020]
+
+    rows, _ = index.search(vectors, vectors[1050], 1100)
+    assert 1050 not in rows
+    assert len(rows) == 1099
+
+
+def test_that_a_saved_index_can_be_loaded_and_remapped() -> None:
+    vectors = _make_vectors(500)
+
+    index = IVFIndex(IVFParameters(n_lists=10, n_probe=10, min_size=0))
+    index.train(vectors, np.arange(len(vectors)))
+
+    with tempfile.TemporaryDirectory() as dir:
+        path = Path(dir) / "ivf.npz"
+        index.save(path)
+
+        loaded_index = IVFIndex.load(path, index.parameters)
+
+    # Drop the first row, shifting all the others up by one
+    compacted_vectors = vectors[1:]
+    missing_rows = loaded_index.remap(np.arange(1, len(vectors)))
+
+    assert len(missing_rows) == 0
+
+    rows, _ = loaded_index.search(compacted_vectors, vectors[10], 1)
+    assert list(rows) == [9]
@@ -78,6 +78,8 @@ async def tool_context(agent: Agent) -> ToolContext:
 def create_client(
     server: PluginServer,
     event_emitter_factory: EventEmitterFactory,
+    max_message_size: int = 16 * 1024 * 1024,
+    descriptor_ttl: float = 60,
 ) -> PluginClient:
     correlator = ContextualCorrelator()
     logger = StdoutLogger(correlator)
@@ -86,6 +88,8 @@ def create_client(
         event_emitter_factory=event_emitter_factory,
         logger=logger,
         correlator=correlator,
+        descriptor_ttl=descriptor_ttl,
+        max_message_size=max_message_size,
     )
 
 
@@ -677,7 +681,25 @@ async def test_that_a_plugin_calls_a_tool_with_an_annotated_union_param(
             assert result.data == 8
 
 
-async def test_that_a_plugin_tool_that_returns_a_huge_payload_raises_an_error(
+async def test_that_a_plugin_tool_can_return_a_payload_spanning_many_transport_chunks(
+    tool_context: ToolContext,
+    container: Container,
+) -> None:
+    @tool
+    async def huge_payload_tool(context: ToolContext) -> ToolResult:
+        await context.emit_message("Fetching everything...")
+        huge_payload = {f"key_{i}": "value" for i in range(100_000)}
+        return ToolResult({"size": len(huge_payload), "payload": huge_payload})
+
+    async with run_service_server([huge_payload_tool]) as server:
+        async with create_client(server, container[EventBufferFactory]) as client:
+            result = await client.call_tool(huge_payload_tool.tool.name, tool_context, arguments={})
+
+            assert result.data["size"] == 100_000
+            assert result.data["payload"]["key_99999"] == "value"
+
+
+async def test_that_a_plugin_tool_that_returns_a_payload_over_the_message_size_limit_raises_an_error(
     tool_context: ToolContext,
     container: Container,
 ) -> None:
@@ -687,11 +709,15 @@ async def test_that_a_plugin_tool_that_returns_a_huge_payload_raises_an_error(
         return ToolResult({"size": len(huge_payload), "payload": huge_payload})
 
     async with run_service_server([huge_payload_tool]) as server:
-        async with create_client(server, container[EventBufferFactory]) as client:
+        async with create_client(
+            server,
+            container[EventBufferFactory],
+            max_message_size=16 * 1024,
+        ) as client:
             with raises(ToolResultError) as exc:
                 await client.call_tool(huge_payload_tool.tool.name, tool_context, arguments={})
 
-            assert "Response exceeds 16KB limit" in str(exc.value)
+            assert "Message exceeds 16384 bytes limit" in str(exc.value)
 
 
 @pytest.mark.parametrize(
@@ -798,3 +824,85 @@ async def test_that_a_plugin_tool_can_return_utterances(
 
             assert utterances[0] in result.utterances
             assert utterances[1] in result.utterances
+
+
+async def test_that_a_plugin_client_validates_tool_calls_against_cached_tool_descriptors(
+    tool_context: ToolContext,
+    container: Container,
+) -> None:
+    descriptor_requests = 0
+
+    async def my_choice_provider() -> list[str]:
+        nonlocal descriptor_requests
+        descriptor_requests += 1
+        return ["a", "b"]
+
+    @tool
+    def my_tool(
+        context: ToolContext,
+        arg: Annotated[str, ToolParameterOptions(choice_provider=my_choice_provider)],
+    ) -> ToolResult:
+        return ToolResult(arg)
+
+    async with run_service_server([my_tool]) as server:
+        async with create_client(server, container[EventBufferFactory]) as client:
+            await client.list_tools()
+            assert descriptor_requests == 1
+
+            for arg in ["a", "b", "a"]:
+                result = await client.call_tool(
+                    my_tool.tool.name,
+                    tool_context,
+                    arguments={"arg": arg},
+                )
+                assert result.data == arg
+
+            with raises(ToolError):
+                await client.call_tool(my_tool.tool.name, tool_context, arguments={"arg": "c"})
+
+            assert descriptor_requests == 1
+
+
+async def test_that_a_plugin_client_raises_when_tool_descriptors_cannot_be_fetched_but_keeps_stale_ones_in_the_background(
+    tool_context: ToolContext,
+    container: Container,
+) -> None:
+    failing = True
+
+    async def my_choice_provider() -> list[str]:
+        if failing:
+            raise Exception("Choices are unavailable")
+        return ["a", "b"]
+
+    @tool
+    def my_tool(
+        context: ToolContext,
+        arg: Annotated[str, ToolParameterOptions(choice_provider=my_choice_provider)],
+    ) -> ToolResult:
+        return ToolResult(arg)
+
+    async with run_service_server([my_tool]) as server:
+        async with create_client(
+            server,
+            container[EventBufferFactory],
+            descriptor_ttl=0,
+        ) as client:
+            with raises(ToolError):
+                await client.list_tools()
+
+            failing = False
+            assert len(await client.list_tools()) == 1
+
+            failing = True
+
+            for _ in range(2):
+                # Expired descriptors are refreshed in the background, which fails
+                result = await client.call_tool(
+                    my_tool.tool.name,
+                    tool_context,
+                    arguments={"arg": "a"},
+                )
+                assert result.data == "a"
+
+                if task := client._descriptors_refresh_task:
+                    await task
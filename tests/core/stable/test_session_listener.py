@@ -0,0 +1,105 @@
+# Copyright 2025 Emcie Co Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import time
+from typing import AsyncIterator
+
+from pytest import fixture
+
+from Daneel.adapters.db.transient import TransientDocumentDatabase
+from Daneel.core.agents import AgentId
+from Daneel.core.async_utils import Timeout
+from Daneel.core.customers import CustomerId
+from Daneel.core.sessions import (
+    EventKind,
+    EventSource,
+    NotifyingSessionListener,
+    Session,
+    SessionDocumentStore,
+)
+
+
+@fixture
+async def session_store() -> AsyncIterator[SessionDocumentStore]:
+    async with SessionDocumentStore(TransientDocumentDatabase()) as store:
+        yield store
+
+
+@fixture
+async def session(session_store: SessionDocumentStore) -> Session:
+    return await session_store.create_session(
+        customer_id=CustomerId("test_customer"),
+        agent_id=AgentId("test_agent"),
+    )
+
+
+async def create_status_event(session_store: SessionDocumentStore, session: Session) -> None:
+    await session_store.create_event(
+        session_id=session.id,
+        source=EventSource.AI_AGENT,
+        kind=EventKind.STATUS,
+        correlation_id="test_correlation_id",
+        data={"status": "ready"},
+    )
+
+
+async def test_that_notifying_listener_wakes_up_as_soon_as_a_matching_event_is_created(
+    session_store: SessionDocumentStore,
+    session: Session,
+) -> None:
+    listener = NotifyingSessionListener(session_store)
+
+    async def create_event_later() -> None:
+        await asyncio.sleep(0.05)
+        await create_status_event(session_store, session)
+
+    start = time.perf_counter()
+
+    results = await asyncio.gather(
+        listener.wait_for_events(session.id, kinds=[EventKind.STATUS], timeout=Timeout(5)),
+        create_event_later(),
+    )
+
+    assert results[0] is True
+    assert time.perf_counter() - start < 0.5
+
+
+async def test_that_notifying_listener_ignores_events_that_do_not_match(
+    session_store: SessionDocumentStore,
+    session: Session,
+) -> None:
+    listener = NotifyingSessionListener(session_store)
+
+    async def create_event_later() -> None:
+        await asyncio.sleep(0.05)
+        await create_status_event(session_store, session)
+
+    results = await asyncio.gather(
+        listener.wait_for_events(session.id, kinds=[EventKind.MESSAGE], timeout=Timeout(0.3)),
+        create_event_later(),
+    )
+
+    assert results[0] is False
+
+
+async def test_that_notifying_listener_returns_immediately_for_existing_events(
+    session_store: SessionDocumentStore,
+    session: Session,
+) -> None:
+    listener = NotifyingSessionListener(session_store)
+
+    await create_status_event(session_store, session)
+
+    assert await listener.wait_for_events(session.id, timeout=Timeout.none())